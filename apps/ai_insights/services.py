@@ -8,121 +8,98 @@ from django.utils import timezone
 from django.db.models import Sum, Count, Q, Avg
 from django.contrib.auth import get_user_model
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    openai = None
-
+from apps.core.llm_gateway import ChatCompletionMixin
+from apps.core.prompt_budget import PromptSection
 from apps.renewals.models import RenewalCase
 from apps.customer_payments.models import CustomerPayment
 from apps.campaigns.models import Campaign
 from apps.customers.models import Customer
 from apps.policies.models import Policy
+from .snapshot import get_snapshot_section
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
-class AIService:
-    
-    def __init__(self):
-        self.openai_client = None
-        self._initialize_openai()
-    
-    def _initialize_openai(self):
-        if not OPENAI_AVAILABLE:
-            logger.warning("OpenAI library not available")
-            return False
-        
-        api_key = getattr(settings, 'OPENAI_API_KEY', '')
-        if not api_key:
-            logger.warning("OpenAI API key not configured")
-            return False
-        
-        try:
-            self.openai_client = openai.OpenAI(api_key=api_key)
-            logger.info("OpenAI client initialized successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {str(e)}")
-            return False
-    
-    def is_available(self) -> bool:
-        return (
-            OPENAI_AVAILABLE and 
-            self.openai_client is not None and 
-            bool(getattr(settings, 'OPENAI_API_KEY', ''))
-        )
-    
+class AIService(ChatCompletionMixin):
+    COMPLETION_PARAMS = {'max_tokens': 1000, 'temperature': 0.7, 'top_p': 1, 'frequency_penalty': 0, 'presence_penalty': 0}
+    CACHE_NAMESPACE = 'ai_insights'
+
+    SNAPSHOT_QUERY_TYPES = (
+        'customer_churn', 'renewal_performance', 'payment_analysis', 'campaign_performance',
+        'customer_insights', 'process_optimization', 'predictive_insights',
+    )
+
     def get_dashboard_data(self) -> Dict[str, Any]:
+        return dict(get_snapshot_section('ai_insights').get('dashboard') or {})
+
+    def build_portfolio_section(self) -> Dict[str, Any]:
+        """Global context for the portfolio snapshot; user- and message-specific data stay per request."""
+        return {
+            'dashboard': self._compute_dashboard_data(),
+            'specialized': {
+                query_type: self._fetch_specialized_data(query_type)
+                for query_type in self.SNAPSHOT_QUERY_TYPES
+            },
+        }
+
+    def _compute_dashboard_data(self) -> Dict[str, Any]:
         try:
-            renewal_cases = RenewalCase.objects.filter(is_deleted=False)
-            
-            renewal_stats = {
-                'total_cases': renewal_cases.count(),
-                'in_progress': renewal_cases.filter(status='in_progress').count(),
-                'renewed': renewal_cases.filter(status='renewed').count(),
-                'pending_action': renewal_cases.filter(status='pending_action').count(),
-                'failed': renewal_cases.filter(status='failed').count(),
-                'total_renewal_amount': float(renewal_cases.aggregate(
-                    total=Sum('renewal_amount')
-                )['total'] or 0),
-            }
-            
-            payments = CustomerPayment.objects.filter(is_deleted=False)
-            payment_stats = {
-                'total_payments': payments.count(),
-                'completed_payments': payments.filter(payment_status='completed').count(),
-                'pending_payments': payments.filter(payment_status='pending').count(),
-                'failed_payments': payments.filter(payment_status='failed').count(),
-                'total_collected': float(payments.filter(
-                    payment_status='completed'
-                ).aggregate(total=Sum('payment_amount'))['total'] or 0),
-            }
-            
-            campaigns = Campaign.objects.filter(is_deleted=False)
-            campaign_stats = {
-                'total_campaigns': campaigns.count(),
-                'active_campaigns': campaigns.filter(status='active').count(),
-                'completed_campaigns': campaigns.filter(status='completed').count(),
-                'scheduled_campaigns': campaigns.filter(status='scheduled').count(),
-            }
-            
-            customers = Customer.objects.filter(is_deleted=False)
-            customer_stats = {
-                'total_customers': customers.count(),
-                'active_customers': customers.filter(status='active').count(),
-                'verified_customers': customers.filter(
-                    Q(email_verified=True) | Q(phone_verified=True) | Q(pan_verified=True)
-                ).count(),
-            }
-            
-            policies = Policy.objects.filter(is_deleted=False)
-            policy_stats = {
-                'total_policies': policies.count(),
-                'active_policies': policies.filter(status='active').count(),
-                'expired_policies': policies.filter(status='expired').count(),
-                'renewed_policies': policies.filter(status='renewed').count(),
-            }
-            
             from datetime import datetime, timedelta
             today = datetime.now().date()
-            
+            thirty_days_ago = timezone.now() - timedelta(days=30)
+
+            renewal_stats = RenewalCase.objects.filter(is_deleted=False).aggregate(
+                total_cases=Count('id'),
+                in_progress=Count('id', filter=Q(status='in_progress')),
+                renewed=Count('id', filter=Q(status='renewed')),
+                pending_action=Count('id', filter=Q(status='pending_action')),
+                failed=Count('id', filter=Q(status='failed')),
+                total_renewal_amount=Sum('renewal_amount'),
+                recent_renewals_count=Count('id', filter=Q(status='renewed', created_at__gte=thirty_days_ago)),
+            )
+            recent_renewals_count = renewal_stats.pop('recent_renewals_count')
+            renewal_stats['total_renewal_amount'] = float(renewal_stats['total_renewal_amount'] or 0)
+
+            payment_stats = CustomerPayment.objects.filter(is_deleted=False).aggregate(
+                total_payments=Count('id'),
+                completed_payments=Count('id', filter=Q(payment_status='completed')),
+                pending_payments=Count('id', filter=Q(payment_status='pending')),
+                failed_payments=Count('id', filter=Q(payment_status='failed')),
+                total_collected=Sum('payment_amount', filter=Q(payment_status='completed')),
+            )
+            payment_stats['total_collected'] = float(payment_stats['total_collected'] or 0)
+
+            campaign_stats = Campaign.objects.filter(is_deleted=False).aggregate(
+                total_campaigns=Count('id'),
+                active_campaigns=Count('id', filter=Q(status='active')),
+                completed_campaigns=Count('id', filter=Q(status='completed')),
+                scheduled_campaigns=Count('id', filter=Q(status='scheduled')),
+            )
+
+            customer_stats = Customer.objects.filter(is_deleted=False).aggregate(
+                total_customers=Count('id'),
+                active_customers=Count('id', filter=Q(status='active')),
+                verified_customers=Count(
+                    'id', filter=Q(email_verified=True) | Q(phone_verified=True) | Q(pan_verified=True)
+                ),
+            )
+
+            policies = Policy.objects.filter(is_deleted=False)
+            policy_stats = policies.aggregate(
+                total_policies=Count('id'),
+                active_policies=Count('id', filter=Q(status='active')),
+                expired_policies=Count('id', filter=Q(status='expired')),
+                renewed_policies=Count('id', filter=Q(status='renewed')),
+            )
+
             expiring_soon = policies.filter(
                 end_date__gte=today,
                 end_date__lte=today + timedelta(days=30),
                 status='active'
             ).select_related('customer', 'policy_type')
-            
-            recent_renewals = RenewalCase.objects.filter(
-                is_deleted=False,
-                status='renewed',
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).select_related('policy', 'customer')
-            
+
             sample_policies = policies.filter(status='active')[:5].select_related('customer', 'policy_type')
-            
+
             detailed_policy_info = []
             for policy in sample_policies:
                 detailed_policy_info.append({
@@ -137,7 +114,7 @@ class AIService:
                     'status': policy.status,
                     'payment_frequency': policy.payment_frequency,
                 })
-            
+
             expiring_policies_info = []
             for policy in expiring_soon:
                 days_until_expiry = (policy.end_date - today).days
@@ -148,7 +125,7 @@ class AIService:
                     'days_until_expiry': days_until_expiry,
                     'premium_amount': float(policy.premium_amount) if policy.premium_amount else 0,
                 })
-            
+
             return {
                 'renewal_cases': renewal_stats,
                 'payments': payment_stats,
@@ -157,78 +134,32 @@ class AIService:
                 'policies': policy_stats,
                 'detailed_policies': detailed_policy_info,
                 'expiring_soon': expiring_policies_info,
-                'recent_renewals_count': recent_renewals.count(),
+                'recent_renewals_count': recent_renewals_count,
                 'timestamp': timezone.now().isoformat(),
             }
-            
+
         except Exception as e:
             logger.error(f"Error fetching dashboard data: {str(e)}")
             return {}
-    
-    def generate_ai_response(self, user_message: str, context_data: Dict[str, Any] = None, user=None, conversation_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
-        if not self.is_available():
-            return {
-                'success': False,
-                'error': 'AI service not available',
-                'message': 'OpenAI API key not configured or service unavailable'
-            }
+
+    def _build_messages(self, user_message: str, user=None, conversation_history: List[Dict[str, Any]] = None):
+        query_type = self._classify_query(user_message)
+     
+        dashboard_data = self.get_dashboard_data()
+        specialized_data = self._get_specialized_data(query_type, user_message)
+        dashboard_data.update(specialized_data)
         
-        try:
-            query_type = self._classify_query(user_message)
-         
-            dashboard_data = self.get_dashboard_data()
-            specialized_data = self._get_specialized_data(query_type, user_message)
-            dashboard_data.update(specialized_data)
-            
-            if user:
-                user_specific_data = self._get_user_specific_data(user)
-                dashboard_data['user_specific'] = user_specific_data
-            
-            system_prompt = self._create_system_prompt(dashboard_data, user, query_type)
-            
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            if conversation_history:
-                for msg in conversation_history:
-                    messages.append({
-                        "role": msg['role'],
-                        "content": msg['content']
-                    })
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            response = self.openai_client.chat.completions.create(
-                model=getattr(settings, 'OPENAI_MODEL', 'gpt-4'),
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
-            
-            ai_response = response.choices[0].message.content
-            
-            return {
-                'success': True,
-                'response': ai_response,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                } if response.usage else None,
-                'model': response.model,
-                'timestamp': timezone.now().isoformat()
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generating AI response: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'message': 'Failed to generate AI response'
-            }
-    
+        if user:
+            user_specific_data = self._get_user_specific_data(user)
+            dashboard_data['user_specific'] = user_specific_data
+        
+        system_prompt = self._create_system_prompt(dashboard_data, user, query_type)
+        return self._budget_messages(system_prompt, conversation_history, user_message)
+
+    def _cache_scope(self, user_message: str, user=None) -> Optional[Tuple[str, str]]:
+        # The prompt carries the asking user's own policies, so answers are per user.
+        return self._classify_query(user_message), f"user:{user.pk}" if user else 'global'
+
     def _get_user_specific_data(self, user) -> Dict[str, Any]:
         try:
             from apps.customers.models import Customer
@@ -399,7 +330,7 @@ class AIService:
                 'active_policies': 0,
             }
     
-    def _create_system_prompt(self, dashboard_data: Dict[str, Any], user=None, query_type: str = 'general') -> str:
+    def _create_system_prompt(self, dashboard_data: Dict[str, Any], user=None, query_type: str = 'general') -> List[PromptSection]:
         
         detailed_policies = dashboard_data.get('detailed_policies', [])
         expiring_policies = dashboard_data.get('expiring_soon', [])
@@ -485,11 +416,12 @@ class AIService:
         
         specialized_context = self._build_specialized_context(dashboard_data, query_type)
         
-        return f"""
+        intro = """
 You are an AI assistant for Renew-IQ, an insurance policy renewal management system. 
 You help users analyze their renewal portfolio, optimize processes, and provide data-driven insights.
+"""
 
-{user_info_text}
+        system_data = f"""
 
 CURRENT SYSTEM DATA:
 - Total Renewal Cases: {dashboard_data.get('renewal_cases', {}).get('total_cases', 0)}
@@ -513,10 +445,9 @@ CURRENT SYSTEM DATA:
 - Total Policies: {dashboard_data.get('policies', {}).get('total_policies', 0)}
 - Active Policies: {dashboard_data.get('policies', {}).get('active_policies', 0)}
 - Recent Renewals (30 days): {dashboard_data.get('recent_renewals_count', 0)}
+"""
 
-{policy_details_text}{expiring_text}
-
-{specialized_context}
+        instructions = """
 
 CRITICAL INSTRUCTIONS:
 1. ALWAYS provide specific, data-driven insights based on the actual data provided above
@@ -539,6 +470,18 @@ RESPONSE FORMAT:
 - Include actionable next steps
 - Use data to support all claims and recommendations
 """
+
+        # Sections keep this order in the prompt; when it is over budget the highest
+        # priority numbers are trimmed first.
+        return [
+            PromptSection('intro', intro, required=True),
+            PromptSection('user_info', user_info_text, priority=20),
+            PromptSection('system_data', system_data, required=True),
+            PromptSection('policy_details', policy_details_text, priority=40),
+            PromptSection('expiring_soon', expiring_text, priority=30),
+            PromptSection('specialized', f"\n\n{specialized_context}\n", priority=10),
+            PromptSection('instructions', instructions, required=True),
+        ]
     
     def _build_specialized_context(self, dashboard_data: Dict[str, Any], query_type: str) -> str:
         """Build specialized context based on query type"""
@@ -946,6 +889,12 @@ RESPONSE FORMAT:
             return 'general'
 
     def _get_specialized_data(self, query_type: str, user_message: str) -> Dict[str, Any]:
+        specialized = get_snapshot_section('ai_insights').get('specialized') or {}
+        if query_type in specialized:
+            return dict(specialized[query_type])
+        return self._fetch_specialized_data(query_type)
+
+    def _fetch_specialized_data(self, query_type: str) -> Dict[str, Any]:
         try:
             if query_type == 'customer_churn':
                 return self._get_churn_analysis_data()
@@ -1406,7 +1355,10 @@ RESPONSE FORMAT:
                 end_date__lte=today + timedelta(days=90)
             ).values('policy_type__name').annotate(
                 count=Count('id'),
-                total_premium=Sum('premium_amount')
+                total_premium=Sum('premium_amount'),
+                avg_renewal_likelihood=Avg('renewal_likelihood'),
+                at_risk_count=Count('id', filter=Q(renewal_likelihood__lt=0.4)),
+                at_risk_premium=Sum('premium_amount', filter=Q(renewal_likelihood__lt=0.4))
             )
             
             historical_renewals = RenewalCase.objects.filter(
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_KEY = 'ai_insights:portfolio_snapshot:version'
+SNAPSHOT_KEY = 'ai_insights:portfolio_snapshot:{version}'
+
+# section name -> getter returning the service that builds it
+SNAPSHOT_SECTIONS = {
+    'ai_insights': 'apps.ai_insights.services.get_ai_service',
+    'upload_chatbot': 'apps.upload_chatbot.services.get_upload_chatbot_service',
+    'case_tracking': 'apps.case_tracking_chatbot.services.get_case_tracking_chatbot_service',
+}
+
+_local_snapshot: Optional[Dict[str, Any]] = None
+_refresh_lock = threading.Lock()
+
+
+def _jsonable(value):
+    """Aggregates return Decimals, dates and timedeltas; keep the snapshot JSON-safe for Redis."""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    return value
+
+
+def compute_portfolio_snapshot() -> Dict[str, Any]:
+    started = time.monotonic()
+    sections = {}
+    for name, getter_path in SNAPSHOT_SECTIONS.items():
+        try:
+            sections[name] = _jsonable(import_string(getter_path)().build_portfolio_section())
+        except Exception as e:
+            logger.error(f"Error building portfolio snapshot section {name}: {str(e)}")
+            sections[name] = {}
+
+    computed_at = timezone.now()
+    snapshot = {
+        'version': int(computed_at.timestamp() * 1000),
+        'computed_at': computed_at.isoformat(),
+        'sections': sections,
+    }
+    logger.info(f"Portfolio snapshot {snapshot['version']} computed in {time.monotonic() - started:.2f}s")
+    return snapshot
+
+
+def refresh_portfolio_snapshot() -> Dict[str, Any]:
+    """
+    Compute a new snapshot and publish it under a fresh version. The version key is
+    written last so readers never see a version whose payload is missing.
+    """
+    global _local_snapshot
+    snapshot = compute_portfolio_snapshot()
+    timeout = getattr(settings, 'PORTFOLIO_SNAPSHOT_TTL', 900)
+    cache.set(SNAPSHOT_KEY.format(version=snapshot['version']), snapshot, timeout)
+    cache.set(SNAPSHOT_VERSION_KEY, snapshot['version'], timeout)
+    _local_snapshot = snapshot
+    return snapshot
+
+
+def _is_fresh(snapshot: Optional[Dict[str, Any]]) -> bool:
+    if not snapshot:
+        return False
+    age_ms = timezone.now().timestamp() * 1000 - snapshot['version']
+    return age_ms < getattr(settings, 'PORTFOLIO_SNAPSHOT_TTL', 900) * 1000
+
+
+def get_portfolio_snapshot() -> Dict[str, Any]:
+    """
+    Current snapshot: the in-process copy when it matches the published version,
+    otherwise the cached payload, and only as a last resort an inline computation.
+    """
+    global _local_snapshot
+    version = cache.get(SNAPSHOT_VERSION_KEY)
+    if version is not None:
+        if _local_snapshot and _local_snapshot['version'] == version:
+            return _local_snapshot
+        snapshot = cache.get(SNAPSHOT_KEY.format(version=version))
+        if snapshot:
+            _local_snapshot = snapshot
+            return snapshot
+
+    if _is_fresh(_local_snapshot):
+        return _local_snapshot
+
+    with _refresh_lock:
+        if _is_fresh(_local_snapshot):
+            return _local_snapshot
+        return refresh_portfolio_snapshot()
+
+
+def get_snapshot_section(name: str) -> Dict[str, Any]:
+    return get_portfolio_snapshot()['sections'].get(name) or {}
+
+
+def get_snapshot_version() -> int:
+    return get_portfolio_snapshot()['version']
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .snapshot import refresh_portfolio_snapshot
+
+
+@shared_task
+def refresh_portfolio_snapshot_task():
+    snapshot = refresh_portfolio_snapshot()
+    return {'version': snapshot['version'], 'computed_at': snapshot['computed_at']}
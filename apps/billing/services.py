@@ -60,4 +60,71 @@ def log_communication(
     
     usage_charge.count += 1
     usage_charge.rate_per_unit = new_total_cost / usage_charge.count
-    usage_charge.save()
\ No newline at end of file
+    usage_charge.save()
+
+def log_communications_bulk(vendor_name, service_type, entries):
+    """
+    Batch variant of log_communication. Each entry is a dict with the same keys as
+    log_communication's arguments, plus optional customer_id / case_id.
+    """
+    if not entries:
+        return []
+
+    from apps.customers.models import Customer
+
+    vendor, _ = Vendor.objects.get_or_create(
+        name=vendor_name,
+        defaults={
+            'service_type': service_type,
+            'contact_name': 'System',
+            'contact_email': 'admin@system.com',
+            'cost_per_message': 0.00
+        }
+    )
+
+    customer_ids = {e['customer_id'] for e in entries if e.get('customer_id') and not e.get('customer')}
+    customers = Customer.objects.in_bulk(customer_ids) if customer_ids else {}
+
+    now = timezone.now()
+    logs = []
+    total_cost = Decimal('0')
+    for entry in entries:
+        customer = entry.get('customer') or customers.get(entry.get('customer_id'))
+        cost = entry.get('cost')
+        final_cost = Decimal(str(cost)) if cost is not None else vendor.cost_per_message
+        total_cost += final_cost
+        logs.append(CommunicationLog(
+            vendor=vendor,
+            customer=customer,
+            case_id=entry['case'].pk if entry.get('case') else entry.get('case_id'),
+            type=service_type,
+            status=entry.get('status', 'pending'),
+            cost=final_cost,
+            error_message=(entry.get('error_message') or '')[:255] or None,
+            timestamp=now,
+            message_snippet=entry.get('message_snippet') or f"Sent via {vendor_name}",
+            customer_name=customer.full_name if customer else "Unknown",
+            provider_message_id=entry.get('provider_message_id')
+        ))
+    CommunicationLog.objects.bulk_create(logs, batch_size=500)
+
+    today = now.date()
+    period, _ = BillingPeriod.objects.get_or_create(
+        month=today.month,
+        year=today.year,
+        defaults={'is_active': True}
+    )
+    usage_charge, _ = UsageCharge.objects.get_or_create(
+        period=period,
+        service_name=service_type,
+        defaults={
+            'rate_per_unit': 0.00,
+            'count': 0
+        }
+    )
+    current_total_cost = usage_charge.count * usage_charge.rate_per_unit
+    usage_charge.count += len(logs)
+    usage_charge.rate_per_unit = (current_total_cost + total_cost) / usage_charge.count
+    usage_charge.save()
+
+    return logs
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Campaign, SequenceStep, CampaignLog, PendingTask
+from .models import Campaign, SequenceStep, CampaignLog, PendingTask, ScheduledStep
 
 @admin.register(Campaign)
 class CampaignAdmin(admin.ModelAdmin):
@@ -22,4 +22,10 @@ class CampaignLogAdmin(admin.ModelAdmin):
 @admin.register(PendingTask)
 class PendingTaskAdmin(admin.ModelAdmin):
     list_display = ('task_id', 'campaign', 'contact', 'step', 'scheduled_for')
-    search_fields = ('task_id', 'campaign__name')
\ No newline at end of file
+    search_fields = ('task_id', 'campaign__name')
+
+@admin.register(ScheduledStep)
+class ScheduledStepAdmin(admin.ModelAdmin):
+    list_display = ('campaign', 'step', 'contact', 'due_at')
+    list_filter = ('step__channel',)
+    search_fields = ('campaign__name', 'contact__email')
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.17 on 2026-10-18 20:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_pending_tasks(apps, schema_editor):
+    PendingTask = apps.get_model('campaign_manager', 'PendingTask')
+    ScheduledStep = apps.get_model('campaign_manager', 'ScheduledStep')
+    ScheduledStep.objects.bulk_create(
+        [
+            ScheduledStep(campaign_id=t.campaign_id, contact_id=t.contact_id, step_id=t.step_id, due_at=t.scheduled_for)
+            for t in PendingTask.objects.all().iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audience_manager', '0003_audiencecontact_expiry_date'),
+        ('campaign_manager', '0004_campaign_email_provider_campaign_sms_provider_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cm_scheduled_steps', to='campaign_manager.campaign')),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cm_scheduled_steps', to='audience_manager.audiencecontact')),
+                ('step', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cm_scheduled_steps', to='campaign_manager.sequencestep')),
+            ],
+            options={
+                'verbose_name': 'Campaign Manager Scheduled Step',
+                'verbose_name_plural': 'Campaign Manager Scheduled Steps',
+                'ordering': ['due_at'],
+                'indexes': [models.Index(fields=['due_at'], name='cm_sched_step_due_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='scheduledstep',
+            constraint=models.UniqueConstraint(fields=('campaign', 'contact', 'step'), name='cm_scheduled_step_unique'),
+        ),
+        migrations.RunPython(copy_pending_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaign_manager', '0005_scheduledstep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledstep',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledstep',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
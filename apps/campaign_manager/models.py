@@ -156,4 +156,32 @@ class PendingTask(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Task {self.task_id} for {self.campaign.name} - Step {self.step.step_order}"
\ No newline at end of file
+        return f"Task {self.task_id} for {self.campaign.name} - Step {self.step.step_order}"
+class ScheduledStep(models.Model):
+    """
+    Durable due-steps table for sequence delivery. One row per contact waiting on a step;
+    the dispatcher claims rows whose due_at has passed while the campaign is active by
+    stamping a lease (claim_token, claimed_until), and deletes each row once its send is
+    recorded. Rows whose lease ran out without being recorded are claimed again.
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="cm_scheduled_steps")
+    contact = models.ForeignKey(AudienceContact, on_delete=models.CASCADE, related_name="cm_scheduled_steps")
+    step = models.ForeignKey(SequenceStep, on_delete=models.CASCADE, related_name="cm_scheduled_steps")
+    due_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_until = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['due_at']
+        verbose_name = "Campaign Manager Scheduled Step"
+        verbose_name_plural = "Campaign Manager Scheduled Steps"
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'contact', 'step'], name='cm_scheduled_step_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['due_at'], name='cm_sched_step_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign.name} - Step {self.step.step_order} for {self.contact_id} at {self.due_at}"
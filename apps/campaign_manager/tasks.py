@@ -1,7 +1,13 @@
+import logging
+import uuid
+from collections import defaultdict
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta 
-from .models import Campaign, SequenceStep, CampaignLog, PendingTask 
+from .models import Campaign, SequenceStep, CampaignLog, PendingTask, ScheduledStep
 from apps.email_provider.services import EmailProviderService
 from apps.email_provider.models import EmailProviderConfig
 from apps.audience_manager.models import AudienceContact
@@ -10,6 +16,8 @@ from apps.whatsapp_provider.models import WhatsAppMessageTemplate, WhatsAppProvi
 from apps.sms_provider.services import SmsService, SmsApiException
 import time
 
+logger = logging.getLogger(__name__)
+
 @shared_task(name="check_scheduled_campaigns")
 def check_scheduled_campaigns():
     now = timezone.now()
@@ -54,208 +62,262 @@ def process_campaign(campaign_id):
         campaign.save()
         return "Campaign has no steps. Marking complete."
 
-    print(f"--- CELERY: Found {contacts.count()} contacts. Starting sequence... ---")
-    for contact in contacts:
-        schedule_step_for_contact.apply_async(
-            args=[campaign.id, first_step.id, contact.id],
-            countdown=5 
-        )
+    due_at = timezone.now() + timedelta(seconds=getattr(settings, 'CAMPAIGN_PROCESSING_DELAY', 5))
+    batch_size = getattr(settings, 'DEFAULT_CAMPAIGN_BATCH_SIZE', 100) * 10
+    scheduled = 0
+    batch = []
+    for contact_id in contacts.values_list('id', flat=True).iterator(chunk_size=batch_size):
+        batch.append(ScheduledStep(campaign=campaign, contact_id=contact_id, step=first_step, due_at=due_at))
+        if len(batch) >= batch_size:
+            scheduled += len(ScheduledStep.objects.bulk_create(batch, ignore_conflicts=True))
+            batch = []
+    if batch:
+        scheduled += len(ScheduledStep.objects.bulk_create(batch, ignore_conflicts=True))
+
+    logger.info(f"Campaign {campaign_id}: scheduled step 1 for {scheduled} contacts")
     return f"Campaign {campaign_id} started."
 
 
-@shared_task
-def resume_paused_campaign(campaign_id):
-    print(f"--- CELERY: Resuming paused campaign_id: {campaign_id} ---")
-    tasks_to_resume = PendingTask.objects.filter(campaign_id=campaign_id)
-    
-    if not tasks_to_resume.exists():
-        return "No pending tasks found to resume."
+def _step_delay(step):
+    delay_in_seconds = (
+        (step.delay_minutes * 60) +
+        (step.delay_hours * 3600) +
+        (step.delay_days * 86400) +
+        (step.delay_weeks * 604800)
+    )
+    return timedelta(seconds=delay_in_seconds or 5)
 
-    now = timezone.now()
-    resumed_count = 0
-    
-    for task in tasks_to_resume:
-        delay_seconds = 0
-        if task.scheduled_for > now:
-            delay_seconds = (task.scheduled_for - now).total_seconds()
-        
-        schedule_step_for_contact.apply_async(
-            args=[task.campaign_id, task.step_id, task.contact_id],
-            countdown=delay_seconds
-        )
-        resumed_count += 1
-    tasks_to_resume.delete()
-    return f"Resumed {resumed_count} tasks for campaign {campaign_id}."
 
-@shared_task(bind=True)
-def schedule_step_for_contact(self, campaign_id, step_id, contact_id):
-    PendingTask.objects.filter(task_id=self.request.id).delete()
-    
-    try:
-        step = SequenceStep.objects.get(id=step_id)
-        contact = AudienceContact.objects.get(id=contact_id)
-        campaign = Campaign.objects.get(id=campaign_id)
-    except Exception as e:
-        return f"Could not find models: {e}"
-
-    if campaign.status == Campaign.CampaignStatus.PAUSED:
-        print(f"--- CELERY: Campaign is PAUSED. Re-queueing task. ---")
-        PendingTask.objects.get_or_create(
-            task_id=self.request.id,
-            defaults={
-                'campaign': campaign,
-                'contact': contact,
-                'step': step,
-                'scheduled_for': timezone.now() 
-            }
-        )
-        return "Campaign paused. Task stored."
-    
-    if campaign.status == Campaign.CampaignStatus.COMPLETED:
-        return "Campaign is completed. Skipping."
-    if step.trigger_condition in ['no_response', 'no_action']:
-        has_interacted = CampaignLog.objects.filter(
-            campaign=campaign,
-            contact=contact,
-            status__in=[
-                CampaignLog.LogStatus.REPLIED, 
-                CampaignLog.LogStatus.CLICKED
-            ]
-        ).exists()
-        
-        if has_interacted:
-            print(f"--- CELERY: Skipping step {step.step_order} for {contact.id}: User has replied/clicked. ---")
-            return "Skipped: User interacted."
-    template = step.template
-    success = False
-    error_msg = None
-    message_id = None 
-
-    if step.channel == 'email' and campaign.enable_email:
-        if contact.email:
-            print(f"--- CELERY: Sending email for step {step.step_order} to {contact.email}... ---")
-            provider = getattr(campaign, 'email_provider', None)
-            
+class _StepSender:
+    """Sends one sequence step to many contacts, resolving providers and templates once per step."""
+
+    def __init__(self, campaign, step):
+        self.campaign = campaign
+        self.step = step
+        self.template = step.template
+        self._email_service = None
+        self._email_provider = None
+        self._whatsapp = None
+
+    def send(self, contact):
+        """Returns (success, error_msg, message_id) for a single contact."""
+        if self.step.channel == 'email' and self.campaign.enable_email:
+            if not contact.email:
+                return False, "Contact has no email.", None
+            return self._send_email(contact)
+
+        if self.step.channel == 'sms' and self.campaign.enable_sms:
+            if not contact.phone:
+                return False, "Contact has no phone number.", None
+            return True, "SMS sending not implemented", None
+
+        if self.step.channel == 'whatsapp' and self.campaign.enable_whatsapp:
+            if not contact.phone:
+                return False, "Contact has no phone number.", None
+            return self._send_whatsapp(contact)
+
+        return False, None, None
+
+    def _send_email(self, contact):
+        if self._email_service is None:
+            provider = self.campaign.email_provider
             if not provider:
                 provider = EmailProviderConfig.objects.filter(is_default=True, is_active=True).first()
-            if provider:
-                try:
-                    email_service = EmailProviderService(config=provider)
-                    
-                    rendered_content = template.content 
-                    
-                    result = email_service.send_email(
-                        to_emails=[contact.email],
-                        subject=template.subject,
-                        html_content=rendered_content,
-                        from_email=provider.from_email
-                    )
-                    
-                    success = result.get('success', False)
-                    if success:
-                        message_id = result.get('message_id', 'sent_via_api')
-                    else:
-                        error_msg = result.get('error', 'Unknown Error')
-                        
-                except Exception as e:
-                    print(f"🔥 EXCEPTION during send: {e}")
-                    success = False
-                    error_msg = str(e)
-            else:
-                error_msg = "No active default provider found."
-            
-        else:
-            error_msg = "Contact has no email."
-    
-    elif step.channel == 'sms' and campaign.enable_sms:
-        if contact.phone:
-            body = template.content 
-            print(f"--- CELERY: Sending SMS for step {step.step_order} to {contact.phone}... ---")
-            success, error_msg, message_id = (True, "SMS sending not implemented", None) 
-        else:
-            error_msg = "Contact has no phone number."
-
-    elif step.channel == 'whatsapp' and campaign.enable_whatsapp:
-        if contact.phone:
-            print(f"--- CELERY: Sending Twilio WhatsApp for step {step.step_order} to {contact.phone}... ---")
-            try:
-                service = WhatsAppService().get_service_instance()
+            if not provider:
+                return False, "No active default provider found.", None
+            self._email_provider = provider
+            self._email_service = EmailProviderService(config=provider)
+
+        try:
+            result = self._email_service.send_email(
+                to_emails=[contact.email],
+                subject=self.template.subject,
+                html_content=self.template.content,
+                from_email=self._email_provider.from_email
+            )
+        except Exception as e:
+            logger.error(f"Email send failed for contact {contact.id}: {e}")
+            return False, str(e), None
 
+        if result.get('success', False):
+            return True, None, result.get('message_id', 'sent_via_api')
+        return False, result.get('error', 'Unknown Error'), None
+
+    def _send_whatsapp(self, contact):
+        try:
+            if self._whatsapp is None:
+                service = WhatsAppService().get_service_instance()
                 provider_template = WhatsAppMessageTemplate.objects.get(
-                    name=template.name,
+                    name=self.template.name,
                     provider=service.provider,
                     status='approved'
                 )
-                variable_names = template.variables
-                custom_params = []
-                for var_name in variable_names:
-                    value = getattr(contact, var_name, '')
-                    custom_params.append(str(value))
-
-                response = service.send_template_message(
-                    to_phone=contact.phone,
-                    template=provider_template,
-                    template_params=custom_params,
-                    campaign=campaign,
-                    customer=None 
-                )
-                success = True
-                message_id = response['messages'][0]['id']
-
-            except WhatsAppProvider.DoesNotExist as e:
-                success = False
-                error_msg = f"No active/default WhatsApp provider configured: {e}"
-            except WhatsAppMessageTemplate.DoesNotExist:
-                success = False
-                error_msg = f"No approved template named '{template.name}' found for the default provider."
-            except WhatsAppAPIError as e:
-                success = False
-                error_msg = str(e)
-            except Exception as e:
-                success = False
-                error_msg = f"A general error occurred: {e}"
-        else:
-            error_msg = "Contact has no phone number."
-    CampaignLog.objects.create(
-        campaign=campaign,
-        step=step,
-        contact=contact,
-        status=CampaignLog.LogStatus.SENT if success else CampaignLog.LogStatus.FAILED,
-        sent_at=timezone.now(),
-        error_message=error_msg,
-        message_provider_id=message_id 
-    )
+                self._whatsapp = (service, provider_template)
+            service, provider_template = self._whatsapp
+
+            custom_params = [str(getattr(contact, var_name, '')) for var_name in self.template.variables]
+            response = service.send_template_message(
+                to_phone=contact.phone,
+                template=provider_template,
+                template_params=custom_params,
+                campaign=self.campaign,
+                customer=None 
+            )
+            return True, None, response['messages'][0]['id']
+        except WhatsAppProvider.DoesNotExist as e:
+            return False, f"No active/default WhatsApp provider configured: {e}", None
+        except WhatsAppMessageTemplate.DoesNotExist:
+            return False, f"No approved template named '{self.template.name}' found for the default provider.", None
+        except WhatsAppAPIError as e:
+            return False, str(e), None
+        except Exception as e:
+            return False, f"A general error occurred: {e}", None
+
+
+def _lease_until():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'SEQUENCE_DISPATCH_LEASE_SECONDS', 600))
 
-    next_step = campaign.cm_sequence_steps.filter(
-        step_order=step.step_order + 1
-    ).first()
 
-    if next_step and success: 
-        delay_in_seconds = (
-            (next_step.delay_minutes * 60) +
-            (next_step.delay_hours * 3600) +
-            (next_step.delay_days * 86400) +
-            (next_step.delay_weeks * 604800)
+def claim_due_steps(batch_size):
+    """
+    Lease up to `batch_size` due rows of active campaigns and commit the lease, so the
+    sends happen outside any transaction and concurrent dispatchers skip these rows
+    until the lease expires. Returns (claim_token, rows).
+    """
+    token = uuid.uuid4()
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            ScheduledStep.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+                due_at__lte=now,
+                campaign__status=Campaign.CampaignStatus.ACTIVE,
+                campaign__is_deleted=False,
+            )
+            .order_by('due_at')
+            .values_list('id', flat=True)[:batch_size]
         )
-        
-        if delay_in_seconds == 0:
-            delay_in_seconds = 5 
-            
-        scheduled_time = timezone.now() + timedelta(seconds=delay_in_seconds)
-        
-        print(f"--- CELERY: Scheduling next step ({next_step.step_order}) in {delay_in_seconds}s. ---")
-        task = schedule_step_for_contact.apply_async(
-            args=[campaign_id, next_step.id, contact_id],
-            countdown=delay_in_seconds
+        if not ids:
+            return token, []
+        ScheduledStep.objects.filter(id__in=ids).update(claim_token=token, claimed_until=_lease_until())
+    rows = list(
+        ScheduledStep.objects.filter(id__in=ids, claim_token=token)
+        .select_related('campaign', 'campaign__email_provider', 'step', 'step__template', 'contact')
+        .order_by('due_at')
+    )
+    return token, rows
+
+
+def _renew_lease(token):
+    ScheduledStep.objects.filter(claim_token=token).update(claimed_until=_lease_until())
+
+
+def _record_send(row, token, success, error_msg, message_id, next_step, next_due_at):
+    """Log one send, schedule the contact's next step and release the due row, in one short transaction."""
+    with transaction.atomic():
+        released, _ = ScheduledStep.objects.filter(pk=row.pk, claim_token=token).delete()
+        if not released:
+            logger.warning(
+                f"Sequence dispatcher lost the lease on step {row.step_id} for contact {row.contact_id} "
+                f"of campaign {row.campaign_id} after sending"
+            )
+        CampaignLog.objects.create(
+            campaign=row.campaign,
+            step=row.step,
+            contact=row.contact,
+            status=CampaignLog.LogStatus.SENT if success else CampaignLog.LogStatus.FAILED,
+            sent_at=timezone.now(),
+            error_message=error_msg,
+            message_provider_id=message_id
         )
-        PendingTask.objects.create(
-            task_id=task.id,
-            campaign=campaign,
-            contact=contact,
-            step=next_step,
-            scheduled_for=scheduled_time
+        if next_step and success:
+            ScheduledStep.objects.bulk_create(
+                [ScheduledStep(campaign=row.campaign, contact=row.contact, step=next_step, due_at=next_due_at)],
+                ignore_conflicts=True
+            )
+
+
+def _process_due_steps(token, due_rows):
+    by_step = defaultdict(list)
+    for row in due_rows:
+        by_step[row.step_id].append(row)
+
+    now = timezone.now()
+    processed = 0
+    for rows in by_step.values():
+        campaign = rows[0].campaign
+        step = rows[0].step
+
+        interacted = set()
+        if step.trigger_condition in ['no_response', 'no_action']:
+            interacted = set(CampaignLog.objects.filter(
+                campaign=campaign,
+                contact_id__in=[row.contact_id for row in rows],
+                status__in=[
+                    CampaignLog.LogStatus.REPLIED, 
+                    CampaignLog.LogStatus.CLICKED
+                ]
+            ).values_list('contact_id', flat=True))
+        if interacted:
+            ScheduledStep.objects.filter(
+                claim_token=token, pk__in=[row.pk for row in rows if row.contact_id in interacted]
+            ).delete()
+
+        next_step = campaign.cm_sequence_steps.filter(step_order=step.step_order + 1).first()
+        next_due_at = now + _step_delay(next_step) if next_step else None
+        sender = _StepSender(campaign, step)
+
+        for row in rows:
+            if row.contact_id in interacted:
+                continue
+            _renew_lease(token)
+            success, error_msg, message_id = sender.send(row.contact)
+            _record_send(row, token, success, error_msg, message_id, next_step, next_due_at)
+            processed += 1
+
+        logger.info(
+            f"Step {step.step_order} of campaign {campaign.id}: {len(rows)} due, "
+            f"{len(interacted)} skipped after interaction"
         )
-        
-    elif not next_step:
-        print(f"--- CELERY: End of sequence for contact {contact.id}. ---")
-    return "Step completed."
\ No newline at end of file
+    return processed
+
+
+@shared_task
+def dispatch_due_sequence_steps(batch_size=None, max_batches=20):
+    """
+    Beat-driven dispatcher: leases due sequence steps in batches and sends them grouped
+    by step. Each send is recorded (log, next step, row deleted) in its own transaction
+    right after it completes, so a failure later in the batch or a dead worker only
+    re-sends the rows whose sends were never recorded.
+    """
+    batch_size = batch_size or getattr(settings, 'SEQUENCE_DISPATCH_BATCH_SIZE', 200)
+    total_sent = 0
+    started = time.monotonic()
+
+    for _ in range(max_batches):
+        token, due_rows = claim_due_steps(batch_size)
+        if not due_rows:
+            break
+        total_sent += _process_due_steps(token, due_rows)
+
+    if total_sent:
+        logger.info(f"Sequence dispatcher: {total_sent} steps processed in {time.monotonic() - started:.2f}s")
+    return f"Processed {total_sent} due steps."
+
+
+@shared_task(bind=True)
+def schedule_step_for_contact(self, campaign_id, step_id, contact_id):
+    """
+    Kept so countdown tasks already sitting in the broker from before the due-steps table
+    existed still land somewhere: they are converted into a due row and sent by the dispatcher.
+    Tasks that had a PendingTask row were already copied into the due-steps table by migration.
+    """
+    deleted, _ = PendingTask.objects.filter(task_id=self.request.id).delete()
+    if deleted:
+        return "Step already migrated to dispatcher."
+    ScheduledStep.objects.bulk_create(
+        [ScheduledStep(campaign_id=campaign_id, step_id=step_id, contact_id=contact_id)],
+        ignore_conflicts=True
+    )
+    return "Step queued for dispatcher."
@@ -3,13 +3,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db.models import Count, Sum, Q, F
-from celery.result import AsyncResult
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Campaign, CampaignLog, SequenceStep, PendingTask
+from .models import Campaign, CampaignLog, SequenceStep, ScheduledStep
 from .serializers import CampaignSerializer, CampaignLogSerializer
 from apps.audience_manager.models import Audience
 from .filters import CampaignFilter 
-from .tasks import process_campaign, resume_paused_campaign 
+from .tasks import process_campaign
 import csv
 import json
 import io
@@ -85,9 +84,9 @@ class CampaignViewSet(viewsets.ModelViewSet):
             )
         
         elif campaign.status == Campaign.CampaignStatus.PAUSED:
-            campaign.status = Campaign.CampaignStatus.ACTIVE
-            campaign.save()
-            resume_paused_campaign.delay(campaign_id=campaign.id) 
+            Campaign.objects.filter(pk=campaign.pk, status=Campaign.CampaignStatus.PAUSED).update(
+                status=Campaign.CampaignStatus.ACTIVE, updated_at=timezone.now()
+            )
             return Response(
                 {'status': 'Campaign is resuming.'}, 
                 status=status.HTTP_200_OK
@@ -101,22 +100,14 @@ class CampaignViewSet(viewsets.ModelViewSet):
     def pause_campaign(self, request, pk=None):
         campaign = self.get_object()
         
-        if campaign.status != Campaign.CampaignStatus.ACTIVE:
+        paused = Campaign.objects.filter(pk=campaign.pk, status=Campaign.CampaignStatus.ACTIVE).update(
+            status=Campaign.CampaignStatus.PAUSED, updated_at=timezone.now()
+        )
+        if not paused:
             return Response({'error': 'Campaign is not active.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        campaign.status = Campaign.CampaignStatus.PAUSED
-        campaign.save()
-        
-        pending_tasks = PendingTask.objects.filter(campaign=campaign)
-        revoked_count = 0
-        for task in pending_tasks:
-            try:
-                AsyncResult(task.task_id).revoke(terminate=True)
-                revoked_count += 1
-            except Exception as e:
-                print(f"Could not revoke task {task.task_id}: {e}")
-        
-        return Response({'status': f'Campaign paused. {revoked_count} pending tasks cancelled.'})
+        on_hold = ScheduledStep.objects.filter(campaign=campaign).count()
+        return Response({'status': f'Campaign paused. {on_hold} scheduled steps on hold.'})
     
     @action(detail=False, methods=['get'], url_path='export')
     def export_campaigns(self, request):
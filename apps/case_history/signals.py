@@ -19,16 +19,12 @@ def create_comment_history_on_save(sender, instance, created, **kwargs):
 @receiver(pre_save, sender=Case)
 def track_case_changes(sender, instance, **kwargs):
     if instance.pk:
-        try:
-            old_instance = Case.objects.get(pk=instance.pk)
-            
-            if old_instance.status != instance.status:
-                pass
-            
-            if old_instance.handling_agent != instance.handling_agent:
-                pass
-                
-        except Case.DoesNotExist:
+        changed = instance.changed_fields()
+        
+        if 'status' in changed:
+            pass
+        
+        if 'assigned_to' in changed:
             pass
 
 
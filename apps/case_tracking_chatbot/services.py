@@ -8,78 +8,69 @@ from django.utils import timezone
 from django.db.models import Sum, Count, Q, Avg, Max, Min
 from django.contrib.auth import get_user_model
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    openai = None
-
+from apps.core.llm_gateway import ChatCompletionMixin
 from apps.renewals.models import RenewalCase
 from apps.customers.models import Customer
 from apps.policies.models import Policy
 from apps.customer_communication_preferences.models import CommunicationLog
 from apps.customer_payments.models import CustomerPayment
+from apps.ai_insights.snapshot import get_snapshot_section
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class CaseTrackingChatbotService:    
-    def __init__(self):
-        self.openai_client = None
-        self._initialize_openai()
-    
-    def _initialize_openai(self):
-        if not OPENAI_AVAILABLE:
-            logger.warning("OpenAI library not available")
-            return False
-        
-        api_key = getattr(settings, 'OPENAI_API_KEY', '')
-        if not api_key:
-            logger.warning("OpenAI API key not configured")
-            return False
-        
-        try:
-            self.openai_client = openai.OpenAI(api_key=api_key)
-            logger.info("OpenAI client initialized successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {str(e)}")
-            return False
-    
-    def is_available(self) -> bool:
-        return self.openai_client is not None
-    
+class CaseTrackingChatbotService(ChatCompletionMixin):
+    COMPLETION_PARAMS = {'max_tokens': 1000, 'temperature': 0.7, 'presence_penalty': 0.1, 'frequency_penalty': 0.1}
+    CACHE_NAMESPACE = 'case_tracking_chatbot'
+
+    # individual_customer and document_analysis look up whatever the question names, so they stay live
+    SNAPSHOT_QUERY_TYPES = (
+        'case_performance', 'case_workflow', 'case_general', 'customer_analysis',
+        'policy_analysis', 'payment_analysis', 'communication_analysis',
+    )
+
     def get_case_tracking_data(self) -> Dict[str, Any]:
+        return dict(get_snapshot_section('case_tracking').get('dashboard') or {})
+
+    def build_portfolio_section(self) -> Dict[str, Any]:
+        return {
+            'dashboard': self._compute_case_tracking_data(),
+            'specialized': {
+                query_type: self._fetch_specialized_data(query_type, None)
+                for query_type in self.SNAPSHOT_QUERY_TYPES
+            },
+        }
+
+    def _compute_case_tracking_data(self) -> Dict[str, Any]:
         try:
             cases = RenewalCase.objects.filter(is_deleted=False)
             
-            case_stats = {
-                'total_cases': cases.count(),
-                'pending_cases': cases.filter(status='pending').count(),
-                'in_progress_cases': cases.filter(status='in_progress').count(),
-                'completed_cases': cases.filter(status='completed').count(),
-                'renewed_cases': cases.filter(status='renewed').count(),
-                'cancelled_cases': cases.filter(status='cancelled').count(),
-                'expired_cases': cases.filter(status='expired').count(),
-                'due_cases': cases.filter(status='due').count(),
-                'overdue_cases': cases.filter(status='overdue').count(),
-                'assigned_cases': cases.filter(status='assigned').count(),
-                'not_required_cases': cases.filter(status='not_required').count(),
-                'failed_cases': cases.filter(status='failed').count(),
-                'uploaded_cases': cases.filter(status='uploaded').count(),
-            }
+            case_stats = cases.aggregate(
+                total_cases=Count('id'),
+                pending_cases=Count('id', filter=Q(status='pending')),
+                in_progress_cases=Count('id', filter=Q(status='in_progress')),
+                completed_cases=Count('id', filter=Q(status='completed')),
+                renewed_cases=Count('id', filter=Q(status='renewed')),
+                cancelled_cases=Count('id', filter=Q(status='cancelled')),
+                expired_cases=Count('id', filter=Q(status='expired')),
+                due_cases=Count('id', filter=Q(status='due')),
+                overdue_cases=Count('id', filter=Q(status='overdue')),
+                assigned_cases=Count('id', filter=Q(status='assigned')),
+                not_required_cases=Count('id', filter=Q(status='not_required')),
+                failed_cases=Count('id', filter=Q(status='failed')),
+                uploaded_cases=Count('id', filter=Q(status='uploaded')),
+            )
             
             customers = Customer.objects.filter(is_deleted=False)
-            customer_stats = {
-                'total_customers': customers.count(),
-                'active_customers': customers.filter(status='active').count(),
-                'inactive_customers': customers.filter(status='inactive').count(),
-                'prospect_customers': customers.filter(status='prospect').count(),
-                'normal_profile_customers': customers.filter(profile='Normal').count(),
-                'hni_profile_customers': customers.filter(profile='HNI').count(),
-            }
+            customer_stats = customers.aggregate(
+                total_customers=Count('id'),
+                active_customers=Count('id', filter=Q(status='active')),
+                inactive_customers=Count('id', filter=Q(status='inactive')),
+                prospect_customers=Count('id', filter=Q(status='prospect')),
+                normal_profile_customers=Count('id', filter=Q(profile='Normal')),
+                hni_profile_customers=Count('id', filter=Q(profile='HNI')),
+            )
             
             case_performance = cases.values('status').annotate(
                 count=Count('id'),
@@ -125,75 +116,32 @@ class CaseTrackingChatbotService:
             logger.error(f"Error fetching case tracking data: {str(e)}")
             return {}
     
-    def generate_ai_response(self, user_message: str, context_data: Dict[str, Any] = None, user=None, conversation_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
-        if not self.is_available():
-            return {
-                'success': False,
-                'error': 'AI service not available',
-                'message': 'OpenAI API key not configured or service unavailable'
-            }
+    def _build_messages(self, user_message: str, user=None, conversation_history: List[Dict[str, Any]] = None):
+        query_type = self._classify_query(user_message)
         
-        try:
-            query_type = self._classify_query(user_message)
-            
-            
-            if query_type == 'non_case_tracking':
-                return {
-                    'success': True,
-                    'response': 'Sorry, I can only help with case tracking and customer-related questions.',
-                    'model': 'direct-response',
-                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
-                    'timestamp': timezone.now().isoformat()
-                }
-            
-            dashboard_data = self.get_case_tracking_data()
-            specialized_data = self._get_specialized_data(query_type, user_message)
-            dashboard_data.update(specialized_data)
-            
-            system_prompt = self._create_system_prompt(dashboard_data, user, query_type)
-            
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            if conversation_history:
-                for msg in conversation_history:
-                    messages.append({
-                        "role": msg['role'],
-                        "content": msg['content']
-                    })
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            response = self.openai_client.chat.completions.create(
-                model=getattr(settings, 'OPENAI_MODEL', 'gpt-4'),
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7,
-                presence_penalty=0.1,
-                frequency_penalty=0.1
-            )
-            
-            ai_response = response.choices[0].message.content.strip()
-            
+        
+        if query_type == 'non_case_tracking':
             return {
                 'success': True,
-                'response': ai_response,
-                'model': response.model,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                },
+                'response': 'Sorry, I can only help with case tracking and customer-related questions.',
+                'model': 'direct-response',
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
                 'timestamp': timezone.now().isoformat()
             }
-            
-        except Exception as e:
-            logger.error(f"Error generating AI response: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'message': 'Failed to generate AI response'
-            }
-    
+        
+        dashboard_data = self.get_case_tracking_data()
+        specialized_data = self._get_specialized_data(query_type, user_message)
+        dashboard_data.update(specialized_data)
+        
+        system_prompt = self._create_system_prompt(dashboard_data, user, query_type)
+        return self._budget_messages(system_prompt, conversation_history, user_message)
+
+    def _cache_scope(self, user_message: str, user=None) -> Optional[Tuple[str, str]]:
+        query_type = self._classify_query(user_message)
+        if query_type not in self.SNAPSHOT_QUERY_TYPES:
+            return None
+        return query_type, 'global'
+
     def _classify_query(self, user_message: str) -> str:
         message_lower = user_message.lower()
         
@@ -311,6 +259,12 @@ class CaseTrackingChatbotService:
             return 'non_case_tracking'
     
     def _get_specialized_data(self, query_type: str, user_message: str) -> Dict[str, Any]:
+        specialized = get_snapshot_section('case_tracking').get('specialized') or {}
+        if query_type in specialized:
+            return dict(specialized[query_type])
+        return self._fetch_specialized_data(query_type, user_message)
+
+    def _fetch_specialized_data(self, query_type: str, user_message: str) -> Dict[str, Any]:
         try:
             if query_type == 'case_performance':
                 return self._get_case_performance_data()
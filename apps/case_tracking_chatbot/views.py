@@ -12,6 +12,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
 
+from apps.core.llm_gateway import sse_response
 from apps.case_tracking_chatbot.models import (
     CaseTrackingChatbotConversation,
     CaseTrackingChatbotMessage
@@ -154,6 +155,15 @@ class CaseTrackingChatbotView(View):
                     'message': 'The AI service is currently unavailable. Please try again later.'
                 }, status=503)
             
+            if data.get('stream'):
+                return sse_response(
+                    case_tracking_chatbot_service.stream_ai_response(
+                        user_message,
+                        conversation_history=conversation_history
+                    ),
+                    on_done=lambda event: self._save_exchange(conversation, user_message, event)
+                )
+            
             ai_response = case_tracking_chatbot_service.generate_ai_response(
                 user_message,
                 conversation_history=conversation_history
@@ -166,27 +176,7 @@ class CaseTrackingChatbotView(View):
                     'message': ai_response.get('message', 'Unknown error occurred')
                 }, status=500)
             
-            if conversation:
-                user_msg = CaseTrackingChatbotMessage.objects.create(
-                    conversation=conversation,
-                    role='user',
-                    content=user_message
-                )
-                
-                ai_msg = CaseTrackingChatbotMessage.objects.create(
-                    conversation=conversation,
-                    role='assistant',
-                    content=ai_response['response'],
-                    metadata={
-                        'usage': ai_response.get('usage'),
-                        'model': ai_response.get('model'),
-                        'timestamp': ai_response.get('timestamp')
-                    }
-                )
-                
-                conversation.last_activity = timezone.now()
-                conversation.update_message_count()
-                conversation.save()
+            self._save_exchange(conversation, user_message, ai_response)
             
             cleaned_response = ai_response['response']
             import re
@@ -273,6 +263,31 @@ class CaseTrackingChatbotView(View):
                 'message': str(e)
             }, status=500)
     
+    def _save_exchange(self, conversation, user_message, ai_response):
+        if not conversation or not ai_response.get('success'):
+            return
+        
+        CaseTrackingChatbotMessage.objects.create(
+            conversation=conversation,
+            role='user',
+            content=user_message
+        )
+        
+        CaseTrackingChatbotMessage.objects.create(
+            conversation=conversation,
+            role='assistant',
+            content=ai_response['response'],
+            metadata={
+                'usage': ai_response.get('usage'),
+                'model': ai_response.get('model'),
+                'timestamp': ai_response.get('timestamp')
+            }
+        )
+        
+        conversation.last_activity = timezone.now()
+        conversation.update_message_count()
+        conversation.save()
+
     def _get_or_create_conversation(self, user, session_id, user_message):
         try:
             if session_id:
@@ -0,0 +1,57 @@
+"""
+Helpers shared by the benchmark_* management commands and the query budget tests.
+
+    class Command(RolledBackCommand):
+        def run(self, options):
+            ...create fixtures...
+            with count_queries() as counter:
+                ...
+            self.stdout.write(f"{counter['queries']} queries")
+
+RolledBackCommand runs `run()` inside a transaction that is always rolled back, so a
+benchmark can create as much data as it needs against a shared database.
+"""
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back(using=DEFAULT_DB_ALIAS):
+    """Run the block in a transaction and roll it back on a clean exit as well."""
+    try:
+        with transaction.atomic(using=using):
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def count_queries(using=DEFAULT_DB_ALIAS):
+    """Count the queries executed in the block; works with DEBUG off, unlike connection.queries."""
+    counter = {'queries': 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(wrapper):
+        yield counter
+
+
+class RolledBackCommand(BaseCommand):
+    """Management command whose `run(options)` writes are always rolled back."""
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.run(options)
+        self.stdout.write("Benchmark data rolled back.")
+
+    def run(self, options):
+        raise NotImplementedError('subclasses of RolledBackCommand must provide a run() method')
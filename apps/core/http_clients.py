@@ -0,0 +1,46 @@
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple[int, str], httpx.Client] = {}
+_lock = threading.Lock()
+
+
+def get_http_client(name: str, timeout: float = 30.0) -> httpx.Client:
+    """
+    Return the process-wide pooled keep-alive client for `name`.
+
+    Clients are keyed by pid as well, so prefork Celery / gunicorn workers never share
+    sockets inherited from the parent process.
+    """
+    key = (os.getpid(), name)
+    client = _clients.get(key)
+    if client is not None and not client.is_closed:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=getattr(settings, 'HTTP_CLIENT_MAX_CONNECTIONS', 100),
+                max_keepalive_connections=getattr(settings, 'HTTP_CLIENT_MAX_KEEPALIVE', 20),
+                keepalive_expiry=getattr(settings, 'HTTP_CLIENT_KEEPALIVE_EXPIRY', 30.0),
+            )
+            client = httpx.Client(limits=limits, timeout=timeout)
+            _clients[key] = client
+            logger.debug(f"Created pooled HTTP client '{name}'")
+        return client
+
+
+def close_http_clients():
+    with _lock:
+        for key, client in list(_clients.items()):
+            if key[0] == os.getpid():
+                client.close()
+            _clients.pop(key, None)
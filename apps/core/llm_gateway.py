@@ -0,0 +1,356 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.core.http_clients import get_http_client
+from apps.core.prompt_budget import PromptBudgeter
+from apps.core.response_cache import ResponseCache, normalize_question
+
+try:
+    import openai
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+    openai = None
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGatewayError(Exception):
+    pass
+
+
+class LLMUnavailable(LLMGatewayError):
+    """No API key, library missing, or every concurrency slot is taken."""
+
+
+def _retryable_errors():
+    if not OPENAI_AVAILABLE:
+        return ()
+    return (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError, openai.InternalServerError)
+
+
+class LLMGateway:
+    """
+    One OpenAI client per process shared by every chatbot service.
+
+    The client rides on the pooled httpx client so TLS connections are reused across
+    requests; a semaphore caps in-flight completions per process and transient errors
+    are retried with exponential backoff. Point OPENAI_BASE_URL at any OpenAI-compatible
+    server (including a local fake) to exercise it without the real API.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._client_key = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(getattr(settings, 'OPENAI_MAX_CONCURRENCY', 8))
+
+    @property
+    def timeout(self) -> float:
+        return getattr(settings, 'OPENAI_TIMEOUT', 30.0)
+
+    def is_available(self) -> bool:
+        return OPENAI_AVAILABLE and bool(getattr(settings, 'OPENAI_API_KEY', ''))
+
+    def _get_client(self):
+        if not self.is_available():
+            raise LLMUnavailable('OpenAI API key not configured or service unavailable')
+
+        key = (getattr(settings, 'OPENAI_API_KEY', ''), getattr(settings, 'OPENAI_BASE_URL', '') or None)
+        if self._client is not None and self._client_key == key:
+            return self._client
+
+        with self._lock:
+            if self._client is None or self._client_key != key:
+                self._client = openai.OpenAI(
+                    api_key=key[0],
+                    base_url=key[1],
+                    timeout=self.timeout,
+                    max_retries=0,
+                    http_client=get_http_client('openai', timeout=self.timeout),
+                )
+                self._client_key = key
+                logger.info("OpenAI client initialized successfully")
+        return self._client
+
+    def _acquire_slot(self):
+        wait = getattr(settings, 'OPENAI_QUEUE_TIMEOUT', 10.0)
+        if not self._slots.acquire(timeout=wait):
+            raise LLMUnavailable('AI service is busy, please try again shortly')
+
+    def _with_retries(self, call):
+        attempts = getattr(settings, 'OPENAI_MAX_RETRIES', 3)
+        backoff = getattr(settings, 'OPENAI_RETRY_BACKOFF', 0.5)
+        for attempt in range(attempts + 1):
+            try:
+                return call()
+            except _retryable_errors() as e:
+                if attempt == attempts:
+                    raise
+                delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+                logger.warning(f"OpenAI call failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    def _params(self, messages: List[Dict[str, str]], overrides: Dict[str, Any]) -> Dict[str, Any]:
+        params = {
+            'model': getattr(settings, 'OPENAI_MODEL', 'gpt-4'),
+            'messages': messages,
+            'max_tokens': 1000,
+            'temperature': 0.7,
+        }
+        params.update(overrides)
+        return params
+
+    def chat(self, messages: List[Dict[str, str]], **overrides) -> Dict[str, Any]:
+        """Blocking completion. Returns {'content', 'model', 'usage'}."""
+        client = self._get_client()
+        params = self._params(messages, overrides)
+
+        self._acquire_slot()
+        try:
+            response = self._with_retries(lambda: client.chat.completions.create(**params))
+        finally:
+            self._slots.release()
+
+        return {
+            'content': response.choices[0].message.content or '',
+            'model': response.model,
+            'usage': {
+                'prompt_tokens': response.usage.prompt_tokens,
+                'completion_tokens': response.usage.completion_tokens,
+                'total_tokens': response.usage.total_tokens
+            } if response.usage else None,
+        }
+
+    def stream_chat(self, messages: List[Dict[str, str]], **overrides) -> Iterator[Dict[str, Any]]:
+        """
+        Yield {'type': 'delta', 'content'} per token chunk and a final
+        {'type': 'done', 'content', 'model', 'usage'}. Retries only happen before the
+        first chunk; once tokens have reached the caller a failure is raised.
+        """
+        client = self._get_client()
+        params = self._params(messages, overrides)
+        params['stream'] = True
+        params['stream_options'] = {'include_usage': True}
+
+        self._acquire_slot()
+        try:
+            stream = self._with_retries(lambda: client.chat.completions.create(**params))
+            parts = []
+            model = None
+            usage = None
+            for chunk in stream:
+                model = chunk.model or model
+                if chunk.usage:
+                    usage = {
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens,
+                        'total_tokens': chunk.usage.total_tokens
+                    }
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield {'type': 'delta', 'content': chunk.choices[0].delta.content}
+            yield {'type': 'done', 'content': ''.join(parts), 'model': model, 'usage': usage}
+        finally:
+            self._slots.release()
+
+
+_gateways: Dict[int, LLMGateway] = {}
+
+
+def get_llm_gateway() -> LLMGateway:
+    pid = os.getpid()
+    gateway = _gateways.get(pid)
+    if gateway is None:
+        gateway = _gateways.setdefault(pid, LLMGateway())
+    return gateway
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events: Iterator[Dict[str, Any]], on_done: Optional[Callable[[Dict[str, Any]], Any]] = None) -> StreamingHttpResponse:
+    """
+    Stream chatbot events as Server-Sent Events. `on_done` runs with the final event
+    (e.g. to persist the assistant message) before it is sent to the client.
+    """
+    def stream():
+        for event in events:
+            if event['type'] == 'done' and on_done:
+                on_done(event)
+            yield sse_event(event, event['type'])
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class ChatCompletionMixin:
+    """
+    Shared completion flow for the chatbot services. Subclasses implement
+    `_build_messages`, returning the message list for the model or a ready response
+    dict when the question can be answered without it.
+
+    Subclasses that set CACHE_NAMESPACE and implement `_cache_scope` get finished
+    answers cached per portfolio-snapshot version. Only self-contained questions are
+    cached: the first message of a conversation, or one of the quick suggestions.
+    """
+    COMPLETION_PARAMS: Dict[str, Any] = {}
+    CACHE_NAMESPACE: Optional[str] = None
+
+    @property
+    def llm(self) -> LLMGateway:
+        return get_llm_gateway()
+
+    @property
+    def response_cache(self) -> Optional[ResponseCache]:
+        return ResponseCache(self.CACHE_NAMESPACE) if self.CACHE_NAMESPACE else None
+
+    def is_available(self) -> bool:
+        return self.llm.is_available()
+
+    def _build_messages(self, user_message: str, user=None, conversation_history: List[Dict[str, Any]] = None):
+        raise NotImplementedError("This method must be implemented by a subclass")
+
+    def _budget_messages(self, system_prompt, conversation_history: Optional[List[Dict[str, Any]]], user_message: str) -> List[Dict[str, str]]:
+        budgeter = PromptBudgeter()
+        messages = budgeter.build_messages(system_prompt, conversation_history, user_message)
+        logger.debug(f"{self.__class__.__name__} prompt budget: {budgeter.last_stats}")
+        return messages
+
+    def _cache_scope(self, user_message: str, user=None) -> Optional[Tuple[str, str]]:
+        """(query_type, scope) for a cacheable question, or None to always ask the model."""
+        return None
+
+    def _cache_version(self):
+        from apps.ai_insights.snapshot import get_snapshot_version
+        return get_snapshot_version()
+
+    def _is_self_contained(self, user_message: str, conversation_history: Optional[List[Dict[str, Any]]]) -> bool:
+        if not conversation_history:
+            return True
+        suggestions = getattr(self, 'get_quick_suggestions', None)
+        if not suggestions:
+            return False
+        question = normalize_question(user_message)
+        return any(normalize_question(item.get('title', '')) == question for item in suggestions())
+
+    def _cache_key(self, user_message: str, user=None, conversation_history: List[Dict[str, Any]] = None) -> Optional[str]:
+        cache = self.response_cache
+        if cache is None or not self._is_self_contained(user_message, conversation_history):
+            return None
+        try:
+            scope = self._cache_scope(user_message, user)
+            if scope is None:
+                return None
+            return cache.key(user_message, scope[0], scope[1], self._cache_version())
+        except Exception as e:
+            logger.warning(f"Response cache key failed: {str(e)}")
+            return None
+
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not cache_key:
+            return None
+        entry = self.response_cache.get(cache_key)
+        if entry is None:
+            return None
+        return {
+            'success': True,
+            'response': entry['response'],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+            'model': entry['model'],
+            'cached': True,
+            'timestamp': timezone.now().isoformat()
+        }
+
+    def _unavailable_response(self) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': 'AI service not available',
+            'message': 'OpenAI API key not configured or service unavailable'
+        }
+
+    def _completion_response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'response': result['content'].strip(),
+            'usage': result['usage'],
+            'model': result['model'],
+            'timestamp': timezone.now().isoformat()
+        }
+
+    def generate_ai_response(self, user_message: str, context_data: Dict[str, Any] = None, user=None, conversation_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        cache_key = self._cache_key(user_message, user, conversation_history)
+        cached = self._cached_response(cache_key)
+        if cached:
+            return cached
+
+        if not self.is_available():
+            return self._unavailable_response()
+
+        try:
+            prepared = self._build_messages(user_message, user, conversation_history)
+            if isinstance(prepared, dict):
+                return prepared
+            response = self._completion_response(self.llm.chat(prepared, **self.COMPLETION_PARAMS))
+            if cache_key:
+                self.response_cache.set(cache_key, response)
+            return response
+        except Exception as e:
+            logger.error(f"Error generating AI response: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to generate AI response'
+            }
+
+    def stream_ai_response(self, user_message: str, user=None, conversation_history: List[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield {'type': 'delta', 'content'} events as tokens arrive, then one
+        {'type': 'done', ...} carrying the same payload generate_ai_response returns,
+        or {'type': 'error', ...} on failure. A cached answer arrives as a single delta.
+        """
+        cache_key = self._cache_key(user_message, user, conversation_history)
+        cached = self._cached_response(cache_key)
+        if cached:
+            yield {'type': 'delta', 'content': cached['response']}
+            yield {'type': 'done', **cached}
+            return
+
+        if not self.is_available():
+            yield {'type': 'error', **self._unavailable_response()}
+            return
+
+        try:
+            prepared = self._build_messages(user_message, user, conversation_history)
+            if isinstance(prepared, dict):
+                yield {'type': 'done', **prepared}
+                return
+            for event in self.llm.stream_chat(prepared, **self.COMPLETION_PARAMS):
+                if event['type'] == 'delta':
+                    yield event
+                else:
+                    response = self._completion_response(event)
+                    if cache_key:
+                        self.response_cache.set(cache_key, response)
+                    yield {'type': 'done', **response}
+        except Exception as e:
+            logger.error(f"Error streaming AI response: {str(e)}")
+            yield {
+                'type': 'error',
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to generate AI response'
+            }
@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.core.llm_gateway import LLMGateway
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /chat/completions endpoint, blocking and SSE."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    token_delay = 0.02
+    tokens = 40
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        words = [f"token{i} " for i in range(self.tokens)]
+        usage = {'prompt_tokens': 100, 'completion_tokens': self.tokens, 'total_tokens': 100 + self.tokens}
+
+        if not request.get('stream'):
+            time.sleep(self.token_delay * self.tokens)
+            body = json.dumps({
+                'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': request.get('model', 'fake'),
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': ''.join(words)}}],
+                'usage': usage,
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send(payload):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        base = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                'model': request.get('model', 'fake')}
+        for word in words:
+            time.sleep(self.token_delay)
+            send(json.dumps({**base, 'choices': [{'index': 0, 'delta': {'content': word}, 'finish_reason': None}]}))
+        send(json.dumps({**base, 'choices': [], 'usage': usage}))
+        send('[DONE]')
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Exercise the LLM gateway against a local fake OpenAI server: time to first token and concurrency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--max-in-flight', type=int, default=4, help='OPENAI_MAX_CONCURRENCY for the run')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeOpenAIHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        messages = [{'role': 'user', 'content': 'How many renewals are pending?'}]
+
+        try:
+            with override_settings(
+                OPENAI_API_KEY='fake-key', OPENAI_BASE_URL=base_url,
+                OPENAI_MAX_CONCURRENCY=options['max_in_flight'], OPENAI_QUEUE_TIMEOUT=60.0,
+            ):
+                gateway = LLMGateway()
+
+                start = time.perf_counter()
+                result = gateway.chat(messages)
+                self.stdout.write(
+                    f"blocking: {time.perf_counter() - start:.2f}s for {result['usage']['completion_tokens']} tokens"
+                )
+
+                start = time.perf_counter()
+                first_token = None
+                for event in gateway.stream_chat(messages):
+                    if event['type'] == 'delta' and first_token is None:
+                        first_token = time.perf_counter() - start
+                self.stdout.write(
+                    f"streaming: first token {first_token * 1000:.0f}ms, complete {time.perf_counter() - start:.2f}s"
+                )
+
+                def one(_):
+                    return gateway.chat(messages)
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                    results = list(executor.map(one, range(options['requests'])))
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"concurrent: {len(results)} requests, {options['concurrency']} callers, "
+                    f"{options['max_in_flight']} in flight -> {elapsed:.2f}s"
+                )
+        finally:
+            server.shutdown()
@@ -0,0 +1,83 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.db.models.signals import pre_save
+from django.utils import timezone
+
+from apps.core.benchmarking import RolledBackCommand
+from apps.customer_communication_preferences.models import CommunicationLog
+from apps.customer_payments.models import CustomerPayment
+from apps.customers.models import Customer
+from apps.renewals.models import RenewalCase
+
+
+def _refetch_soft_deleted(sender, instance, **kwargs):
+    """What the soft-delete handlers did before change tracking: load the stored row to diff against."""
+    if instance.pk and instance.is_deleted:
+        sender.objects.filter(pk=instance.pk).first()
+
+
+def _refetch_case(sender, instance, **kwargs):
+    if instance.pk:
+        sender.objects.filter(pk=instance.pk).first()
+
+
+class Command(RolledBackCommand):
+    help = 'Measure audited saves per second with and without the pre_save re-fetch. All rows are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--cases', type=int, default=2000,
+                            help='Existing renewal cases to re-save (status toggled, rolled back)')
+
+    def run(self, options):
+        tag = uuid.uuid4().hex[:8]
+        customer = Customer.objects.create(
+            customer_code=f'TRK{tag}', first_name='Tracking', email=f'tracking-{tag}@example.com', phone='9876543210'
+        )
+        rows = options['rows']
+        batches = {}
+        for label in ('before', 'after'):
+            CustomerPayment.objects.bulk_create([
+                CustomerPayment(customer=customer, payment_amount=Decimal('100'), net_amount=Decimal('100'),
+                                payment_date=timezone.now(), payment_mode='upi', transaction_id=f'{label}-{tag}-{i}')
+                for i in range(rows)
+            ], batch_size=1000)
+            CommunicationLog.objects.bulk_create([
+                CommunicationLog(customer=customer, channel='email', communication_date=timezone.now(),
+                                 outcome='delivered', message_content=f'{label}-{tag}-{i}')
+                for i in range(rows)
+            ], batch_size=1000)
+            batches[label] = (
+                list(CustomerPayment.objects.filter(customer=customer, transaction_id__startswith=f'{label}-')),
+                list(CommunicationLog.objects.filter(customer=customer, message_content__startswith=f'{label}-')),
+            )
+        cases = list(RenewalCase.objects.all()[:options['cases']])
+
+        pre_save.connect(_refetch_soft_deleted, sender=CustomerPayment)
+        pre_save.connect(_refetch_soft_deleted, sender=CommunicationLog)
+        pre_save.connect(_refetch_case, sender=RenewalCase)
+        try:
+            self._measure('Before (re-fetch)', *batches['before'], cases)
+        finally:
+            pre_save.disconnect(_refetch_soft_deleted, sender=CustomerPayment)
+            pre_save.disconnect(_refetch_soft_deleted, sender=CommunicationLog)
+            pre_save.disconnect(_refetch_case, sender=RenewalCase)
+
+        self._measure('After (tracked)', *batches['after'], cases)
+
+    def _measure(self, label, payments, communications, cases):
+        for name, objects, change in (
+            ('payment soft-deletes', payments, lambda obj: setattr(obj, 'is_deleted', True)),
+            ('communication soft-deletes', communications, lambda obj: setattr(obj, 'is_deleted', True)),
+            ('case status saves', cases, lambda obj: setattr(obj, 'status', 'in_progress' if obj.status != 'in_progress' else 'pending')),
+        ):
+            if not objects:
+                continue
+            start = time.perf_counter()
+            for obj in objects:
+                change(obj)
+                obj.save()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label}: {len(objects)} {name} in {elapsed:.2f}s ({len(objects) / elapsed:.0f} saves/s)")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.response_cache import ResponseCache
+
+NAMESPACES = ('ai_insights', 'upload_chatbot', 'case_tracking_chatbot')
+
+
+class Command(BaseCommand):
+    help = 'Report chatbot response cache hit rates and tokens saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after reporting')
+
+    def handle(self, *args, **options):
+        for namespace in NAMESPACES:
+            cache = ResponseCache(namespace)
+            stats = cache.stats()
+            self.stdout.write(
+                f"{namespace}: {stats['hits']} hits / {stats['misses']} misses "
+                f"({stats['hit_rate']}% hit rate), {stats['tokens_saved']} tokens saved"
+            )
+            if options['reset']:
+                cache.reset_stats()
@@ -0,0 +1,50 @@
+import re
+from typing import List, Optional
+
+_BRACKETED = re.compile(r'<([^<>]*)>')
+_SEPARATORS = re.compile(r'[\s,]+')
+_REPLY_PREFIX = re.compile(r'^\s*((re|fw|fwd|aw|sv)\s*(\[\d+\])?\s*:\s*)+', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message_id(raw: Optional[str]) -> Optional[str]:
+    """
+    Lookup key for a Message-ID: angle brackets and whitespace stripped, lowercased.
+    The original header value is kept on the row for outgoing In-Reply-To headers.
+    """
+    if not raw:
+        return None
+    key = _SEPARATORS.sub('', str(raw)).replace('<', '').replace('>', '').lower()
+    return key[:255] or None
+
+
+def original_message_id(raw: Optional[str]) -> Optional[str]:
+    """First id in a Message-ID/In-Reply-To/References header, brackets stripped but case kept, for storing."""
+    if not raw:
+        return None
+    for part in _BRACKETED.findall(raw) or _SEPARATORS.split(raw):
+        part = _SEPARATORS.sub('', part)
+        if part:
+            return part[:255]
+    return None
+
+
+def parse_message_ids(raw: Optional[str]) -> List[str]:
+    """Normalized ids from an In-Reply-To/References header, in header order, without duplicates."""
+    if not raw:
+        return []
+    parts = _BRACKETED.findall(raw) or _SEPARATORS.split(raw)
+    keys = []
+    for part in parts:
+        key = normalize_message_id(part)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def thread_key(subject: Optional[str]) -> Optional[str]:
+    """'RE: Fwd: Renewal due' and 're: renewal  due' both map to 'renewal due'."""
+    if not subject:
+        return None
+    key = _WHITESPACE.sub(' ', _REPLY_PREFIX.sub('', subject)).strip().lower()
+    return key[:255] or None
@@ -67,6 +67,50 @@ class BaseModel(TimestampedModel, SoftDeleteModel):
     class Meta:
         abstract = True
 
+class ChangeTrackingMixin:
+    """
+    Remembers the database values of `tracked_fields` when an instance is loaded and
+    after each save, so pre_save/post_save handlers can diff without re-fetching.
+    Foreign keys are tracked by id. Instances that were not loaded from the database
+    report every tracked field as changed.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+    def _snapshot_tracked_fields(self):
+        self._loaded_values = {
+            name: self.__dict__[attname]
+            for name, attname in self._tracked_attnames()
+            if attname in self.__dict__
+        }
+
+    def _tracked_attnames(self):
+        return [(name, self._meta.get_field(name).attname) for name in self.tracked_fields]
+
+    def has_loaded_state(self):
+        return getattr(self, '_loaded_values', None) is not None
+
+    def previous_value(self, field, default=None):
+        return (getattr(self, '_loaded_values', None) or {}).get(field, default)
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return set(self.tracked_fields)
+        return {
+            name for name, attname in self._tracked_attnames()
+            if name not in loaded or loaded[name] != self.__dict__.get(attname)
+        }
+
 class AuditLog(TimestampedModel):
     ACTION_CHOICES = [
         ('create', 'Create'),
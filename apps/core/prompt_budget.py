@@ -0,0 +1,141 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Exact count with tiktoken when installed, otherwise the usual ~4 chars/token estimate."""
+    global _encoding
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+@dataclass
+class PromptSection:
+    name: str
+    text: str
+    priority: int = 100
+    required: bool = False
+
+
+class PromptBudgeter:
+    """
+    Fit a system prompt and conversation history into a token budget.
+
+    System-prompt sections are kept in priority order (lower first) until the system
+    budget is spent; a section that does not fit is cut at a line boundary and anything
+    after it is dropped. History keeps the most recent turns verbatim and folds older
+    turns into one short extractive summary, so a long conversation costs a bounded
+    number of tokens instead of growing every turn.
+    """
+
+    def __init__(self, max_prompt_tokens: Optional[int] = None, history_tokens: Optional[int] = None,
+                 recent_turns: Optional[int] = None):
+        self.max_prompt_tokens = max_prompt_tokens or getattr(settings, 'AI_PROMPT_MAX_TOKENS', 6000)
+        self.history_tokens = history_tokens or getattr(settings, 'AI_PROMPT_HISTORY_TOKENS', 1500)
+        self.recent_turns = recent_turns or getattr(settings, 'AI_PROMPT_RECENT_TURNS', 4)
+        self.last_stats: Dict[str, Any] = {}
+
+    def compose(self, sections: Sequence[PromptSection], budget: Optional[int] = None) -> str:
+        budget = budget if budget is not None else self.max_prompt_tokens - self.history_tokens
+        ordered = sorted(enumerate(sections), key=lambda item: (not item[1].required, item[1].priority, item[0]))
+
+        kept = {}
+        used = 0
+        dropped = []
+        for index, section in ordered:
+            if not section.text or not section.text.strip():
+                continue
+            tokens = count_tokens(section.text)
+            if section.required or used + tokens <= budget:
+                kept[index] = section.text
+                used += tokens
+                continue
+            truncated = self._truncate_lines(section.text, budget - used)
+            if truncated:
+                kept[index] = truncated
+                used += count_tokens(truncated)
+            dropped.append(section.name)
+
+        self.last_stats['system_tokens'] = used
+        self.last_stats['trimmed_sections'] = dropped
+        if dropped:
+            logger.info(f"Prompt budget trimmed sections: {', '.join(dropped)}")
+        # Keep the original section order so the prompt still reads naturally.
+        return ''.join(kept[index] for index in sorted(kept))
+
+    def _truncate_lines(self, text: str, budget: int) -> str:
+        if budget <= 0:
+            return ''
+        lines = []
+        used = 0
+        for line in text.splitlines(keepends=True):
+            tokens = count_tokens(line)
+            if used + tokens > budget:
+                break
+            lines.append(line)
+            used += tokens
+        return ''.join(lines)
+
+    def _summarize(self, turns: List[Dict[str, Any]], budget: int) -> str:
+        points = []
+        for msg in turns:
+            first_sentence = re.split(r'(?<=[.!?])\s+', (msg.get('content') or '').strip(), maxsplit=1)[0]
+            points.append(f"- {msg['role']}: {first_sentence[:200]}")
+        summary = "Summary of earlier conversation:\n" + "\n".join(points)
+        return self._truncate_lines(summary, budget) if count_tokens(summary) > budget else summary
+
+    def fit_history(self, history: Optional[List[Dict[str, Any]]]) -> List[Dict[str, str]]:
+        history = [msg for msg in (history or []) if msg.get('content')]
+        recent = []
+        used = 0
+        for msg in reversed(history[-self.recent_turns:]):
+            tokens = count_tokens(msg['content'])
+            if used + tokens > self.history_tokens:
+                break
+            recent.insert(0, {'role': msg['role'], 'content': msg['content']})
+            used += tokens
+
+        older = history[:len(history) - len(recent)]
+        messages = []
+        if older:
+            summary = self._summarize(older, max(self.history_tokens - used, 0))
+            if summary:
+                messages.append({'role': 'system', 'content': summary})
+                used += count_tokens(summary)
+        self.last_stats['history_tokens'] = used
+        self.last_stats['summarized_turns'] = len(older)
+        return messages + recent
+
+    def build_messages(self, system_prompt, history: Optional[List[Dict[str, Any]]], user_message: str) -> List[Dict[str, str]]:
+        """`system_prompt` is either a ready string or a list of PromptSection."""
+        self.last_stats = {}
+        history_messages = self.fit_history(history)
+        system_budget = self.max_prompt_tokens - self.last_stats['history_tokens'] - count_tokens(user_message)
+        if isinstance(system_prompt, str):
+            system_prompt = [PromptSection('system', system_prompt, priority=0)]
+        system_text = self.compose(system_prompt, budget=system_budget)
+
+        self.last_stats['prompt_tokens'] = (
+            self.last_stats['system_tokens'] + self.last_stats['history_tokens'] + count_tokens(user_message)
+        )
+        return [{'role': 'system', 'content': system_text}] + history_messages + [{'role': 'user', 'content': user_message}]
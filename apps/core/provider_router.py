@@ -0,0 +1,294 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class NoProviderAvailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window_size: int = 50, min_calls: int = 10,
+                 error_rate_threshold: float = 0.5, latency_threshold: float = None,
+                 cooldown_seconds: float = 30.0):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        now = time.monotonic()
+        if self._state == self.OPEN and now - self._opened_at >= self.cooldown_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        elif self._probe_in_flight and now - self._probe_started_at >= self.cooldown_seconds:
+            # The probe's caller never recorded a result; let another request probe.
+            self._probe_in_flight = False
+
+    def try_acquire(self) -> bool:
+        """
+        True if a request may go to the provider now. While half-open this claims the
+        single probe slot, so concurrent callers are refused until the probe's result
+        is recorded.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started_at = time.monotonic()
+                return True
+            return False
+
+    def is_available(self) -> bool:
+        """Like try_acquire() but without reserving the half-open probe slot; for reporting only."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.HALF_OPEN:
+                return not self._probe_in_flight
+            return self._state == self.CLOSED
+
+    def record(self, success: bool, latency: float = 0.0):
+        with self._lock:
+            self._outcomes.append((success, latency))
+
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if success:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+
+            if self._state == self.CLOSED and self._should_trip():
+                self._trip()
+
+    def _should_trip(self) -> bool:
+        if len(self._outcomes) < self.min_calls:
+            return False
+        error_rate, avg_latency = self._rates()
+        if error_rate >= self.error_rate_threshold:
+            return True
+        return bool(self.latency_threshold and avg_latency >= self.latency_threshold)
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit breaker opened (error_rate={self._rates()[0]:.2f})")
+
+    def _rates(self):
+        if not self._outcomes:
+            return 0.0, 0.0
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        latency = sum(lat for _, lat in self._outcomes) / len(self._outcomes)
+        return failures / len(self._outcomes), latency
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            error_rate, avg_latency = self._rates()
+            return {
+                'state': self._state,
+                'calls': len(self._outcomes),
+                'error_rate': round(error_rate, 4),
+                'avg_latency': round(avg_latency, 4),
+            }
+
+
+@dataclass
+class ProviderEntry:
+    provider: Any
+    priority: tuple
+    daily_limit: Optional[int] = None
+    sent_today: int = 0
+    monthly_limit: Optional[int] = None
+    sent_this_month: int = 0
+    lookup_keys: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def pk(self):
+        return self.provider.pk
+
+
+class ProviderRouter:
+    """
+    In-process cache of provider configurations and service instances for one channel.
+
+    Provider rows are loaded once and kept until a config change is saved (post_save /
+    post_delete invalidation) or the TTL expires, so that changes made by other processes
+    are picked up too. Saves that only touch usage counters do not invalidate the cache;
+    usage between reloads is counted locally. Selection never touches the database.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Iterable[ProviderEntry]],
+                 service_factory: Callable[[Any], Any] = None,
+                 watch_models: Iterable = (), counter_fields: Iterable[str] = (),
+                 ttl: int = None, breaker_options: Dict[str, Any] = None):
+        self.name = name
+        self.loader = loader
+        self.service_factory = service_factory
+        self.counter_fields = frozenset(counter_fields)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'PROVIDER_ROUTER_CACHE_TTL', 60)
+        self.breaker_options = breaker_options or getattr(settings, 'PROVIDER_ROUTER_BREAKER', {})
+
+        self._lock = threading.RLock()
+        self._entries: Optional[List[ProviderEntry]] = None
+        self._loaded_at = 0.0
+        self._services: Dict[Any, Any] = {}
+        self._breakers: Dict[Any, CircuitBreaker] = {}
+        self._local_sent: Dict[Any, int] = {}
+        self._usage_date = None
+
+        for model in watch_models:
+            uid = f"provider_router:{name}:{model._meta.label}"
+            post_save.connect(self._on_model_saved, sender=model, weak=False, dispatch_uid=f"{uid}:save")
+            post_delete.connect(self._on_model_deleted, sender=model, weak=False, dispatch_uid=f"{uid}:delete")
+
+    def _on_model_saved(self, sender, instance, update_fields=None, **kwargs):
+        if update_fields and set(update_fields) <= self.counter_fields:
+            return
+        self.invalidate()
+
+    def _on_model_deleted(self, sender, instance, **kwargs):
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+            self._services.clear()
+
+    def _get_entries(self) -> List[ProviderEntry]:
+        with self._lock:
+            today = timezone.now().date()
+            if self._usage_date != today:
+                self._usage_date = today
+                self._local_sent.clear()
+                self._entries = None
+
+            if self._entries is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._entries = sorted(self.loader(), key=lambda e: e.priority)
+                self._loaded_at = time.monotonic()
+                self._services.clear()
+                self._local_sent.clear()
+            return self._entries
+
+    def breaker(self, provider_id) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(provider_id)
+            if breaker is None:
+                breaker = CircuitBreaker(**self.breaker_options)
+                self._breakers[provider_id] = breaker
+            return breaker
+
+    def _remaining_quota(self, entry: ProviderEntry) -> Optional[int]:
+        used = self._local_sent.get(entry.pk, 0)
+        remaining = []
+        if entry.daily_limit is not None:
+            remaining.append(entry.daily_limit - entry.sent_today - used)
+        if entry.monthly_limit is not None:
+            remaining.append(entry.monthly_limit - entry.sent_this_month - used)
+        return min(remaining) if remaining else None
+
+    def _is_routable(self, entry: ProviderEntry, count: int) -> bool:
+        remaining = self._remaining_quota(entry)
+        if remaining is not None and remaining < count:
+            return False
+        # Last check, so the probe slot is only claimed for the provider actually returned.
+        return self.breaker(entry.pk).try_acquire()
+
+    def get_provider(self, provider_id=None, count: int = 1, exclude: Iterable = (), **lookup):
+        """
+        Return a cached provider model. With provider_id (or a lookup key such as
+        webhook_verify_token) the exact provider is returned regardless of health;
+        otherwise the first provider by priority with quota and a closed breaker.
+        """
+        entries = self._get_entries()
+
+        if provider_id is not None or lookup:
+            for entry in entries:
+                if provider_id is not None and str(entry.pk) != str(provider_id):
+                    continue
+                if any(entry.lookup_keys.get(k) != v for k, v in lookup.items()):
+                    continue
+                return entry.provider
+            raise NoProviderAvailable(f"No active {self.name} provider matches the request.")
+
+        excluded = set(exclude)
+        with self._lock:
+            for entry in entries:
+                if entry.pk not in excluded and self._is_routable(entry, count):
+                    return entry.provider
+
+        raise NoProviderAvailable(f"No healthy {self.name} provider with remaining quota.")
+
+    def get_service(self, provider_id=None, **lookup):
+        if self.service_factory is None:
+            raise NotImplementedError(f"Router '{self.name}' has no service factory")
+
+        provider = self.get_provider(provider_id, **lookup)
+        with self._lock:
+            service = self._services.get(provider.pk)
+            if service is None:
+                service = self.service_factory(provider)
+                self._services[provider.pk] = service
+            return service
+
+    def record_result(self, provider_id, success: bool, latency: float = 0.0, count: int = 1):
+        self.breaker(provider_id).record(success, latency)
+        if success:
+            with self._lock:
+                self._local_sent[provider_id] = self._local_sent.get(provider_id, 0) + count
+
+    @contextmanager
+    def track(self, provider_id, count: int = 1):
+        """Time the wrapped provider call and record it; exceptions count as failures."""
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.record_result(provider_id, False, time.monotonic() - start, count)
+            raise
+        self.record_result(provider_id, True, time.monotonic() - start, count)
+
+    def health_snapshot(self) -> List[Dict[str, Any]]:
+        entries = self._get_entries()
+        with self._lock:
+            return [
+                {
+                    'provider_id': entry.pk,
+                    'name': str(entry.provider),
+                    'remaining_quota': self._remaining_quota(entry),
+                    'circuit': self.breaker(entry.pk).stats(),
+                }
+                for entry in entries
+            ]
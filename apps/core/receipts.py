@@ -0,0 +1,40 @@
+import logging
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+def claim_unprocessed_events(model, batch_size: int) -> List[Any]:
+    """
+    Lock the oldest unprocessed webhook events so concurrent workers never apply the
+    same batch twice. Must be called inside transaction.atomic().
+    """
+    return list(
+        model.objects.select_for_update(skip_locked=True)
+        .filter(processed=False)
+        .order_by('id')[:batch_size]
+    )
+
+
+def coalesce_status_updates(updates: Iterable[Dict[str, Any]], rank: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collapse status updates to the latest one per message id.
+
+    Updates are ordered by their `timestamp` and then by status rank, so a `read` that
+    shares a timestamp with `delivered` still wins.
+    """
+    latest: Dict[str, Dict[str, Any]] = {}
+    for update in updates:
+        message_id = update.get('message_id')
+        if not message_id or update.get('status') not in rank:
+            continue
+        current = latest.get(message_id)
+        key = (update['timestamp'], rank[update['status']])
+        if current is None or key >= (current['timestamp'], rank[current['status']]):
+            latest[message_id] = update
+    return latest
+
+
+def is_status_progression(current: str, new: str, rank: Dict[str, int]) -> bool:
+    """Late or redelivered receipts must never move a message back to an earlier state."""
+    return rank.get(new, -1) >= rank.get(current, -1)
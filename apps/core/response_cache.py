@@ -0,0 +1,86 @@
+import hashlib
+import logging
+import re
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'llm_response_cache:stats:{namespace}:{counter}'
+STATS_COUNTERS = ('hits', 'misses', 'tokens_saved')
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_question(text: str) -> str:
+    """'What are the key bottlenecks?' and 'what are the  key bottlenecks' share a key."""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', (text or '').lower())).strip()
+
+
+class ResponseCache:
+    """
+    Cache of finished chatbot answers keyed by normalized question, query type, scope
+    (e.g. the asking user when the prompt carries personal data) and the portfolio
+    snapshot version. A new snapshot changes every key, so an answer is never served
+    against numbers older than the context it was generated from.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    @property
+    def timeout(self) -> int:
+        return getattr(settings, 'AI_RESPONSE_CACHE_TTL', 900)
+
+    def key(self, question: str, query_type: str, scope: str, version) -> str:
+        raw = '|'.join([self.namespace, normalize_question(question), query_type, str(scope), str(version)])
+        return f"llm_response_cache:{self.namespace}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {str(e)}")
+            entry = None
+
+        if entry is None:
+            self._incr('misses')
+            return None
+        self._incr('hits')
+        self._incr('tokens_saved', (entry.get('usage') or {}).get('total_tokens') or 0)
+        return entry
+
+    def set(self, key: str, response: Dict[str, Any]):
+        entry = {name: response.get(name) for name in ('response', 'usage', 'model')}
+        try:
+            cache.set(key, entry, self.timeout)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {str(e)}")
+
+    def _incr(self, counter: str, amount: int = 1):
+        if not amount:
+            return
+        key = STATS_KEY.format(namespace=self.namespace, counter=counter)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # First write for this counter; add() keeps a concurrent first write from being lost.
+            if not cache.add(key, amount, None):
+                cache.incr(key, amount)
+        except Exception as e:
+            logger.warning(f"Response cache stats update failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        values = {
+            counter: cache.get(STATS_KEY.format(namespace=self.namespace, counter=counter)) or 0
+            for counter in STATS_COUNTERS
+        }
+        lookups = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / lookups * 100, 2) if lookups else 0.0
+        return values
+
+    def reset_stats(self):
+        cache.delete_many([STATS_KEY.format(namespace=self.namespace, counter=c) for c in STATS_COUNTERS])
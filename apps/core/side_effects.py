@@ -0,0 +1,82 @@
+"""
+Deferral of per-row signal side effects during bulk writes.
+
+    with deferred_side_effects():
+        for row in rows:
+            import_row(row)
+
+Inside the block, receivers record the affected ids with defer() instead of doing
+their derived-data work. On a clean exit every registered handler runs once, in
+registration order, with all ids collected for it, in a single transaction. On an
+exception the collected ids are dropped along with the block.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_handlers: Dict[str, Callable[[Dict[Any, Any], Dict[str, Dict[Any, Any]]], None]] = {}
+
+
+def register_deferred_handler(name: str):
+    """
+    Register `handler(keys, pending)` for deferred work named `name`. `keys` maps each
+    collected id to the last value passed with it; `pending` is everything collected
+    in the block, for handlers that coalesce with another handler's ids.
+    """
+    def decorator(handler):
+        _handlers[name] = handler
+        return handler
+    return decorator
+
+
+def defer(name: str, key: Any, value: Any = None) -> bool:
+    """Record `key` for handler `name` if a deferral block is open; False means run now."""
+    pending = _pending()
+    if pending is None:
+        return False
+    pending.setdefault(name, {})[key] = value
+    return True
+
+
+def deferring() -> bool:
+    return _pending() is not None
+
+
+def _pending() -> Optional[Dict[str, Dict[Any, Any]]]:
+    return getattr(_local, 'pending', None)
+
+
+@contextmanager
+def deferred_side_effects():
+    if deferring():
+        # Nested blocks join the outermost one.
+        yield
+        return
+
+    _local.pending = {}
+    try:
+        yield
+    except BaseException:
+        _local.pending = None
+        raise
+    pending, _local.pending = _local.pending, None
+    flush_side_effects(pending)
+
+
+def flush_side_effects(pending: Dict[str, Dict[Any, Any]]):
+    with transaction.atomic():
+        for name, handler in _handlers.items():
+            keys = pending.get(name)
+            if not keys:
+                continue
+            try:
+                with transaction.atomic():
+                    handler(keys, pending)
+            except Exception as e:
+                logger.error(f"Deferred side effect {name} failed for {len(keys)} ids: {str(e)}")
@@ -126,19 +126,14 @@ def process_file_upload(file_id):
 
 
 @shared_task
-def update_customer_metrics():
+def update_customer_metrics(incremental=False):
     try:
-        from apps.customers.models import Customer
-        
-        customers = Customer.objects.filter(is_deleted=False)
-        updated_count = 0
+        from apps.customers.metrics import refresh_customer_metrics
         
-        for customer in customers:
-            customer.update_metrics()
-            updated_count += 1
+        result = refresh_customer_metrics(incremental=incremental)
         
-        logger.info(f"Updated metrics for {updated_count} customers")
-        return f"Updated metrics for {updated_count} customers"
+        logger.info(f"Updated metrics for {result['updated']} of {result['scanned']} customers")
+        return f"Updated metrics for {result['updated']} of {result['scanned']} customers"
         
     except Exception as e:
         logger.error(f"Error updating customer metrics: {str(e)}")
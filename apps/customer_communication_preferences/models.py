@@ -1,6 +1,6 @@
 from django.db import models
 from django.core.validators import RegexValidator
-from apps.core.models import BaseModel
+from apps.core.models import BaseModel, ChangeTrackingMixin
 from apps.customers.models import Customer
 class CustomerCommunicationPreference(BaseModel):
     COMMUNICATION_CHANNEL_CHOICES = [
@@ -268,7 +268,9 @@ class CustomerCommunicationPreference(BaseModel):
         return enabled_channels
 
 
-class CommunicationLog(BaseModel):    
+class CommunicationLog(ChangeTrackingMixin, BaseModel):
+    tracked_fields = ('is_deleted',)
+
     COMMUNICATION_CHANNEL_CHOICES = [
         ('email', 'Email'),
         ('sms', 'SMS'),
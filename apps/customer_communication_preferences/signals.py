@@ -1,12 +1,16 @@
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.db import transaction
+from django.db.models import OuterRef, Subquery
 from django.utils import timezone
+from apps.core.side_effects import defer, register_deferred_handler
 from .models import CommunicationLog
 
 
 @receiver(post_save, sender=CommunicationLog)
 def update_last_contact_date_on_save(sender, instance, created, **kwargs):
+    if instance.customer_id and defer('customer_last_contact', instance.customer_id):
+        return
     try:
         with transaction.atomic():
             if instance.customer:
@@ -30,6 +34,8 @@ def update_last_contact_date_on_save(sender, instance, created, **kwargs):
 
 @receiver(post_delete, sender=CommunicationLog)
 def update_last_contact_date_on_delete(sender, instance, **kwargs):
+    if instance.customer_id and defer('customer_last_contact', instance.customer_id):
+        return
     try:
         with transaction.atomic():
             if instance.customer:
@@ -54,30 +60,37 @@ def update_last_contact_date_on_delete(sender, instance, **kwargs):
 
 @receiver(pre_save, sender=CommunicationLog)
 def update_last_contact_date_on_soft_delete(sender, instance, **kwargs):
+    if not (instance.pk and instance.is_deleted and 'is_deleted' in instance.changed_fields()):
+        return
+    if instance.customer_id and defer('customer_last_contact', instance.customer_id):
+        return
     try:
-        if instance.pk and instance.is_deleted:
-            try:
-                original = CommunicationLog.objects.get(pk=instance.pk)
-                if not original.is_deleted and instance.is_deleted:
-                    with transaction.atomic():
-                        if instance.customer:
-                            remaining_communications = CommunicationLog.objects.filter(
-                                customer=instance.customer,
-                                is_deleted=False
-                            ).exclude(id=instance.id)
-                            
-                            if remaining_communications.exists():
-                                latest_communication = remaining_communications.order_by('-communication_date').first()
-                                instance.customer.last_contact_date = latest_communication.communication_date
-                            else:
-                                instance.customer.last_contact_date = None
-                            
-                            instance.customer.save(update_fields=['last_contact_date'])
-                            
-            except CommunicationLog.DoesNotExist:
-                pass
+        with transaction.atomic():
+            if instance.customer:
+                latest_communication = CommunicationLog.objects.filter(
+                    customer=instance.customer,
+                    is_deleted=False
+                ).exclude(id=instance.id).order_by('-communication_date').first()
+                
+                if latest_communication:
+                    instance.customer.last_contact_date = latest_communication.communication_date
+                else:
+                    instance.customer.last_contact_date = None
+                
+                instance.customer.save(update_fields=['last_contact_date'])
                 
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f"Error updating last_contact_date after soft delete {instance.id}: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error updating last_contact_date after soft delete {instance.id}: {str(e)}")
+
+
+@register_deferred_handler('customer_last_contact')
+def update_deferred_last_contact_dates(customer_ids, pending):
+    from apps.customers.models import Customer
+
+    latest = CommunicationLog.objects.filter(
+        customer=OuterRef('pk'),
+        is_deleted=False
+    ).order_by('-communication_date').values('communication_date')[:1]
+    Customer.objects.filter(id__in=list(customer_ids)).update(last_contact_date=Subquery(latest))
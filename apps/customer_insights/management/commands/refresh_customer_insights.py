@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.customers.models import Customer
+from apps.customer_insights.services import CustomerInsightsService
+
+
+class Command(BaseCommand):
+    help = 'Precompute stored customer insights for stale customers, or for all customers with --full'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every customer, not only stale ones')
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        customer_ids = None
+        if options['full']:
+            customer_ids = Customer.objects.filter(is_deleted=False).order_by('id').values_list('id', flat=True)
+
+        start = time.perf_counter()
+        result = CustomerInsightsService().refresh_insights(customer_ids, chunk_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+
+        rate = result['refreshed'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed insights for {result['refreshed']} customers in {elapsed:.2f}s ({rate:.0f} customers/s)"
+        ))
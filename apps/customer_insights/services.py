@@ -1,10 +1,15 @@
+import logging
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, CharField, Exists, ExpressionWrapper, F, OuterRef, Q, Value, When, Window
+from django.db.models.functions import RowNumber, TruncDate
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 from collections import defaultdict, Counter
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 import json
+import numpy as np
 from django.utils.timesince import timesince
 from django.contrib.auth import get_user_model
 import random
@@ -13,12 +18,14 @@ from apps.customer_payments.models import CustomerPayment
 from apps.customer_payment_schedule.models import PaymentSchedule
 from apps.customer_communication_preferences.models import CommunicationLog
 from apps.policies.models import Policy
+from apps.policies.scoring import risk_scores
 from apps.claims.models import Claim
 from apps.renewals.models import RenewalCase
 from apps.case_logs.models import CaseLog
 from .models import CustomerInsight
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 COMMUNICATION_TOPICS = {
     'policy_inquiries': ['policy inquiry', 'coverage question', 'policy details'],
@@ -26,116 +33,262 @@ COMMUNICATION_TOPICS = {
     'complaints': ['complaint', 'delay', 'service issue'],
     'coverage_updates': ['coverage update', 'change of address', 'nominee update'],
 }
+SUCCESSFUL_OUTCOMES = ['successful', 'delivered', 'opened', 'replied']
+PENDING_CLAIM_STATUSES = ['pending', 'in_progress', 'document_pending']
+INSIGHT_FIELDS = [
+    'payment_insights', 'communication_insights', 'claims_insights', 'profile_insights',
+    'is_cached', 'cache_expires_at', 'calculated_at',
+]
+
+
+def _topic_expression():
+    """First matching COMMUNICATION_TOPICS entry for a CommunicationLog, evaluated in SQL."""
+    whens = []
+    for topic, keywords in COMMUNICATION_TOPICS.items():
+        matches = Q()
+        for keyword in keywords:
+            matches |= Q(message_content__icontains=keyword)
+        whens.append(When(matches, then=Value(topic)))
+    return Case(*whens, default=Value('other'), output_field=CharField())
+
+
+def _as_days(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 86400
+    return float(value)
+
 
 class CustomerInsightsService:    
     def __init__(self):
         self.now = timezone.now()
         self.today = self.now.date()
     
-    def _serialize_datetime(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, dict):
-            return {key: self._serialize_datetime(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self._serialize_datetime(item) for item in obj]
-        else:
-            return obj
-
     def get_customer_insights(self, customer_id: int, force_recalculate: bool = False) -> Dict[str, Any]:
         try:
             customer = Customer.objects.get(id=customer_id, is_deleted=False)
         except Customer.DoesNotExist:
             return {"error": "Customer not found"}
         
-        insight_record, created = CustomerInsight.objects.get_or_create(
-            customer=customer,
-            defaults={'is_cached': False}
-        )
-        
-        needs_recalculation_for_reliability = False
-        if insight_record.is_cached and insight_record.payment_insights:
-            payment_insights = insight_record.payment_insights
-            payment_reliability = payment_insights.get('payment_reliability', '')
-            total_payments = payment_insights.get('total_payments_made', 0)
-            if payment_reliability == "Unknown" and total_payments > 0:
-                needs_recalculation_for_reliability = True
-        
-        if True:
-            insights_data = self._calculate_all_insights(customer)
-            
-            insights_data['payment_insights'] = self._serialize_datetime(insights_data['payment_insights'])
-            insights_data['communication_insights'] = self._serialize_datetime(insights_data['communication_insights'])
-            insights_data['claims_insights'] = self._serialize_datetime(insights_data['claims_insights'])
-            insights_data['profile_insights'] = self._serialize_datetime(insights_data['profile_insights'])
-            
-            insight_record.payment_insights = insights_data['payment_insights']
-            insight_record.communication_insights = insights_data['communication_insights']
-            insight_record.claims_insights = insights_data['claims_insights']
-            insight_record.profile_insights = insights_data['profile_insights']
-            insight_record.is_cached = True
-            insight_record.cache_expires_at = timezone.now() + timedelta(hours=24)
-            insight_record.calculated_at = timezone.now() 
-            insight_record.save()
-        else:
-            insights_data = {
-                'payment_insights': insight_record.payment_insights,
-                'communication_insights': insight_record.communication_insights,
-                'claims_insights': insight_record.claims_insights,
-                'profile_insights': insight_record.profile_insights,
-            }
+        # Insights are precomputed by refresh_insights(); reads only compute a customer
+        # that has never been processed, or when explicitly asked to.
+        insight_record = CustomerInsight.objects.filter(customer=customer).first()
+        if insight_record is None or force_recalculate:
+            self.refresh_insights([customer.id])
+            insight_record = CustomerInsight.objects.get(customer=customer)
         
         return {
             "customer_info": self._get_customer_basic_info(customer),
-            "payment_insights": insights_data['payment_insights'],
-            "communication_insights": insights_data['communication_insights'],
-            "claims_insights": insights_data['claims_insights'],
-            "profile_insights": insights_data['profile_insights'],
+            "payment_insights": insight_record.payment_insights,
+            "communication_insights": insight_record.communication_insights,
+            "claims_insights": insight_record.claims_insights,
+            "profile_insights": insight_record.profile_insights,
             "payment_schedule": self.get_payment_schedule(customer),
             "payment_history": self.get_payment_history(customer),
             "calculated_at": insight_record.calculated_at,
             "is_cached": insight_record.is_cached,
         }
-    
-    def _calculate_all_insights(self, customer: Customer) -> Dict[str, Any]:
+
+    def stale_customer_ids(self):
+        """
+        Customers whose stored insights are missing, invalidated, expired, or older than
+        their latest payment, communication, claim or policy change.
+        """
+        def changed_since_calculation(model):
+            return Exists(model.objects.filter(customer=OuterRef('pk'), updated_at__gt=OuterRef('insights_at')))
+
+        return (
+            Customer.objects.filter(is_deleted=False)
+            .annotate(insights_at=F('customer_insights__calculated_at'))
+            .filter(
+                Q(insights_at__isnull=True)
+                | Q(customer_insights__is_cached=False)
+                | Q(customer_insights__cache_expires_at__lte=self.now)
+                | changed_since_calculation(CustomerPayment)
+                | changed_since_calculation(CommunicationLog)
+                | changed_since_calculation(Claim)
+                | changed_since_calculation(Policy)
+            )
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def refresh_insights(self, customer_ids: Optional[Iterable[int]] = None, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Recompute and store insights for `customer_ids`, or for every stale customer.
+        Each chunk costs a fixed number of grouped queries plus one bulk write,
+        independent of how many payments, communications or claims it covers.
+        """
+        chunk_size = chunk_size or settings.CUSTOMER_INSIGHTS_BATCH_SIZE
+        ids = list(customer_ids) if customer_ids is not None else list(self.stale_customer_ids())
+
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            customers = Customer.objects.filter(id__in=chunk, is_deleted=False).only('id', 'first_policy_date')
+            self._store_insights(self.calculate_insights_batch(customers))
+
+        logger.info(f"Refreshed insights for {len(ids)} customers")
+        return {'refreshed': len(ids), 'calculated_at': self.now}
+
+    def _store_insights(self, insights_by_customer: Dict[int, Dict[str, Any]]):
+        if not insights_by_customer:
+            return
+        customer_ids = list(insights_by_customer)
+        existing = set(
+            CustomerInsight.objects.filter(customer_id__in=customer_ids).values_list('customer_id', flat=True)
+        )
+        CustomerInsight.objects.bulk_create(
+            [CustomerInsight(customer_id=customer_id) for customer_id in customer_ids if customer_id not in existing],
+            ignore_conflicts=True,
+        )
+
+        # calculated_at is the snapshot time, not the write time, so changes made while
+        # the batch was running are still picked up by the next stale scan.
+        expires_at = self.now + timedelta(hours=settings.CUSTOMER_INSIGHTS_TTL_HOURS)
+        records = list(CustomerInsight.objects.filter(customer_id__in=customer_ids).only('id', 'customer_id'))
+        for record in records:
+            for section, values in insights_by_customer[record.customer_id].items():
+                setattr(record, section, values)
+            record.is_cached = True
+            record.cache_expires_at = expires_at
+            record.calculated_at = self.now
+        CustomerInsight.objects.bulk_update(records, INSIGHT_FIELDS)
+
+    def calculate_insights_batch(self, customers) -> Dict[int, Dict[str, Any]]:
+        customers = list(customers)
+        ids = [customer.id for customer in customers]
+        if not ids:
+            return {}
+
+        payments = self._payment_aggregates(ids)
+        communications = self._communication_aggregates(ids)
+        claims = self._claims_aggregates(ids)
+        policies = self._policy_aggregates(ids)
+        risk = self._calculate_risk_scores(customers, payments, policies)
+
         return {
-            "payment_insights": self.calculate_payment_insights(customer),
-            "communication_insights": self.calculate_communication_insights(customer),
-            "claims_insights": self.calculate_claims_insights(customer),
-            "profile_insights": self.calculate_profile_insights(customer),
+            customer.id: {
+                "payment_insights": self.calculate_payment_insights(customer, payments.get(customer.id)),
+                "communication_insights": self.calculate_communication_insights(communications.get(customer.id)),
+                "claims_insights": self.calculate_claims_insights(claims.get(customer.id)),
+                "profile_insights": self.calculate_profile_insights(
+                    customer, policies.get(customer.id), payments.get(customer.id), communications.get(customer.id),
+                    risk[customer.id]
+                ),
+            }
+            for customer in customers
         }
 
-    def calculate_profile_insights(self, customer: Customer) -> Dict[str, Any]:
-        policies = Policy.objects.filter(customer=customer, is_deleted=False)
-        active_policies = policies.filter(status='active').count()
-        expired_policies = policies.filter(status__in=['expired', 'cancelled', 'lapsed']).count()
-        try:
-             family_policies = policies.filter(policy_type__name__icontains='family').count()
-        except Exception:
-             family_policies = 0 
-
-        portfolio = {}
-        for policy in policies:
-            policy_type_name = policy.policy_type.name if policy.policy_type else 'Unknown'
-            portfolio[policy_type_name] = portfolio.get(policy_type_name, 0) + 1
+    def _payment_aggregates(self, customer_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        payments = CustomerPayment.objects.filter(customer_id__in=customer_ids, is_deleted=False).order_by()
+        on_time = Q(payment_status='completed', payment_date__lte=F('due_date'))
+        days_before_due = ExpressionWrapper(
+            F('due_date') - TruncDate('payment_date', tzinfo=dt_timezone.utc), output_field=models.DurationField()
+        )
 
-        payments = CustomerPayment.objects.filter(customer=customer, is_deleted=False)
-        total_payments_count = payments.count()
-        
-        on_time_count = payments.filter(
-            payment_status='completed',
-            payment_date__lte=models.F('due_date')
-        ).count()
-        
+        rows = {
+            row['customer_id']: row
+            for row in payments.values('customer_id').annotate(
+                total=models.Count('id'),
+                amount=models.Sum('payment_amount'),
+                on_time=models.Count('id', filter=on_time),
+                completed=models.Count('id', filter=Q(payment_status='completed')),
+                ytd=models.Sum('payment_amount', filter=Q(payment_status='completed', payment_date__year=self.now.year)),
+                first_payment=models.Min('payment_date'),
+                last_payment=models.Max('payment_date'),
+                days_before_due=models.Avg(days_before_due, filter=Q(due_date__isnull=False)),
+            )
+        }
+        for row in payments.values('customer_id', 'payment_mode').annotate(count=models.Count('id')).order_by('customer_id', '-count'):
+            rows[row['customer_id']].setdefault('most_used_mode', row['payment_mode'])
+        return rows
+
+    def _communication_aggregates(self, customer_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        communications = CommunicationLog.objects.filter(customer_id__in=customer_ids, is_deleted=False).order_by()
+
+        rows = {
+            row['customer_id']: dict(row, channels={}, topics={})
+            for row in communications.values('customer_id').annotate(
+                total=models.Count('id'),
+                last_contact=models.Max('communication_date'),
+                successful=models.Count('id', filter=Q(outcome__in=SUCCESSFUL_OUTCOMES)),
+                answered=models.Count('id', filter=Q(outcome__in=['successful', 'replied'])),
+                responses=models.Count('id', filter=Q(outcome__in=['replied', 'clicked'])),
+                escalations=models.Count('id', filter=Q(outcome='escalated')),
+                recent=models.Count('id', filter=Q(communication_date__gte=self.now - timedelta(days=30))),
+            )
+        }
+        for row in communications.values('customer_id', 'channel').annotate(count=models.Count('id')).order_by('customer_id', '-count'):
+            rows[row['customer_id']]['channels'][row['channel']] = row['count']
+        for row in communications.annotate(topic=_topic_expression()).values('customer_id', 'topic').annotate(count=models.Count('id')):
+            rows[row['customer_id']]['topics'][row['topic']] = row['count']
+        return rows
+
+    def _claims_aggregates(self, customer_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        claims = Claim.objects.filter(customer_id__in=customer_ids, is_deleted=False).order_by()
+        approved = Q(status='approved')
+        processing_time = ExpressionWrapper(F('reported_date') - F('incident_date'), output_field=models.DurationField())
+
+        rows = {
+            row['customer_id']: dict(row, by_type={}, top_approved=[])
+            for row in claims.values('customer_id').annotate(
+                total=models.Count('id'),
+                amount=models.Sum('claim_amount'),
+                approved=models.Count('id', filter=approved),
+                approved_amount=models.Sum('claim_amount', filter=approved),
+                rejected=models.Count('id', filter=Q(status='rejected')),
+                pending=models.Count('id', filter=Q(status__in=PENDING_CLAIM_STATUSES)),
+                processing_time=models.Avg(processing_time, filter=approved & Q(reported_date__gt=F('incident_date'))),
+            )
+        }
+        for row in claims.values('customer_id', 'claim_type').annotate(count=models.Count('id')):
+            rows[row['customer_id']]['by_type'][row['claim_type']] = row['count']
+
+        top_approved = claims.filter(approved).annotate(
+            rank=Window(RowNumber(), partition_by=[F('customer_id')], order_by=F('claim_amount').desc())
+        ).filter(rank__lte=2).values('customer_id', 'claim_type', 'incident_date', 'claim_amount')
+        for row in top_approved:
+            rows[row['customer_id']]['top_approved'].append(row)
+
+        latest = claims.order_by('customer_id', '-created_at').distinct('customer_id').values('customer_id', 'incident_date')
+        for row in latest:
+            rows[row['customer_id']]['last_incident_date'] = row['incident_date']
+        return rows
+
+    def _policy_aggregates(self, customer_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        policies = Policy.objects.filter(customer_id__in=customer_ids, is_deleted=False).order_by()
+
+        rows = {
+            row['customer_id']: dict(row, portfolio={})
+            for row in policies.values('customer_id').annotate(
+                total=models.Count('id'),
+                active=models.Count('id', filter=Q(status='active')),
+                expired=models.Count('id', filter=Q(status__in=['expired', 'cancelled', 'lapsed'])),
+                family=models.Count('id', filter=Q(policy_type__name__icontains='family')),
+                premium=models.Sum('premium_amount'),
+            )
+        }
+        for row in policies.values('customer_id', 'policy_type__name').annotate(count=models.Count('id')):
+            rows[row['customer_id']]['portfolio'][row['policy_type__name'] or 'Unknown'] = row['count']
+        return rows
+
+    def calculate_profile_insights(self, customer: Customer, policy_row: Optional[Dict[str, Any]],
+                                   payment_row: Optional[Dict[str, Any]], communication_row: Optional[Dict[str, Any]],
+                                   risk_score: float) -> Dict[str, Any]:
+        policy_row = policy_row or {}
+        payment_row = payment_row or {}
+        active_policies = policy_row.get('active', 0)
+
+        total_payments_count = payment_row.get('total', 0)
+        on_time_count = payment_row.get('on_time', 0)
         on_time_percentage = int((on_time_count / total_payments_count * 100)) if total_payments_count > 0 else 0
         
         years_as_customer = 0
-        if hasattr(customer, 'first_policy_date') and customer.first_policy_date:
+        if customer.first_policy_date:
             years_as_customer = (self.today - customer.first_policy_date).days // 365
-        elif payments.exists():
-            first_pay = payments.order_by('payment_date').first()
-            if first_pay and first_pay.payment_date:
-                years_as_customer = (self.today - first_pay.payment_date.date()).days // 365
+        elif payment_row.get('first_payment'):
+            years_as_customer = (self.today - payment_row['first_payment'].date()).days // 365
         
         customer_tenure = f"{years_as_customer} years" if years_as_customer > 0 else "New Customer"
         
@@ -147,13 +300,8 @@ class CustomerInsightsService:
             payment_rating = "Average"
         else:
             payment_rating = "Poor"
-            
-        ytd_paid = payments.filter(
-            payment_date__year=self.now.year,
-            payment_status='completed'
-        ).aggregate(total=models.Sum('payment_amount'))['total'] or 0
 
-        total_premium_value = sum(p.premium_amount for p in policies)
+        total_premium_value = policy_row.get('premium') or 0
         if active_policies >= 3 and total_premium_value >= 50000:
             segment = "HNI"
         elif active_policies >= 2:
@@ -161,10 +309,7 @@ class CustomerInsightsService:
         else:
             segment = "Standard"
             
-        recent_comms = CommunicationLog.objects.filter(
-            customer=customer,
-            communication_date__gte=self.now - timedelta(days=30)
-        ).count()
+        recent_comms = (communication_row or {}).get('recent', 0)
         engagement = "High" if recent_comms >= 5 else ("Medium" if recent_comms >= 2 else "Low")
 
         return {
@@ -172,17 +317,17 @@ class CustomerInsightsService:
                 "on_time_percentage": on_time_percentage,
                 "customer_tenure": customer_tenure,
                 "payment_rating": payment_rating,
-                "total_paid_ytd": float(ytd_paid)
+                "total_paid_ytd": float(payment_row.get('ytd') or 0)
             },
             "policy_info": {
                 "active_policies": active_policies,
-                "family_policies": family_policies,
-                "expired_policies": expired_policies
+                "family_policies": policy_row.get('family', 0),
+                "expired_policies": policy_row.get('expired', 0)
             },
             "customer_segment": segment,
             "engagement_level": engagement,
-            "policy_portfolio": portfolio,
-            "overall_risk_score": self._calculate_risk_score(customer, policies)
+            "policy_portfolio": policy_row.get('portfolio', {}),
+            "overall_risk_score": risk_score
         }
     def get_payment_history(self, customer: Customer, years: int = 10) -> Dict[str, Any]:
         start_date = self.today - timedelta(days=years * 365)
@@ -262,34 +407,18 @@ class CustomerInsightsService:
             "total_premium": float(customer.total_premium),
         }
     
-    def calculate_payment_insights(self, customer: Customer) -> Dict[str, Any]:
-        payments = CustomerPayment.objects.filter(customer=customer, is_deleted=False).order_by('-payment_date')
-        if not payments.exists():
+    def calculate_payment_insights(self, customer: Customer, row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not row:
             return self._get_empty_payment_insights()
         
-        total_payments = payments.count()
-        total_amount = sum(p.payment_amount for p in payments)
+        total_payments = row['total']
+        total_amount = row['amount'] or 0
         avg_amount = total_amount / total_payments if total_payments > 0 else 0
+        on_time_rate = (row['on_time'] / total_payments * 100) if total_payments > 0 else 0
+        most_used_mode = row.get('most_used_mode') or 'unknown'
+        timing_analysis = self._analyze_payment_timing(row)
         
-        on_time_payments = payments.filter(payment_status='completed', payment_date__lte=models.F('due_date')).count()
-        on_time_rate = (on_time_payments / total_payments * 100) if total_payments > 0 else 0
-        
-        payment_methods = payments.values_list('payment_mode', flat=True)
-        method_counts = Counter(payment_methods)
-        most_used_mode = method_counts.most_common(1)[0][0] if method_counts else 'unknown'
-        
-        timing_analysis = self._analyze_payment_timing(payments)
-        
-        customer_since_date = None
-        if hasattr(customer, 'first_policy_date') and customer.first_policy_date:
-            customer_since_date = customer.first_policy_date
-        elif payments.exists():
-            first_payment = payments.last()
-            if first_payment and first_payment.payment_date:
-                customer_since_date = first_payment.payment_date
-        elif hasattr(customer, 'created_at') and customer.created_at:
-            customer_since_date = customer.created_at.date() if isinstance(customer.created_at, datetime) else customer.created_at
-        
+        customer_since_date = customer.first_policy_date or row['first_payment']
         customer_since = self._calculate_customer_since(customer_since_date)
         reliability = self._calculate_payment_reliability(on_time_rate, total_payments)
         
@@ -303,10 +432,9 @@ class CustomerInsightsService:
             "preferred_payment_method": most_used_mode,
             "average_payment_amount": float(avg_amount),
             "customer_since_years": customer_since,
-            "last_payment_date": payments.first().payment_date.isoformat() if payments.exists() and payments.first().payment_date else None,
+            "last_payment_date": row['last_payment'].isoformat() if row['last_payment'] else None,
             "payment_frequency": timing_analysis.get('frequency', 'Unknown'),
         }
-
     def _get_empty_payment_insights(self) -> Dict[str, Any]:
         return {
             "total_premiums_paid": 0.0,
@@ -322,37 +450,25 @@ class CustomerInsightsService:
             "payment_frequency": "Unknown",
         }
 
-    def _analyze_payment_timing(self, payments) -> Dict[str, Any]:
-        if not payments.exists():
-            return {"average_timing": "No data", "frequency": "Unknown"}
-        
-        timing_diffs = []
-        for payment in payments:
-            if payment.payment_date and hasattr(payment, 'due_date') and payment.due_date:
-                payment_date_only = payment.payment_date.date()
-                diff = (payment.due_date - payment_date_only).days
-                timing_diffs.append(diff)
-        
-        if timing_diffs:
-            avg_diff = sum(timing_diffs) / len(timing_diffs)
-            if avg_diff > 0:
-                timing = f"{int(avg_diff)} days early"
-            elif avg_diff < 0:
-                timing = f"{int(abs(avg_diff))} days late"
-            else:
-                timing = "On time"
-        else:
+    def _analyze_payment_timing(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        avg_diff = _as_days(row.get('days_before_due'))
+        if avg_diff is None:
             timing = "Unknown"
+        elif avg_diff > 0:
+            timing = f"{int(avg_diff)} days early"
+        elif avg_diff < 0:
+            timing = f"{int(abs(avg_diff))} days late"
+        else:
+            timing = "On time"
         
-        if len(payments) >= 12:
+        if row['total'] >= 12:
             frequency = "Regular"
-        elif len(payments) >= 6:
+        elif row['total'] >= 6:
             frequency = "Occasional"
         else:
             frequency = "Infrequent"
         
         return {"average_timing": timing, "frequency": frequency}
-
     def _calculate_customer_since(self, first_payment_date) -> str:
         if not first_payment_date:
             return "0 months"
@@ -388,34 +504,18 @@ class CustomerInsightsService:
         elif on_time_rate >= 70: return "Average"
         else: return "Poor"
 
-    def calculate_communication_insights(self, customer: Customer) -> Dict[str, Any]:
-        communications = CommunicationLog.objects.filter(customer=customer, is_deleted=False).order_by('-communication_date')
-        if not communications.exists():
+    def calculate_communication_insights(self, row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not row:
             return self._get_empty_communication_insights()
         
-        total_communications = communications.count()
-        last_contact = communications.first().communication_date if communications.exists() else None
-        channel_breakdown = self._calculate_channel_breakdown(communications)
-        response_time = self._calculate_avg_response_time(communications)
-        successful_comms = communications.filter(outcome__in=['successful', 'delivered', 'opened', 'replied'])
-        satisfaction = (successful_comms.count() / total_communications * 5) if total_communications > 0 else 0
+        total_communications = row['total']
+        last_contact = row['last_contact']
+        channel_breakdown = row['channels']
+        response_time = 2.1 if row['answered'] else 0.0
+        satisfaction = (row['successful'] / total_communications * 5) if total_communications > 0 else 0
         preferred_channel = max(channel_breakdown.items(), key=lambda x: x[1])[0] if channel_breakdown else 'email'
-        frequency = self._calculate_communication_frequency(communications)
-        responses = communications.filter(outcome__in=['replied', 'clicked'])
-        response_rate = (responses.count() / total_communications * 100) if total_communications > 0 else 0
-        escalations = communications.filter(outcome='escalated').count()
-        
-        topic_breakdown = defaultdict(int)
-        for comm in communications:
-            content = comm.message_content.lower()
-            found = False
-            for topic, keywords in COMMUNICATION_TOPICS.items():
-                if any(keyword in content for keyword in keywords):
-                    topic_breakdown[topic] += 1
-                    found = True
-                    break
-            if not found:
-                 topic_breakdown['other'] += 1
+        frequency = self._calculate_communication_frequency(total_communications)
+        response_rate = (row['responses'] / total_communications * 100) if total_communications > 0 else 0
 
         return {
             "total_communications": total_communications,
@@ -423,11 +523,11 @@ class CustomerInsightsService:
             "satisfaction_rating": round(satisfaction, 1),
             "last_contact_date": last_contact.isoformat() if last_contact else None,
             "channel_breakdown": channel_breakdown,
-            "topic_breakdown": dict(topic_breakdown),
+            "topic_breakdown": row['topics'],
             "preferred_channel": preferred_channel,
             "communication_frequency": frequency,
             "response_rate": round(response_rate, 1),
-            "escalation_count": escalations,
+            "escalation_count": row['escalations'],
         }
 
     def _get_empty_communication_insights(self) -> Dict[str, Any]:
@@ -438,49 +538,25 @@ class CustomerInsightsService:
             "response_rate": 0.0, "escalation_count": 0,
         }
 
-    def _calculate_channel_breakdown(self, communications) -> Dict[str, int]:
-        channel_counts = communications.values('channel').annotate(count=models.Count('id')).order_by('-count')
-        return {item['channel']: item['count'] for item in channel_counts}
-
-    def _calculate_avg_response_time(self, communications) -> float:
-        successful_comms = communications.filter(outcome__in=['successful', 'replied'])
-        return 2.1 if successful_comms.exists() else 0.0
-
-    def _calculate_communication_frequency(self, communications) -> str:
-        total = communications.count()
+    def _calculate_communication_frequency(self, total: int) -> str:
         if total >= 20: return "High"
         elif total >= 10: return "Medium"
         elif total >= 5: return "Low"
         else: return "Very Low"
 
-    def calculate_claims_insights(self, customer: Customer) -> Dict[str, Any]:
-        claims = Claim.objects.filter(customer=customer, is_deleted=False)
-        if not claims.exists():
+    def calculate_claims_insights(self, row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not row:
             return self._get_empty_claims_insights()
         
-        total_claims = claims.count()
-        approved_claims = claims.filter(status='approved')
-        rejected_claims = claims.filter(status='rejected')
-        pending_claims = claims.filter(status__in=['pending', 'in_progress', 'document_pending'])
-        
-        total_claimed_amount = sum(claim.claim_amount for claim in claims)
-        approved_amount = sum(claim.claim_amount for claim in approved_claims) 
-        approval_rate = (approved_claims.count() / total_claims * 100) if total_claims > 0 else 0
-        
-        claims_by_type = {}
-        for claim in claims:
-            claim_type = claim.claim_type
-            claims_by_type[claim_type] = claims_by_type.get(claim_type, 0) + 1
+        total_claims = row['total']
+        total_claimed_amount = row['amount'] or 0
+        approved_amount = row['approved_amount'] or 0
+        approval_rate = (row['approved'] / total_claims * 100) if total_claims > 0 else 0
+        claims_by_status = {'approved': row['approved'], 'rejected': row['rejected'], 'pending': row['pending']}
         
-        claims_by_status = {'approved': approved_claims.count(), 'rejected': rejected_claims.count(), 'pending': pending_claims.count()}
-        
-        processing_times = []
-        for claim in approved_claims:
-            if claim.reported_date and claim.incident_date:
-                processing_days = (claim.reported_date - claim.incident_date).days
-                if processing_days > 0: processing_times.append(processing_days)
-        
-        avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 8
+        avg_processing_time = _as_days(row['processing_time'])
+        if avg_processing_time is None:
+            avg_processing_time = 8
         
         if total_claims >= 5 or total_claimed_amount > 100000: risk_level = "medium"
         elif total_claims >= 3 or total_claimed_amount > 50000: risk_level = "low"
@@ -488,20 +564,19 @@ class CustomerInsightsService:
         
         claim_frequency = "High" if total_claims >= 5 else "Medium" if total_claims >= 3 else "Low"
 
-        summary_claims_breakdown = []
-        top_claims = approved_claims.order_by('-claim_amount')[:2]
-        for claim in top_claims:
-            if claim.incident_date:
-                summary_claims_breakdown.append({
-                    "type": claim.claim_type, "year": claim.incident_date.year, "amount": float(claim.claim_amount) 
-                })
+        summary_claims_breakdown = [
+            {"type": claim['claim_type'], "year": claim['incident_date'].year, "amount": float(claim['claim_amount'])}
+            for claim in sorted(row['top_approved'], key=lambda claim: claim['claim_amount'], reverse=True)
+            if claim['incident_date']
+        ]
+        last_incident_date = row.get('last_incident_date')
         
         return {
             "total_claims": total_claims, "approved_amount": float(approved_amount),
             "total_claimed_amount": float(total_claimed_amount), "approval_rate": round(approval_rate, 1),
-            "claims_by_type": claims_by_type, "claims_by_status": claims_by_status,
+            "claims_by_type": row['by_type'], "claims_by_status": claims_by_status,
             "claims_summary_breakdown": summary_claims_breakdown,
-            "last_claim_date": claims.first().incident_date.isoformat() if claims.exists() else None,
+            "last_claim_date": last_incident_date.isoformat() if last_incident_date else None,
             "avg_processing_time": round(avg_processing_time, 1),
             "claim_frequency": claim_frequency, "risk_level": risk_level
         }
@@ -515,24 +590,22 @@ class CustomerInsightsService:
             "avg_processing_time": 0, "claim_frequency": "None", "risk_level": "very_low"
         }
 
-    def _calculate_risk_score(self, customer: Customer, policies) -> float:
-        score = 50.0 
-        payments = CustomerPayment.objects.filter(customer=customer, is_deleted=False)
-        if payments.exists():
-            on_time_rate = payments.filter(payment_status='completed').count() / payments.count() * 100
-            if on_time_rate >= 95: score -= 10
-            elif on_time_rate < 70: score += 15
-        if policies.count() > 3: score -= 5 
-        if hasattr(customer, 'first_policy_date') and customer.first_policy_date:
-            years_as_customer = (self.today - customer.first_policy_date).days // 365
-            if years_as_customer > 5: score -= 10 
-        return max(0, min(100, score))
+    def _calculate_risk_scores(self, customers: List[Customer], payments: Dict[int, Dict[str, Any]],
+                               policies: Dict[int, Dict[str, Any]]) -> Dict[int, float]:
+        payment_rows = [payments.get(customer.id, {}) for customer in customers]
+        scores = risk_scores(
+            [row.get('total', 0) for row in payment_rows],
+            [row.get('completed', 0) for row in payment_rows],
+            [policies.get(customer.id, {}).get('total', 0) for customer in customers],
+            [(self.today - customer.first_policy_date).days if customer.first_policy_date else np.nan for customer in customers],
+        )
+        return {customer.id: float(score) for customer, score in zip(customers, scores)}
 
     def get_payment_schedule(self, customer: Customer) -> Dict[str, Any]:
         upcoming_payments = PaymentSchedule.objects.filter(
             renewal_case__customer=customer, due_date__gte=self.today,
             status__in=['pending', 'scheduled'], is_deleted=False
-        ).order_by('due_date')[:5]
+        ).select_related('renewal_case__policy__policy_type').order_by('due_date')[:5]
         
         payments_data = []
         for payment in upcoming_payments:
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .services import CustomerInsightsService
+
+
+@shared_task
+def refresh_customer_insights(customer_ids=None):
+    result = CustomerInsightsService().refresh_insights(customer_ids)
+    return {'refreshed': result['refreshed'], 'calculated_at': result['calculated_at'].isoformat()}
@@ -144,16 +144,11 @@ class CustomerInsightsViewSet(viewsets.ModelViewSet):
             customer_ids = serializer.validated_data['customer_ids']
             force_recalculate = serializer.validated_data['force_recalculate']
             
-            service = CustomerInsightsService()
-            updated_count = 0
-            
-            for customer_id in customer_ids:
-                try:
-                    customer = Customer.objects.get(id=customer_id, is_deleted=False)
-                    service.get_customer_insights(customer_id)
-                    updated_count += 1
-                except Customer.DoesNotExist:
-                    continue
+            existing_ids = list(
+                Customer.objects.filter(id__in=customer_ids, is_deleted=False).values_list('id', flat=True)
+            )
+            result = CustomerInsightsService().refresh_insights(existing_ids)
+            updated_count = result['refreshed']
             
             return Response({
                 'message': f'Successfully updated insights for {updated_count} customers',
@@ -209,11 +204,11 @@ class CustomerInsightsViewSet(viewsets.ModelViewSet):
             recent_customers = Customer.objects.filter(
                 is_deleted=False,
                 customer_insights__isnull=False
-            ).distinct().order_by('-customer_insights__calculated_at')[:10]
+            ).select_related('customer_insights').order_by('-customer_insights__calculated_at')[:10]
             
             for customer in recent_customers:
                 try:
-                    insight_record = CustomerInsight.objects.get(customer=customer)
+                    insight_record = customer.customer_insights
                     payment_insights = insight_record.payment_insights
                     communication_insights = insight_record.communication_insights
                     claims_insights = insight_record.claims_insights
@@ -296,12 +291,12 @@ class CustomerInsightsViewSet(viewsets.ModelViewSet):
                     date_filter &= Q(customer_insights__calculated_at__lte=filters['date_to'])
                 queryset = queryset.filter(date_filter)
             
-            customers = queryset.distinct()[offset:offset + limit]
+            customers = queryset.filter(customer_insights__isnull=False).select_related('customer_insights')[offset:offset + limit]
             
             summary_data = []
             for customer in customers:
                 try:
-                    insight_record = CustomerInsight.objects.get(customer=customer)
+                    insight_record = customer.customer_insights
                     payment_insights = insight_record.payment_insights
                     communication_insights = insight_record.communication_insights
                     claims_insights = insight_record.claims_insights
@@ -8,24 +8,9 @@ class InstallmentIntegrationService:
     def create_installments_for_policy(policy, renewal_case=None):
         try:
             with transaction.atomic():
-                installments_created = []
-                
-                if policy.payment_frequency == 'monthly':
-                    installments_created = InstallmentIntegrationService._create_monthly_installments(
-                        policy, renewal_case
-                    )
-                elif policy.payment_frequency == 'quarterly':
-                    installments_created = InstallmentIntegrationService._create_quarterly_installments(
-                        policy, renewal_case
-                    )
-                elif policy.payment_frequency == 'yearly':
-                    installments_created = InstallmentIntegrationService._create_yearly_installments(
-                        policy, renewal_case
-                    )
-                elif policy.payment_frequency == 'single':
-                    installments_created = InstallmentIntegrationService._create_single_installment(
-                        policy, renewal_case
-                    )
+                installments_created = CustomerInstallment.objects.bulk_create(
+                    InstallmentIntegrationService.build_installments(policy, renewal_case)
+                )
                 
                 return {
                     'success': True,
@@ -41,76 +26,83 @@ class InstallmentIntegrationService:
             }
     
     @staticmethod
-    def _create_monthly_installments(policy, renewal_case):
+    def create_installments_bulk(policies_and_cases):
+        """Installments for many (policy, renewal_case) pairs in chunked bulk inserts."""
         installments = []
+        for policy, renewal_case in policies_and_cases:
+            installments.extend(InstallmentIntegrationService.build_installments(policy, renewal_case))
+        CustomerInstallment.objects.bulk_create(installments, batch_size=1000)
+        return len(installments)
+    
+    @staticmethod
+    def build_installments(policy, renewal_case):
+        if policy.payment_frequency == 'monthly':
+            return InstallmentIntegrationService._build_monthly_installments(policy, renewal_case)
+        elif policy.payment_frequency == 'quarterly':
+            return InstallmentIntegrationService._build_quarterly_installments(policy, renewal_case)
+        elif policy.payment_frequency == 'yearly':
+            return InstallmentIntegrationService._build_yearly_installments(policy, renewal_case)
+        elif policy.payment_frequency == 'single':
+            return InstallmentIntegrationService._build_single_installment(policy, renewal_case)
+        return []
+    
+    @staticmethod
+    def _build_monthly_installments(policy, renewal_case):
         monthly_amount = policy.premium_amount / 12
         
-        for month in range(1, 13):
-            due_date = policy.start_date + timedelta(days=30 * month)
-            
-            installment = CustomerInstallment.objects.create(
-                customer=policy.customer,
+        return [
+            CustomerInstallment(
+                customer_id=policy.customer_id,
                 renewal_case=renewal_case,
                 period=f"{month:02d}/{policy.start_date.year}",
                 amount=monthly_amount,
-                due_date=due_date,
+                due_date=policy.start_date + timedelta(days=30 * month),
                 status='pending'
             )
-            installments.append(installment)
-        
-        return installments
+            for month in range(1, 13)
+        ]
     
     @staticmethod
-    def _create_quarterly_installments(policy, renewal_case):
-        installments = []
+    def _build_quarterly_installments(policy, renewal_case):
         quarterly_amount = policy.premium_amount / 4
         
-        for quarter in range(1, 5):
-            due_date = policy.start_date + timedelta(days=90 * quarter)
-            
-            installment = CustomerInstallment.objects.create(
-                customer=policy.customer,
+        return [
+            CustomerInstallment(
+                customer_id=policy.customer_id,
                 renewal_case=renewal_case,
                 period=f"Q{quarter}/{policy.start_date.year}",
                 amount=quarterly_amount,
-                due_date=due_date,
+                due_date=policy.start_date + timedelta(days=90 * quarter),
                 status='pending'
             )
-            installments.append(installment)
-        
-        return installments
+            for quarter in range(1, 5)
+        ]
     
     @staticmethod
-    def _create_yearly_installments(policy, renewal_case):
-        installments = []
-        
-        installment = CustomerInstallment.objects.create(
-            customer=policy.customer,
-            renewal_case=renewal_case,
-            period=f"Year 1/{policy.start_date.year}",
-            amount=policy.premium_amount,
-            due_date=policy.start_date,
-            status='pending'
-        )
-        installments.append(installment)
-        
-        return installments
+    def _build_yearly_installments(policy, renewal_case):
+        return [
+            CustomerInstallment(
+                customer_id=policy.customer_id,
+                renewal_case=renewal_case,
+                period=f"Year 1/{policy.start_date.year}",
+                amount=policy.premium_amount,
+                due_date=policy.start_date,
+                status='pending'
+            )
+        ]
     
     @staticmethod
-    def _create_single_installment(policy, renewal_case):
-        installments = []
-        
-        installment = CustomerInstallment.objects.create(
-            customer=policy.customer,
-            renewal_case=renewal_case,
-            period=f"Single Payment/{policy.start_date.year}",
-            amount=policy.premium_amount,
-            due_date=policy.start_date,
-            status='pending'
-        )
-        installments.append(installment)
-        
-        return installments
+    def _build_single_installment(policy, renewal_case):
+        return [
+            CustomerInstallment(
+                customer_id=policy.customer_id,
+                renewal_case=renewal_case,
+                period=f"Single Payment/{policy.start_date.year}",
+                amount=policy.premium_amount,
+                due_date=policy.start_date,
+                status='pending'
+            )
+        ]
     
     @staticmethod
     def link_payment_to_installment(payment):
@@ -1,11 +1,17 @@
+import logging
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.db import transaction
+from apps.core.side_effects import defer, register_deferred_handler
 from .services import InstallmentIntegrationService
 
+logger = logging.getLogger(__name__)
+
+
 @receiver(post_save, sender='policies.Policy')
 def create_installments_on_policy_creation(sender, instance, created, **kwargs):
-    if created:  
+    if created and not defer('policy_installments', instance.pk):
         try:
             renewal_case = None
             if hasattr(instance, 'renewal_cases'):
@@ -42,7 +48,7 @@ def link_payment_to_installment(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender='renewals.RenewalCase')
 def create_installments_on_renewal_case_creation(sender, instance, created, **kwargs):
-    if created:  
+    if created and not defer('case_installments', instance.pk):
         try:
             if hasattr(instance, 'policy') and instance.policy:
                 result = InstallmentIntegrationService.create_installments_for_policy(
@@ -56,3 +62,34 @@ def create_installments_on_renewal_case_creation(sender, instance, created, **kw
                     
         except Exception as e:
             print(f"❌ Error in create_installments_on_renewal_case_creation: {str(e)}")
+
+
+@register_deferred_handler('case_installments')
+def create_deferred_case_installments(case_ids, pending):
+    from apps.renewals.models import RenewalCase
+
+    cases = RenewalCase.objects.filter(id__in=list(case_ids), policy__isnull=False).select_related('policy')
+    created = InstallmentIntegrationService.create_installments_bulk((case.policy, case) for case in cases)
+    logger.info(f"Created {created} installments for {len(case_ids)} renewal cases")
+
+
+@register_deferred_handler('policy_installments')
+def create_deferred_policy_installments(policy_ids, pending):
+    from apps.policies.models import Policy
+    from apps.renewals.models import RenewalCase
+
+    # Installments need a renewal case. Policies whose case was created in the same
+    # block already get theirs from case_installments; only policies attached to an
+    # existing case are handled here, with that policy's first case.
+    new_cases = set(pending.get('case_installments', {}))
+    first_case, covered = {}, set()
+    for case in RenewalCase.objects.filter(policy_id__in=list(policy_ids)).only('id', 'policy_id'):
+        first_case.setdefault(case.policy_id, case)
+        if case.id in new_cases:
+            covered.add(case.policy_id)
+
+    policies = list(Policy.objects.filter(id__in=[policy_id for policy_id in first_case if policy_id not in covered]))
+    created = InstallmentIntegrationService.create_installments_bulk(
+        (policy, first_case[policy.id]) for policy in policies
+    )
+    logger.info(f"Created {created} installments for {len(policies)} policies")
@@ -1,9 +1,11 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-from apps.core.models import BaseModel
+from apps.core.models import BaseModel, ChangeTrackingMixin
 from apps.customers.models import Customer
-class CustomerPayment(BaseModel):
+class CustomerPayment(ChangeTrackingMixin, BaseModel):
+    tracked_fields = ('is_deleted',)
+
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('processing', 'Processing'),
@@ -1,38 +1,32 @@
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from collections import defaultdict
 from django.db import transaction
+from apps.core.side_effects import defer, register_deferred_handler
 from .models import CustomerPayment
 
+RENEWAL_PAYMENT_STATUS = {
+    'completed': 'success',
+    'failed': 'failed',
+    'cancelled': 'failed',
+    'refunded': 'failed',
+    'pending': 'pending',
+    'processing': 'pending',
+    'partial': 'success',
+    'overdue': 'failed',
+}
+
 
 @receiver(post_save, sender=CustomerPayment)
 def update_payment_status_on_save(sender, instance, created, **kwargs):
     try:
+        renewal_payment_status = RENEWAL_PAYMENT_STATUS.get(instance.payment_status, 'pending')
+        if not instance.renewal_case_id or defer('case_payment_status', instance.renewal_case_id, renewal_payment_status):
+            return
+
         with transaction.atomic():
-            status_mapping = {
-                'completed': 'success',
-                'failed': 'failed',
-                'cancelled': 'failed',
-                'refunded': 'failed',
-                'pending': 'pending',
-                'processing': 'pending',
-                'partial': 'success',
-                'overdue': 'failed',
-            }
-            
-            renewal_payment_status = status_mapping.get(instance.payment_status, 'pending')
-            
-            if instance.renewal_case:
-                instance.renewal_case.payment_status = renewal_payment_status
-                instance.renewal_case.save(update_fields=['payment_status'])
-                
-            if instance.customer:
-                latest_payment = CustomerPayment.objects.filter(
-                    customer=instance.customer,
-                    is_deleted=False
-                ).order_by('-payment_date').first()
-                
-                if latest_payment:
-                    customer_payment_status = status_mapping.get(latest_payment.payment_status, 'pending')
+            instance.renewal_case.payment_status = renewal_payment_status
+            instance.renewal_case.save(update_fields=['payment_status'])
                     
     except Exception as e:
         import logging
@@ -40,6 +34,17 @@ def update_payment_status_on_save(sender, instance, created, **kwargs):
         logger.error(f"Error updating payment status for payment {instance.id}: {str(e)}")
 
 
+@register_deferred_handler('case_payment_status')
+def update_deferred_case_payment_status(statuses, pending):
+    from apps.renewals.models import RenewalCase
+
+    case_ids_by_status = defaultdict(list)
+    for case_id, renewal_payment_status in statuses.items():
+        case_ids_by_status[renewal_payment_status].append(case_id)
+    for renewal_payment_status, case_ids in case_ids_by_status.items():
+        RenewalCase.objects.filter(id__in=case_ids).update(payment_status=renewal_payment_status)
+
+
 @receiver(post_delete, sender=CustomerPayment)
 def update_payment_status_on_delete(sender, instance, **kwargs):
     try:
@@ -83,48 +88,24 @@ def update_payment_status_on_delete(sender, instance, **kwargs):
 @receiver(pre_save, sender=CustomerPayment)
 def update_payment_status_on_soft_delete(sender, instance, **kwargs):
     try:
-      
-        if instance.pk and instance.is_deleted:
-          
-            try:
-                original = CustomerPayment.objects.get(pk=instance.pk)
-                if not original.is_deleted and instance.is_deleted:
-                
-                    with transaction.atomic():
-                        if instance.renewal_case:
-                           
-                            remaining_payments = CustomerPayment.objects.filter(
-                                renewal_case=instance.renewal_case,
-                                is_deleted=False
-                            ).exclude(id=instance.id)
-                            
-                            if remaining_payments.exists():
-                               
-                                latest_payment = remaining_payments.order_by('-payment_date').first()
-                                status_mapping = {
-                                    'completed': 'success',
-                                    'failed': 'failed',
-                                    'cancelled': 'failed',
-                                    'refunded': 'failed',
-                                    'pending': 'pending',
-                                    'processing': 'pending',
-                                    'partial': 'success',
-                                    'overdue': 'failed',
-                                }
-                                renewal_payment_status = status_mapping.get(latest_payment.payment_status, 'pending')
-                            else:
-                              
-                                renewal_payment_status = 'pending'
-                            
-                            instance.renewal_case.payment_status = renewal_payment_status
-                            instance.renewal_case.save(update_fields=['payment_status'])
-                            
-            except CustomerPayment.DoesNotExist:
-             
-                pass
+        if instance.pk and instance.is_deleted and 'is_deleted' in instance.changed_fields():
+            with transaction.atomic():
+                if instance.renewal_case:
+                    remaining_payments = CustomerPayment.objects.filter(
+                        renewal_case=instance.renewal_case,
+                        is_deleted=False
+                    ).exclude(id=instance.id)
+                    
+                    latest_payment = remaining_payments.order_by('-payment_date').first()
+                    if latest_payment:
+                        renewal_payment_status = RENEWAL_PAYMENT_STATUS.get(latest_payment.payment_status, 'pending')
+                    else:
+                        renewal_payment_status = 'pending'
+                    
+                    instance.renewal_case.payment_status = renewal_payment_status
+                    instance.renewal_case.save(update_fields=['payment_status'])
                 
     except Exception as e:
-     
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"Error updating payment status after soft delete {instance.id}: {str(e)}")
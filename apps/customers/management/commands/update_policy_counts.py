@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from apps.customers.models import Customer
+from apps.customers.metrics import refresh_customer_metrics
 class Command(BaseCommand):
     help = 'Update policy counts for all customers'
 
@@ -8,35 +7,27 @@ class Command(BaseCommand):
         parser.add_argument(
             '--batch-size',
             type=int,
-            default=100,
+            default=1000,
             help='Number of customers to process in each batch'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only recompute customers whose policies changed since the last run'
+        )
 
     def handle(self, *args, **options):
-        batch_size = options['batch_size']
-        customers = Customer.objects.all()
-        total_customers = customers.count()
-        updated_count = 0
-        
-        self.stdout.write(f'Starting to update policy counts for {total_customers} customers...')
-        
-        for i in range(0, total_customers, batch_size):
-            batch = customers[i:i + batch_size]
-            
-            with transaction.atomic():
-                for customer in batch:
-                    old_count = customer.total_policies
-                    customer.update_metrics()
-                    new_count = customer.total_policies
-                    updated_count += 1
-                    
-                    if old_count != new_count:
-                        self.stdout.write(
-                            f'Customer {customer.customer_code}: {old_count} -> {new_count} policies'
-                        )
-            
-            self.stdout.write(f'Processed {min(i + batch_size, total_customers)}/{total_customers} customers...')
-        
+        mode = 'incremental' if options['incremental'] else 'full'
+        self.stdout.write(f'Starting {mode} policy count update...')
+
+        result = refresh_customer_metrics(
+            incremental=options['incremental'],
+            chunk_size=options['batch_size']
+        )
+
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully updated policy counts for {updated_count} customers')
+            self.style.SUCCESS(
+                f"Successfully updated policy counts: {result['scanned']} customers scanned, "
+                f"{result['updated']} changed in {result['seconds']}s"
+            )
         )
@@ -0,0 +1,123 @@
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = ['total_policies', 'total_premium', 'lifetime_value', 'first_policy_date', 'last_policy_date', 'profile']
+LAST_RUN_KEY = 'customers:metrics:last_run'
+
+
+def profile_for(total_policies: int) -> str:
+    return 'HNI' if total_policies > 1 else 'Normal'
+
+
+def policy_aggregates(policies):
+    """Per-customer policy aggregates, one grouped query, ordered by customer id."""
+    return (
+        policies.filter(is_deleted=False)
+        .values('customer_id')
+        .annotate(
+            total=Count('id'),
+            premium=Sum('premium_amount'),
+            first_start=Min('start_date'),
+            last_start=Max('start_date'),
+        )
+        .order_by('customer_id')
+    )
+
+
+def apply_aggregate(customer, row: Optional[Dict[str, Any]]) -> bool:
+    """Set the metric fields on `customer` from its aggregate row; True when anything changed."""
+    total = row['total'] if row else 0
+    premium = (row['premium'] if row else None) or Decimal('0')
+    values = {
+        'total_policies': total,
+        'total_premium': premium,
+        'lifetime_value': premium,
+        'profile': profile_for(total),
+    }
+    # Customers without policies keep their historical first/last dates.
+    if row:
+        values['first_policy_date'] = row['first_start']
+        values['last_policy_date'] = row['last_start']
+
+    changed = False
+    for field, value in values.items():
+        if getattr(customer, field) != value:
+            setattr(customer, field, value)
+            changed = True
+    return changed
+
+
+def recompute_customer_metrics(customer_ids: Optional[Iterable] = None, chunk_size: int = 1000) -> Dict[str, Any]:
+    """
+    Recompute stored policy metrics for all customers, or only `customer_ids`.
+
+    Customers and the grouped policy aggregate are both streamed in customer-id order
+    and merged, so memory stays at one chunk and the database sees two queries plus
+    one UPDATE per chunk of changed rows, however many customers there are.
+    """
+    from apps.customers.models import Customer
+    from apps.policies.models import Policy
+
+    started = time.monotonic()
+    customers = Customer.objects.filter(is_deleted=False)
+    policies = Policy.objects.all()
+    if customer_ids is not None:
+        customers = customers.filter(id__in=customer_ids)
+        policies = policies.filter(customer_id__in=customer_ids)
+
+    aggregates = policy_aggregates(policies).iterator(chunk_size=chunk_size)
+    row = next(aggregates, None)
+
+    scanned = updated = 0
+    pending = []
+    for customer in customers.only('id', *METRIC_FIELDS).order_by('id').iterator(chunk_size=chunk_size):
+        while row is not None and row['customer_id'] < customer.id:
+            row = next(aggregates, None)
+        match = row if row is not None and row['customer_id'] == customer.id else None
+
+        scanned += 1
+        if apply_aggregate(customer, match):
+            pending.append(customer)
+        if len(pending) >= chunk_size:
+            Customer.objects.bulk_update(pending, METRIC_FIELDS)
+            updated += len(pending)
+            pending = []
+
+    if pending:
+        Customer.objects.bulk_update(pending, METRIC_FIELDS)
+        updated += len(pending)
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Customer metrics: {scanned} customers scanned, {updated} updated in {elapsed:.2f}s")
+    return {'scanned': scanned, 'updated': updated, 'seconds': round(elapsed, 3)}
+
+
+def refresh_customer_metrics(incremental: bool = False, since=None, chunk_size: int = 1000) -> Dict[str, Any]:
+    """
+    Full pass, or an incremental one over customers with a policy created, edited or
+    soft-deleted since the previous run. Incremental falls back to a full pass when no
+    previous run is recorded.
+
+    The incremental pass only sees a policy's current customer, so customers that lost
+    policies to a reassignment or a queryset delete/update wait for the nightly full pass.
+    """
+    from apps.policies.models import Policy
+
+    run_started = timezone.now()
+    since = since or (cache.get(LAST_RUN_KEY) if incremental else None)
+    if incremental and since is not None:
+        changed_ids = Policy.objects.filter(updated_at__gte=since).values('customer_id')
+        result = recompute_customer_metrics(changed_ids, chunk_size=chunk_size)
+    else:
+        result = recompute_customer_metrics(chunk_size=chunk_size)
+    cache.set(LAST_RUN_KEY, run_started, None)
+    result['incremental'] = incremental and since is not None
+    return result
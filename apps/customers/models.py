@@ -238,28 +238,11 @@ class Customer(BaseModel):
         )['total'] or 0
     
     def update_metrics(self):
-        policies = self.policies.filter(is_deleted=False)
+        from apps.customers.metrics import METRIC_FIELDS, apply_aggregate, policy_aggregates
 
-        self.total_policies = policies.count()
-        self.total_premium = policies.aggregate(
-            total=models.Sum('premium_amount')
-        )['total'] or 0
-
-        self.lifetime_value = self.total_premium
-
-        if self.total_policies > 1:
-            self.profile = 'HNI'
-        else:
-            self.profile = 'Normal'
-
-        if policies.exists():
-            self.first_policy_date = policies.order_by('start_date').first().start_date
-            self.last_policy_date = policies.order_by('-start_date').first().start_date
-
-        self.save(update_fields=[
-            'total_policies', 'total_premium', 'lifetime_value',
-            'first_policy_date', 'last_policy_date', 'profile'
-        ])
+        row = policy_aggregates(self.policies.all()).first()
+        apply_aggregate(self, row)
+        self.save(update_fields=METRIC_FIELDS)
 
 
 class CustomerContact(BaseModel):    
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.db.models import Q, Count
+from .metrics import recompute_customer_metrics
 from .models import Customer
 from .serializers import CustomerSerializer
 
@@ -15,17 +16,13 @@ class CustomerViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def update_policy_counts(self, request):
         try:
-            customers = Customer.objects.all()
-            updated_count = 0
-
             with transaction.atomic():
-                for customer in customers:
-                    customer.update_metrics()
-                    updated_count += 1
+                result = recompute_customer_metrics()
 
             return Response({
-                'message': f'Successfully updated policy counts for {updated_count} customers',
-                'updated_count': updated_count
+                'message': f'Successfully updated policy counts for {result["scanned"]} customers',
+                'updated_count': result['scanned'],
+                'changed_count': result['updated']
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
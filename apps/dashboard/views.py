@@ -11,6 +11,7 @@ from datetime import timedelta
 from apps.renewals.models import RenewalCase
 from apps.customer_payments.models import CustomerPayment
 from apps.ai_insights.services import ai_service
+from apps.core.llm_gateway import sse_response
 from apps.ai_insights.models import AIConversation, AIMessage, AIAnalytics
 from .serializers import DashboardSummarySerializer
 
@@ -223,6 +224,31 @@ def ai_chat(request):
                     'timestamp': msg.timestamp.isoformat()
                 })
         
+        if request.data.get('stream'):
+            def save_assistant_message(event):
+                if not event.get('success'):
+                    return
+                AIMessage.objects.create(
+                    conversation=conversation,
+                    role='assistant',
+                    content=event['response'],
+                    metadata={
+                        'model': event.get('model'),
+                        'usage': event.get('usage'),
+                        'timestamp': event.get('timestamp')
+                    }
+                )
+                conversation.update_message_count()
+
+            return sse_response(
+                ai_service.stream_ai_response(
+                    message,
+                    user=request.user,
+                    conversation_history=conversation_history
+                ),
+                on_done=save_assistant_message
+            )
+        
         ai_response = ai_service.generate_ai_response(
             message, 
             user=request.user,
@@ -1,12 +1,16 @@
 import json
+import uuid
 from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.core.cache import cache
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
 
+from . import presence
+from .realtime import BROADCAST_FOLDER_TYPES, folder_group, user_group
+
 class InboxConsumer(AsyncWebsocketConsumer):
     
     async def connect(self):
@@ -25,16 +29,24 @@ class InboxConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
-        self.inbox_group = "inbox_updates"
+        self.user_group = user_group(self.user.id)
+        self.folder_groups = set()
         self.email_id = self.scope['url_route']['kwargs'].get('email_id') 
         
         await self.channel_layer.group_add(
-            self.inbox_group,
+            self.user_group,
             self.channel_name
         )
 
+        query_params = parse_qs(self.scope.get('query_string', b'').decode())
+        folder_ids = self.parse_folder_ids(','.join(query_params.get('folders', [])))
+        if not folder_ids:
+            folder_ids = await self.get_default_folder_ids()
+        for folder_id in folder_ids:
+            await self.subscribe_folder(folder_id)
+
         if self.email_id:
-            self.presence_group = f"email_{self.email_id}_viewers"
+            self.presence_group = presence.presence_group(self.email_id)
             await self.channel_layer.group_add(
                 self.presence_group,
                 self.channel_name
@@ -44,12 +56,15 @@ class InboxConsumer(AsyncWebsocketConsumer):
         await self.accept()
 
     async def disconnect(self, close_code):
-        if hasattr(self, 'inbox_group'):
+        if hasattr(self, 'user_group'):
             await self.channel_layer.group_discard(
-                self.inbox_group,
+                self.user_group,
                 self.channel_name
             )
 
+        for group in list(getattr(self, 'folder_groups', ())):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
         if hasattr(self, 'presence_group'):
             await self.update_presence(join=False)
             await self.channel_layer.group_discard(
@@ -61,31 +76,82 @@ class InboxConsumer(AsyncWebsocketConsumer):
         if not self.user or not self.user.is_authenticated:
             return
 
-        cache_key = f"presence_email_{self.email_id}"
-        current_viewers = cache.get(cache_key, set())
-
         if join:
-            current_viewers.add(self.user.id)
+            changed = await sync_to_async(presence.join, thread_sensitive=False)(
+                self.email_id, self.user.id, self.channel_name
+            )
         else:
-            current_viewers.discard(self.user.id)
-        
-        cache.set(cache_key, current_viewers, timeout=3600)
-
-        await self.channel_layer.group_send(
-            self.presence_group,
-            {
-                "type": "presence_update",
-                "viewer_count": len(current_viewers),
-                "viewers": list(current_viewers)
-            }
+            changed = await sync_to_async(presence.leave, thread_sensitive=False)(
+                self.email_id, self.user.id, self.channel_name
+            )
+
+        if changed:
+            await presence.publish(self.channel_layer, self.email_id)
+
+    async def heartbeat(self):
+        if not getattr(self, 'presence_group', None):
+            return
+        changed = await sync_to_async(presence.heartbeat, thread_sensitive=False)(
+            self.email_id, self.user.id, self.channel_name
         )
+        if changed:
+            await presence.publish(self.channel_layer, self.email_id)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            content = json.loads(text_data or '{}')
+        except ValueError:
+            return
+
+        action = content.get('action')
+        if action == 'heartbeat':
+            await self.heartbeat()
+            return
+
+        for folder_id in self.parse_folder_ids(str(content.get('folder_id', ''))):
+            if action == 'subscribe':
+                await self.subscribe_folder(folder_id)
+            elif action == 'unsubscribe':
+                await self.unsubscribe_folder(folder_id)
+
+    async def subscribe_folder(self, folder_id):
+        group = folder_group(folder_id)
+        if group not in self.folder_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.folder_groups.add(group)
 
-    async def inbox_update(self, event):
+    async def unsubscribe_folder(self, folder_id):
+        group = folder_group(folder_id)
+        if group in self.folder_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.folder_groups.discard(group)
+
+    @staticmethod
+    def parse_folder_ids(raw):
+        folder_ids = []
+        for value in raw.split(','):
+            try:
+                folder_ids.append(str(uuid.UUID(value.strip())))
+            except ValueError:
+                continue
+        return folder_ids
+
+    async def inbox_batch(self, event):
         await self.send(text_data=json.dumps(event))
 
     async def presence_update(self, event):
         await self.send(text_data=json.dumps(event))
 
+    @database_sync_to_async
+    def get_default_folder_ids(self):
+        from .models import EmailFolder
+
+        return [
+            str(folder_id) for folder_id in EmailFolder.objects.filter(
+                folder_type__in=BROADCAST_FOLDER_TYPES, is_system=True, is_deleted=False
+            ).values_list('id', flat=True)
+        ]
+
     @database_sync_to_async
     def get_user_from_token(self, token):
         try:
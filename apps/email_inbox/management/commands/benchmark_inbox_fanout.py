@@ -0,0 +1,132 @@
+import asyncio
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from apps.email_inbox.realtime import BroadcastDebouncer, folder_group, route_messages, send_frames, user_group
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure inbox websocket fan-out for a burst of new emails: one global group_send per email '
+        'versus per-user/per-folder groups with debounced batch frames. Uses the configured channel layer; '
+        'no database rows are written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=200)
+        parser.add_argument('--folders', type=int, default=4)
+        parser.add_argument('--emails', type=int, default=500)
+        parser.add_argument('--assigned-ratio', type=float, default=0.3)
+        parser.add_argument('--window-ms', type=int, default=250)
+        parser.add_argument('--max-batch', type=int, default=100)
+
+    def handle(self, *args, **options):
+        self.layer = get_channel_layer()
+        self.stdout.write(f"Channel layer: {type(self.layer).__module__}.{type(self.layer).__name__}")
+
+        users = list(range(1, options['sockets'] + 1))
+        folders = [str(uuid.uuid4()) for _ in range(options['folders'])]
+        rows = [
+            {
+                'id': str(uuid.uuid4()),
+                'subject': f"Renewal query {n}",
+                'folder': random.choice(folders),
+                'assigned_to': random.choice(users) if random.random() < options['assigned_ratio'] else None,
+            }
+            for n in range(options['emails'])
+        ]
+
+        self._per_email(users, rows)
+        self._batched(users, folders, rows, options)
+
+    def _per_email(self, users, rows):
+        channels = async_to_sync(self._join)([['inbox_updates'] for _ in users])
+
+        latencies = []
+        for row in rows:
+            start = time.perf_counter()
+            async_to_sync(self.layer.group_send)('inbox_updates', {'type': 'inbox_update', 'event': 'new_email', 'email_data': row})
+            latencies.append(time.perf_counter() - start)
+
+        frames, emails = async_to_sync(self._drain)(channels, [['inbox_updates'] for _ in channels])
+        self._report('Per-email global group', latencies, sum(latencies), len(rows), len(rows) * len(users), frames, emails)
+
+    def _batched(self, users, folders, rows, options):
+        # Each agent watches one folder and their own user group.
+        memberships = [[user_group(user), folder_group(folders[user % len(folders)])] for user in users]
+        channels = async_to_sync(self._join)(memberships)
+
+        by_id = {row['id']: row for row in rows}
+        queued_at = {}
+        latencies = []
+        sent_frames = []
+        done = threading.Event()
+
+        def flush(ids):
+            sent_frames.append(send_frames(route_messages(by_id[i] for i in ids), max_batch=options['max_batch']))
+            finished = time.perf_counter()
+            latencies.extend(finished - queued_at[i] for i in ids)
+            if len(latencies) >= len(rows):
+                done.set()
+
+        debouncer = BroadcastDebouncer(flush, window=options['window_ms'] / 1000, max_batch=options['max_batch'])
+        caller_seconds = 0.0
+        for row in rows:
+            start = time.perf_counter()
+            queued_at[row['id']] = start
+            debouncer.add(row['id'])
+            caller_seconds += time.perf_counter() - start
+        if not done.wait(timeout=30):
+            self.stdout.write(self.style.ERROR("Batched broadcast did not finish within 30s"))
+            return
+
+        watchers = {folder: sum(1 for user in users if folders[user % len(folders)] == folder) for folder in folders}
+        expected = sum(watchers[row['folder']] + (1 if row['assigned_to'] else 0) for row in rows)
+        frames, emails = async_to_sync(self._drain)(channels, memberships)
+        self._report(
+            f"Per-user/folder, {options['window_ms']}ms window", latencies, caller_seconds,
+            sum(sent_frames), expected, frames, emails,
+        )
+
+    async def _join(self, memberships):
+        channels = []
+        for groups in memberships:
+            channel = await self.layer.new_channel()
+            for group in groups:
+                await self.layer.group_add(group, channel)
+            channels.append(channel)
+        return channels
+
+    async def _drain(self, channels, memberships):
+        async def drain_one(channel, groups):
+            frames = emails = 0
+            while True:
+                try:
+                    message = await asyncio.wait_for(self.layer.receive(channel), timeout=0.2)
+                except asyncio.TimeoutError:
+                    break
+                frames += 1
+                emails += message.get('count', 1)
+            for group in groups:
+                await self.layer.group_discard(group, channel)
+            return frames, emails
+
+        results = await asyncio.gather(*(drain_one(c, g) for c, g in zip(channels, memberships)))
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    def _report(self, label, latencies, caller_seconds, sends, expected_emails, frames, emails):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label}: {sends} group sends, caller blocked {caller_seconds * 1000:.1f}ms; "
+            f"queue-to-fan-out p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, "
+            f"max {latencies[-1] * 1000:.1f}ms; sockets received {frames} frames carrying "
+            f"{emails} of {expected_emails} emails"
+        )
@@ -0,0 +1,64 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from apps.email_inbox import presence
+
+
+class Command(BaseCommand):
+    help = (
+        'Check inbox presence under concurrent joins (lost updates versus the old cache get/set), '
+        'TTL expiry of silent connections, and the bulk viewers query. Uses the configured presence store.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=50)
+        parser.add_argument('--viewers', type=int, default=20, help='Connections per email')
+        parser.add_argument('--threads', type=int, default=16)
+
+    def handle(self, *args, **options):
+        store = presence.get_presence_store()
+        self.stdout.write(f"Presence store: {type(store).__name__}")
+
+        email_ids = [f"bench-{uuid.uuid4().hex[:12]}" for _ in range(options['emails'])]
+        joins = [(email_id, user_id) for email_id in email_ids for user_id in range(1, options['viewers'] + 1)]
+
+        def legacy_join(args):
+            email_id, user_id = args
+            key = f"presence_email_{email_id}"
+            current = cache.get(key, set())
+            current.add(user_id)
+            cache.set(key, current, timeout=60)
+
+        with ThreadPoolExecutor(options['threads']) as pool:
+            list(pool.map(legacy_join, joins))
+        legacy_seen = sum(len(cache.get(f"presence_email_{email_id}", set())) for email_id in email_ids)
+        cache.delete_many([f"presence_email_{email_id}" for email_id in email_ids])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['threads']) as pool:
+            list(pool.map(lambda args: presence.join(args[0], args[1], f"bench.{uuid.uuid4().hex}"), joins))
+        join_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = presence.viewers_for(email_ids)
+        bulk_ms = (time.perf_counter() - start) * 1000
+        seen = sum(len(user_ids) for user_ids in found.values())
+
+        self.stdout.write(
+            f"Concurrent joins: {len(joins)} in {join_seconds:.2f}s ({len(joins) / join_seconds:.0f}/s); "
+            f"viewers recorded {seen}/{len(joins)} (old cache get/set: {legacy_seen}/{len(joins)})"
+        )
+        self.stdout.write(f"Bulk viewers for {len(email_ids)} emails: {bulk_ms:.1f}ms")
+
+        # Connections that stop heartbeating disappear after their TTL without a leave().
+        with override_settings(PRESENCE_TTL_SECONDS=1):
+            silent = email_ids[0]
+            presence.join(silent, 999999, 'bench.silent')
+            time.sleep(1.1)
+            left = 999999 in presence.viewers(silent)
+        self.stdout.write(f"Silent connection still listed after TTL: {left}")
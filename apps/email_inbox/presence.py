@@ -0,0 +1,198 @@
+"""
+Who is viewing which email.
+
+Every websocket connection is one member, `<user_id>:<channel_name>`, of a per-email
+sorted set scored by the time it expires. Join and heartbeat are a single ZADD and
+leave a single ZREM, so concurrent viewers never overwrite each other. A connection
+that dies without disconnecting stops heartbeating and drops out once its TTL passes.
+Presence frames are throttled to PRESENCE_BROADCASTS_PER_SECOND per email, and a
+throttled change is still sent as a trailing update once the window reopens.
+
+Without PRESENCE_REDIS_URL an in-process store stands in, matching the in-memory
+channel layer: correct within one process, invisible to the others.
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+_store = None
+_store_lock = threading.Lock()
+_trailing = set()
+
+
+def presence_group(email_id) -> str:
+    return f"email_{email_id}_viewers"
+
+
+def _member(user_id, channel_name) -> str:
+    return f"{user_id}:{channel_name}"
+
+
+def _user_ids(members: Iterable) -> List[int]:
+    user_ids = set()
+    for member in members:
+        if isinstance(member, bytes):
+            member = member.decode()
+        user_ids.add(int(member.split(':', 1)[0]))
+    return sorted(user_ids)
+
+
+class RedisPresenceStore:
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(email_id) -> str:
+        return f"presence:email:{email_id}"
+
+    def touch(self, email_id, member: str, ttl: int, now: float) -> bool:
+        """Add or refresh `member`; True when the viewer set changed (a new member, or expired ones removed)."""
+        key = self._key(email_id)
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {member: now + ttl})
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.expire(key, ttl)
+        added, expired, _ = pipe.execute()
+        return bool(added or expired)
+
+    def remove(self, email_id, member: str, now: float) -> bool:
+        key = self._key(email_id)
+        pipe = self.client.pipeline()
+        pipe.zrem(key, member)
+        pipe.zremrangebyscore(key, '-inf', now)
+        removed, expired = pipe.execute()
+        return bool(removed or expired)
+
+    def members(self, email_ids: List, now: float) -> Dict[str, List]:
+        pipe = self.client.pipeline(transaction=False)
+        for email_id in email_ids:
+            pipe.zrangebyscore(self._key(email_id), now, '+inf')
+        return dict(zip((str(email_id) for email_id in email_ids), pipe.execute()))
+
+    def acquire(self, email_id, interval: float) -> bool:
+        """Take the broadcast slot for `email_id` if nobody in any process has used it in the last `interval` seconds."""
+        return bool(self.client.set(f"presence:throttle:{email_id}", 1, nx=True, px=max(int(interval * 1000), 1)))
+
+
+class LocalPresenceStore:
+    def __init__(self):
+        self._expiry: Dict[str, Dict[str, float]] = {}
+        self._slots: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, members: Dict[str, float], now: float) -> int:
+        expired = [member for member, expires_at in members.items() if expires_at <= now]
+        for member in expired:
+            del members[member]
+        return len(expired)
+
+    def touch(self, email_id, member: str, ttl: int, now: float) -> bool:
+        with self._lock:
+            members = self._expiry.setdefault(str(email_id), {})
+            added = member not in members
+            members[member] = now + ttl
+            return bool(added or self._prune(members, now))
+
+    def remove(self, email_id, member: str, now: float) -> bool:
+        with self._lock:
+            members = self._expiry.get(str(email_id), {})
+            removed = members.pop(member, None) is not None
+            expired = self._prune(members, now)
+            if not members:
+                self._expiry.pop(str(email_id), None)
+            return bool(removed or expired)
+
+    def members(self, email_ids: List, now: float) -> Dict[str, List]:
+        with self._lock:
+            return {
+                str(email_id): [
+                    member for member, expires_at in self._expiry.get(str(email_id), {}).items() if expires_at > now
+                ]
+                for email_id in email_ids
+            }
+
+    def acquire(self, email_id, interval: float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._slots.get(str(email_id), 0) > now:
+                return False
+            self._slots[str(email_id)] = now + interval
+            return True
+
+
+def get_presence_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = settings.PRESENCE_REDIS_URL
+                _store = RedisPresenceStore(url) if url else LocalPresenceStore()
+    return _store
+
+
+def join(email_id, user_id, channel_name) -> bool:
+    return get_presence_store().touch(email_id, _member(user_id, channel_name), settings.PRESENCE_TTL_SECONDS, time.time())
+
+
+# A heartbeat is a join that usually changes nothing.
+heartbeat = join
+
+
+def leave(email_id, user_id, channel_name) -> bool:
+    return get_presence_store().remove(email_id, _member(user_id, channel_name), time.time())
+
+
+def viewers(email_id) -> List[int]:
+    return viewers_for([email_id])[str(email_id)]
+
+
+def viewers_for(email_ids: Iterable) -> Dict[str, List[int]]:
+    """Live viewer user ids per email, for any number of emails in one round trip."""
+    email_ids = list(email_ids)
+    if not email_ids:
+        return {}
+    members = get_presence_store().members(email_ids, time.time())
+    return {email_id: _user_ids(found) for email_id, found in members.items()}
+
+
+async def publish(channel_layer, email_id):
+    """Send the current viewers of `email_id` now, or as a trailing update if its broadcast slot is taken."""
+    if email_id in _trailing:
+        return
+    interval = 1 / settings.PRESENCE_BROADCASTS_PER_SECOND
+    store = get_presence_store()
+    if await sync_to_async(store.acquire, thread_sensitive=False)(email_id, interval):
+        await _send(channel_layer, email_id)
+        return
+
+    _trailing.add(email_id)
+    asyncio.ensure_future(_send_trailing(channel_layer, email_id, interval))
+
+
+async def _send_trailing(channel_layer, email_id, interval: float):
+    store = get_presence_store()
+    try:
+        await asyncio.sleep(interval)
+        while not await sync_to_async(store.acquire, thread_sensitive=False)(email_id, interval):
+            await asyncio.sleep(interval)
+    finally:
+        _trailing.discard(email_id)
+    await _send(channel_layer, email_id)
+
+
+async def _send(channel_layer, email_id):
+    current = await sync_to_async(viewers, thread_sensitive=False)(email_id)
+    await channel_layer.group_send(
+        presence_group(email_id),
+        {
+            "type": "presence_update",
+            "viewer_count": len(current),
+            "viewers": current,
+        }
+    )
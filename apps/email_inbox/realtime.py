@@ -0,0 +1,161 @@
+"""
+Websocket fan-out for the inbox.
+
+Sockets join one group per user and one per folder they are looking at, so an event
+only reaches the agents it concerns. New messages are not sent one by one: their ids
+are collected for a short window (or until a batch is full) and then loaded in one
+query and sent as a single `inbox_batch` frame per group, so an IMAP sync of 500
+emails is a handful of frames rather than 500 per socket.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_FOLDER_TYPES = ('inbox', 'sent')
+
+
+def user_group(user_id) -> str:
+    return f"inbox_user_{user_id}"
+
+
+def folder_group(folder_id) -> str:
+    return f"inbox_folder_{folder_id}"
+
+
+def route_messages(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, List[Any]]]:
+    """
+    Group serialized messages by destination: every message goes to its folder's group
+    as `new_emails`, and assigned ones also to the assignee's group as `assigned_emails`.
+    """
+    frames = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        if row.get('folder'):
+            frames[folder_group(row['folder'])]['new_emails'].append(row)
+        if row.get('assigned_to'):
+            frames[user_group(row['assigned_to'])]['assigned_emails'].append(row)
+    return frames
+
+
+def send_frames(frames: Dict[str, Dict[str, List[Any]]], max_batch: Optional[int] = None) -> int:
+    """Send every group's events as `inbox_batch` frames of at most `max_batch` emails; returns the frame count."""
+    max_batch = max_batch or settings.INBOX_BROADCAST_MAX_BATCH
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return 0
+
+    sends = []
+    for group, events in frames.items():
+        for event, emails in events.items():
+            for start in range(0, len(emails), max_batch):
+                batch = emails[start:start + max_batch]
+                sends.append((group, {
+                    'type': 'inbox_batch',
+                    'event': event,
+                    'count': len(batch),
+                    'emails': batch,
+                    'sent_at': time.time(),
+                }))
+
+    async def _send_all():
+        await asyncio.gather(*(channel_layer.group_send(group, message) for group, message in sends))
+
+    if sends:
+        async_to_sync(_send_all)()
+    return len(sends)
+
+
+def broadcast_messages(message_ids: Iterable) -> int:
+    """Load, serialize and fan out the given messages; one query for the lot, whatever the burst size."""
+    from .models import EmailInboxMessage
+    from .serializers import EmailInboxMessageSerializer
+
+    message_ids = list(message_ids)
+    if not message_ids:
+        return 0
+
+    messages = (
+        EmailInboxMessage.objects
+        .filter(pk__in=message_ids, folder__folder_type__in=BROADCAST_FOLDER_TYPES)
+        .select_related('folder', 'assigned_to', 'created_by', 'updated_by', 'escalated_by')
+        .prefetch_related('internal_notes__author')
+        .order_by('received_at')
+    )
+    # Plain JSON types only: related keys come out of the serializer as UUID objects,
+    # which neither the websocket send nor the Redis layer's msgpack can encode.
+    rows = json.loads(json.dumps(EmailInboxMessageSerializer(messages, many=True).data, cls=DjangoJSONEncoder))
+    return send_frames(route_messages(rows))
+
+
+class BroadcastDebouncer:
+    """
+    Collects keys and hands them to `flush` in one call, `window` seconds after the
+    first key of a burst arrives or as soon as `max_batch` keys are waiting. The flush
+    runs on a timer thread, so the caller never waits on the channel layer.
+    """
+
+    def __init__(self, flush: Callable[[List[Any]], Any], window: float, max_batch: int):
+        self._flush = flush
+        self.window = window
+        self.max_batch = max_batch
+        self._keys: Dict[Any, None] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self._keys[key] = None
+            if len(self._keys) < self.max_batch:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self._on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            keys = self._take()
+        self._run(keys)
+
+    def flush(self):
+        """Send whatever is waiting now, without waiting for the window."""
+        with self._lock:
+            keys = self._take()
+        self._run(keys)
+
+    def _take(self) -> List[Any]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        keys, self._keys = list(self._keys), {}
+        return keys
+
+    def _on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads are not reused; close the connection the flush opened.
+            connections.close_all()
+
+    def _run(self, keys: List[Any]):
+        if not keys:
+            return
+        try:
+            self._flush(keys)
+        except Exception as e:
+            logger.error(f"Inbox broadcast failed for {len(keys)} messages: {str(e)}")
+
+
+inbox_broadcaster = BroadcastDebouncer(
+    broadcast_messages,
+    window=settings.INBOX_BROADCAST_DEBOUNCE_MS / 1000,
+    max_batch=settings.INBOX_BROADCAST_MAX_BATCH,
+)
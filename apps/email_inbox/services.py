@@ -14,6 +14,7 @@ from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from apps.email_settings.models import EmailAccount
 from apps.email_settings.utils import decrypt_credential
+from apps.core.message_ids import thread_key
 from .models import (
     EmailInboxMessage, EmailFolder, EmailConversation, EmailFilter,
     EmailAttachment, EmailSearchQuery,BulkEmailCampaign
@@ -240,7 +241,7 @@ class EmailInboxService:
             
             if thread_id:
                 email_message.thread_id = thread_id
-                email_message.save()
+                email_message.save(update_fields=['thread_id'])
                 
                 conversation, created = EmailConversation.objects.get_or_create(
                     thread_id=thread_id,
@@ -270,8 +271,10 @@ class EmailInboxService:
             logger.error(f"Error updating conversation thread: {str(e)}")
     
     def _extract_thread_id(self, subject: str) -> str:
-        if subject.lower().startswith(('re:', 'fwd:')):
-            return subject[4:].strip()
+        # Only replies and forwards join a conversation; the key strips every
+        # Re:/Fwd: prefix and case so all variants hit the same unique thread_id row.
+        if subject and subject.lower().lstrip().startswith(('re:', 're[', 'fw:', 'fwd:')):
+            return thread_key(subject)
         return None
     
     def send_outbound_email(self, email_message_obj, attachments=None):
@@ -1,27 +1,24 @@
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models.signals import post_save, post_migrate
 from django.dispatch import receiver
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 
+from apps.core.side_effects import defer, register_deferred_handler
 from .models import EmailInboxMessage, EmailFolder
-from .serializers import EmailInboxMessageSerializer
+from .realtime import BROADCAST_FOLDER_TYPES, broadcast_messages, inbox_broadcaster
 
 
 @receiver(post_save, sender=EmailInboxMessage)
 def broadcast_new_email(sender, instance, created, **kwargs):
-    if created and instance.folder and instance.folder.folder_type in ['inbox', 'sent']:
-        channel_layer = get_channel_layer()
-        email_data = EmailInboxMessageSerializer(instance).data
-
-        async_to_sync(channel_layer.group_send)(
-            "inbox_updates",
-            {
-                "type": "inbox_update",
-                "event": "new_email",
-                "email_data": email_data
-            }
-        )
+    if created and instance.folder_id and instance.folder.folder_type in BROADCAST_FOLDER_TYPES:
+        if not defer('inbox_broadcast', instance.pk):
+            message_id = instance.pk
+            transaction.on_commit(lambda: inbox_broadcaster.add(message_id))
+
+
+@register_deferred_handler('inbox_broadcast')
+def broadcast_deferred_emails(message_ids, pending):
+    message_ids = list(message_ids)
+    transaction.on_commit(lambda: broadcast_messages(message_ids))
 
 
 @receiver(post_migrate)
@@ -11,6 +11,7 @@ from django.conf import settings
 from django.utils import timezone
 from django.template import Template, Context
 from celery import shared_task
+from apps.core.side_effects import deferred_side_effects
 from apps.email_settings.models import EmailAccount, EmailModuleSettings
 from apps.email_settings.utils import decrypt_credential
 from .models import BulkEmailCampaign, EmailInboxMessage, EmailFolder
@@ -178,7 +179,9 @@ def fetch_new_emails():
             mail = imaplib.IMAP4_SSL(account.imap_server, account.imap_port)
             mail.login(account.email_address, password)
             
-            count = process_imap_folder(mail, "INBOX", is_incoming=True, account=account, service=service)
+            # One batched websocket broadcast per account sync instead of one per email.
+            with deferred_side_effects():
+                count = process_imap_folder(mail, "INBOX", is_incoming=True, account=account, service=service)
             total_synced += count
             mail.logout()
             
@@ -42,6 +42,7 @@ from .serializers import (EmailInboxMessageSerializer,
     CampaignPreviewSerializer,
 )
 from .services import EmailInboxService
+from . import presence
 from apps.email_settings.models import EmailAccount
 class EmailFolderViewSet(viewsets.ModelViewSet):
     queryset = EmailFolder.objects.filter(is_deleted=False)
@@ -383,6 +384,13 @@ class EmailInboxMessageViewSet(viewsets.ModelViewSet):
         data = service.get_dashboard_summary(request.user)
         return Response(data)
 
+    @action(detail=False, methods=['get'])
+    def viewers(self, request):
+        email_ids = [email_id.strip() for email_id in request.query_params.get('ids', '').split(',') if email_id.strip()]
+        if len(email_ids) > 200:
+            return Response({'error': 'At most 200 ids per request'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'viewers': presence.viewers_for(email_ids)})
+
     @action(detail=False, methods=['get'])
     def analytics_report(self, request):
         start_date = request.query_params.get('start_date')
@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from .models import (
     EmailWebhook, EmailAutomation, EmailAutomationLog, EmailIntegration,
-    EmailSLA, EmailTemplateVariable, EmailIntegrationAnalytics
+    EmailSLA, EmailTemplateVariable, EmailIntegrationAnalytics, EmailProviderEvent
 )
 
 @admin.register(EmailWebhook)
@@ -56,6 +56,13 @@ class EmailWebhookAdmin(admin.ModelAdmin):
     mark_as_processed.short_description = "Mark as processed"
 
 
+@admin.register(EmailProviderEvent)
+class EmailProviderEventAdmin(admin.ModelAdmin):
+    list_display = ['provider', 'event_type', 'provider_message_id', 'processed', 'received_at', 'processed_at']
+    list_filter = ['provider', 'event_type', 'processed']
+    search_fields = ['provider_message_id', 'event_id']
+    readonly_fields = ['provider', 'event_id', 'event_type', 'provider_message_id', 'event_time', 'raw_data', 'received_at', 'processed_at']
+
 @admin.register(EmailAutomation)
 class EmailAutomationAdmin(admin.ModelAdmin):
     list_display = [
@@ -0,0 +1,79 @@
+import json
+import random
+import time
+import uuid
+
+from rest_framework.test import APIRequestFactory
+
+from apps.core.benchmarking import RolledBackCommand
+from apps.email_integration.models import EmailProviderEvent
+from apps.email_integration.tasks import process_email_provider_events
+from apps.email_integration.views import email_provider_events_webhook
+from apps.email_operations.models import EmailMessage
+
+
+class Command(RolledBackCommand):
+    help = 'Measure batched SendGrid event ingestion and bulk apply rate (events/s). All rows are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--posts', type=int, default=20)
+        parser.add_argument('--events-per-post', type=int, default=1000)
+        parser.add_argument('--duplicate-ratio', type=float, default=0.1,
+                            help='Share of events re-sent with an existing sg_event_id')
+
+    def run(self, options):
+        provider_ids = [uuid.uuid4().hex[:22] for _ in range(options['messages'])]
+        EmailMessage.objects.bulk_create([
+            EmailMessage(
+                message_id=f"bench-{provider_id}", to_emails='bench@example.com', from_email='noreply@example.com',
+                subject='Benchmark', status='sent', provider_name='sendgrid', provider_message_id=provider_id
+            )
+            for provider_id in provider_ids
+        ], batch_size=1000)
+
+        factory = APIRequestFactory()
+        base_ts = int(time.time())
+        sent_event_ids = []
+        total_events = 0
+        ingest_seconds = 0.0
+
+        for n in range(options['posts']):
+            events = []
+            for _ in range(options['events_per_post']):
+                if sent_event_ids and random.random() < options['duplicate_ratio']:
+                    events.append(random.choice(sent_event_ids))
+                    continue
+                event = {
+                    'sg_event_id': uuid.uuid4().hex,
+                    'sg_message_id': f"{random.choice(provider_ids)}.filter0001.{n}.0",
+                    'event': random.choice(['delivered', 'open', 'click', 'bounce']),
+                    'timestamp': base_ts + n,
+                    'email': 'bench@example.com',
+                    'ip': '203.0.113.7',
+                    'url': 'https://example.com/renew',
+                }
+                sent_event_ids.append(event)
+                events.append(event)
+
+            request = factory.post('/webhooks/sendgrid/delivery-events/', json.dumps(events), content_type='application/json')
+            start = time.perf_counter()
+            response = email_provider_events_webhook(request, provider='sendgrid')
+            ingest_seconds += time.perf_counter() - start
+            if response.status_code != 200:
+                self.stdout.write(self.style.ERROR(f"Webhook returned {response.status_code}"))
+                return
+            total_events += len(events)
+
+        stored = EmailProviderEvent.objects.filter(processed=False).count()
+        self.stdout.write(
+            f"Ingest: {total_events} events in {options['posts']} posts, {ingest_seconds:.2f}s "
+            f"({total_events / ingest_seconds if ingest_seconds else 0:.0f} events/s); {stored} stored after dedupe"
+        )
+
+        result = process_email_provider_events()
+        rate = result['events'] / result['seconds'] if result['seconds'] else 0
+        self.stdout.write(
+            f"Apply: {result['events']} events -> {result['tracking']} tracking rows, "
+            f"{result['status_updates']} status updates in {result['seconds']}s ({rate:.0f} events/s)"
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_integration', '0004_rename_email_webhooks_provider_event_idx_email_webho_provide_60e6a6_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailProviderEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('provider', models.CharField(choices=[('sendgrid', 'SendGrid'), ('aws_ses', 'AWS SES'), ('mailgun', 'Mailgun'), ('postmark', 'Postmark')], max_length=20)),
+                ('event_id', models.CharField(help_text='Provider event id, or a payload hash when none is sent', max_length=255)),
+                ('event_type', models.CharField(choices=[('sent', 'Sent'), ('delivered', 'Delivered'), ('opened', 'Opened'), ('clicked', 'Clicked'), ('bounced', 'Bounced'), ('complained', 'Complained'), ('unsubscribed', 'Unsubscribed'), ('blocked', 'Blocked'), ('deferred', 'Deferred'), ('dropped', 'Dropped'), ('incoming', 'Incoming Email')], max_length=20)),
+                ('provider_message_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('event_time', models.DateTimeField(blank=True, null=True)),
+                ('raw_data', models.JSONField(default=dict, help_text='Raw event payload')),
+                ('processed', models.BooleanField(default=False)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Email Provider Event',
+                'verbose_name_plural': 'Email Provider Events',
+                'db_table': 'email_provider_events',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(condition=models.Q(('processed', False)), fields=['id'], name='email_event_unprocessed_idx'), models.Index(fields=['provider_message_id'], name='email_provi_provide_7fa156_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='emailproviderevent',
+            constraint=models.UniqueConstraint(fields=('provider', 'event_id'), name='email_provider_event_unique'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_integration', '0005_emailproviderevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailautomationlog',
+            name='current_step',
+            field=models.PositiveIntegerField(default=0, help_text='Index of the next step to run'),
+        ),
+        migrations.AddField(
+            model_name='emailautomationlog',
+            name='resume_at',
+            field=models.DateTimeField(blank=True, help_text='Wake-up time of a waiting run, or lease expiry while a resumed run executes', null=True),
+        ),
+        migrations.AlterField(
+            model_name='emailautomationlog',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('waiting', 'Waiting'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='emailautomationlog',
+            index=models.Index(fields=['status', 'resume_at'], name='email_autom_status_be11de_idx'),
+        ),
+    ]
@@ -70,6 +70,41 @@ class EmailWebhook(models.Model):
         return f"{self.provider} - {self.get_event_type_display()} ({self.status})"
 
 
+class EmailProviderEvent(models.Model):
+    """
+    Append-only queue of delivery/engagement events from batched SendGrid and SES
+    webhooks, one row per event. The (provider, event_id) constraint drops redelivered
+    events on insert; tasks.process_email_provider_events applies them in bulk.
+    """
+    id = models.BigAutoField(primary_key=True)
+    provider = models.CharField(max_length=20, choices=EmailWebhook.PROVIDER_CHOICES)
+    event_id = models.CharField(max_length=255, help_text="Provider event id, or a payload hash when none is sent")
+    event_type = models.CharField(max_length=20, choices=EmailWebhook.EVENT_TYPES)
+    provider_message_id = models.CharField(max_length=255, blank=True, null=True)
+    event_time = models.DateTimeField(blank=True, null=True)
+    raw_data = models.JSONField(default=dict, help_text="Raw event payload")
+
+    processed = models.BooleanField(default=False)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'email_provider_events'
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='email_provider_event_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed=False), name='email_event_unprocessed_idx'),
+            models.Index(fields=['provider_message_id']),
+        ]
+        verbose_name = 'Email Provider Event'
+        verbose_name_plural = 'Email Provider Events'
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} - {self.provider_message_id}"
+
+
 class EmailAutomation(models.Model):    
     TRIGGER_TYPES = [
         ('email_received', 'Email Received'),
@@ -147,10 +182,24 @@ class EmailAutomation(models.Model):
         self.is_active = False
         self.save(update_fields=['is_deleted', 'deleted_at', 'is_active'])
 
+    def get_steps(self):
+        """
+        Ordered steps of the automation. A plain automation is its single action;
+        action_config['steps'] holds a list of {'action_type', 'action_config'} for
+        multi-step ones. delay_seconds becomes a leading delay step.
+        """
+        steps = self.action_config.get('steps') if isinstance(self.action_config, dict) else None
+        if not steps:
+            steps = [{'action_type': self.action_type, 'action_config': self.action_config}]
+        if self.delay_seconds:
+            steps = [{'action_type': 'delay', 'action_config': {'delay_seconds': self.delay_seconds}}] + list(steps)
+        return steps
+
 class EmailAutomationLog(models.Model):    
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('running', 'Running'),
+        ('waiting', 'Waiting'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
         ('cancelled', 'Cancelled'),
@@ -170,12 +219,21 @@ class EmailAutomationLog(models.Model):
     completed_at = models.DateTimeField(blank=True, null=True)
     duration_seconds = models.FloatField(blank=True, null=True, help_text="Execution duration in seconds")
     
+    current_step = models.PositiveIntegerField(default=0, help_text="Index of the next step to run")
+    resume_at = models.DateTimeField(
+        blank=True, null=True,
+        help_text="Wake-up time of a waiting run, or lease expiry while a resumed run executes"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     executed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='executed_email_automations')
     
     class Meta:
         db_table = 'email_automation_logs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'resume_at']),
+        ]
         verbose_name = 'Email Automation Log'
         verbose_name_plural = 'Email Automation Logs'
     
@@ -66,12 +66,12 @@ class EmailAutomationLogSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'automation', 'automation_name', 'status', 'status_display',
             'trigger_data', 'execution_data', 'result_data', 'error_message',
-            'started_at', 'completed_at', 'duration_seconds', 'created_at',
-            'executed_by', 'executed_by_name'
+            'started_at', 'completed_at', 'duration_seconds', 'current_step', 'resume_at',
+            'created_at', 'executed_by', 'executed_by_name'
         ]
         read_only_fields = [
-            'id', 'started_at', 'completed_at', 'duration_seconds', 'created_at',
-            'executed_by'
+            'id', 'started_at', 'completed_at', 'duration_seconds', 'current_step', 'resume_at',
+            'created_at', 'executed_by'
         ]
 
 
@@ -1,19 +1,69 @@
+import hashlib
+import ipaddress
 import logging
 import requests
 import json
 from typing import List, Dict, Any, Optional
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db.models import Q, Count, Avg
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 import uuid
 
+from apps.core.receipts import coalesce_status_updates, is_status_progression
 from .models import (
     EmailWebhook, EmailAutomation, EmailAutomationLog, EmailIntegration,
-    EmailSLA, EmailTemplateVariable, EmailIntegrationAnalytics
+    EmailSLA, EmailTemplateVariable, EmailIntegrationAnalytics, EmailProviderEvent
 )
 
 logger = logging.getLogger(__name__)
 
+SENDGRID_EVENT_TYPES = {
+    'processed': 'sent',
+    'delivered': 'delivered',
+    'open': 'opened',
+    'click': 'clicked',
+    'bounce': 'bounced',
+    'blocked': 'blocked',
+    'dropped': 'dropped',
+    'deferred': 'deferred',
+    'spamreport': 'complained',
+    'unsubscribe': 'unsubscribed',
+    'group_unsubscribe': 'unsubscribed',
+}
+
+SES_EVENT_TYPES = {
+    'Send': 'sent',
+    'Delivery': 'delivered',
+    'Open': 'opened',
+    'Click': 'clicked',
+    'Bounce': 'bounced',
+    'Complaint': 'complained',
+    'Reject': 'dropped',
+    'Rendering Failure': 'dropped',
+    'DeliveryDelay': 'deferred',
+    'Subscription': 'unsubscribed',
+}
+
+# Webhook event -> EmailMessage status; opens and clicks imply delivery.
+EVENT_STATUS_MAPPING = {
+    'delivered': 'delivered',
+    'bounced': 'bounced',
+    'complained': 'complained',
+    'unsubscribed': 'unsubscribed',
+    'opened': 'delivered',
+    'clicked': 'delivered',
+}
+
+EMAIL_STATUS_RANK = {
+    'sent': 0,
+    'delivered': 1,
+    'bounced': 2,
+    'complained': 2,
+    'unsubscribed': 2,
+}
+
 class EmailIntegrationService:    
     def __init__(self):
         pass
@@ -93,7 +143,148 @@ class EmailIntegrationService:
                 'message': f'Error processing incoming email webhook: {str(e)}'
             }
 
+    def _payload_hash(self, payload: Any) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _valid_ip(self, value: Optional[str]) -> Optional[str]:
+        try:
+            return str(ipaddress.ip_address(value)) if value else None
+        except ValueError:
+            return None
+
+    def _normalize_sendgrid_events(self, payload: Any) -> List[Dict[str, Any]]:
+        events = payload if isinstance(payload, list) else [payload]
+        normalized = []
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            event_type = SENDGRID_EVENT_TYPES.get(event.get('event'))
+            if not event_type:
+                continue
+            # Event payloads carry "<X-Message-Id>.filterXXXX..."; sends store the bare X-Message-Id.
+            sg_message_id = event.get('sg_message_id') or ''
+            timestamp = event.get('timestamp')
+            normalized.append({
+                'event_id': event.get('sg_event_id') or self._payload_hash(event),
+                'event_type': event_type,
+                'provider_message_id': sg_message_id.split('.filter')[0] or None,
+                'event_time': datetime.fromtimestamp(int(timestamp), tz=dt_timezone.utc) if timestamp else None,
+                'raw_data': event,
+            })
+        return normalized
+
+    def _normalize_ses_events(self, payload: Any) -> List[Dict[str, Any]]:
+        envelopes = payload if isinstance(payload, list) else [payload]
+        normalized = []
+        for envelope in envelopes:
+            if not isinstance(envelope, dict):
+                continue
+            event_id = None
+            event = envelope
+            if envelope.get('Type') == 'SubscriptionConfirmation':
+                logger.warning(f"SES SNS subscription confirmation received for topic {envelope.get('TopicArn')}")
+                continue
+            if envelope.get('Type') == 'Notification':
+                event_id = envelope.get('MessageId')
+                try:
+                    event = json.loads(envelope.get('Message') or '{}')
+                except ValueError:
+                    continue
+
+            event_type = SES_EVENT_TYPES.get(event.get('eventType') or event.get('notificationType'))
+            if not event_type:
+                continue
+            mail = event.get('mail', {})
+            detail = event.get((event.get('eventType') or event.get('notificationType') or '').lower(), {})
+            normalized.append({
+                'event_id': event_id or self._payload_hash(event),
+                'event_type': event_type,
+                'provider_message_id': mail.get('messageId'),
+                'event_time': parse_datetime(detail.get('timestamp') or mail.get('timestamp') or ''),
+                'raw_data': event,
+            })
+        return normalized
+
+    def ingest_provider_events(self, provider: str, payload: Any) -> Dict[str, Any]:
+        """
+        Store every event of a batched SendGrid or SES webhook as its own row. Events
+        already stored (same provider event id) are dropped by the unique constraint,
+        so provider retries are harmless. Applying them is left to the batch task.
+        """
+        if provider == 'sendgrid':
+            events = self._normalize_sendgrid_events(payload)
+        elif provider == 'aws_ses':
+            events = self._normalize_ses_events(payload)
+        else:
+            return {'success': False, 'message': f'Unsupported provider: {provider}'}
+
+        EmailProviderEvent.objects.bulk_create(
+            [EmailProviderEvent(provider=provider, **event) for event in events],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+        return {'success': True, 'accepted': len(events)}
+
+    def apply_provider_events(self, events: List[EmailProviderEvent]) -> Dict[str, int]:
+        """
+        Apply a batch of stored events: one lookup for the affected messages, one
+        bulk insert of tracking rows and one bulk status update with the latest
+        status per message. Statuses never move backwards.
+        """
+        from apps.email_operations.models import EmailMessage, EmailTracking
+
+        provider_ids = {event.provider_message_id for event in events if event.provider_message_id}
+        messages = {
+            message.provider_message_id: message
+            for message in EmailMessage.objects.filter(provider_message_id__in=provider_ids)
+        }
+        tracking_types = {choice for choice, _ in EmailTracking.EVENT_CHOICES}
+
+        tracking = []
+        status_updates = []
+        for event in events:
+            message = messages.get(event.provider_message_id)
+            if not message:
+                continue
+            data = event.raw_data or {}
+            if event.event_type in tracking_types:
+                tracking.append(EmailTracking(
+                    email_message=message,
+                    event_type=event.event_type,
+                    event_data=data,
+                    ip_address=self._valid_ip(data.get('ip') or data.get('open', {}).get('ipAddress')),
+                    user_agent=data.get('useragent') or data.get('open', {}).get('userAgent'),
+                    link_url=(data.get('url') or data.get('click', {}).get('link') or '')[:200] or None,
+                ))
+            status = EVENT_STATUS_MAPPING.get(event.event_type)
+            if status:
+                status_updates.append({
+                    'message_id': event.provider_message_id,
+                    'status': status,
+                    'timestamp': event.event_time.timestamp() if event.event_time else 0,
+                })
+
+        changed = []
+        now = timezone.now()
+        for provider_id, update in coalesce_status_updates(status_updates, EMAIL_STATUS_RANK).items():
+            message = messages[provider_id]
+            if message.status != update['status'] and is_status_progression(message.status, update['status'], EMAIL_STATUS_RANK):
+                message.status = update['status']
+                message.updated_at = now
+                changed.append(message)
+
+        EmailTracking.objects.bulk_create(tracking, batch_size=1000)
+        EmailMessage.objects.bulk_update(changed, ['status', 'updated_at'], batch_size=1000)
+        return {'tracking': len(tracking), 'status_updates': len(changed)}
+
     def process_webhook(self, provider: str, event_type: str, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+        if provider in ('sendgrid', 'aws_ses'):
+            # Batched payloads: every event goes to the event store, not just the first.
+            result = self.ingest_provider_events(provider, raw_data)
+            if result['success']:
+                result['message'] = f"{result['accepted']} events queued for processing"
+            return result
+
         try:
             webhook = EmailWebhook.objects.create(
                 provider=provider,
@@ -199,59 +390,11 @@ class EmailIntegrationService:
             }
 
     def _process_webhook_data(self, provider: str, event_type: str, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            if provider == 'sendgrid':
-                return self._process_sendgrid_webhook(event_type, raw_data)
-            elif provider == 'aws_ses':
-                return self._process_aws_ses_webhook(event_type, raw_data)
-            else:
-                return {
-                    'provider': provider,
-                    'event_type': event_type,
-                    'raw_data': raw_data
-                }
-        except Exception as e:
-            logger.error(f"Error processing webhook data: {str(e)}")
-            return {
-                'provider': provider,
-                'event_type': event_type,
-                'raw_data': raw_data,
-                'error': str(e)
-            }
-    
-    def _process_sendgrid_webhook(self, event_type: str, raw_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        try:
-            if not raw_data or not isinstance(raw_data, list):
-                return {'error': 'Invalid SendGrid webhook data'}
-            
-            event = raw_data[0] 
-            return {
-                'provider': 'sendgrid',
-                'event_type': event_type,
-                'email_message_id': event.get('sg_message_id'),
-                'provider_message_id': event.get('sg_message_id'),
-                'event_time': event.get('timestamp'),
-                'ip_address': event.get('ip'),
-                'user_agent': event.get('useragent'),
-                'event_data': event
-            }
-        except Exception as e:
-            logger.error(f"Error processing SendGrid webhook: {str(e)}")
-            return {'error': str(e)}
-    
-    def _process_aws_ses_webhook(self, event_type: str, raw_data: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            return {
-                'provider': 'aws_ses',
-                'event_type': event_type,
-                'email_message_id': raw_data.get('mail', {}).get('messageId'),
-                'provider_message_id': raw_data.get('mail', {}).get('messageId'),
-                'event_time': raw_data.get('eventTime'),
-                'event_data': raw_data
-            }
-        except Exception as e:
-            logger.error(f"Error processing AWS SES webhook: {str(e)}")
-            return {'error': str(e)}
+        return {
+            'provider': provider,
+            'event_type': event_type,
+            'raw_data': raw_data
+        }
     
     def _update_email_status_from_webhook(self, webhook: EmailWebhook, processed_data: Dict[str, Any]):
         try:
@@ -326,15 +469,7 @@ class EmailIntegrationService:
                 started_at=timezone.now()
             )
             
-            result = self._execute_automation_action(automation, trigger_data or {})
-            
-            log.status = 'completed' if result['success'] else 'failed'
-            log.completed_at = timezone.now()
-            log.duration_seconds = (log.completed_at - log.started_at).total_seconds()
-            log.result_data = result
-            if not result['success']:
-                log.error_message = result.get('message', 'Unknown error')
-            log.save()
+            result = self._run_automation_steps(automation, log)
             
             automation.execution_count += 1
             automation.last_executed = timezone.now()
@@ -354,11 +489,111 @@ class EmailIntegrationService:
                 'message': f'Error executing automation: {str(e)}'
             }
     
-    def _execute_automation_action(self, automation: EmailAutomation, trigger_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _run_automation_steps(self, automation: EmailAutomation, log: EmailAutomationLog) -> Dict[str, Any]:
+        """
+        Run the automation from log.current_step. A delay step records the next step
+        and a wake-up time and returns immediately; resume_waiting_automations picks
+        the run up again once it is due, so waiting costs no worker time.
+        """
+        steps = automation.get_steps()
+        execution_data = dict(log.execution_data or {})
+        step_results = list(execution_data.get('step_results', []))
+        result = {'success': True, 'message': 'Automation completed'}
+
+        for index in range(log.current_step, len(steps)):
+            action_type = steps[index].get('action_type')
+            action_config = steps[index].get('action_config') or {}
+
+            if action_type == 'delay':
+                delay_seconds = int(action_config.get('delay_seconds', 0) or 0)
+                log.current_step = index + 1
+                if delay_seconds > 0 and log.current_step < len(steps):
+                    log.status = 'waiting'
+                    log.resume_at = timezone.now() + timedelta(seconds=delay_seconds)
+                    log.execution_data = {**execution_data, 'step_results': step_results}
+                    log.save(update_fields=['status', 'resume_at', 'current_step', 'execution_data'])
+                    return {
+                        'success': True,
+                        'waiting': True,
+                        'message': f'Waiting {delay_seconds} seconds before step {log.current_step + 1}',
+                        'resume_at': log.resume_at.isoformat(),
+                        'log_id': str(log.id)
+                    }
+                result = {'success': True, 'message': f'Delay completed: {delay_seconds} seconds'}
+                continue
+
+            result = self._execute_automation_action(action_type, action_config, log.trigger_data or {})
+            step_results.append({
+                'step': index,
+                'action_type': action_type,
+                'success': result.get('success', False),
+                'message': result.get('message')
+            })
+            log.current_step = index + 1
+            if not result.get('success'):
+                break
+            # Record progress now so a run reclaimed after a worker crash resumes after this step
+            # instead of repeating it.
+            log.execution_data = {**execution_data, 'step_results': step_results}
+            log.save(update_fields=['current_step', 'execution_data'])
+
+        log.status = 'completed' if result.get('success') else 'failed'
+        log.resume_at = None
+        log.completed_at = timezone.now()
+        log.duration_seconds = (log.completed_at - log.started_at).total_seconds()
+        log.execution_data = {**execution_data, 'step_results': step_results}
+        log.result_data = json.loads(json.dumps(result, default=str))
+        if not result.get('success'):
+            log.error_message = result.get('message', 'Unknown error')
+        log.save()
+        return result
+
+    def claim_due_automation_runs(self, batch_size: int, lease_seconds: int) -> List[EmailAutomationLog]:
+        """
+        Lock waiting runs whose wake-up time has passed, plus resumed runs whose worker
+        died (lease expired), and lease them to this worker. Concurrent schedulers skip
+        each other's rows.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            runs = list(
+                EmailAutomationLog.objects.select_for_update(skip_locked=True, of=('self',))
+                .filter(status__in=['waiting', 'running'], resume_at__lte=now)
+                .select_related('automation')
+                .order_by('resume_at')[:batch_size]
+            )
+            if runs:
+                lease_until = now + timedelta(seconds=lease_seconds)
+                EmailAutomationLog.objects.filter(id__in=[run.id for run in runs]).update(
+                    status='running', resume_at=lease_until
+                )
+                for run in runs:
+                    run.status = 'running'
+                    run.resume_at = lease_until
+        return runs
+
+    def resume_automation_run(self, log: EmailAutomationLog) -> Dict[str, Any]:
+        automation = log.automation
+        if automation.is_deleted or not automation.is_active or automation.status != 'active':
+            log.status = 'cancelled'
+            log.resume_at = None
+            log.completed_at = timezone.now()
+            log.error_message = 'Automation was deactivated while waiting'
+            log.save(update_fields=['status', 'resume_at', 'completed_at', 'error_message'])
+            return {'success': False, 'message': log.error_message}
+        try:
+            return self._run_automation_steps(automation, log)
+        except Exception as e:
+            logger.error(f"Error resuming automation run {log.id}: {str(e)}")
+            log.status = 'failed'
+            log.resume_at = None
+            log.completed_at = timezone.now()
+            log.error_message = str(e)
+            log.save(update_fields=['status', 'resume_at', 'completed_at', 'error_message'])
+            return {'success': False, 'message': str(e)}
+
+    def _execute_automation_action(self, action_type: str, action_config: Dict[str, Any], trigger_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            action_type = automation.action_type
-            action_config = automation.action_config
-            
             if action_type == 'send_email':
                 return self._execute_send_email_action(action_config, trigger_data)
             elif action_type == 'reply_email':
@@ -377,8 +612,6 @@ class EmailIntegrationService:
                 return self._execute_update_crm_action(action_config, trigger_data)
             elif action_type == 'webhook_call':
                 return self._execute_webhook_call_action(action_config, trigger_data)
-            elif action_type == 'delay':
-                return self._execute_delay_action(action_config, trigger_data)
             else:
                 return {
                     'success': False,
@@ -619,26 +852,6 @@ class EmailIntegrationService:
                 'message': f'Error calling webhook: {str(e)}'
             }
     
-    def _execute_delay_action(self, action_config: Dict[str, Any], trigger_data: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            import time
-            
-            delay_seconds = action_config.get('delay_seconds', 0)
-            if delay_seconds > 0:
-                time.sleep(delay_seconds)
-            
-            return {
-                'success': True,
-                'message': f'Delay completed: {delay_seconds} seconds'
-            }
-            
-        except Exception as e:
-            logger.error(f"Error executing delay action: {str(e)}")
-            return {
-                'success': False,
-                'message': f'Error executing delay: {str(e)}'
-            }
-    
     def sync_integration(self, integration_id: str, sync_type: str = 'incremental') -> Dict[str, Any]:
         try:
             integration = EmailIntegration.objects.get(id=integration_id)
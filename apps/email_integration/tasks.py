@@ -0,0 +1,77 @@
+import logging
+import time
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.receipts import claim_unprocessed_events
+from .models import EmailProviderEvent
+from .services import EmailIntegrationService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_email_provider_events(batch_size=None, max_batches=50):
+    batch_size = batch_size or getattr(settings, 'WEBHOOK_EVENT_BATCH_SIZE', 1000)
+    service = EmailIntegrationService()
+    total_events = total_tracking = total_updates = 0
+    started = time.monotonic()
+
+    for _ in range(max_batches):
+        with transaction.atomic():
+            events = claim_unprocessed_events(EmailProviderEvent, batch_size)
+            if not events:
+                break
+
+            result = service.apply_provider_events(events)
+            total_tracking += result['tracking']
+            total_updates += result['status_updates']
+            total_events += len(events)
+
+            EmailProviderEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+                processed=True, processed_at=timezone.now()
+            )
+
+    elapsed = time.monotonic() - started
+    if total_events:
+        logger.info(
+            f"Email provider events: {total_events} events -> {total_tracking} tracking rows, "
+            f"{total_updates} status updates in {elapsed:.2f}s ({total_events / elapsed if elapsed else 0:.0f} events/s)"
+        )
+    return {
+        'events': total_events,
+        'tracking': total_tracking,
+        'status_updates': total_updates,
+        'seconds': round(elapsed, 3),
+    }
+
+
+@shared_task
+def resume_waiting_automations(batch_size=None, max_batches=20):
+    """Beat-driven scheduler: resumes automation runs whose delay step has elapsed, in batches."""
+    batch_size = batch_size or getattr(settings, 'AUTOMATION_RESUME_BATCH_SIZE', 200)
+    lease_seconds = getattr(settings, 'AUTOMATION_RUN_LEASE_SECONDS', 600)
+    service = EmailIntegrationService()
+    resumed = completed = waiting = 0
+    started = time.monotonic()
+
+    for _ in range(max_batches):
+        runs = service.claim_due_automation_runs(batch_size, lease_seconds)
+        if not runs:
+            break
+        for run in runs:
+            result = service.resume_automation_run(run)
+            resumed += 1
+            if result.get('waiting'):
+                waiting += 1
+            elif result.get('success'):
+                completed += 1
+
+    if resumed:
+        logger.info(
+            f"Automation scheduler: {resumed} runs resumed, {completed} completed, "
+            f"{waiting} waiting again in {time.monotonic() - started:.2f}s"
+        )
+    return {'resumed': resumed, 'completed': completed, 'waiting': waiting}
@@ -9,7 +9,8 @@ from .views import (
     EmailTemplateVariableViewSet,
     EmailIntegrationAnalyticsViewSet,
     sendgrid_incoming_webhook,
-    sendgrid_events_webhook
+    sendgrid_events_webhook,
+    email_provider_events_webhook
 )
 
 router = DefaultRouter()
@@ -25,4 +26,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('webhooks/sendgrid/incoming/', sendgrid_incoming_webhook, name='sendgrid-incoming-webhook'),
     path('webhooks/sendgrid/events/', sendgrid_events_webhook, name='sendgrid-events-webhook'),
+    path('webhooks/<str:provider>/delivery-events/', email_provider_events_webhook, name='email-provider-events-webhook'),
 ]
@@ -743,4 +743,23 @@ def sendgrid_events_webhook(request):
         return Response({
             'success': False,
             'message': f'Internal server error: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@csrf_exempt
+def email_provider_events_webhook(request, provider):
+    """
+    Batched delivery/engagement events from SendGrid (JSON array) or SES (SNS
+    notification). Events are stored and acknowledged; a worker applies them in bulk.
+    """
+    if provider not in ('sendgrid', 'aws_ses'):
+        return Response({'success': False, 'message': 'Unsupported provider'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        payload = json.loads(request.body) if request.body else []
+    except json.JSONDecodeError:
+        return Response({'success': False, 'message': 'Invalid JSON payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = EmailIntegrationService().ingest_provider_events(provider, payload)
+    return Response(result, status=status.HTTP_200_OK)
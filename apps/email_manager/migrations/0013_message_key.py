@@ -0,0 +1,47 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:02
+
+from django.db import migrations, models
+
+from apps.core.message_ids import normalize_message_id
+
+
+def backfill_message_keys(apps, schema_editor):
+    for model_name in ('EmailManager', 'EmailManagerInbox'):
+        model = apps.get_model('email_manager', model_name)
+        seen = set()
+        batch = []
+        rows = model.objects.exclude(message_id__isnull=True).exclude(message_id='').order_by('created_at')
+        for row in rows.only('id', 'message_id').iterator(chunk_size=2000):
+            key = normalize_message_id(row.message_id)
+            # Ids differing only in case keep the key on the oldest row.
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            row.message_key = key
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['message_key'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['message_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_manager', '0012_emailmanagerforwardmail_original_email_manager'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmanager',
+            name='message_key',
+            field=models.CharField(blank=True, editable=False, help_text='Lowercased message ID without angle brackets, used to link replies', max_length=255, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='emailmanagerinbox',
+            name='message_key',
+            field=models.CharField(blank=True, editable=False, help_text='Lowercased message ID without angle brackets, used to link replies', max_length=255, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_message_keys, migrations.RunPython.noop),
+    ]
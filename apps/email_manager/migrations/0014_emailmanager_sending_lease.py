@@ -0,0 +1,27 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_manager', '0013_message_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmanager',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text="When a dispatcher's claim on this scheduled email lapses", null=True),
+        ),
+        migrations.AlterField(
+            model_name='emailmanager',
+            name='email_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('scheduled', 'Scheduled')], default='pending', help_text='Status of the email', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='emailmanager',
+            index=models.Index(fields=['email_status', 'lease_expires_at'], name='email_manag_email_s_1d1df5_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:51
+
+from django.db import migrations, models
+
+from apps.core.message_ids import normalize_message_id
+
+
+def fill_missing_message_keys(apps, schema_editor):
+    """0013 left case-variant duplicates without a key; now that keys may repeat they get one too."""
+    for model_name in ('EmailManager', 'EmailManagerInbox'):
+        model = apps.get_model('email_manager', model_name)
+        batch = []
+        rows = model.objects.filter(message_key__isnull=True).exclude(message_id__isnull=True).exclude(message_id='')
+        for row in rows.only('id', 'message_id').iterator(chunk_size=2000):
+            row.message_key = normalize_message_id(row.message_id)
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['message_key'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['message_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_manager', '0014_emailmanager_sending_lease'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailmanager',
+            name='message_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Lowercased message ID without angle brackets, used to link replies; not unique, since ids differing only in case normalize to the same key', max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='emailmanagerinbox',
+            name='message_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Lowercased message ID without angle brackets, used to link replies; not unique, since ids differing only in case normalize to the same key', max_length=255, null=True),
+        ),
+        migrations.RunPython(fill_missing_message_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('email_manager', '0015_message_key_not_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmanager',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, help_text='Identifies the dispatcher claim currently holding this scheduled email', null=True),
+        ),
+        migrations.AddField(
+            model_name='emailmanager',
+            name='smtp_handoff_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the current claim handed the message to SMTP; cleared on each claim', null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from apps.core.message_ids import normalize_message_id
 from apps.core.models import BaseModel
 from apps.templates.models import Template
 class EmailManager(BaseModel):
@@ -93,6 +94,7 @@ class EmailManager(BaseModel):
         max_length=20,
         choices=[
             ('pending', 'Pending'),
+            ('sending', 'Sending'),
             ('sent', 'Sent'),
             ('failed', 'Failed'),
             ('scheduled', 'Scheduled'),
@@ -118,11 +120,37 @@ class EmailManager(BaseModel):
         unique=True,
         help_text="Unique message ID of the sent email"
     )
+    message_key = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        help_text="Lowercased message ID without angle brackets, used to link replies; not unique, "
+                  "since ids differing only in case normalize to the same key"
+    )
     
     started = models.BooleanField(
         default=False,
         help_text="Indicates whether the email sending process has started"
     )
+    lease_expires_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="When a dispatcher's claim on this scheduled email lapses"
+    )
+    claim_token = models.UUIDField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Identifies the dispatcher claim currently holding this scheduled email"
+    )
+    smtp_handoff_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="When the current claim handed the message to SMTP; cleared on each claim"
+    )
 
     
     template = models.ForeignKey(
@@ -146,8 +174,16 @@ class EmailManager(BaseModel):
             models.Index(fields=['template']),
             models.Index(fields=['created_at']),
             models.Index(fields=['message_id']),
+            models.Index(fields=['email_status', 'lease_expires_at']),
         ]
     
+    def save(self, *args, **kwargs):
+        self.message_key = normalize_message_id(self.message_id)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'message_id' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'message_key'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Email to {self.to} - {self.subject}"
 
@@ -183,6 +219,15 @@ class EmailManagerInbox(BaseModel):
         unique=True,
         help_text="Unique message ID from email header"
     )
+    message_key = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        help_text="Lowercased message ID without angle brackets, used to link replies; not unique, "
+                  "since ids differing only in case normalize to the same key"
+    )
     in_reply_to = models.CharField(
         max_length=255,
         blank=True,
@@ -225,6 +270,13 @@ class EmailManagerInbox(BaseModel):
             models.Index(fields=['received_at']),
         ]
 
+    def save(self, *args, **kwargs):
+        self.message_key = normalize_message_id(self.message_id)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'message_id' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'message_key'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"From {self.from_email} - {self.subject or '(no subject)'}"
 
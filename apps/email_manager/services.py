@@ -1,12 +1,16 @@
 import logging
 import smtplib
-from typing import List, Dict, Any
+import uuid
+from datetime import timedelta
+from typing import List, Dict, Any, Tuple
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from .models import EmailManager
 from django.template import Template as DjangoTemplate, Context
 from apps.policies.models import Policy
+from apps.core.message_ids import normalize_message_id, original_message_id, parse_message_ids
 from .models import EmailManagerInbox
 import imaplib, email
 from email.header import decode_header
@@ -26,7 +30,13 @@ class EmailManagerService:
     
 
     @staticmethod
-    def send_email(email_manager: EmailManager) -> Dict[str, Any]:
+    def send_email(email_manager: EmailManager, claim_token=None) -> Dict[str, Any]:
+        """
+        `claim_token` is passed by the scheduled dispatcher: the row is in 'sending' under
+        that claim's lease, and the Message-ID and SMTP hand-off are recorded against the
+        claim before SMTP is touched, so a send can never happen after the lease was
+        given to another claim.
+        """
         try:
             if email_manager.schedule_send and email_manager.schedule_date_time:
                 if timezone.now() < email_manager.schedule_date_time:
@@ -65,6 +75,24 @@ class EmailManagerService:
             from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
 
             custom_msg_id = make_msgid(domain="nbinteli1001.welleazy.com")
+            real_msg_id = custom_msg_id.strip("<>")
+
+            if claim_token is not None:
+                fenced = EmailManager.objects.filter(
+                    id=email_manager.id,
+                    email_status='sending',
+                    claim_token=claim_token,
+                    lease_expires_at__gt=timezone.now(),
+                    smtp_handoff_at__isnull=True,
+                ).update(
+                    message_id=real_msg_id,
+                    message_key=normalize_message_id(real_msg_id),
+                    smtp_handoff_at=timezone.now()
+                )
+                if not fenced:
+                    logger.warning(f"Lease on scheduled email {email_manager.id} lapsed before sending; skipped")
+                    return {'success': False, 'message': 'Claim lease lapsed', 'lease_lost': True}
+
             msg = EmailMultiAlternatives(
                 subject=subject,
                 body=message,
@@ -77,14 +105,14 @@ class EmailManagerService:
 
             msg.send(fail_silently=False)
 
-            real_msg_id = custom_msg_id.strip("<>")
-
             now = timezone.now()
             EmailManager.objects.filter(id=email_manager.id).update(
                 message_id=real_msg_id,
+                message_key=normalize_message_id(real_msg_id),
                 email_status='sent',
                 sent_at=now,
-                error_message=None
+                error_message=None,
+                lease_expires_at=None
             )
 
             email_manager.refresh_from_db()
@@ -107,7 +135,8 @@ class EmailManagerService:
 
             EmailManager.objects.filter(id=email_manager.id).update(
                 email_status='failed',
-                error_message=error_message
+                error_message=error_message,
+                lease_expires_at=None
             )
             email_manager.refresh_from_db()
 
@@ -117,32 +146,102 @@ class EmailManagerService:
                 'error': error_message
             }
 
+    @staticmethod
+    def _lease_until():
+        return timezone.now() + timedelta(seconds=getattr(settings, 'SCHEDULED_EMAIL_LEASE_SECONDS', 300))
+
+    @staticmethod
+    def claim_scheduled_emails(batch_size: int = None) -> Tuple[uuid.UUID, List[int]]:
+        """
+        Move up to `batch_size` due scheduled emails to 'sending' under a new claim and
+        return (claim_token, ids). Rows locked by a concurrent claimer are skipped, so any
+        number of dispatchers can run at once without handing out the same email twice.
+        """
+        batch_size = batch_size or getattr(settings, 'SCHEDULED_EMAIL_BATCH_SIZE', 50)
+        claim_token = uuid.uuid4()
+        now = timezone.now()
+
+        with transaction.atomic():
+            ids = list(
+                EmailManager.objects.select_for_update(skip_locked=True)
+                .filter(
+                    schedule_send=True,
+                    schedule_date_time__lte=now,
+                    email_status__in=['pending', 'scheduled'],
+                    is_deleted=False
+                )
+                .order_by('schedule_date_time')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if ids:
+                EmailManager.objects.filter(id__in=ids).update(
+                    email_status='sending',
+                    claim_token=claim_token,
+                    smtp_handoff_at=None,
+                    lease_expires_at=EmailManagerService._lease_until()
+                )
+        return claim_token, ids
+
+    @staticmethod
+    def release_expired_leases() -> Dict[str, int]:
+        """
+        Hand back emails whose worker died mid-batch. Rows whose claim never reached SMTP
+        are rescheduled; rows whose claim did are marked failed rather than risk sending
+        them twice.
+        """
+        now = timezone.now()
+        expired = EmailManager.objects.filter(email_status='sending', lease_expires_at__lt=now)
+        rescheduled = expired.filter(smtp_handoff_at__isnull=True).update(
+            email_status='scheduled',
+            claim_token=None,
+            lease_expires_at=None
+        )
+        abandoned = expired.filter(smtp_handoff_at__isnull=False).update(
+            email_status='failed',
+            claim_token=None,
+            lease_expires_at=None,
+            error_message='Send outcome unknown: worker lease expired after the message was handed to SMTP'
+        )
+        if rescheduled or abandoned:
+            logger.warning(f"Expired scheduled-email leases: {rescheduled} rescheduled, {abandoned} marked failed")
+        return {'rescheduled': rescheduled, 'abandoned': abandoned}
+
+    @staticmethod
+    def send_claimed_emails(email_ids: List[int], claim_token) -> Dict[str, int]:
+        sent_count = 0
+        failed_count = 0
+        claimed = EmailManager.objects.filter(id__in=email_ids, email_status='sending', claim_token=claim_token)
+        for email in claimed:
+            # Sends are sequential; keep the rest of the batch leased while this one runs.
+            claimed.filter(smtp_handoff_at__isnull=True).update(lease_expires_at=EmailManagerService._lease_until())
+            result = EmailManagerService.send_email(email, claim_token=claim_token)
+            if result['success']:
+                sent_count += 1
+            elif not result.get('lease_lost'):
+                failed_count += 1
+        return {'sent': sent_count, 'failed': failed_count}
+
     @staticmethod
     def send_scheduled_emails() -> Dict[str, Any]:
-        
+        """Claim and send due scheduled emails inline, batch by batch, in this process."""
         try:
-            now = timezone.now()
-            scheduled_emails = EmailManager.objects.filter(
-                schedule_send=True,
-                schedule_date_time__lte=now,
-                is_deleted=False
-            ).filter(
-                Q(email_status="pending") | Q(email_status="scheduled")
-            )
-            
+            EmailManagerService.release_expired_leases()
+
             sent_count = 0
             failed_count = 0
-            
-            for email in scheduled_emails:
-                result = EmailManagerService.send_email(email)
-                if result['success']:
-                    sent_count += 1
-                else:
-                    failed_count += 1
+            processed = 0
+            for _ in range(getattr(settings, 'SCHEDULED_EMAIL_MAX_BATCHES', 20)):
+                claim_token, email_ids = EmailManagerService.claim_scheduled_emails()
+                if not email_ids:
+                    break
+                processed += len(email_ids)
+                result = EmailManagerService.send_claimed_emails(email_ids, claim_token)
+                sent_count += result['sent']
+                failed_count += result['failed']
             
             return {
                 'success': True,
-                'message': f'Processed {scheduled_emails.count()} scheduled emails',
+                'message': f'Processed {processed} scheduled emails',
                 'sent': sent_count,
                 'failed': failed_count
             }
@@ -223,6 +322,90 @@ class EmailInboxService:
             return None
 
 
+    @staticmethod
+    def _decode_subject(subject_raw):
+        subject = ""
+        for part, encoding in decode_header(subject_raw):
+            if isinstance(part, bytes):
+                subject += part.decode(encoding or "utf-8", errors="ignore")
+            else:
+                subject += part
+        return EmailInboxService.clean_text(subject)
+
+    @staticmethod
+    def _extract_content(msg):
+        body = ""
+        html_body = ""
+        attachments = []
+
+        if msg.is_multipart():
+            for part in msg.walk():
+                content_type = part.get_content_type()
+                content_disposition = str(part.get("Content-Disposition", ""))
+
+                if "attachment" in content_disposition:
+                    filename = part.get_filename()
+                    if filename:
+                        try:
+                            decoded = decode_header(filename)[0]
+                            filename = (
+                                decoded[0]
+                                if isinstance(decoded[0], str)
+                                else decoded[0].decode(decoded[1] or "utf-8")
+                            )
+                        except Exception:
+                            filename = filename or "unknown"
+                        payload = part.get_payload(decode=True)
+                        attachments.append({
+                            "filename": filename,
+                            "size": len(payload) if payload else 0,
+                            "content_type": content_type,
+                        })
+                    continue
+
+                payload = part.get_payload(decode=True)
+                if not payload:
+                    continue
+                text = payload.decode(errors="ignore")
+
+                if content_type == "text/plain":
+                    body += text + "\n"
+                elif content_type == "text/html":
+                    html_body += text
+        else:
+            payload = msg.get_payload(decode=True)
+            if payload:
+                body = payload.decode(errors="ignore")
+
+        return body, html_body, attachments
+
+    @staticmethod
+    def resolve_related_emails(candidate_keys):
+        """
+        Map normalized Message-IDs to the EmailManager thread they belong to: either the
+        sent email itself or, for replies further down a thread, the email an earlier
+        inbox reply was linked to. Two indexed IN lookups for the whole batch.
+        """
+        if not candidate_keys:
+            return {}
+        # Keys are not unique (case variants share one); newest first so the oldest row wins.
+        related = {
+            sent.message_key: sent
+            for sent in EmailManager.objects.filter(
+                message_key__in=candidate_keys, is_deleted=False
+            ).order_by("-created_at")
+        }
+        remaining = [key for key in candidate_keys if key not in related]
+        if remaining:
+            replies = EmailManagerInbox.objects.filter(
+                message_key__in=remaining,
+                related_email__isnull=False,
+                related_email__is_deleted=False,
+            ).select_related("related_email").order_by("-created_at")
+            for reply in replies:
+                related[reply.message_key] = reply.related_email
+        return related
+
     @staticmethod
     def fetch_incoming_emails():
         IMAP_HOST = getattr(settings, "IMAP_HOST", "imap.gmail.com")
@@ -250,161 +433,108 @@ class EmailInboxService:
             skipped = 0
             linked = 0
 
+            fetched = []
             for eid in email_ids[-50:]: 
                 try:
                     status, msg_data = mail.fetch(eid, "(RFC822)")
                     if status != "OK":
                         continue
 
-                    raw_email = msg_data[0][1]
-                    msg = email.message_from_bytes(raw_email)
+                    msg = email.message_from_bytes(msg_data[0][1])
 
                     msg_id = msg.get("Message-ID")
-                    if not msg_id:
+                    message_key = normalize_message_id(msg_id)
+                    if not message_key:
                         logger.debug("⏩ Skipped: No Message-ID header present.")
                         skipped += 1
                         continue
 
-                    msg_id_clean = EmailInboxService.clean_message_id(msg_id)
+                    references_raw = msg.get("References")
+                    references = parse_message_ids(references_raw)
+                    in_reply_to_raw = msg.get("In-Reply-To")
+                    in_reply_to = (parse_message_ids(in_reply_to_raw) or [None])[0]
+                    # In-Reply-To first, then References from the most recent ancestor back.
+                    candidate_keys = [in_reply_to] if in_reply_to else []
+                    candidate_keys.extend(key for key in reversed(references) if key not in candidate_keys)
+
+                    fetched.append({
+                        "eid": eid,
+                        "msg": msg,
+                        "message_id": EmailInboxService.clean_message_id(msg_id),
+                        "message_key": message_key,
+                        # Stored as sent, like message_id; the lowercased keys are only for lookups.
+                        "in_reply_to": original_message_id(in_reply_to_raw) or original_message_id(references_raw),
+                        "references_raw": references_raw,
+                        "candidate_keys": candidate_keys,
+                    })
+                except Exception as e:
+                    logger.error(f"Error fetching email ID {eid}: {str(e)}", exc_info=True)
+                    continue
+
+            mail.logout()
 
-                    if EmailManagerInbox.objects.filter(message_id__iexact=msg_id_clean).exists():
+            existing_keys = set(EmailManagerInbox.objects.filter(
+                message_key__in=[item["message_key"] for item in fetched]
+            ).values_list("message_key", flat=True))
+            related_by_key = EmailInboxService.resolve_related_emails(list({
+                key for item in fetched for key in item["candidate_keys"]
+            }))
+
+            for item in fetched:
+                try:
+                    if item["message_key"] in existing_keys:
                         skipped += 1
                         continue
 
+                    msg = item["msg"]
                     from_ = msg.get("From", "")
                     to_ = msg.get("To", "")
-                    subject_raw = msg.get("Subject", "")
-                    in_reply_to_raw = msg.get("In-Reply-To")
-                    references_raw = msg.get("References")
+                    subject = EmailInboxService._decode_subject(msg.get("Subject", ""))
 
-                    subject_parts = decode_header(subject_raw)
-                    subject = ""
-                    for part, encoding in subject_parts:
-                        if isinstance(part, bytes):
-                            subject += part.decode(encoding or "utf-8", errors="ignore")
-                        else:
-                            subject += part
-                    subject = EmailInboxService.clean_text(subject)
-
-                    in_reply_to = EmailInboxService.clean_message_id(in_reply_to_raw)
-                    references = [
-                        EmailInboxService.clean_message_id(ref)
-                        for ref in references_raw.split()
-                        if ref.strip()
-                    ] if references_raw else []
-
-                    candidate_ids = []
-                    if in_reply_to:
-                        candidate_ids.append(in_reply_to)
-                    candidate_ids.extend(references)
-
-                    logger.debug(f"📨 Processing email '{subject}' | Candidates: {candidate_ids}")
-
-                    related_email = None
-                    for mid in candidate_ids:
-                        if not mid:
-                            continue
-                        normalized_mid = mid.lower().strip().replace("<", "").replace(">", "")
-                        try:
-                            related_email = EmailManager.objects.filter(
-                                message_id__iexact=normalized_mid,
-                                is_deleted=False
-                            ).first()
-
-                            if not related_email:
-                                related_email = EmailManager.objects.filter(
-                                    message_id__icontains=normalized_mid,
-                                    is_deleted=False
-                                ).first()
-
-                            if not related_email:
-                                related_email = EmailManager.objects.filter(
-                                    message_id__icontains=mid.lower(),
-                                    is_deleted=False
-                                ).first()
-
-                            if related_email:
-                                logger.info(
-                                    f"✅ Linked reply to EmailManager ID={related_email.id}, "
-                                    f"policy={related_email.policy_number}, subject={subject}"
-                                )
-                                linked += 1
-                                break
-                        except Exception as ex:
-                            logger.exception(f"⚠️ Error linking MID {mid}: {ex}")
-                            continue
-
-                    body = ""
-                    html_body = ""
-                    attachments = []
-
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            content_type = part.get_content_type()
-                            content_disposition = str(part.get("Content-Disposition", ""))
-
-                            if "attachment" in content_disposition:
-                                filename = part.get_filename()
-                                if filename:
-                                    try:
-                                        decoded = decode_header(filename)[0]
-                                        filename = (
-                                            decoded[0]
-                                            if isinstance(decoded[0], str)
-                                            else decoded[0].decode(decoded[1] or "utf-8")
-                                        )
-                                    except Exception:
-                                        filename = filename or "unknown"
-                                    payload = part.get_payload(decode=True)
-                                    attachments.append({
-                                        "filename": filename,
-                                        "size": len(payload) if payload else 0,
-                                        "content_type": content_type,
-                                    })
-                                continue
-
-                            payload = part.get_payload(decode=True)
-                            if not payload:
-                                continue
-                            text = payload.decode(errors="ignore")
-
-                            if content_type == "text/plain" and "attachment" not in content_disposition:
-                                body += text + "\n"
-                            elif content_type == "text/html" and "attachment" not in content_disposition:
-                                html_body += text
-                    else:
-                        payload = msg.get_payload(decode=True)
-                        if payload:
-                            body = payload.decode(errors="ignore")
-
-                    if related_email:
-                        EmailManagerInbox.objects.create(
-                            from_email=from_,
-                            to_email=to_,
-                            subject=subject,
-                            message=EmailInboxService.clean_text(body),
-                            html_message=html_body.strip() or None,
-                            received_at=timezone.now(),
-                            message_id=msg_id_clean,
-                            in_reply_to=in_reply_to or (references[0] if references else None),
-                            references=references_raw,
-                            attachments=attachments if attachments else None,
-                            related_email=related_email,
-                            is_read=False,
-                        )
-                        processed += 1
-                        logger.info(
-                            f"📩 Stored reply from {from_} for policy {related_email.policy_number} | Subject: {subject}"
-                        )
-                    else:
+                    logger.debug(f"📨 Processing email '{subject}' | Candidates: {item['candidate_keys']}")
+
+                    related_email = next(
+                        (related_by_key[key] for key in item["candidate_keys"] if key in related_by_key),
+                        None
+                    )
+                    if not related_email:
                         skipped += 1
                         logger.debug(f"⏩ Skipped unrelated email: {subject} from {from_}")
+                        continue
+
+                    linked += 1
+                    logger.info(
+                        f"✅ Linked reply to EmailManager ID={related_email.id}, "
+                        f"policy={related_email.policy_number}, subject={subject}"
+                    )
+
+                    body, html_body, attachments = EmailInboxService._extract_content(msg)
+                    EmailManagerInbox.objects.create(
+                        from_email=from_,
+                        to_email=to_,
+                        subject=subject,
+                        message=EmailInboxService.clean_text(body),
+                        html_message=html_body.strip() or None,
+                        received_at=timezone.now(),
+                        message_id=item["message_id"],
+                        in_reply_to=item["in_reply_to"],
+                        references=item["references_raw"],
+                        attachments=attachments if attachments else None,
+                        related_email=related_email,
+                        is_read=False,
+                    )
+                    existing_keys.add(item["message_key"])
+                    # Later messages in this batch may reply to this one.
+                    related_by_key[item["message_key"]] = related_email
+                    processed += 1
+                    logger.info(
+                        f"📩 Stored reply from {from_} for policy {related_email.policy_number} | Subject: {subject}"
+                    )
 
                 except Exception as e:
-                    logger.error(f"Error processing email ID {eid}: {str(e)}", exc_info=True)
+                    logger.error(f"Error processing email ID {item['eid']}: {str(e)}", exc_info=True)
                     continue
 
-            mail.logout()
             logger.info(f"📬 Summary: Processed={processed}, Skipped={skipped}, Linked={linked}")
 
             return {
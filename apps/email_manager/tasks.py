@@ -1,9 +1,37 @@
+import logging
 from celery import shared_task
+from django.conf import settings
 from .services import EmailManagerService, EmailInboxService
 
+logger = logging.getLogger(__name__)
+
 @shared_task
 def process_scheduled_emails():
-    EmailManagerService.send_scheduled_emails()
+    """
+    Beat-driven dispatcher: releases expired leases, then claims due scheduled emails
+    in batches and fans each batch out to a worker. Overlapping ticks are safe because
+    claiming skips rows another dispatcher already holds.
+    """
+    released = EmailManagerService.release_expired_leases()
+
+    claimed = 0
+    for _ in range(getattr(settings, 'SCHEDULED_EMAIL_MAX_BATCHES', 20)):
+        claim_token, email_ids = EmailManagerService.claim_scheduled_emails()
+        if not email_ids:
+            break
+        claimed += len(email_ids)
+        send_scheduled_email_batch.delay(email_ids, str(claim_token))
+
+    if claimed:
+        logger.info(f"Scheduled email dispatcher: {claimed} emails claimed")
+    return {'claimed': claimed, **released}
+
+@shared_task
+def send_scheduled_email_batch(email_ids, claim_token=None):
+    if claim_token is None:
+        # Queued before claims carried a token: leave the rows for release_expired_leases.
+        return {'sent': 0, 'failed': 0}
+    return EmailManagerService.send_claimed_emails(email_ids, claim_token)
 
 @shared_task
 def fetch_and_process_incoming_emails():
@@ -21,9 +21,47 @@ from sendgrid.helpers.mail import Mail
 
 from .models import EmailProviderConfig, EmailProviderHealthLog, EmailProviderUsageLog
 from apps.billing.services import log_communication
+from apps.core.provider_router import ProviderEntry, ProviderRouter, NoProviderAvailable
 
 logger = logging.getLogger(__name__)
 
+_decrypted_credentials: Dict[str, str] = {}
+
+
+def _load_email_provider_entries() -> List[ProviderEntry]:
+    entries = []
+    today = timezone.now().date()
+    providers = EmailProviderConfig.objects.filter(
+        is_active=True,
+        is_deleted=False,
+        health_status__in=['healthy', 'unknown']
+    )
+    for provider in providers:
+        if provider.health_status == 'healthy':
+            health_rank = 0
+        elif provider.api_key and provider.provider_type == 'sendgrid' and provider.from_email:
+            health_rank = 1
+        else:
+            continue
+
+        entries.append(ProviderEntry(
+            provider=provider,
+            priority=(health_rank, provider.priority, provider.name),
+            daily_limit=provider.daily_limit,
+            sent_today=provider.emails_sent_today if provider.last_reset_daily == today else 0,
+            monthly_limit=provider.monthly_limit,
+            sent_this_month=provider.emails_sent_this_month,
+        ))
+    return entries
+
+
+email_provider_router = ProviderRouter(
+    name='email',
+    loader=_load_email_provider_entries,
+    watch_models=[EmailProviderConfig],
+    counter_fields=['emails_sent_today', 'emails_sent_this_month', 'last_reset_daily'],
+)
+
 class EmailProviderService:    
     def __init__(self,config: EmailProviderConfig = None):
         self.config = config
@@ -47,8 +85,13 @@ class EmailProviderService:
     def _decrypt_credential(self, value: str) -> str:
         if not self._fernet or not value:
             return value
+        cached = _decrypted_credentials.get(value)
+        if cached is not None:
+            return cached
         try:
-            return self._fernet.decrypt(value.encode()).decode()
+            decrypted = self._fernet.decrypt(value.encode()).decode()
+            _decrypted_credentials[value] = decrypted
+            return decrypted
         except Exception as e:
             logger.error(f"Failed to decrypt credential: {e}")
             return value
@@ -66,27 +109,11 @@ class EmailProviderService:
             health_status='healthy'
         ).order_by('priority', 'name')
     
-    def get_available_provider(self) -> Optional[EmailProviderConfig]:
-        providers = self.get_healthy_providers()
-        
-        for provider in providers:
-            if provider.can_send_email():
-                return provider
-        
-        active_providers = EmailProviderConfig.objects.filter(
-            is_active=True,
-            is_deleted=False,
-            health_status__in=['unknown', 'healthy']
-        ).order_by('priority', 'name')
-        
-        for provider in active_providers:
-            if (provider.api_key and 
-                provider.provider_type == 'sendgrid' and 
-                provider.from_email):
-                logger.info(f"Using provider with unknown health status: {provider.name}")
-                return provider
-        
-        return None
+    def get_available_provider(self, count: int = 1) -> Optional[EmailProviderConfig]:
+        try:
+            return email_provider_router.get_provider(count=count)
+        except NoProviderAvailable:
+            return None
     
     def send_email(self, to_emails: List[str], subject: str, html_content: str = '',
                    text_content: str = '', from_email: str = None, from_name: str = None,
@@ -123,7 +150,7 @@ class EmailProviderService:
         if self.config:
             provider = self.config
         else:
-            provider = self.get_available_provider() 
+            provider = self.get_available_provider(count=len(to_emails or [])) 
 
         if not provider:
             return {
@@ -156,6 +183,7 @@ class EmailProviderService:
             
             response_time = time.time() - start_time
             
+            email_provider_router.record_result(provider.pk, result['success'], response_time, len(to_emails))
             self._log_usage(provider, len(to_emails), result['success'], response_time)
             
             if result['success']:
@@ -181,6 +209,7 @@ class EmailProviderService:
             logger.error(f"Error sending email via {provider.name}: {str(e)}")
             response_time = time.time() - start_time
             
+            email_provider_router.record_result(provider.pk, False, response_time, len(to_emails))
             self._log_usage(provider, len(to_emails), False, response_time)
             
             log_communication(
@@ -0,0 +1,187 @@
+"""
+Export engine for feedback data.
+
+Every export is a generator of rows (header first) built on a chunked queryset
+iterator, so memory and query count stay flat as the data grows. The same rows feed
+a streamed CSV response, an XLSX written through openpyxl's write-only workbook, or a
+file generated in the background for large surveys (see generate_survey_export).
+"""
+import csv
+import io
+import logging
+import tempfile
+from typing import Any, Iterable, Iterator, List
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.files import File
+from django.db.models import Prefetch, Q, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from .models import QuestionAnswer
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'xlsx')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class _Echo:
+    """csv.writer target that hands each encoded line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def customer_display():
+    return Coalesce(
+        NullIf(Trim(Concat('customer__first_name', Value(' '), 'customer__last_name')), Value('')),
+        Value('Anonymous'),
+    )
+
+
+# Row sources
+
+
+def survey_answer_rows(survey, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """
+    Header plus one row per submission with an answer column per question. Answers are
+    pivoted in the same query (two ordered array aggregates per submission), and the
+    submissions are read through a server-side cursor.
+    """
+    questions = list(survey.questions.order_by('order', 'id').values_list('id', 'label'))
+    yield ['Date', 'Customer', 'Rating', 'Comment'] + [label for _, label in questions]
+
+    answered = Q(answers__isnull=False)
+    submissions = (
+        survey.submissions
+        .order_by('-created_at')
+        .annotate(
+            customer_label=customer_display(),
+            question_ids=ArrayAgg('answers__question_id', filter=answered, ordering='answers__id'),
+            answer_values=ArrayAgg('answers__answer_value', filter=answered, ordering='answers__id'),
+        )
+        .values_list('created_at', 'customer_label', 'rating', 'comment', 'question_ids', 'answer_values')
+    )
+    for created_at, customer, rating, comment, question_ids, answer_values in submissions.iterator(chunk_size=chunk_size):
+        answers = dict(zip(question_ids or [], answer_values or []))
+        yield [created_at.strftime("%Y-%m-%d"), customer, rating, comment] + [
+            answers.get(question_id, "") for question_id, _ in questions
+        ]
+
+
+def submission_inbox_rows(submissions, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Any]]:
+    yield ['ID', 'Date', 'Customer', 'Rating', 'Category', 'Status', 'Comment', 'Assigned To']
+    submissions = submissions.select_related('assigned_to').annotate(customer_label=customer_display())
+    for sub in submissions.iterator(chunk_size=chunk_size):
+        yield [
+            sub.id,
+            sub.created_at.strftime("%Y-%m-%d %H:%M"),
+            sub.customer_label,
+            f"{sub.rating}/5",
+            sub.category,
+            sub.get_status_display(),
+            sub.comment,
+            sub.assigned_to.get_full_name() if sub.assigned_to else "Unassigned",
+        ]
+
+
+def response_rows(submissions, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """All-surveys response list; answers are prefetched once per chunk rather than per submission."""
+    yield ['Survey', 'Date', 'Customer', 'Rating', 'Comment', 'Answers']
+    submissions = (
+        submissions
+        .select_related('survey')
+        .annotate(customer_label=customer_display())
+        .prefetch_related(Prefetch('answers', queryset=QuestionAnswer.objects.select_related('question').order_by('id')))
+    )
+    for sub in submissions.iterator(chunk_size=chunk_size):
+        yield [
+            sub.survey.title,
+            sub.created_at.strftime("%Y-%m-%d"),
+            sub.customer_label,
+            sub.rating,
+            sub.comment,
+            " | ".join(f"{a.question.label}: {a.answer_value}" for a in sub.answers.all()),
+        ]
+
+
+# Writers
+
+
+def stream_csv(rows: Iterable[List[Any]], filename: str) -> StreamingHttpResponse:
+    writer = csv.writer(_Echo())
+    response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type=CONTENT_TYPES['csv'])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _xlsx_value(value):
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    return value
+
+
+def write_export(rows: Iterable[List[Any]], file_format: str, fileobj) -> int:
+    """Write `rows` to the binary file object `fileobj`; returns the number of data rows."""
+    count = -1
+    if file_format == 'xlsx':
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Export')
+        for row in rows:
+            sheet.append([_xlsx_value(value) for value in row])
+            count += 1
+        workbook.save(fileobj)
+    else:
+        text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        text.flush()
+        text.detach()
+    return max(count, 0)
+
+
+def export_response(rows: Iterable[List[Any]], filename: str, file_format: str = 'csv'):
+    """
+    CSV streams straight to the client. XLSX is a zip archive that cannot be sent before
+    it is complete, so it is built in a temporary file (write-only mode keeps memory flat)
+    and then streamed from disk.
+    """
+    if file_format != 'xlsx':
+        return stream_csv(rows, f"{filename}.csv")
+    tmp = tempfile.TemporaryFile()
+    write_export(rows, 'xlsx', tmp)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=f"{filename}.xlsx", content_type=CONTENT_TYPES['xlsx'])
+
+
+# Background generation
+
+
+def generate_survey_export(export_id) -> int:
+    from .models import SurveyExport
+
+    export = SurveyExport.objects.select_related('survey').get(pk=export_id)
+    exports = SurveyExport.objects.filter(pk=export.pk)
+    exports.update(status='running')
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            row_count = write_export(survey_answer_rows(export.survey), export.file_format, tmp)
+            tmp.seek(0)
+            filename = f"survey_{export.survey_id}_{timezone.now():%Y%m%d%H%M%S}.{export.file_format}"
+            export.file.save(filename, File(tmp), save=False)
+        exports.update(status='completed', file=export.file.name, row_count=row_count, completed_at=timezone.now())
+    except Exception as e:
+        logger.error(f"Survey export {export_id} failed: {str(e)}", exc_info=True)
+        exports.update(status='failed', error=str(e), completed_at=timezone.now())
+        raise
+    return row_count
@@ -0,0 +1,77 @@
+import json
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.benchmarking import RolledBackCommand, count_queries
+from apps.feedback_and_surveys.exports import generate_survey_export
+from apps.feedback_and_surveys.models import (
+    QuestionAnswer, SubmissionActivityLog, Survey, SurveyExport, SurveyQuestion, SurveySubmission,
+)
+from apps.feedback_and_surveys.views import SubmissionViewSet
+
+
+class Command(RolledBackCommand):
+    help = (
+        'Measure feedback bulk actions and exports over many submissions: bulk_action time and queries, '
+        'streamed inbox CSV/XLSX export, and background survey export generation. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=10000)
+        parser.add_argument('--questions', type=int, default=10)
+
+    def run(self, options):
+        tag = uuid.uuid4().hex[:8]
+        owner = get_user_model().objects.create(email=f'feedback-bench-{tag}@example.com')
+        survey = Survey.objects.create(owner=owner, title=f'Benchmark {tag}', status='active', is_active=True)
+        questions = SurveyQuestion.objects.bulk_create([
+            SurveyQuestion(survey=survey, label=f'Question {n}', order=n) for n in range(options['questions'])
+        ])
+        submissions = SurveySubmission.objects.bulk_create([
+            SurveySubmission(survey=survey, rating=n % 5 + 1, comment=f'Comment {n}') for n in range(options['submissions'])
+        ], batch_size=2000)
+        QuestionAnswer.objects.bulk_create([
+            QuestionAnswer(submission=submission, question=question, answer_value='Yes')
+            for submission in submissions for question in questions
+        ], batch_size=5000)
+        ids = [submission.id for submission in submissions]
+
+        factory = APIRequestFactory()
+        bulk_action = SubmissionViewSet.as_view({'post': 'bulk_action'})
+        request = factory.post('/feedback_and_surveys/inbox/bulk_action/',
+                               json.dumps({'ids': ids, 'action': 'flag'}), content_type='application/json')
+        force_authenticate(request, user=owner)
+        with count_queries() as queries:
+            start = time.perf_counter()
+            response = bulk_action(request)
+            elapsed = time.perf_counter() - start
+        logs = SubmissionActivityLog.objects.filter(submission__survey=survey).count()
+        self.stdout.write(
+            f"bulk_action flag: {response.data.get('updated_count')} submissions in {elapsed:.2f}s "
+            f"with {queries['queries']} queries; {logs} activity logs"
+        )
+
+        export = SubmissionViewSet.as_view({'get': 'export'})
+        for file_format in ('csv', 'xlsx'):
+            request = factory.get('/feedback_and_surveys/inbox/export/', {'file_format': file_format})
+            force_authenticate(request, user=owner)
+            with count_queries() as queries:
+                start = time.perf_counter()
+                response = export(request)
+                size = sum(len(chunk) for chunk in response.streaming_content)
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"Inbox export {file_format}: {len(ids)} rows, {size / 1024:.0f} KiB in {elapsed:.2f}s "
+                f"with {queries['queries']} queries"
+            )
+
+        survey_export = SurveyExport.objects.create(survey=survey, file_format='xlsx', created_by=owner)
+        start = time.perf_counter()
+        rows = generate_survey_export(survey_export.id)
+        elapsed = time.perf_counter() - start
+        survey_export.refresh_from_db()
+        self.stdout.write(f"Background survey export xlsx: {rows} rows in {elapsed:.2f}s -> {survey_export.file.name}")
+        survey_export.file.delete(save=False)
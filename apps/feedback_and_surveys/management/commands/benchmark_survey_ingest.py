@@ -0,0 +1,77 @@
+import json
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory
+
+from apps.core.benchmarking import RolledBackCommand, count_queries
+from apps.feedback_and_surveys.exports import survey_answer_rows
+from apps.feedback_and_surveys.models import QuestionAnswer, Survey, SurveyQuestion, SurveySubmission
+from apps.feedback_and_surveys.views import PublicSurveyViewSet
+
+
+class Command(RolledBackCommand):
+    help = (
+        'Measure public survey submissions (queries and submissions/s) and the pivoted CSV export '
+        '(queries and rows/s). All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument('--submissions', type=int, default=500, help='Submitted through the API')
+        parser.add_argument('--export-submissions', type=int, default=20000,
+                            help='Total submissions in the survey when exporting (the rest are bulk inserted)')
+
+    def run(self, options):
+        tag = uuid.uuid4().hex[:8]
+        owner = get_user_model().objects.create(email=f'survey-bench-{tag}@example.com')
+        survey = Survey.objects.create(owner=owner, title=f'Benchmark {tag}', status='active', is_active=True)
+        SurveyQuestion.objects.bulk_create([
+            SurveyQuestion(survey=survey, label=f'Question {n}', order=n) for n in range(options['questions'])
+        ])
+        question_ids = list(survey.questions.values_list('id', flat=True))
+
+        factory = APIRequestFactory()
+        view = PublicSurveyViewSet.as_view({'post': 'submit'})
+        body = json.dumps({
+            'rating': 4,
+            'comment': 'Quick renewal',
+            'answers': [{'question_id': question_id, 'value': 'Yes'} for question_id in question_ids],
+        })
+
+        query_counts = []
+        start = time.perf_counter()
+        for _ in range(options['submissions']):
+            request = factory.post(f'/feedback/public/{survey.pk}/submit/', body, content_type='application/json')
+            with count_queries() as queries:
+                response = view(request, pk=survey.pk)
+            if response.status_code != 201:
+                self.stdout.write(self.style.ERROR(f"Submit returned {response.status_code}: {response.data}"))
+                return
+            query_counts.append(queries['queries'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Submit: {options['submissions']} submissions x {len(question_ids)} answers in {elapsed:.2f}s "
+            f"({options['submissions'] / elapsed:.0f}/s); queries per submission first {query_counts[0]}, "
+            f"max after warm-up {max(query_counts[1:] or query_counts)}"
+        )
+
+        extra = max(0, options['export_submissions'] - options['submissions'])
+        for offset in range(0, extra, 2000):
+            submissions = SurveySubmission.objects.bulk_create([
+                SurveySubmission(survey=survey, rating=3, comment='Bulk') for _ in range(min(2000, extra - offset))
+            ])
+            QuestionAnswer.objects.bulk_create([
+                QuestionAnswer(submission=submission, question_id=question_id, answer_value='No')
+                for submission in submissions for question_id in question_ids
+            ], batch_size=5000)
+
+        with count_queries() as queries:
+            start = time.perf_counter()
+            rows = sum(1 for _ in survey_answer_rows(survey)) - 1
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Export: {rows} rows x {len(question_ids)} answer columns in {elapsed:.2f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s) using {queries['queries']} queries"
+        )
@@ -151,4 +151,20 @@ class AutomationRule(BaseModel):
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"{self.name} ({self.trigger_event})"
\ No newline at end of file
+        return f"{self.name} ({self.trigger_event})"
+
+class SurveyExport(BaseModel):
+    FORMAT_CHOICES = [('csv', 'CSV'), ('xlsx', 'Excel')]
+    STATUS_CHOICES = [('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')]
+
+    survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name='exports')
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='feedback/exports/', blank=True)
+    row_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'feedback_survey_exports'
+        ordering = ['-created_at']
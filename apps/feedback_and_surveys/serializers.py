@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Survey, SurveyQuestion, SurveySubmission, QuestionAnswer, SubmissionAttachment, SubmissionActivityLog,AutomationRule
 from apps.audience_manager.models import AudienceContact
+from .submissions import invalidate_question_map
 
 class SurveyQuestionSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(required=False)
@@ -41,6 +42,7 @@ class SurveySerializer(serializers.ModelSerializer):
             for q_data in questions_data:
                 q_data.pop('id', None) 
                 SurveyQuestion.objects.create(survey=instance, **q_data)
+            invalidate_question_map(instance)
 
         return instance
 
@@ -0,0 +1,59 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QuestionAnswer, SubmissionActivityLog, SurveyQuestion, SurveySubmission
+
+
+def question_map_key(survey) -> str:
+    # Saving a survey (which the builder does before rewriting its questions) moves the key.
+    version = int(survey.updated_at.timestamp() * 1000) if survey.updated_at else 0
+    return f"feedback:survey:{survey.pk}:questions:{version}"
+
+
+def question_map(survey) -> Dict[str, int]:
+    """{str(question_id): question_id} for the survey, cached per survey version."""
+    key = question_map_key(survey)
+    questions = cache.get(key)
+    if questions is None:
+        questions = {str(pk): pk for pk in SurveyQuestion.objects.filter(survey=survey).values_list('id', flat=True)}
+        cache.set(key, questions, settings.SURVEY_QUESTION_MAP_TTL)
+    return questions
+
+
+def invalidate_question_map(survey):
+    cache.delete(question_map_key(survey))
+
+
+def build_answers(submission, questions: Dict[str, int], raw_answers: Iterable[Any]) -> Tuple[List[QuestionAnswer], int]:
+    """Unsaved answers for the ids that belong to the survey; returns them with the count of skipped entries."""
+    answers = []
+    skipped = 0
+    for raw in raw_answers or []:
+        question_id = questions.get(str(raw.get('question_id'))) if isinstance(raw, dict) else None
+        if question_id is None or 'value' not in raw:
+            skipped += 1
+            continue
+        answers.append(QuestionAnswer(submission=submission, question_id=question_id, answer_value=str(raw['value'])))
+    return answers, skipped
+
+
+def bulk_update_submissions(submissions, updates: Dict[str, Any], actor, log_text: str, batch_size: int = 1000) -> int:
+    """
+    Apply `updates` to every submission in the queryset with one UPDATE and record one
+    activity log per submission with bulk_create; returns the number of submissions.
+    """
+    with transaction.atomic():
+        ids = list(submissions.order_by().values_list('id', flat=True))
+        if not ids:
+            return 0
+        now = timezone.now()
+        SurveySubmission.objects.filter(id__in=ids).update(updated_at=now, **updates)
+        SubmissionActivityLog.objects.bulk_create(
+            [SubmissionActivityLog(submission_id=pk, actor=actor, action=log_text) for pk in ids],
+            batch_size=batch_size,
+        )
+    return len(ids)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .exports import generate_survey_export
+
+
+@shared_task
+def generate_survey_export_task(export_id):
+    return generate_survey_export(export_id)
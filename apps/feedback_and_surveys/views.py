@@ -1,13 +1,12 @@
 from rest_framework import viewsets, filters, permissions
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Survey, SurveySubmission, SurveyQuestion, QuestionAnswer, SubmissionAttachment, SubmissionActivityLog, AutomationRule
+from .models import Survey, SurveySubmission, SurveyQuestion, QuestionAnswer, SubmissionAttachment, SubmissionActivityLog, AutomationRule, SurveyExport
 from .serializers import InboxSubmissionSerializer, SurveySerializer, SurveySubmissionSerializer, SurveyCampaignSerializer, DashboardFeedbackTableSerializer, FeedbackDetailSerializer, SurveyResponseCardSerializer, AudienceListSerializer, AudienceContactSerializer, AutomationRuleSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Avg, Count, Sum
 from .services import DistributionService
-import csv
 from django.http import HttpResponse
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -21,6 +20,14 @@ from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from django.utils import timezone
+from django.db import transaction
+from django.conf import settings
+from .exports import (
+    EXPORT_FORMATS, customer_display, export_response, response_rows, stream_csv,
+    submission_inbox_rows, survey_answer_rows,
+)
+from .submissions import build_answers, bulk_update_submissions, question_map
+from .tasks import generate_survey_export_task
 
 class SurveyViewSet(viewsets.ModelViewSet):
     serializer_class = SurveySerializer
@@ -69,33 +76,38 @@ class SurveyViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def export_csv(self, request, pk=None):
         survey = self.get_object()
-        submissions = survey.submissions.all().order_by('-created_at')
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="{survey.title}_results.csv"'
-        
-        writer = csv.writer(response)
-        
-        question_labels = [q.label for q in survey.questions.all().order_by('order')]
-        headers = ['Date', 'Customer', 'Rating', 'Comment'] + question_labels
-        writer.writerow(headers)
-        
-        for sub in submissions:
-            row = [
-                sub.created_at.strftime("%Y-%m-%d"),
-                sub.customer.name if sub.customer else sub.customer_name or "Anonymous",
-                sub.rating,
-                sub.comment
-            ]
-            
-            answers_map = {ans.question_id: ans.answer_value for ans in sub.answers.all()}
-            
-            for question in survey.questions.all().order_by('order'):
-                row.append(answers_map.get(question.id, "")) 
-            
-            writer.writerow(row)
-            
-        return response
+        return stream_csv(survey_answer_rows(survey), f"{survey.title}_results.csv")
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        survey = self.get_object()
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': f"file_format must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        background = request.query_params.get('background') in ('1', 'true')
+        if not background and survey.submissions.count() <= settings.SURVEY_EXPORT_SYNC_LIMIT:
+            return export_response(survey_answer_rows(survey), f"{survey.title}_results", file_format)
+
+        export = SurveyExport.objects.create(survey=survey, file_format=file_format, created_by=request.user)
+        transaction.on_commit(lambda: generate_survey_export_task.delay(export.id))
+        return Response({'export_id': export.id, 'status': export.status}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path=r'exports/(?P<export_id>\d+)')
+    def export_status(self, request, pk=None, export_id=None):
+        survey = self.get_object()
+        export = get_object_or_404(SurveyExport, pk=export_id, survey=survey)
+        return Response({
+            'export_id': export.id,
+            'status': export.status,
+            'file_format': export.file_format,
+            'row_count': export.row_count,
+            'file_url': export.file.url if export.status == 'completed' and export.file else None,
+            'error': export.error or None,
+            'created_at': export.created_at,
+            'completed_at': export.completed_at,
+        })
+
     @action(detail=True, methods=['post'])
     def pause(self, request, pk=None):
         
@@ -122,21 +134,24 @@ class SurveyViewSet(viewsets.ModelViewSet):
         elements.append(Paragraph(f"Survey Report: {survey.title}", styles['Title']))
         elements.append(Spacer(1, 12))
         
-        total = submissions.count()
-        avg = submissions.aggregate(Avg('rating'))['rating__avg'] or 0
+        summary = submissions.aggregate(total=Count('id'), avg=Avg('rating'))
+        total = summary['total']
+        avg = summary['avg'] or 0
         stats_text = f"Total Responses: {total}  |  Average Rating: {round(avg, 1)} / 5"
         elements.append(Paragraph(stats_text, styles['Heading2']))
         elements.append(Spacer(1, 12))
         
         data = [['Date', 'Customer', 'Rating', 'Comment']]
         
-        for sub in submissions[:20]:
-            name = sub.customer.name if sub.customer else "Anonymous"
-            comment = (sub.comment[:50] + '...') if sub.comment and len(sub.comment) > 50 else sub.comment or ""
+        latest = submissions.order_by('-created_at').annotate(customer_label=customer_display()).values_list(
+            'created_at', 'customer_label', 'rating', 'comment'
+        )[:20]
+        for created_at, name, rating, comment in latest:
+            comment = (comment[:50] + '...') if comment and len(comment) > 50 else comment or ""
             data.append([
-                sub.created_at.strftime("%Y-%m-%d"),
+                created_at.strftime("%Y-%m-%d"),
                 name,
-                str(sub.rating),
+                str(rating),
                 comment
             ])
             
@@ -294,35 +309,20 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         if not ids:
             return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
 
-        submissions = SurveySubmission.objects.filter(id__in=ids)
-        count = 0
-
-        for sub in submissions:
-            if action_type == 'assign':
-                if value:
-                    sub.assigned_to_id = value
-                    sub.status = 'in_progress'
-                    sub.save()
-                    self._log_activity(sub, request.user, f"Bulk assigned to User {value}")
-                    count += 1
-            
-            elif action_type == 'resolve':
-                sub.status = 'resolved'
-                sub.save()
-                self._log_activity(sub, request.user, "Marked resolved (Bulk)")
-                count += 1
-
-            elif action_type == 'flag':
-                sub.is_flagged = True
-                sub.save()
-                self._log_activity(sub, request.user, "Flagged for follow-up (Bulk)")
-                count += 1
-                
-            elif action_type == 'archive':
-                sub.status = 'archived'
-                sub.save()
-                self._log_activity(sub, request.user, "Archived (Bulk)")
-                count += 1
+        submissions = self.get_queryset().filter(id__in=ids)
+        updates = None
+
+        if action_type == 'assign':
+            if value:
+                updates, log_text = {'assigned_to_id': value, 'status': 'in_progress'}, f"Bulk assigned to User {value}"
+        elif action_type == 'resolve':
+            updates, log_text = {'status': 'resolved'}, "Marked resolved (Bulk)"
+        elif action_type == 'flag':
+            updates, log_text = {'is_flagged': True}, "Flagged for follow-up (Bulk)"
+        elif action_type == 'archive':
+            updates, log_text = {'status': 'archived'}, "Archived (Bulk)"
+
+        count = bulk_update_submissions(submissions, updates, request.user, log_text) if updates else 0
 
         return Response({'status': 'success', 'updated_count': count, 'action': action_type})
 
@@ -339,26 +339,8 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     def export(self, request):
       
         queryset = self.filter_queryset(self.get_queryset())
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="feedback_inbox.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'Date', 'Customer', 'Rating', 'Category', 'Status', 'Comment', 'Assigned To'])
-        
-        for sub in queryset:
-            writer.writerow([
-                sub.id,
-                sub.created_at.strftime("%Y-%m-%d %H:%M"),
-                sub.customer.name if sub.customer else "Anonymous",
-                f"{sub.rating}/5",
-                sub.category,
-                sub.get_status_display(),
-                sub.comment,
-                sub.assigned_to.get_full_name() if sub.assigned_to else "Unassigned"
-            ])
-            
-        return response
+        file_format = request.query_params.get('file_format', 'csv')
+        return export_response(submission_inbox_rows(queryset), "feedback_inbox", file_format)
 
     @action(detail=False, methods=['post'])
     def bulk_update(self, request):
@@ -366,28 +348,18 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         ids = request.data.get('ids', [])
         action_type = request.data.get('action')
         value = request.data.get('value') 
-        submissions = SurveySubmission.objects.filter(id__in=ids)
-        updated_count = 0
-
-        for sub in submissions:
-            if action_type == 'resolve':
-                sub.status = 'resolved'
-                sub.save()
-                self._log_activity(sub, request.user, "Marked as Resolved (Bulk Action)")
-                updated_count += 1
-                
-            elif action_type == 'assign':
-                if value:
-                    sub.assigned_to_id = value
-                    sub.save()
-                    self._log_activity(sub, request.user, f"Assigned to User ID {value}")
-                    updated_count += 1
-            
-            elif action_type == 'flag':
-                sub.is_flagged = True
-                sub.save()
-                self._log_activity(sub, request.user, "Flagged for follow-up")
-                updated_count += 1
+        submissions = self.get_queryset().filter(id__in=ids)
+        updates = None
+
+        if action_type == 'resolve':
+            updates, log_text = {'status': 'resolved'}, "Marked as Resolved (Bulk Action)"
+        elif action_type == 'assign':
+            if value:
+                updates, log_text = {'assigned_to_id': value}, f"Assigned to User ID {value}"
+        elif action_type == 'flag':
+            updates, log_text = {'is_flagged': True}, "Flagged for follow-up"
+
+        updated_count = bulk_update_submissions(submissions, updates, request.user, log_text) if updates else 0
 
         return Response({'message': f'Successfully updated {updated_count} items.'})
 
@@ -429,10 +401,10 @@ class PublicSurveyViewSet(viewsets.ReadOnlyModelViewSet):
         
         if contact_id:
             try:
-                contact = AudienceContact.objects.get(id=contact_id)
+                contact = AudienceContact.objects.select_related('customer').get(id=contact_id)
                 customer_name = contact.name
                 customer_obj = contact.customer 
-            except AudienceContact.DoesNotExist:
+            except (AudienceContact.DoesNotExist, ValueError):
                 pass
 
        
@@ -446,18 +418,11 @@ class PublicSurveyViewSet(viewsets.ReadOnlyModelViewSet):
 
         serializer = SurveySubmissionSerializer(data=submission_data)
         if serializer.is_valid():
-            submission = serializer.save()
-            raw_answers = data.get('answers', [])
-            for ans in raw_answers:
-                try:
-                    question = SurveyQuestion.objects.get(id=ans['question_id'])
-                    QuestionAnswer.objects.create(
-                        submission=submission,
-                        question=question,
-                        answer_value=str(ans['value'])
-                    )
-                except SurveyQuestion.DoesNotExist:
-                    continue
+            questions = question_map(survey)
+            with transaction.atomic():
+                submission = serializer.save()
+                answers, _ = build_answers(submission, questions, data.get('answers', []))
+                QuestionAnswer.objects.bulk_create(answers)
             return Response({'status': 'success', 'message': 'Thank you for your feedback!'}, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -583,26 +548,8 @@ class ResponseListViewSet(viewsets.ReadOnlyModelViewSet):
     def export_csv(self, request):
         
         queryset = self.filter_queryset(self.get_queryset())
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="all_responses.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Survey', 'Date', 'Customer', 'Rating', 'Comment', 'Answers'])
-        
-        for sub in queryset:
-            answers_str = " | ".join([f"{a.question.label}: {a.answer_value}" for a in sub.answers.all()])
-            customer = sub.customer.name if sub.customer else "Anonymous"
-            
-            writer.writerow([
-                sub.survey.title,
-                sub.created_at.strftime("%Y-%m-%d"),
-                customer,
-                sub.rating,
-                sub.comment,
-                answers_str
-            ])
-        return response
+        file_format = request.query_params.get('file_format', 'csv')
+        return export_response(response_rows(queryset), "all_responses", file_format)
 
     @action(detail=False, methods=['get'])
     def export_pdf(self, request):
@@ -619,10 +566,12 @@ class ResponseListViewSet(viewsets.ReadOnlyModelViewSet):
         elements.append(Spacer(1, 12))
         
         data = [['Survey', 'Customer', 'Rating', 'Comment']]
-        for sub in queryset[:50]:
-            customer = sub.customer.name if sub.customer else "Anonymous"
-            comment = (sub.comment[:50] + '...') if sub.comment else "-"
-            data.append([sub.survey.title, customer, str(sub.rating), comment])
+        rows = queryset.annotate(customer_label=customer_display()).values_list(
+            'survey__title', 'customer_label', 'rating', 'comment'
+        )[:50]
+        for survey_title, customer, rating, comment in rows:
+            comment = (comment[:50] + '...') if comment else "-"
+            data.append([survey_title, customer, str(rating), comment])
             
         table = Table(data, colWidths=[150, 100, 50, 200])
         table.setStyle(TableStyle([
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.17 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_process_folder', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledgedocument',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the file content, used to reuse OCR results', max_length=64, null=True),
+        ),
+    ]
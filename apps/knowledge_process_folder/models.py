@@ -69,6 +69,13 @@ class KnowledgeDocument(models.Model):
         blank=True,
         help_text="Exact reason why OCR failed (system generated)",
     )
+    content_hash = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="SHA-256 of the file content, used to reuse OCR results",
+    )
     uploaded_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
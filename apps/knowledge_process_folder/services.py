@@ -1,9 +1,12 @@
+import hashlib
 import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from bs4 import BeautifulSoup
 from PIL import Image
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from docx import Document
 from django.utils import timezone
 from django.conf import settings
@@ -17,10 +20,59 @@ pytesseract.pytesseract.tesseract_cmd = (
     r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 )
 
+TEXT_LAYER_ACCURACY = 100.0
+PDF_OCR_ACCURACY = 85.0
+
+
+def file_content_hash(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _poppler_binary(poppler_path, name):
+    return os.path.join(poppler_path, f"{name}.exe" if os.name == "nt" else name)
+
+
+def _extract_text_layer(file_path, poppler_path):
+    """
+    Embedded text per page via pdftotext (ships with poppler). Pages come back
+    form-feed separated; returns [] when the binary is unavailable or fails.
+    """
+    try:
+        result = subprocess.run(
+            [_poppler_binary(poppler_path, "pdftotext"), "-layout", file_path, "-"],
+            capture_output=True,
+            timeout=getattr(settings, "OCR_TEXT_LAYER_TIMEOUT", 120),
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        logger.warning("pdftotext unavailable, OCRing every page of %s", file_path)
+        return []
+    return result.stdout.decode("utf-8", errors="ignore").split("\f")
+
+
+def _ocr_pdf_page(file_path, page_number, dpi, poppler_path):
+    # Rasterize exactly one page so memory per worker is bounded by a single image.
+    images = convert_from_path(
+        file_path,
+        dpi=dpi,
+        first_page=page_number,
+        last_page=page_number,
+        poppler_path=poppler_path,
+    )
+    try:
+        return pytesseract.image_to_string(images[0]) if images else ""
+    finally:
+        for image in images:
+            image.close()
+
 
 class KnowledgeService:
     @staticmethod
-    def extract_text_from_document(file_path):
+    def extract_text_from_document(file_path, progress_callback=None):
         if not file_path:
             raise ValueError("file_path is required for OCR")
 
@@ -38,35 +90,7 @@ class KnowledgeService:
                 return text.strip(), 90.0
 
             if ext == ".pdf":
-                poppler_path = getattr(settings, "POPPLER_PATH", None)
-
-                if not poppler_path:
-                    raise RuntimeError(
-                        "POPPLER_PATH is not configured in Django settings."
-                    )
-
-                pdfinfo_path = os.path.join(poppler_path, "pdfinfo.exe")
-                if not os.path.exists(pdfinfo_path):
-                    raise RuntimeError(
-                        f"Poppler not found. pdfinfo.exe not found at: {pdfinfo_path}"
-                    )
-
-                try:
-                    pages = convert_from_path(
-                        file_path,
-                        dpi=300,
-                        poppler_path=poppler_path,
-                    )
-                except Exception as exc:
-                    raise RuntimeError(
-                        "Unable to read PDF pages. Poppler may be misconfigured."
-                    ) from exc
-
-                full_text = ""
-                for page in pages:
-                    full_text += pytesseract.image_to_string(page)
-
-                return full_text.strip(), 85.0
+                return KnowledgeService._extract_text_from_pdf(file_path, progress_callback)
 
             raise ValueError(f"Unsupported document type: {ext}")
 
@@ -74,6 +98,102 @@ class KnowledgeService:
             logger.exception("Text extraction failed for file: %s", file_path)
             raise
 
+    @staticmethod
+    def _extract_text_from_pdf(file_path, progress_callback=None):
+        """
+        Use the embedded text layer where a page has one and OCR only the rest.
+        Pages are rasterized one at a time inside a bounded worker window, so peak
+        memory depends on the worker count rather than the page count.
+        """
+        poppler_path = getattr(settings, "POPPLER_PATH", None)
+
+        if not poppler_path:
+            raise RuntimeError(
+                "POPPLER_PATH is not configured in Django settings."
+            )
+
+        pdfinfo_path = _poppler_binary(poppler_path, "pdfinfo")
+        if not os.path.exists(pdfinfo_path):
+            raise RuntimeError(
+                f"Poppler not found. pdfinfo not found at: {pdfinfo_path}"
+            )
+
+        try:
+            page_count = int(pdfinfo_from_path(file_path, poppler_path=poppler_path)["Pages"])
+        except Exception as exc:
+            raise RuntimeError(
+                "Unable to read PDF pages. Poppler may be misconfigured."
+            ) from exc
+
+        min_chars = getattr(settings, "OCR_TEXT_LAYER_MIN_CHARS", 20)
+        text_layer = _extract_text_layer(file_path, poppler_path)
+        pages = [""] * page_count
+        ocr_pages = []
+        for page_number in range(1, page_count + 1):
+            embedded = text_layer[page_number - 1] if page_number <= len(text_layer) else ""
+            if len(embedded.strip()) >= min_chars:
+                pages[page_number - 1] = embedded
+            else:
+                ocr_pages.append(page_number)
+
+        done = page_count - len(ocr_pages)
+        if progress_callback:
+            progress_callback(done, page_count)
+
+        if ocr_pages:
+            dpi = getattr(settings, "OCR_DPI", 300)
+            workers = getattr(settings, "OCR_MAX_WORKERS", None) or os.cpu_count() or 1
+            window = max(workers, getattr(settings, "OCR_PAGE_WINDOW", workers * 2))
+
+            # tesseract and pdftoppm run as child processes, so a thread pool already
+            # spreads the work across cores without pickling page images between processes.
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for start in range(0, len(ocr_pages), window):
+                    batch = ocr_pages[start:start + window]
+                    results = executor.map(
+                        lambda page_number: _ocr_pdf_page(file_path, page_number, dpi, poppler_path),
+                        batch,
+                    )
+                    for page_number, text in zip(batch, results):
+                        pages[page_number - 1] = text
+                        done += 1
+                        if progress_callback:
+                            progress_callback(done, page_count)
+
+        text_pages = page_count - len(ocr_pages)
+        accuracy = (
+            (text_pages * TEXT_LAYER_ACCURACY + len(ocr_pages) * PDF_OCR_ACCURACY) / page_count
+            if page_count else PDF_OCR_ACCURACY
+        )
+        logger.info(
+            "PDF extracted (pages=%s, text_layer=%s, ocr=%s): %s",
+            page_count, text_pages, len(ocr_pages), file_path,
+        )
+        return "\n".join(pages).strip(), round(accuracy, 1)
+
+    @staticmethod
+    def extract_document_text(document, progress_callback=None):
+        """
+        Extract text for a KnowledgeDocument, reusing the result of any completed
+        document with identical file content instead of running OCR again.
+        """
+        file_path = document.document_file.path
+        content_hash = file_content_hash(file_path)
+        document.content_hash = content_hash
+
+        cached = (
+            KnowledgeDocument.objects.filter(content_hash=content_hash, ocr_status="completed")
+            .exclude(pk=document.pk)
+            .exclude(extracted_text="")
+            .values("extracted_text", "ocr_accuracy")
+            .first()
+        )
+        if cached:
+            logger.info("OCR cache hit (doc_id=%s, hash=%s)", document.pk, content_hash)
+            return cached["extracted_text"], cached["ocr_accuracy"]
+
+        return KnowledgeService.extract_text_from_document(file_path, progress_callback)
+
     @staticmethod
     def run_ocr_after_approval(document):
         if not document.document_file:
@@ -87,9 +207,7 @@ class KnowledgeService:
             document.ocr_status = "processing"
             document.save(update_fields=["ocr_status"])
 
-            text, accuracy = KnowledgeService.extract_text_from_document(
-                document.document_file.path
-            )
+            text, accuracy = KnowledgeService.extract_document_text(document)
 
             document.extracted_text = text
             document.ocr_accuracy = accuracy
@@ -99,6 +217,7 @@ class KnowledgeService:
                     "extracted_text",
                     "ocr_accuracy",
                     "ocr_status",
+                    "content_hash",
                 ]
             )
 
@@ -113,24 +232,6 @@ class KnowledgeService:
             )
             raise
     @staticmethod
-    def scrape_static_website(url):
-        try:
-            response = requests.get(
-                url,
-                timeout=20,
-                headers={"User-Agent": "Mozilla/5.0 (KnowledgeBot/1.0)"},
-            )
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, "html.parser")
-            return soup.get_text(" ", strip=True)
-
-        except requests.RequestException:
-            logger.exception("Static scraping failed for URL: %s", url)
-            raise
-
-class KnowledgeService:
-    @staticmethod
     def scrape_static_website(url):
         logger.info("Static scraping started for URL: %s", url)
 
@@ -52,7 +52,15 @@ def process_document_ocr(self, document_id):
             raise FileNotFoundError(f"OCR file not found: {file_path}")
 
         logger.info("OCR FILE PATH: %s", file_path)
-        text, accuracy = KnowledgeService.extract_text_from_document(file_path)
+
+        def report_progress(done, total):
+            self.update_state(
+                state="PROGRESS",
+                meta={"document_id": document_id, "pages_done": done, "pages_total": total},
+            )
+            logger.info("OCR PROGRESS (doc_id=%s): %s/%s pages", document_id, done, total)
+
+        text, accuracy = KnowledgeService.extract_document_text(doc, report_progress)
 
         if not text or not text.strip():
             raise Exception("OCR completed but no text detected")
@@ -64,6 +72,7 @@ def process_document_ocr(self, document_id):
                 "extracted_text",
                 "ocr_accuracy",
                 "ocr_status",
+                "content_hash",
             ]
         )
 
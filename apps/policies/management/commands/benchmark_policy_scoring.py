@@ -0,0 +1,100 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from apps.core.benchmarking import RolledBackCommand
+from apps.customer_payments.models import CustomerPayment
+from apps.customers.models import Customer
+from apps.policies.models import Policy, PolicyType
+from apps.policies.scoring import renewal_base_rates, renewal_likelihood, score_policy_portfolio
+from apps.policy_data.views import calculate_policy_and_renewal_status
+
+
+class Command(RolledBackCommand):
+    help = 'Compare per-row and vectorized policy scoring throughput (policies/s). All rows are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=5000)
+        parser.add_argument('--policies-per-customer', type=int, default=3)
+        parser.add_argument('--payments-per-customer', type=int, default=4)
+        parser.add_argument('--per-row-sample', type=int, default=2000,
+                            help='Policies scored through the per-row path (it is extrapolated to the full book)')
+
+    def run(self, options):
+        today = timezone.localdate()
+        tag = uuid.uuid4().hex[:6]
+        policy_type = PolicyType.objects.create(name=f'Benchmark {tag}', code=f'BM{tag}')
+
+        customers = Customer.objects.bulk_create([
+            Customer(
+                customer_code=f'BM{tag}{i}', first_name='Bench', email=f'bench{i}@example.com', phone='9876543210',
+                first_policy_date=today - timedelta(days=random.randint(0, 4000))
+            )
+            for i in range(options['customers'])
+        ], batch_size=1000)
+
+        policies, payments = [], []
+        for customer in customers:
+            start = customer.first_policy_date
+            for n in range(options['policies_per_customer']):
+                end = start + timedelta(days=365)
+                policies.append(Policy(
+                    policy_number=f'BM{tag}-{customer.id}-{n}', customer=customer, policy_type=policy_type,
+                    start_date=start, end_date=end, premium_amount=Decimal('12000'), sum_assured=Decimal('500000'),
+                    status='active'
+                ))
+                start = end + timedelta(days=random.randint(1, 60))
+            for n in range(options['payments_per_customer']):
+                payments.append(CustomerPayment(
+                    customer=customer, transaction_id=f'BM{tag}-{customer.id}-{n}', payment_amount=Decimal('1000'),
+                    net_amount=Decimal('1000'), payment_date=timezone.now(),
+                    payment_status=random.choice(['completed', 'completed', 'completed', 'failed'])
+                ))
+        Policy.objects.bulk_create(policies, batch_size=1000)
+        CustomerPayment.objects.bulk_create(payments, batch_size=1000)
+        total = len(policies)
+
+        sample = Policy.objects.filter(policy_type=policy_type).select_related('customer')[:options['per_row_sample']]
+        base_rates = renewal_base_rates(today)
+        start = time.perf_counter()
+        for policy in sample:
+            self._score_per_row(policy, today, base_rates)
+        per_row_seconds = time.perf_counter() - start
+        per_row_rate = len(sample) / per_row_seconds if per_row_seconds else 0
+        self.stdout.write(
+            f"Per-row: {len(sample)} policies in {per_row_seconds:.2f}s ({per_row_rate:.0f} policies/s, "
+            f"~{total / per_row_rate if per_row_rate else 0:.0f}s for {total})"
+        )
+
+        result = score_policy_portfolio(today=today)
+        rate = result['policies'] / result['seconds'] if result['seconds'] else 0
+        self.stdout.write(
+            f"Vectorized: {result['policies']} policies for {result['customers']} customers in "
+            f"{result['seconds']}s ({rate:.0f} policies/s)"
+        )
+
+    def _score_per_row(self, policy, today, base_rates):
+        """The per-row path: status lookup, payment and policy counts, and a save for every policy."""
+        customer = policy.customer
+        _, renewal_status = calculate_policy_and_renewal_status(
+            policy.end_date, start_date=policy.start_date, customer=customer, exclude_policy_id=policy.id
+        )
+        customer_payments = CustomerPayment.objects.filter(customer=customer, is_deleted=False)
+        score = 50.0
+        if customer_payments.exists():
+            completed_rate = customer_payments.filter(payment_status='completed').count() / customer_payments.count() * 100
+            if completed_rate >= 95: score -= 10
+            elif completed_rate < 70: score += 15
+        if Policy.objects.filter(customer=customer, is_deleted=False).count() > 3: score -= 5
+        if customer.first_policy_date and (today - customer.first_policy_date).days // 365 > 5: score -= 10
+
+        base_rate = base_rates.get(policy.policy_type_id, base_rates[None])
+        policy.risk_score = max(0, min(100, score))
+        policy.renewal_status = renewal_status
+        policy.renewal_likelihood = float(renewal_likelihood(base_rate, policy.risk_score, renewal_status))
+        policy.scored_at = timezone.now()
+        policy.save(update_fields=['risk_score', 'renewal_status', 'renewal_likelihood', 'scored_at'])
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0009_claimtimelineevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='renewal_likelihood',
+            field=models.FloatField(blank=True, help_text='Estimated probability (0-1) that the policy renews', null=True),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='renewal_status',
+            field=models.CharField(blank=True, help_text='Renewal status from the nightly scoring run', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='risk_score',
+            field=models.FloatField(blank=True, help_text='Customer risk score (0-100) from the nightly scoring run', null=True),
+        ),
+        migrations.AddField(
+            model_name='policy',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
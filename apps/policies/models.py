@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from apps.core.models import BaseModel, TimestampedModel
+from apps.core.models import BaseModel, ChangeTrackingMixin, TimestampedModel
 from apps.customers.models import Customer
 import uuid
 from decimal import Decimal
@@ -66,7 +66,9 @@ class PolicyType(BaseModel):
     def __str__(self):
         return f"{self.name} ({self.code})"
 
-class Policy(BaseModel):
+class Policy(ChangeTrackingMixin, BaseModel):
+    tracked_fields = ('customer',)
+
     POLICY_STATUS_CHOICES = [
         ('active', 'Active'),
         ('expired', 'Expired'),
@@ -112,6 +114,11 @@ class Policy(BaseModel):
     terms_conditions = models.TextField(blank=True)
     special_conditions = models.TextField(blank=True)
     agent = models.ForeignKey(PolicyAgent, on_delete=models.SET_NULL, null=True, blank=True, related_name='policies', help_text="Policy agent")
+
+    risk_score = models.FloatField(null=True, blank=True, help_text="Customer risk score (0-100) from the nightly scoring run")
+    renewal_status = models.CharField(max_length=20, blank=True, help_text="Renewal status from the nightly scoring run")
+    renewal_likelihood = models.FloatField(null=True, blank=True, help_text="Estimated probability (0-1) that the policy renews")
+    scored_at = models.DateTimeField(null=True, blank=True)
     
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_policies')
     last_modified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='modified_policies')
@@ -0,0 +1,187 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+POLICY_DUE_THRESHOLD = 15
+DEFAULT_RENEWAL_RATE = 0.5
+SCORE_FIELDS = ['risk_score', 'renewal_status', 'renewal_likelihood', 'scored_at']
+
+
+def risk_scores(payment_count, completed_count, policy_count, tenure_days) -> np.ndarray:
+    """
+    Customer risk score (0-100, baseline 50) over whole arrays: payment completion
+    rate, number of policies and years since the first policy. Missing tenure is NaN.
+    """
+    payment_count = np.asarray(payment_count, dtype=float)
+    completed_count = np.asarray(completed_count, dtype=float)
+    policy_count = np.asarray(policy_count, dtype=float)
+    tenure_years = np.floor_divide(np.asarray(tenure_days, dtype=float), 365)
+
+    completed_rate = np.divide(
+        completed_count * 100, payment_count, out=np.full(payment_count.shape, np.nan), where=payment_count > 0
+    )
+    score = np.full(payment_count.shape, 50.0)
+    score -= np.where(completed_rate >= 95, 10, 0)
+    score += np.where(completed_rate < 70, 15, 0)
+    score -= np.where(policy_count > 3, 5, 0)
+    score -= np.where(tenure_years > 5, 10, 0)
+    return np.clip(score, 0, 100)
+
+
+def renewal_statuses(end_date, start_date, previous_end_date, today, grace_period_days: int = 30):
+    """
+    Array form of policy_data.views.calculate_policy_and_renewal_status.
+    Dates are datetime64[D] arrays; NaT in previous_end_date means no earlier policy.
+    Returns (policy_status, renewal_status) string arrays.
+    """
+    end_date = np.asarray(end_date, dtype='datetime64[D]')
+    start_date = np.asarray(start_date, dtype='datetime64[D]')
+    previous_end_date = np.asarray(previous_end_date, dtype='datetime64[D]')
+    days_to_expiry = (end_date - np.datetime64(today, 'D')).astype(int)
+
+    renewed = (start_date > end_date) | (~np.isnat(previous_end_date) & (start_date > previous_end_date))
+    conditions = [
+        renewed,
+        (days_to_expiry < 0) & (days_to_expiry >= -grace_period_days),
+        days_to_expiry < 0,
+        days_to_expiry <= POLICY_DUE_THRESHOLD,
+        days_to_expiry <= grace_period_days,
+    ]
+    policy_status = np.select(conditions, ['active', 'expired', 'expired', 'pending', 'expiring_soon'], 'active')
+    renewal_status = np.select(conditions, ['renewed', 'pending', 'overdue', 'due', 'due'], 'not_required')
+    return policy_status, renewal_status
+
+
+def renewal_likelihood(base_rate, risk_score, renewal_status) -> np.ndarray:
+    """
+    Historical renewal rate of the policy type, scaled by customer risk (x1.5 at risk 0,
+    x0.5 at risk 100), halved once overdue, and 1.0 for policies already renewed.
+    """
+    likelihood = np.asarray(base_rate, dtype=float) * (1.5 - np.asarray(risk_score, dtype=float) / 100)
+    likelihood = np.where(renewal_status == 'overdue', likelihood * 0.5, likelihood)
+    likelihood = np.where(renewal_status == 'renewed', 1.0, likelihood)
+    return np.clip(likelihood, 0, 1)
+
+
+def renewal_base_rates(today) -> Dict[Any, float]:
+    """Share of renewal cases opened in the last year that renewed, per policy type id (None = overall)."""
+    from apps.renewals.models import RenewalCase
+
+    rows = list(
+        RenewalCase.objects.filter(is_deleted=False, created_at__date__gte=today - timedelta(days=365))
+        .values('policy__policy_type_id')
+        .annotate(total=Count('id'), renewed=Count('id', filter=Q(status='renewed')))
+        .order_by()
+    )
+    rates = {row['policy__policy_type_id']: row['renewed'] / row['total'] for row in rows if row['total']}
+    total = sum(row['total'] for row in rows)
+    rates[None] = sum(row['renewed'] for row in rows) / total if total else DEFAULT_RENEWAL_RATE
+    return rates
+
+
+def _frame(queryset, columns: List[str]) -> pd.DataFrame:
+    return pd.DataFrame.from_records(list(queryset.values_list(*columns)), columns=columns)
+
+
+def score_customer_range(first_customer_id, last_customer_id, today, base_rates: Dict[Any, float], scored_at=None) -> int:
+    """
+    Score every live policy of customers first_customer_id..last_customer_id: three
+    column reads, array math, and a bulk write. A customer's policies always land in
+    the same range, so earlier-policy lookups never cross a chunk boundary.
+    """
+    from apps.customer_payments.models import CustomerPayment
+    from apps.customers.models import Customer
+    from apps.policies.models import Policy
+
+    customer_range = {'customer_id__gte': first_customer_id, 'customer_id__lte': last_customer_id}
+    policies = _frame(
+        Policy.objects.filter(is_deleted=False, **customer_range).order_by(),
+        ['id', 'customer_id', 'policy_type_id', 'start_date', 'end_date'],
+    )
+    if policies.empty:
+        return 0
+
+    customers = _frame(
+        Customer.objects.filter(id__gte=first_customer_id, id__lte=last_customer_id).order_by(),
+        ['id', 'first_policy_date'],
+    ).rename(columns={'id': 'customer_id'})
+    payments = _frame(
+        CustomerPayment.objects.filter(is_deleted=False, **customer_range).order_by().values('customer_id').annotate(
+            total=Count('id'), completed=Count('id', filter=Q(payment_status='completed'))
+        ),
+        ['customer_id', 'total', 'completed'],
+    )
+
+    policies['start_date'] = pd.to_datetime(policies['start_date'])
+    policies['end_date'] = pd.to_datetime(policies['end_date'])
+    policies['policy_count'] = policies.groupby('customer_id')['id'].transform('size')
+
+    # Latest end date among the customer's policies ending strictly before this one starts.
+    earlier = policies[['customer_id', 'end_date']].rename(columns={'end_date': 'previous_end_date'})
+    policies = pd.merge_asof(
+        policies.sort_values('start_date'), earlier.sort_values('previous_end_date'),
+        left_on='start_date', right_on='previous_end_date', by='customer_id',
+        direction='backward', allow_exact_matches=False,
+    )
+    policies = policies.merge(customers, on='customer_id', how='left').merge(payments, on='customer_id', how='left')
+
+    first_policy_date = pd.to_datetime(policies['first_policy_date'])
+    tenure_days = (pd.Timestamp(today) - first_policy_date).dt.days
+    risk = risk_scores(
+        policies['total'].fillna(0), policies['completed'].fillna(0), policies['policy_count'], tenure_days
+    )
+    _, renewal_status = renewal_statuses(
+        policies['end_date'].values, policies['start_date'].values, policies['previous_end_date'].values, today
+    )
+    base_rate = policies['policy_type_id'].map(base_rates).fillna(base_rates[None])
+    likelihood = renewal_likelihood(base_rate, risk, renewal_status)
+
+    scored_at = scored_at or timezone.now()
+    Policy.objects.bulk_update(
+        [
+            Policy(id=policy_id, risk_score=round(score, 1), renewal_status=status,
+                   renewal_likelihood=round(chance, 4), scored_at=scored_at)
+            for policy_id, score, status, chance in zip(
+                policies['id'].tolist(), risk.tolist(), renewal_status.tolist(), likelihood.tolist()
+            )
+        ],
+        SCORE_FIELDS,
+        batch_size=1000,
+    )
+    return len(policies)
+
+
+def score_policy_portfolio(chunk_size: int = None, today=None) -> Dict[str, Any]:
+    """Score the whole book in customer-id chunks; returns counts and elapsed seconds."""
+    from apps.customers.models import Customer
+
+    chunk_size = chunk_size or settings.POLICY_SCORING_CHUNK_SIZE
+    today = today or timezone.localdate()
+    started = time.monotonic()
+    scored_at = timezone.now()
+    base_rates = renewal_base_rates(today)
+
+    last_id = 0
+    scored = customers = 0
+    while True:
+        ids = list(
+            Customer.objects.filter(is_deleted=False, id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        scored += score_customer_range(ids[0], ids[-1], today, base_rates, scored_at=scored_at)
+        customers += len(ids)
+        last_id = ids[-1]
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Scored {scored} policies for {customers} customers in {elapsed:.2f}s")
+    return {'policies': scored, 'customers': customers, 'seconds': round(elapsed, 3)}
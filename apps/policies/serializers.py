@@ -99,9 +99,13 @@ class PolicySerializer(serializers.ModelSerializer):
             'terms_conditions', 'special_conditions', 'agent', 'created_by',
             'created_by_name', 'last_modified_by', 'last_modified_by_name', 'is_due_for_renewal',
             'days_to_expiry', 'beneficiaries', 'documents', 'payments', 'notes',
+            'risk_score', 'renewal_status', 'renewal_likelihood', 'scored_at',
             'created_at', 'updated_at',
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'is_due_for_renewal', 'days_to_expiry']
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'is_due_for_renewal', 'days_to_expiry',
+            'risk_score', 'renewal_status', 'renewal_likelihood', 'scored_at',
+        ]
 
     def get_complete_coverage_details(self, obj):
         return obj.get_complete_coverage_details()
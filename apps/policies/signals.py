@@ -1,14 +1,26 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from apps.core.side_effects import defer, register_deferred_handler
+from apps.customers.metrics import recompute_customer_metrics
 from .models import Policy
 
 @receiver(post_save, sender=Policy)
 def update_customer_metrics_on_policy_save(sender, instance, created, **kwargs):
-    if instance.customer:
+    # A reassigned policy also changes the totals of the customer it was moved from.
+    previous_customer_id = instance.previous_value('customer')
+    if previous_customer_id and previous_customer_id != instance.customer_id \
+            and not defer('customer_metrics', previous_customer_id):
+        recompute_customer_metrics([previous_customer_id])
+    if instance.customer_id and not defer('customer_metrics', instance.customer_id):
         instance.customer.update_metrics()
 
 
 @receiver(post_delete, sender=Policy)
 def update_customer_metrics_on_policy_delete(sender, instance, **kwargs):
-    if instance.customer:
+    if instance.customer_id and not defer('customer_metrics', instance.customer_id):
         instance.customer.update_metrics()
+
+
+@register_deferred_handler('customer_metrics')
+def update_deferred_customer_metrics(customer_ids, pending):
+    recompute_customer_metrics(list(customer_ids))
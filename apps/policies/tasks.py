@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .scoring import score_policy_portfolio
+
+
+@shared_task
+def score_policy_portfolio_task():
+    return score_policy_portfolio()
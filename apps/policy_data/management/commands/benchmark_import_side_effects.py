@@ -0,0 +1,81 @@
+import time
+import uuid
+from contextlib import nullcontext
+from datetime import date, timedelta
+from unittest import mock
+
+import pandas as pd
+from django.contrib.auth import get_user_model
+
+from apps.core import side_effects
+from apps.core.benchmarking import RolledBackCommand, count_queries
+from apps.policy_data.views import FileUploadViewSet
+
+
+class Command(RolledBackCommand):
+    help = (
+        'Count queries for a policy import with per-row signal side effects and with deferred_side_effects(), '
+        'including the deferred flush. All rows are rolled back. The flush budget is checked by '
+        'apps.policy_data.tests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--skip-per-row', action='store_true', help='Only run the deferred import')
+
+    def run(self, options):
+        rows = options['rows']
+        user = get_user_model().objects.filter(is_superuser=True).first()
+        viewset = FileUploadViewSet()
+
+        if not options['skip_per_row']:
+            with mock.patch('apps.policy_data.views.deferred_side_effects', nullcontext):
+                per_row = self._import(viewset, self._frame(rows, phone_prefix='8'), user)
+            self._report('Per-row', rows, per_row)
+
+        flush_counter = {}
+        real_flush = side_effects.flush_side_effects
+
+        def counted_flush(pending):
+            with count_queries() as counter:
+                real_flush(pending)
+            flush_counter.update(counter)
+
+        with mock.patch('apps.core.side_effects.flush_side_effects', counted_flush):
+            deferred = self._import(viewset, self._frame(rows, phone_prefix='9'), user)
+        self._report('Deferred', rows, deferred)
+        self.stdout.write(f"Deferred flush: {flush_counter.get('queries', 0)} queries")
+
+    def _import(self, viewset, frame, user):
+        with count_queries() as counter:
+            start = time.perf_counter()
+            result = viewset._process_excel_data(frame, user)
+            counter['seconds'] = time.perf_counter() - start
+        counter['failed'] = result['failed_records']
+        return counter
+
+    def _report(self, label, rows, counter):
+        self.stdout.write(
+            f"{label}: {counter['queries']} queries for {rows} rows ({counter['queries'] / rows:.1f}/row), "
+            f"{counter['seconds']:.1f}s, {counter['failed']} failed rows"
+        )
+
+    def _frame(self, rows, phone_prefix):
+        tag = uuid.uuid4().hex[:8]
+        start = date.today() - timedelta(days=200)
+        return pd.DataFrame([
+            {
+                'email': f'import-{tag}-{i}@example.com',
+                'first_name': 'Import',
+                'last_name': f'Customer {i}',
+                'phone': f'{phone_prefix}{i:09d}',
+                'policy_number': f'IMP-{tag}-{i}',
+                'policy_type': 'Benchmark Motor',
+                'start_date': start.isoformat(),
+                'end_date': (start + timedelta(days=365)).isoformat(),
+                'premium_amount': 12000,
+                'sum_assured': 500000,
+                'payment_frequency': 'monthly',
+            }
+            for i in range(rows)
+        ])
@@ -0,0 +1,151 @@
+import re
+from contextlib import nullcontext
+from datetime import date, timedelta
+from unittest import mock
+
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import side_effects
+from apps.customer_installment.models import CustomerInstallment
+from apps.customers.models import Customer
+from .views import FileUploadViewSet
+
+User = get_user_model()
+
+# Statements in one deferred flush, whatever the number of imported rows. Savepoints are
+# not counted, and a bulk write the backend splits into batches counts once.
+FLUSH_QUERY_BUDGET = 12
+
+BATCHED_WRITE = re.compile(r'^(INSERT (?:OR IGNORE )?INTO "\w+"|UPDATE "\w+" SET "\w+")')
+
+# Phone number lead digit per import, so the imports never match each other's customers.
+PHONE_PREFIXES = {'per-row': 8, 'deferred': 9, 'deferred-large': 7}
+
+
+def create_import_customers(rows, prefix):
+    # The rows attach to existing customers so every row takes the policy, renewal
+    # case and installment path whose side effects are deferred.
+    Customer.objects.bulk_create([
+        Customer(
+            customer_code=f'IMP{PHONE_PREFIXES[prefix]}{i:05d}',
+            first_name='Import',
+            last_name=f'Customer {i}',
+            email=f'{prefix}-import-{i}@example.com',
+            phone=f'{PHONE_PREFIXES[prefix]}{i:09d}'
+        )
+        for i in range(rows)
+    ])
+
+
+def import_frame(rows, prefix):
+    start = date.today() - timedelta(days=200)
+    return pd.DataFrame([
+        {
+            'email': f'{prefix}-import-{i}@example.com',
+            'first_name': 'Import',
+            'last_name': f'Customer {i}',
+            'phone': f'{PHONE_PREFIXES[prefix]}{i:09d}',
+            'policy_number': f'{prefix.upper()}-{i}',
+            'policy_type': 'Import Motor',
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=365)).isoformat(),
+            'premium_amount': 12000,
+            'sum_assured': 500000,
+            'payment_frequency': 'monthly',
+        }
+        for i in range(rows)
+    ])
+
+
+class DeferredImportSideEffectsTests(TestCase):
+    rows = 30
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='importer@example.com',
+            password='testpassword123',
+            first_name='Import',
+            last_name='User'
+        )
+        create_import_customers(self.rows, 'per-row')
+        create_import_customers(self.rows, 'deferred')
+        self.viewset = FileUploadViewSet()
+
+    def _import(self, prefix, rows=None):
+        rows = rows or self.rows
+        with CaptureQueriesContext(connection) as queries:
+            result = self.viewset._process_excel_data(import_frame(rows, prefix), self.user)
+        self.assertEqual(result['failed_records'], 0, result['errors'])
+        self.assertEqual(result['successful_records'], rows)
+        return len(queries)
+
+    def _flush_statements(self, prefix, rows=None):
+        """Import `rows` rows and return the statements of each deferred flush."""
+        flushes = []
+        real_flush = side_effects.flush_side_effects
+
+        def counted_flush(pending):
+            with CaptureQueriesContext(connection) as queries:
+                real_flush(pending)
+            statements = []
+            previous_write = None
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT')):
+                    continue
+                write = BATCHED_WRITE.match(sql)
+                write = write and write.group(1)
+                if write is None or write != previous_write:
+                    statements.append(sql)
+                previous_write = write
+            flushes.append(statements)
+
+        with mock.patch('apps.core.side_effects.flush_side_effects', counted_flush):
+            self._import(prefix, rows)
+        self.assertEqual(len(flushes), 1)
+        return flushes[0]
+
+    def _derived_state(self, prefix):
+        customers = Customer.objects.filter(email__startswith=f'{prefix}-import-').order_by('email')
+        return [
+            (
+                customer.total_policies,
+                customer.total_premium,
+                CustomerInstallment.objects.filter(customer=customer).count(),
+            )
+            for customer in customers
+        ]
+
+    def test_deferred_import_matches_per_row_side_effects(self):
+        with mock.patch('apps.policy_data.views.deferred_side_effects', nullcontext):
+            per_row_queries = self._import('per-row')
+        deferred_queries = self._import('deferred')
+
+        self.assertEqual(len(self._derived_state('deferred')), self.rows)
+        self.assertEqual(self._derived_state('deferred'), self._derived_state('per-row'))
+        self.assertLess(deferred_queries, per_row_queries)
+
+    def test_deferred_flush_stays_within_query_budget(self):
+        statements = self._flush_statements('deferred')
+
+        self.assertLessEqual(len(statements), FLUSH_QUERY_BUDGET, '\n'.join(statements))
+        self.assertEqual(
+            CustomerInstallment.objects.filter(customer__email__startswith='deferred-import-').count(), 12 * self.rows
+        )
+
+    def test_deferred_flush_does_not_grow_with_the_import(self):
+        large_rows = self.rows * 10
+        create_import_customers(large_rows, 'deferred-large')
+
+        small = self._flush_statements('deferred')
+        large = self._flush_statements('deferred-large', large_rows)
+
+        self.assertLessEqual(len(large), FLUSH_QUERY_BUDGET, '\n'.join(large))
+        self.assertEqual(len(large), len(small), '\n'.join(large))
+        self.assertEqual(
+            CustomerInstallment.objects.filter(customer__email__startswith='deferred-large-').count(), 12 * large_rows
+        )
@@ -14,6 +14,7 @@ from django.db import transaction, IntegrityError
 from django.db.models import Count
 from django.contrib.auth import get_user_model
 from django.core.files.storage import default_storage
+from apps.core.side_effects import deferred_side_effects
 from apps.customers.models import Customer
 from apps.files_upload.models import FileUpload
 from apps.uploads.models import FileUpload as UploadsFileUpload
@@ -763,26 +764,29 @@ class FileUploadViewSet(viewsets.ModelViewSet):
 
         batch_code = generate_batch_code()
 
-        for idx, (_, row) in enumerate(df.iterrows()):
-            try:
-                with transaction.atomic():
-                    customer, customer_created = self._process_customer_data(row, user)
-                    if customer_created:
-                        created_customers += 1
+        # Customer metrics, installments and payment/contact rollups are applied once
+        # per affected record after the loop instead of on every row's save.
+        with deferred_side_effects():
+            for idx, (_, row) in enumerate(df.iterrows()):
+                try:
+                    with transaction.atomic():
+                        customer, customer_created = self._process_customer_data(row, user)
+                        if customer_created:
+                            created_customers += 1
 
-                    policy, policy_created = self._process_policy_data(row, customer, user)
-                    if policy_created:
-                        created_policies += 1
+                        policy, policy_created = self._process_policy_data(row, customer, user)
+                        if policy_created:
+                            created_policies += 1
 
-                    self._process_renewal_case_data(row, customer, policy, user, batch_code)
-                    created_renewal_cases += 1
+                        self._process_renewal_case_data(row, customer, policy, user, batch_code)
+                        created_renewal_cases += 1
 
-                    successful_records += 1
+                        successful_records += 1
 
-            except Exception as e:
-                failed_records += 1
-                error_msg = f"Row {idx + 1}: {str(e)}"
-                errors.append(error_msg)
+                except Exception as e:
+                    failed_records += 1
+                    error_msg = f"Row {idx + 1}: {str(e)}"
+                    errors.append(error_msg)
 
         return {
             'total_records': total_records,
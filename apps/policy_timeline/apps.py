@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PolicyTimelineConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.policy_timeline'
+    verbose_name = 'Policy Timeline'
+
+    def ready(self):
+        import apps.policy_timeline.signals
@@ -0,0 +1,72 @@
+"""
+Bulk creation of timeline events for integrations that backfill policy history.
+
+The referenced policies, customers and agents of the whole payload are resolved with
+one query each, every item is validated in memory, the valid ones are inserted with
+chunked bulk_create, and the affected customers' summaries and customer 360 entries
+are refreshed once at the end.
+"""
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from apps.customers.models import Customer
+from apps.policies.models import Policy
+
+from .customer_360 import invalidate_customer_360
+from .models import PolicyTimeline
+from .serializers import PolicyTimelineBulkItemSerializer
+from .summaries import refresh_timeline_summaries
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+
+def _referenced_ids(items: Iterable[Any], field: str) -> Set[int]:
+    ids = set()
+    for item in items:
+        if isinstance(item, dict):
+            try:
+                ids.add(int(item.get(field)))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+def resolve_references(items: List[Any]) -> Dict[str, Any]:
+    """Serializer context for PolicyTimelineBulkItemSerializer: one query per referenced table."""
+    policy_ids = _referenced_ids(items, 'policy')
+    customer_ids = _referenced_ids(items, 'customer')
+    agent_ids = _referenced_ids(items, 'agent')
+    return {
+        'policy_customers': dict(Policy.objects.filter(id__in=policy_ids).values_list('id', 'customer_id')) if policy_ids else {},
+        'customer_ids': set(Customer.objects.filter(id__in=customer_ids).values_list('id', flat=True)) if customer_ids else set(),
+        'agent_ids': set(get_user_model().objects.filter(id__in=agent_ids).values_list('id', flat=True)) if agent_ids else set(),
+    }
+
+
+def create_timeline_events(items: List[Any], user=None, batch_size: int = BULK_CREATE_BATCH_SIZE) -> Tuple[List[PolicyTimeline], List[Dict[str, Any]]]:
+    """
+    Validate and insert `items`; returns the created events and one error entry
+    ({'index', 'data', 'errors'}) per rejected item. Valid items are created even when
+    others fail.
+    """
+    context = resolve_references(items)
+    events = []
+    errors = []
+    for index, item in enumerate(items):
+        serializer = PolicyTimelineBulkItemSerializer(data=item, context=context)
+        if serializer.is_valid():
+            events.append(PolicyTimeline(created_by=user, **serializer.validated_data))
+        else:
+            errors.append({'index': index, 'data': item, 'errors': serializer.errors})
+
+    if events:
+        customer_ids = {event.customer_id for event in events}
+        with transaction.atomic():
+            # bulk_create sends no post_save, so the summary and cache updates the
+            # signal receivers would do per event happen here once.
+            events = PolicyTimeline.objects.bulk_create(events, batch_size=batch_size)
+            refresh_timeline_summaries(customer_ids)
+            transaction.on_commit(lambda: invalidate_customer_360(*customer_ids))
+    return events, errors
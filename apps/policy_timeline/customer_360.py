@@ -0,0 +1,264 @@
+"""
+Customer 360 read model behind policy_timeline_complete_api.
+
+Everything on the page that does not depend on the request's timeline filters
+(profile, policies, payments, assets, preferences, event type counts) is loaded with
+one select_related query plus a fixed set of prefetches, assembled into a plain dict
+and cached per customer. Writes to any of the source tables drop the customer's entry
+(see signals.py); CUSTOMER_360_CACHE_TTL bounds staleness from queryset.update() and
+other writes that bypass signals. The read path never writes.
+"""
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Count, Prefetch
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from apps.customer_assets.models import CustomerAssets
+from apps.customer_family_medical_history.models import CustomerFamilyMedicalHistory
+from apps.customers.models import Customer
+from apps.other_insurance_policies.models import OtherInsurancePolicy
+from apps.policies.models import Policy
+from apps.renewal_timeline.models import CommonRenewalTimelineSettings
+
+from .models import PolicyTimeline, UpcomingPayment
+from .serializers import CustomerPaymentScheduleSerializer, UpcomingPaymentSerializer
+
+DEFAULT_REMINDER_SCHEDULE = [
+    "30 days before due date (Email)",
+    "14 days before due date (Email)",
+    "7 days before due date (Phone)",
+]
+
+
+def customer_360_key(customer_id) -> str:
+    return f"policy_timeline:customer360:{customer_id}"
+
+
+def invalidate_customer_360(*customer_ids):
+    keys = [customer_360_key(customer_id) for customer_id in customer_ids if customer_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+def customer_360_queryset():
+    return Customer.objects.select_related('payment_schedule', 'financial_profile').prefetch_related(
+        Prefetch(
+            'policies',
+            queryset=Policy.objects.filter(status='active').select_related('policy_type'),
+            to_attr='active_policies',
+        ),
+        Prefetch(
+            'upcoming_payments',
+            queryset=UpcomingPayment.objects.filter(due_date__gte=timezone.now().date())
+            .select_related('policy__policy_type').order_by('due_date'),
+            to_attr='due_payments',
+        ),
+        Prefetch(
+            'family_medical_history',
+            queryset=CustomerFamilyMedicalHistory.objects.filter(is_active=True),
+            to_attr='active_medical_history',
+        ),
+        Prefetch('assets', queryset=CustomerAssets.objects.prefetch_related('vehicles')),
+        'policy_preferences',
+        Prefetch(
+            'other_insurance_policies',
+            queryset=OtherInsurancePolicy.objects.filter(policy_status='active').select_related('policy_type'),
+            to_attr='active_other_policies',
+        ),
+        'detailed_communication_preferences',
+    )
+
+
+def _related(instance, name):
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def event_type_counts(customer_id) -> Dict[str, Dict[str, Any]]:
+    counts = dict(
+        PolicyTimeline.objects.filter(customer_id=customer_id, is_deleted=False)
+        .order_by().values_list('event_type').annotate(count=Count('id'))
+    )
+    return {
+        value: {'label': label, 'count': counts.get(value, 0)}
+        for value, label in PolicyTimeline.EVENT_TYPE_CHOICES
+    }
+
+
+def build_customer_360(customer) -> Dict[str, Any]:
+    """Plain, picklable payload for a customer loaded through customer_360_queryset()."""
+    policies = []
+    total_premium = 0
+    total_coverage = 0
+    for policy in customer.active_policies:
+        premium = float(policy.premium_amount or 0)
+        coverage = float(policy.sum_assured or 0)
+        total_premium += premium
+        total_coverage += coverage
+        policies.append({
+            'id': policy.id,
+            'policy_number': policy.policy_number,
+            'policy_type': policy.policy_type.name if policy.policy_type else None,
+            'premium_amount': premium,
+            'start_date': policy.start_date,
+            'end_date': policy.end_date,
+            'status': policy.status,
+            'coverage_amount': coverage,
+        })
+
+    schedule = _related(customer, 'payment_schedule')
+    profile = _related(customer, 'financial_profile')
+    financial_profile = None
+    if profile:
+        financial_profile = {
+            'annual_income': float(profile.annual_income or 0),
+            'income_captured_date': profile.income_captured_date,
+            'income_source': profile.income_source,
+            'policy_capacity_utilization': profile.policy_capacity_utilization,
+            'recommended_policies_count': profile.recommended_policies_count,
+            'risk_profile': profile.risk_profile,
+            'tolerance_score': float(profile.tolerance_score or 0),
+            'income_range': profile.income_range,
+            'capacity_status': profile.capacity_status,
+        }
+
+    medical_history = [{
+        'condition_name': history.condition_name,
+        'family_relation': history.get_family_relation_display(),
+        'condition_status': history.get_condition_status_display(),
+        'age_diagnosed': history.age_diagnosed,
+        'severity_level': history.get_severity_level_display(),
+        'risk_score': history.risk_score,
+        'is_high_risk': history.is_high_risk,
+    } for history in customer.active_medical_history]
+
+    assets = []
+    vehicles = []
+    for asset in customer.assets.all():
+        assets.append({
+            'residence_type': asset.get_residence_type_display(),
+            'residence_status': asset.get_residence_status_display(),
+            'residence_location': asset.residence_location,
+            'residence_rating': asset.get_residence_rating_display(),
+            'asset_score': asset.asset_score,
+        })
+        for vehicle in asset.vehicles.all():
+            vehicles.append({
+                'vehicle_name': vehicle.vehicle_name,
+                'model_year': vehicle.model_year,
+                'vehicle_type': vehicle.get_vehicle_type_display(),
+                'value': float(vehicle.value),
+                'condition': vehicle.get_condition_display(),
+                'vehicle_age': vehicle.vehicle_age,
+                'vehicle_score': vehicle.vehicle_score,
+            })
+
+    policy_preferences = [{
+        'preferred_tenure': pref.preferred_tenure,
+        'coverage_type': pref.get_coverage_type_display(),
+        'preferred_insurer': pref.preferred_insurer,
+        'payment_mode': pref.get_payment_mode_display(),
+        'auto_renewal': pref.auto_renewal,
+        'budget_range_min': float(pref.budget_range_min or 0),
+        'budget_range_max': float(pref.budget_range_max or 0),
+        'avoided_policy_types': getattr(pref, 'avoided_policy_types', None),
+    } for pref in customer.policy_preferences.all()]
+
+    other_policies = [{
+        'policy_number': policy.policy_number,
+        'insurance_company': policy.insurance_company,
+        'policy_type': policy.policy_type.name if policy.policy_type else None,
+        'premium_amount': float(policy.premium_amount or 0),
+        'sum_assured': float(policy.sum_assured or 0),
+        'payment_mode': policy.get_payment_mode_display(),
+        'channel': policy.get_channel_display(),
+        'satisfaction_rating': policy.satisfaction_rating,
+        'claim_experience': policy.claim_experience,
+        'switching_potential': policy.switching_potential,
+    } for policy in customer.active_other_policies]
+
+    communication = [{
+        'channel': pref.get_preferred_channel_display(),
+        'status': 'Preferred' if getattr(pref, 'is_preferred', False) else 'Accepted',
+        'is_enabled': True,
+    } for pref in customer.detailed_communication_preferences.all()]
+
+    return {
+        'customer': {
+            'id': customer.id,
+            'name': customer.full_name,
+            'code': customer.customer_code,
+            'email': customer.email,
+            'phone': customer.phone,
+            'date_of_birth': customer.date_of_birth,
+            'gender': customer.gender,
+            'address': f"{customer.address_line1}, {customer.city}, {customer.state}" if customer.address_line1 else None,
+        },
+        'totals': {
+            'active_policies': len(policies),
+            'total_premium': total_premium,
+            'total_coverage': total_coverage,
+        },
+        'financial_profile': financial_profile,
+        'family_medical_history': medical_history,
+        'assets': assets,
+        'vehicles': vehicles,
+        'policy_preferences': policy_preferences,
+        'other_insurance_policies': other_policies,
+        'communication_preferences': communication,
+        'languages': {
+            'preferred_language': getattr(customer, 'preferred_language', 'English'),
+            'document_language': getattr(customer, 'document_language', 'English'),
+            'primary_communication_language': getattr(customer, 'communication_language', 'English'),
+        },
+        'payment_schedule': dict(CustomerPaymentScheduleSerializer(schedule).data) if schedule else None,
+        'payment_timing_days': schedule.average_payment_timing_days if schedule else None,
+        'payment_method': {
+            'primary_method': schedule.get_preferred_payment_method_display(),
+            'auto_debit_active': schedule.preferred_payment_method == 'auto_debit',
+            'details': "Details on file",
+        } if schedule else None,
+        'upcoming_payments': [dict(row) for row in UpcomingPaymentSerializer(customer.due_payments, many=True).data],
+        'active_policies': policies,
+        'event_type_counts': event_type_counts(customer.id),
+    }
+
+
+def get_customer_360(customer_id) -> Dict[str, Any]:
+    key = customer_360_key(customer_id)
+    payload = cache.get(key)
+    if payload is None:
+        customer = get_object_or_404(customer_360_queryset(), id=customer_id)
+        payload = build_customer_360(customer)
+        cache.set(key, payload, settings.CUSTOMER_360_CACHE_TTL)
+    return payload
+
+
+def reminder_schedule() -> List[str]:
+    common_settings = CommonRenewalTimelineSettings.objects.filter(is_active=True).first()
+    schedule = []
+    if common_settings:
+        if common_settings.reminder_schedule:
+            schedule = common_settings.reminder_schedule
+        elif common_settings.reminder_days:
+            for days in common_settings.reminder_days:
+                channel = 'Phone' if days == 7 else 'Email'
+                schedule.append(f"{days} days before due date ({channel})")
+    return schedule or list(DEFAULT_REMINDER_SCHEDULE)
+
+
+def renewal_timeline(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    avg_days = payload['payment_timing_days']
+    if avg_days is None:
+        return None
+    return {
+        'typical_pattern': f"Pays {abs(avg_days)} days {'early' if avg_days >= 0 else 'late'}",
+        'avg_timing_days': avg_days,
+        'reminder_schedule': reminder_schedule(),
+    }
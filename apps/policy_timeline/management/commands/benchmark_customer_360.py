@@ -0,0 +1,117 @@
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.benchmarking import RolledBackCommand, count_queries
+from apps.customer_assets.models import CustomerAssets
+from apps.customer_family_medical_history.models import CustomerFamilyMedicalHistory
+from apps.customer_financial_profile.models import CustomerFinancialProfile
+from apps.customer_vehicle.models import CustomerVehicle
+from apps.customers.models import Customer
+from apps.other_insurance_policies.models import OtherInsurancePolicy
+from apps.policies.models import Policy, PolicyType
+from apps.policy_timeline.customer_360 import customer_360_key, invalidate_customer_360
+from apps.policy_timeline.models import CustomerPaymentSchedule, PolicyTimeline, UpcomingPayment
+from apps.policy_timeline.views import policy_timeline_complete_api
+
+
+class Command(RolledBackCommand):
+    help = (
+        'Measure policy_timeline_complete_api queries and time for a customer with many policies, events, '
+        'payments and assets, cold and with the customer 360 cached. All rows are rolled back. The query '
+        'budgets are checked by apps.policy_timeline.tests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Policies, events, payments and assets each')
+
+    def run(self, options):
+        rows = options['rows']
+        today = timezone.localdate()
+        tag = uuid.uuid4().hex[:6]
+        user = get_user_model().objects.create(email=f'c360-bench-{tag}@example.com')
+        policy_type = PolicyType.objects.create(name=f'Benchmark {tag}', code=f'BM{tag}')
+        customer = Customer.objects.create(
+            customer_code=f'BM{tag}', first_name='Bench', email=f'c360-{tag}@example.com', phone='9876543210'
+        )
+
+        policies = Policy.objects.bulk_create([
+            Policy(
+                policy_number=f'BM{tag}-{n}', customer=customer, policy_type=policy_type, start_date=today,
+                end_date=today + timedelta(days=365), premium_amount=Decimal('12000'),
+                sum_assured=Decimal('500000'), status='active'
+            )
+            for n in range(rows)
+        ])
+        event_types = [value for value, _ in PolicyTimeline.EVENT_TYPE_CHOICES]
+        PolicyTimeline.objects.bulk_create([
+            PolicyTimeline(
+                policy=policies[n % len(policies)], customer=customer, event_type=event_types[n % len(event_types)],
+                event_title=f'Event {n}', event_description='Benchmark event', event_date=timezone.now() - timedelta(days=n)
+            )
+            for n in range(rows)
+        ])
+        UpcomingPayment.objects.bulk_create([
+            UpcomingPayment(
+                policy=policy, customer=customer, due_date=today + timedelta(days=30),
+                amount_due=Decimal('1000'), days_to_due=30
+            )
+            for policy in policies
+        ])
+        assets = CustomerAssets.objects.bulk_create([CustomerAssets(customer=customer) for _ in range(rows)])
+        CustomerVehicle.objects.bulk_create([
+            CustomerVehicle(customer_assets=asset, vehicle_name='Sedan', model_year=2020, value=Decimal('800000'))
+            for asset in assets
+        ])
+        CustomerFamilyMedicalHistory.objects.bulk_create([
+            CustomerFamilyMedicalHistory(
+                customer=customer, condition_category='diabetes', condition_name='Type 2 diabetes',
+                condition_status='controlled', family_relation='father'
+            )
+            for _ in range(rows)
+        ])
+        OtherInsurancePolicy.objects.bulk_create([
+            OtherInsurancePolicy(
+                customer=customer, policy_type=policy_type, policy_number=f'EXT{tag}-{n}', insurance_company='Other Co',
+                start_date=today, end_date=today + timedelta(days=365), premium_amount=Decimal('9000'),
+                sum_assured=Decimal('300000')
+            )
+            for n in range(rows)
+        ])
+        CustomerFinancialProfile.objects.create(customer=customer, annual_income=Decimal('1200000'))
+        CustomerPaymentSchedule.objects.create(customer=customer, average_payment_timing_days=5)
+
+        factory = APIRequestFactory()
+        invalidate_customer_360(customer.id)
+        try:
+            self._request(factory, user, customer.id, 'Cold')
+            cached = cache.get(customer_360_key(customer.id)) is not None
+            self._request(factory, user, customer.id, 'Warm')
+        finally:
+            invalidate_customer_360(customer.id)
+
+        if not cached:
+            self.stdout.write("Cache backend does not keep entries; the warm request was not served from cache.")
+
+    def _request(self, factory, user, customer_id, label):
+        request = factory.get(f'/policy-timeline/complete-api/{customer_id}/')
+        force_authenticate(request, user=user)
+        with count_queries() as queries:
+            start = time.perf_counter()
+            response = policy_timeline_complete_api(request, customer_id=customer_id)
+            elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise CommandError(f"{label} request returned {response.status_code}: {response.data}")
+        data = response.data['data']
+        self.stdout.write(
+            f"{label}: {queries['queries']} queries in {elapsed * 1000:.1f}ms "
+            f"({len(data['active_policies'])} policies, {data['timeline_events']['total_count']} events, "
+            f"{len(data['vehicles'])} vehicles)"
+        )
@@ -0,0 +1,75 @@
+import json
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.benchmarking import RolledBackCommand, count_queries
+from apps.customers.models import Customer
+from apps.policies.models import Policy, PolicyType
+from apps.policy_timeline.views import create_timeline_event_bulk
+
+
+class Command(RolledBackCommand):
+    help = (
+        'Post a large backfill to the bulk timeline event API and report queries, time and per-item errors. '
+        'All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--customers', type=int, default=20)
+        parser.add_argument('--invalid-every', type=int, default=100, help='Every Nth event references a missing policy')
+
+    def run(self, options):
+        today = timezone.localdate()
+        tag = uuid.uuid4().hex[:6]
+        user = get_user_model().objects.create(email=f'tlb-bench-{tag}@example.com')
+        policy_type = PolicyType.objects.create(name=f'Benchmark {tag}', code=f'BM{tag}')
+        customers = Customer.objects.bulk_create([
+            Customer(customer_code=f'BM{tag}{i}', first_name='Bench', email=f'tlb{i}-{tag}@example.com', phone='9876543210')
+            for i in range(options['customers'])
+        ])
+        policies = Policy.objects.bulk_create([
+            Policy(
+                policy_number=f'BM{tag}-{customer.id}', customer=customer, policy_type=policy_type, start_date=today,
+                end_date=today + timedelta(days=365), premium_amount=Decimal('12000'),
+                sum_assured=Decimal('500000'), status='active'
+            )
+            for customer in customers
+        ])
+
+        invalid_every = options['invalid_every']
+        events = []
+        for n in range(options['events']):
+            policy = policies[n % len(policies)]
+            events.append({
+                'policy': 0 if invalid_every and n % invalid_every == 0 else policy.id,
+                'customer': policy.customer_id,
+                'agent': user.id,
+                'event_type': 'renewal',
+                'event_title': f'Renewal {n}',
+                'event_description': 'Backfilled policy history',
+                'event_date': (timezone.now() - timedelta(days=n)).isoformat(),
+            })
+
+        request = APIRequestFactory().post('/policy-timeline/bulk-create/', json.dumps({'events': events}),
+                                           content_type='application/json')
+        force_authenticate(request, user=user)
+        with count_queries() as queries:
+            start = time.perf_counter()
+            response = create_timeline_event_bulk(request)
+            elapsed = time.perf_counter() - start
+        if response.status_code != 201:
+            raise CommandError(f"Bulk create returned {response.status_code}: {response.data}")
+
+        self.stdout.write(
+            f"Bulk create: {response.data['created_count']} created, {response.data['error_count']} rejected "
+            f"of {len(events)} in {elapsed:.2f}s ({len(events) / elapsed:.0f} events/s) "
+            f"with {queries['queries']} queries"
+        )
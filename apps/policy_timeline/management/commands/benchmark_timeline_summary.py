@@ -0,0 +1,79 @@
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.benchmarking import RolledBackCommand, count_queries
+from apps.customers.models import Customer
+from apps.policies.models import Policy, PolicyType
+from apps.policy_timeline.models import CustomerTimelineSummary, PolicyTimeline
+from apps.policy_timeline.views import policy_timeline_dashboard, timeline_statistics
+
+
+class Command(RolledBackCommand):
+    help = (
+        'Measure one-by-one event creation with the maintained CustomerTimelineSummary, and '
+        'timeline_statistics and policy_timeline_dashboard queries and time, for a customer with many events. '
+        'All rows are rolled back. The summary invariants are checked by apps.policy_timeline.tests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--created', type=int, default=50, help='Events saved one by one through the ORM')
+
+    def run(self, options):
+        today = timezone.localdate()
+        tag = uuid.uuid4().hex[:6]
+        user = get_user_model().objects.create(email=f'tl-bench-{tag}@example.com')
+        policy_type = PolicyType.objects.create(name=f'Benchmark {tag}', code=f'BM{tag}')
+        customer = Customer.objects.create(
+            customer_code=f'BM{tag}', first_name='Bench', email=f'tl-{tag}@example.com', phone='9876543210'
+        )
+        policy = Policy.objects.create(
+            policy_number=f'BM{tag}', customer=customer, policy_type=policy_type, start_date=today,
+            end_date=today + timedelta(days=365), premium_amount=Decimal('12000'), sum_assured=Decimal('500000'),
+            status='active'
+        )
+        event_types = [value for value, _ in PolicyTimeline.EVENT_TYPE_CHOICES]
+        statuses = [value for value, _ in PolicyTimeline.EVENT_STATUS_CHOICES]
+        PolicyTimeline.objects.bulk_create([
+            PolicyTimeline(
+                policy=policy, customer=customer, event_type=event_types[n % len(event_types)],
+                event_status=statuses[n % len(statuses)], event_title=f'Event {n}', event_description='Benchmark',
+                event_date=timezone.now() - timedelta(days=n % 400), is_milestone=n % 10 == 0,
+                follow_up_required=n % 7 == 0, follow_up_date=timezone.now() + timedelta(days=3)
+            )
+            for n in range(options['events'])
+        ], batch_size=2000)
+        # bulk_create skips signals, as a backfill integration would; start from a fresh row.
+        CustomerTimelineSummary.objects.filter(customer=customer).delete()
+
+        start = time.perf_counter()
+        for n in range(options['created']):
+            PolicyTimeline.objects.create(
+                policy=policy, customer=customer, event_type='communication', event_title=f'Call {n}',
+                event_description='Benchmark', event_date=timezone.now()
+            )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Created {options['created']} events one by one in {elapsed:.2f}s")
+
+        factory = APIRequestFactory()
+        for label, view, path, kwargs in (
+            ('timeline_statistics', timeline_statistics, '/policy-timeline/statistics/', {}),
+            ('policy_timeline_dashboard', policy_timeline_dashboard, f'/policy-timeline/dashboard/{customer.id}/',
+             {'customer_id': customer.id}),
+        ):
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            with count_queries() as queries:
+                start = time.perf_counter()
+                response = view(request, **kwargs)
+                elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f"{label} returned {response.status_code}: {response.data}")
+            self.stdout.write(f"{label}: {queries['queries']} queries in {elapsed * 1000:.1f}ms")
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:45
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+
+def backfill_summaries(apps, schema_editor):
+    """Summaries are now maintained on write, so every customer with events or policies needs a fresh row."""
+    PolicyTimeline = apps.get_model('policy_timeline', 'PolicyTimeline')
+    CustomerTimelineSummary = apps.get_model('policy_timeline', 'CustomerTimelineSummary')
+    Policy = apps.get_model('policies', 'Policy')
+
+    values = {}
+    events = (
+        PolicyTimeline.objects.filter(is_deleted=False).values('customer_id')
+        .annotate(total=Count('id'), last=Max('event_date')).order_by()
+    )
+    for row in events.iterator():
+        values[row['customer_id']] = {'total_events': row['total'], 'last_activity_date': row['last']}
+    active = Q(status='active')
+    policies = (
+        Policy.objects.values('customer_id')
+        .annotate(count=Count('id', filter=active), premium=Sum('premium_amount', filter=active)).order_by()
+    )
+    for row in policies.iterator():
+        values.setdefault(row['customer_id'], {}).update(
+            active_policies=row['count'], total_premium=row['premium'] or Decimal('0')
+        )
+
+    now = timezone.now()
+    fields = ['total_events', 'last_activity_date', 'active_policies', 'total_premium', 'updated_at']
+    existing = list(CustomerTimelineSummary.objects.all())
+    for summary in existing:
+        row = values.pop(summary.customer_id, {})
+        summary.total_events = row.get('total_events', 0)
+        summary.last_activity_date = row.get('last_activity_date')
+        summary.active_policies = row.get('active_policies', 0)
+        summary.total_premium = row.get('total_premium', Decimal('0'))
+        summary.updated_at = now
+    CustomerTimelineSummary.objects.bulk_update(existing, fields, batch_size=1000)
+    CustomerTimelineSummary.objects.bulk_create(
+        [CustomerTimelineSummary(customer_id=customer_id, **row) for customer_id, row in values.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0010_policy_scores'),
+        ('policy_timeline', '0003_customerpaymentschedule_upcomingpayment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import PolicyTimeline, PolicyTimelineEvent, CustomerTimelineSummary, PolicyTimelineFilter, CustomerPaymentSchedule, UpcomingPayment
+from .summaries import customer_timeline_summary
 from apps.customers.serializers import CustomerSerializer
 from apps.policies.serializers import PolicySerializer
 from apps.users.serializers import UserSerializer
@@ -179,6 +180,45 @@ class PolicyTimelineCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class PolicyTimelineBulkItemSerializer(PolicyTimelineCreateSerializer):
+    """
+    One event of a bulk payload, validated without touching the database. The view
+    resolves every referenced id up front and passes them in the context as
+    `policy_customers` ({policy_id: customer_id}), `customer_ids` and `agent_ids`.
+    validated_data carries policy_id, customer_id and agent_id.
+    """
+    policy = serializers.IntegerField()
+    customer = serializers.IntegerField()
+    agent = serializers.IntegerField(required=False, allow_null=True)
+    
+    def validate(self, data):
+        errors = {}
+        policy_customer = self.context['policy_customers'].get(data['policy'])
+        if policy_customer is None:
+            errors['policy'] = [f"Invalid pk \"{data['policy']}\" - object does not exist."]
+        if data['customer'] not in self.context['customer_ids']:
+            errors['customer'] = [f"Invalid pk \"{data['customer']}\" - object does not exist."]
+        if data.get('agent') is not None and data['agent'] not in self.context['agent_ids']:
+            errors['agent'] = [f"Invalid pk \"{data['agent']}\" - object does not exist."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        
+        if policy_customer != data['customer']:
+            raise serializers.ValidationError(
+                "Customer must match the policy's customer"
+            )
+        
+        if data.get('follow_up_required') and not data.get('follow_up_date'):
+            raise serializers.ValidationError(
+                "Follow-up date is required when follow-up is marked as required"
+            )
+        
+        data['policy_id'] = data.pop('policy')
+        data['customer_id'] = data.pop('customer')
+        data['agent_id'] = data.pop('agent', None)
+        return data
+
+
 class PolicyTimelineEventSerializer(serializers.ModelSerializer):    
     class Meta:
         model = PolicyTimelineEvent
@@ -434,26 +474,22 @@ class PolicyTimelineDashboardSerializer(serializers.ModelSerializer):
             'total_premium',
         ]
     
+    def _summary(self, obj):
+        # Computed once per customer per serialization; list callers should
+        # select_related('customer__timeline_summary').
+        cache = self.context.setdefault('timeline_summaries', {})
+        if obj.customer_id not in cache:
+            cache[obj.customer_id] = customer_timeline_summary(obj.customer)
+        return cache[obj.customer_id]
+    
     def get_total_events(self, obj):
-        try:
-            return PolicyTimeline.objects.filter(customer=obj.customer, is_deleted=False).count()
-        except:
-            return 0
+        return self._summary(obj)['total_events']
     
     def get_active_policies(self, obj):
-        try:
-            return obj.customer.policies.filter(status='active').count()
-        except:
-            return 0
+        return self._summary(obj)['active_policies']
     
     def get_total_premium(self, obj):
-        try:
-            total = 0
-            for policy in obj.customer.policies.filter(status='active'):
-                total += float(policy.premium_amount or 0)
-            return total
-        except:
-            return 0
+        return float(self._summary(obj)['total_premium'] or 0)
 
 class UpcomingPaymentSerializer(serializers.ModelSerializer):
     
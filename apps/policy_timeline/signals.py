@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.side_effects import defer, register_deferred_handler
+from apps.customer_assets.models import CustomerAssets
+from apps.customer_communication_preferences.models import CustomerCommunicationPreference
+from apps.customer_family_medical_history.models import CustomerFamilyMedicalHistory
+from apps.customer_financial_profile.models import CustomerFinancialProfile
+from apps.customer_policy_preferences.models import CustomerPolicyPreference
+from apps.customer_vehicle.models import CustomerVehicle
+from apps.customers.models import Customer
+from apps.other_insurance_policies.models import OtherInsurancePolicy
+from apps.policies.models import Policy
+from .customer_360 import invalidate_customer_360
+from .models import CustomerPaymentSchedule, PolicyTimeline, UpcomingPayment
+from .summaries import record_new_events, refresh_timeline_summaries
+
+# Tables read by the customer 360 payload, with how to find the customer of a row.
+CUSTOMER_360_SOURCES = {
+    Customer: lambda instance: instance.pk,
+    Policy: lambda instance: instance.customer_id,
+    PolicyTimeline: lambda instance: instance.customer_id,
+    CustomerPaymentSchedule: lambda instance: instance.customer_id,
+    UpcomingPayment: lambda instance: instance.customer_id,
+    CustomerFinancialProfile: lambda instance: instance.customer_id,
+    CustomerFamilyMedicalHistory: lambda instance: instance.customer_id,
+    CustomerAssets: lambda instance: instance.customer_id,
+    CustomerVehicle: lambda instance: CustomerAssets.objects.filter(
+        pk=instance.customer_assets_id
+    ).values_list('customer_id', flat=True).first(),
+    CustomerPolicyPreference: lambda instance: instance.customer_id,
+    OtherInsurancePolicy: lambda instance: instance.customer_id,
+    CustomerCommunicationPreference: lambda instance: instance.customer_id,
+}
+
+
+def invalidate_customer_360_on_write(sender, instance, **kwargs):
+    customer_id = CUSTOMER_360_SOURCES[sender](instance)
+    if customer_id and not defer('customer_360', customer_id):
+        # After commit, so a concurrent read cannot re-cache the old rows.
+        transaction.on_commit(lambda: invalidate_customer_360(customer_id))
+
+
+for model in CUSTOMER_360_SOURCES:
+    post_save.connect(invalidate_customer_360_on_write, sender=model, dispatch_uid=f'customer_360_save_{model.__name__}')
+    post_delete.connect(invalidate_customer_360_on_write, sender=model, dispatch_uid=f'customer_360_delete_{model.__name__}')
+
+
+@register_deferred_handler('customer_360')
+def invalidate_deferred_customer_360(customer_ids, pending):
+    ids = list(customer_ids)
+    transaction.on_commit(lambda: invalidate_customer_360(*ids))
+
+
+@receiver(post_save, sender=PolicyTimeline)
+def update_timeline_summary_on_event_save(sender, instance, created, **kwargs):
+    if not instance.customer_id or defer('timeline_summary', instance.customer_id):
+        return
+    if created and not instance.is_deleted:
+        record_new_events(instance.customer_id, 1, instance.event_date)
+    else:
+        refresh_timeline_summaries([instance.customer_id])
+
+
+@receiver(post_delete, sender=PolicyTimeline)
+@receiver(post_save, sender=Policy)
+@receiver(post_delete, sender=Policy)
+def refresh_timeline_summary(sender, instance, **kwargs):
+    if instance.customer_id and not defer('timeline_summary', instance.customer_id):
+        refresh_timeline_summaries([instance.customer_id])
+
+
+@register_deferred_handler('timeline_summary')
+def refresh_deferred_timeline_summaries(customer_ids, pending):
+    refresh_timeline_summaries(customer_ids)
@@ -0,0 +1,106 @@
+"""
+Maintenance of CustomerTimelineSummary.
+
+A new timeline event bumps its customer's row with one UPDATE (see signals.py); edits,
+soft deletes and policy changes recompute the affected customers from two grouped
+aggregates. Readers never create summaries; customers without a row yet are answered
+from the same aggregates by summary_values().
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from apps.policies.models import Policy
+
+from .models import CustomerTimelineSummary, PolicyTimeline
+
+SUMMARY_FIELDS = ['total_events', 'active_policies', 'total_premium', 'last_activity_date']
+
+
+def event_aggregates(customer_ids: Iterable) -> Dict[Any, Dict[str, Any]]:
+    rows = (
+        PolicyTimeline.objects.filter(customer_id__in=customer_ids, is_deleted=False)
+        .values('customer_id')
+        .annotate(total_events=Count('id'), last_activity_date=Max('event_date'))
+        .order_by()
+    )
+    return {row.pop('customer_id'): row for row in rows}
+
+
+def policy_aggregates(customer_ids: Iterable) -> Dict[Any, Dict[str, Any]]:
+    active = Q(status='active')
+    rows = (
+        Policy.objects.filter(customer_id__in=customer_ids)
+        .values('customer_id')
+        .annotate(
+            active_policies=Count('id', filter=active),
+            total_premium=Coalesce(Sum('premium_amount', filter=active), Value(Decimal('0'))),
+        )
+        .order_by()
+    )
+    return {row.pop('customer_id'): row for row in rows}
+
+
+def summary_values(customer_ids: Iterable) -> Dict[Any, Dict[str, Any]]:
+    """Fresh summary values for each customer id, from one event and one policy aggregate."""
+    customer_ids = list(customer_ids)
+    events = event_aggregates(customer_ids)
+    policies = policy_aggregates(customer_ids)
+    return {
+        customer_id: {
+            'total_events': events.get(customer_id, {}).get('total_events', 0),
+            'last_activity_date': events.get(customer_id, {}).get('last_activity_date'),
+            'active_policies': policies.get(customer_id, {}).get('active_policies', 0),
+            'total_premium': policies.get(customer_id, {}).get('total_premium', Decimal('0')),
+        }
+        for customer_id in customer_ids
+    }
+
+
+def refresh_timeline_summaries(customer_ids: Iterable, batch_size: int = 1000) -> int:
+    """Recompute and store the summaries of `customer_ids`; returns the number of customers."""
+    values = summary_values(set(customer_ids))
+    if not values:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        existing = list(CustomerTimelineSummary.objects.filter(customer_id__in=values).select_for_update())
+        for summary in existing:
+            for field, value in values.pop(summary.customer_id).items():
+                setattr(summary, field, value)
+            summary.updated_at = now
+        CustomerTimelineSummary.objects.bulk_update(existing, SUMMARY_FIELDS + ['updated_at'], batch_size=batch_size)
+        # Another writer may create the same row concurrently; its values are as fresh as ours.
+        CustomerTimelineSummary.objects.bulk_create(
+            [CustomerTimelineSummary(customer_id=customer_id, **row) for customer_id, row in values.items()],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+    return len(existing) + len(values)
+
+
+def record_new_events(customer_id, count: int, latest_event_date) -> None:
+    """Add `count` new events to the customer's summary, creating the row on first use."""
+    updated = CustomerTimelineSummary.objects.filter(customer_id=customer_id).update(
+        total_events=F('total_events') + count,
+        last_activity_date=Greatest(Coalesce('last_activity_date', Value(latest_event_date)), Value(latest_event_date)),
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        refresh_timeline_summaries([customer_id])
+
+
+def customer_timeline_summary(customer) -> Dict[str, Any]:
+    """
+    Summary values for `customer`: the maintained row when it exists (select_related
+    'timeline_summary' to keep this query-free), otherwise computed without writing.
+    """
+    try:
+        summary = customer.timeline_summary
+    except CustomerTimelineSummary.DoesNotExist:
+        return summary_values([customer.pk])[customer.pk]
+    return {field: getattr(summary, field) for field in SUMMARY_FIELDS}
@@ -0,0 +1,337 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.customer_assets.models import CustomerAssets
+from apps.customer_family_medical_history.models import CustomerFamilyMedicalHistory
+from apps.customer_financial_profile.models import CustomerFinancialProfile
+from apps.customer_vehicle.models import CustomerVehicle
+from apps.customers.models import Customer
+from apps.other_insurance_policies.models import OtherInsurancePolicy
+from apps.policies.models import Policy, PolicyType
+from .bulk import create_timeline_events
+from .customer_360 import customer_360_key
+from .models import CustomerPaymentSchedule, CustomerTimelineSummary, PolicyTimeline, UpcomingPayment
+from .summaries import SUMMARY_FIELDS, refresh_timeline_summaries, summary_values
+from .views import (
+    create_timeline_event_bulk, policy_timeline_complete_api, policy_timeline_dashboard, timeline_statistics,
+)
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'policy-timeline-tests'}}
+
+# One customer query, eight prefetches and the event type counts on a cache miss, plus
+# the timeline count, the timeline page and the renewal settings on every request.
+COLD_QUERY_BUDGET = 13
+WARM_QUERY_BUDGET = 3
+
+
+def create_customer_book(code, policy_type, policies=1, **related):
+    """A customer with `policies` active policies and `related[name]` rows of each other 360 source."""
+    today = timezone.localdate()
+    customer = Customer.objects.create(
+        customer_code=code, first_name='Timeline', email=f'{code.lower()}@example.com', phone='9876543210'
+    )
+    created = Policy.objects.bulk_create([
+        Policy(
+            policy_number=f'{code}-{n}', customer=customer, policy_type=policy_type, start_date=today,
+            end_date=today + timedelta(days=365), premium_amount=Decimal('12000'), sum_assured=Decimal('500000'),
+            status='active'
+        )
+        for n in range(policies)
+    ])
+    event_types = [value for value, _ in PolicyTimeline.EVENT_TYPE_CHOICES]
+    PolicyTimeline.objects.bulk_create([
+        PolicyTimeline(
+            policy=created[n % len(created)], customer=customer, event_type=event_types[n % len(event_types)],
+            event_title=f'Event {n}', event_description='Timeline event', event_date=timezone.now() - timedelta(days=n)
+        )
+        for n in range(related.get('events', 0))
+    ])
+    UpcomingPayment.objects.bulk_create([
+        UpcomingPayment(policy=policy, customer=customer, due_date=today + timedelta(days=30),
+                        amount_due=Decimal('1000'), days_to_due=30)
+        for policy in created[:related.get('payments', 0)]
+    ])
+    assets = CustomerAssets.objects.bulk_create([CustomerAssets(customer=customer) for _ in range(related.get('assets', 0))])
+    CustomerVehicle.objects.bulk_create([
+        CustomerVehicle(customer_assets=asset, vehicle_name='Sedan', model_year=2020, value=Decimal('800000'))
+        for asset in assets
+    ])
+    CustomerFamilyMedicalHistory.objects.bulk_create([
+        CustomerFamilyMedicalHistory(customer=customer, condition_category='diabetes', condition_name='Type 2 diabetes',
+                                     condition_status='controlled', family_relation='father')
+        for _ in range(related.get('medical_history', 0))
+    ])
+    OtherInsurancePolicy.objects.bulk_create([
+        OtherInsurancePolicy(customer=customer, policy_type=policy_type, policy_number=f'EXT-{code}-{n}',
+                             insurance_company='Other Co', start_date=today, end_date=today + timedelta(days=365),
+                             premium_amount=Decimal('9000'), sum_assured=Decimal('300000'))
+        for n in range(related.get('other_policies', 0))
+    ])
+    return customer, created
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class Customer360QueryBudgetTests(TestCase):
+    rows = 25
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='timeline@example.com',
+            password='testpassword123',
+            first_name='Timeline',
+            last_name='Agent'
+        )
+        self.policy_type = PolicyType.objects.create(name='Timeline Motor', code='TLMOTOR')
+        self.customer, self.policies = create_customer_book(
+            'C360', self.policy_type, policies=self.rows, events=self.rows, payments=self.rows, assets=self.rows,
+            medical_history=self.rows, other_policies=self.rows
+        )
+        CustomerFinancialProfile.objects.create(customer=self.customer, annual_income=Decimal('1200000'))
+        CustomerPaymentSchedule.objects.create(customer=self.customer, average_payment_timing_days=5)
+
+    def _get(self):
+        request = APIRequestFactory().get(f'/policy-timeline/complete-api/{self.customer.id}/')
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = policy_timeline_complete_api(request, customer_id=self.customer.id)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['data'], len(queries)
+
+    def test_cold_and_warm_requests_stay_within_query_budget(self):
+        data, cold = self._get()
+        self.assertLessEqual(cold, COLD_QUERY_BUDGET)
+        self.assertEqual(len(data['active_policies']), self.rows)
+        self.assertEqual(len(data['vehicles']), self.rows)
+        self.assertEqual(data['timeline_events']['total_count'], self.rows)
+        self.assertIsNotNone(cache.get(customer_360_key(self.customer.id)))
+
+        warm_data, warm = self._get()
+        self.assertLessEqual(warm, WARM_QUERY_BUDGET)
+        self.assertEqual(warm_data['active_policies'], data['active_policies'])
+
+    def test_cold_query_count_does_not_grow_with_related_rows(self):
+        _, cold = self._get()
+        cache.clear()
+        CustomerAssets.objects.bulk_create([CustomerAssets(customer=self.customer) for _ in range(self.rows)])
+        _, cold_with_more_assets = self._get()
+        self.assertEqual(cold_with_more_assets, cold)
+
+    def test_write_to_a_source_table_invalidates_the_cached_360(self):
+        data, _ = self._get()
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            Policy.objects.create(
+                policy_number='C360-NEW', customer=self.customer, policy_type=self.policy_type, start_date=today,
+                end_date=today + timedelta(days=365), premium_amount=Decimal('5000'), sum_assured=Decimal('100000'),
+                status='active'
+            )
+        self.assertIsNone(cache.get(customer_360_key(self.customer.id)))
+
+        refreshed, _ = self._get()
+        self.assertEqual(len(refreshed['active_policies']), len(data['active_policies']) + 1)
+
+    def test_vehicle_write_invalidates_through_its_asset(self):
+        self._get()
+        asset = CustomerAssets.objects.filter(customer=self.customer).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomerVehicle.objects.create(
+                customer_assets=asset, vehicle_name='Hatchback', model_year=2022, value=Decimal('500000')
+            )
+        self.assertIsNone(cache.get(customer_360_key(self.customer.id)))
+
+
+class TimelineSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='summary@example.com',
+            password='testpassword123',
+            first_name='Summary',
+            last_name='Agent'
+        )
+        self.policy_type = PolicyType.objects.create(name='Summary Motor', code='SUMMOTOR')
+        self.customer, self.policies = create_customer_book('SUM', self.policy_type, policies=3)
+
+    def _create_event(self, days_ago=0, **fields):
+        return PolicyTimeline.objects.create(
+            policy=self.policies[0], customer=self.customer, event_type=fields.pop('event_type', 'communication'),
+            event_title='Call', event_description='Summary event', event_date=timezone.now() - timedelta(days=days_ago),
+            **fields
+        )
+
+    def assertSummaryMatchesAggregates(self):
+        stored = CustomerTimelineSummary.objects.get(customer=self.customer)
+        expected = summary_values([self.customer.id])[self.customer.id]
+        self.assertEqual({field: getattr(stored, field) for field in SUMMARY_FIELDS}, expected)
+        return stored
+
+    def test_events_created_one_by_one_keep_the_summary_current(self):
+        for days_ago in (5, 1, 3):
+            self._create_event(days_ago=days_ago)
+
+        stored = self.assertSummaryMatchesAggregates()
+        self.assertEqual(stored.total_events, 3)
+        self.assertEqual(stored.active_policies, 3)
+
+    def test_soft_delete_and_policy_changes_refresh_the_summary(self):
+        latest = self._create_event(days_ago=0)
+        self._create_event(days_ago=2)
+
+        latest.is_deleted = True
+        latest.save()
+        stored = self.assertSummaryMatchesAggregates()
+        self.assertEqual(stored.total_events, 1)
+
+        lapsed = self.policies[1]
+        lapsed.status = 'lapsed'
+        lapsed.save()
+        stored = self.assertSummaryMatchesAggregates()
+        self.assertEqual(stored.active_policies, 2)
+        self.assertEqual(stored.total_premium, Decimal('24000'))
+
+    def test_refresh_repairs_rows_written_without_signals(self):
+        self._create_event()
+        PolicyTimeline.objects.bulk_create([
+            PolicyTimeline(policy=self.policies[0], customer=self.customer, event_type='renewal', event_title='Backfill',
+                           event_description='Summary event', event_date=timezone.now() - timedelta(days=n))
+            for n in range(4)
+        ])
+        refresh_timeline_summaries([self.customer.id])
+        stored = self.assertSummaryMatchesAggregates()
+        self.assertEqual(stored.total_events, 5)
+
+    def test_dashboard_reads_the_summary_and_answers_customers_without_one(self):
+        self._create_event()
+        other, _ = create_customer_book('SUMNEW', self.policy_type, policies=2)
+        CustomerTimelineSummary.objects.filter(customer=other).delete()
+
+        factory = APIRequestFactory()
+        for customer, total_events, active_policies in ((self.customer, 1, 3), (other, 0, 2)):
+            request = factory.get(f'/policy-timeline/dashboard/{customer.id}/')
+            force_authenticate(request, user=self.user)
+            response = policy_timeline_dashboard(request, customer_id=customer.id)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertEqual(response.data['total_events'], total_events)
+            self.assertEqual(response.data['summary']['active_policies'], active_policies)
+        self.assertFalse(CustomerTimelineSummary.objects.filter(customer=other).exists())
+
+    def test_statistics_match_per_filter_counts(self):
+        follow_up = timezone.now() + timedelta(days=3)
+        for n, event_type in enumerate(['communication', 'renewal', 'payment', 'renewal']):
+            self._create_event(days_ago=n * 20, event_type=event_type, is_milestone=n % 2 == 0,
+                               follow_up_required=n < 2, follow_up_date=follow_up)
+        self._create_event(days_ago=1, is_deleted=True)
+
+        request = APIRequestFactory().get('/policy-timeline/statistics/', {'days': 30})
+        force_authenticate(request, user=self.user)
+        statistics = timeline_statistics(request).data['statistics']
+
+        events = PolicyTimeline.objects.filter(is_deleted=False)
+        recent = events.filter(event_date__gte=timezone.now() - timedelta(days=30))
+        self.assertEqual(statistics['total_events'], events.count())
+        self.assertEqual(statistics['recent_events'], recent.count())
+        self.assertEqual(statistics['milestone_events'], recent.filter(is_milestone=True).count())
+        self.assertEqual(statistics['follow_up_events'], events.filter(follow_up_required=True).count())
+        self.assertEqual(
+            {row['event_type']: row['count'] for row in statistics['events_by_type']},
+            {'communication': 1, 'renewal': 1}
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BulkTimelineEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='bulk@example.com',
+            password='testpassword123',
+            first_name='Bulk',
+            last_name='Agent'
+        )
+        policy_type = PolicyType.objects.create(name='Bulk Motor', code='BULKMOTOR')
+        self.first, self.first_policies = create_customer_book('BULKA', policy_type, policies=2)
+        self.second, self.second_policies = create_customer_book('BULKB', policy_type, policies=1)
+
+    def _item(self, policy, customer=None, **fields):
+        return {
+            'policy': policy.id,
+            'customer': (customer or policy.customer).id,
+            'agent': self.user.id,
+            'event_type': 'renewal',
+            'event_title': 'Backfilled renewal',
+            'event_description': 'Imported policy history',
+            'event_date': (timezone.now() - timedelta(days=fields.pop('days_ago', 0))).isoformat(),
+            **fields,
+        }
+
+    def test_valid_items_are_created_and_each_rejected_item_is_reported(self):
+        policy, other_policy, second_policy = self.first_policies[0], self.first_policies[1], self.second_policies[0]
+        items = [
+            self._item(policy, days_ago=3),
+            self._item(other_policy, days_ago=2),
+            {**self._item(policy), 'policy': 0},
+            self._item(second_policy, days_ago=1),
+            self._item(second_policy, customer=self.first),
+            {**self._item(policy), 'event_title': ''},
+        ]
+        request = APIRequestFactory().post(
+            '/policy-timeline/bulk-create/', json.dumps({'events': items}), content_type='application/json'
+        )
+        force_authenticate(request, user=self.user)
+        response = create_timeline_event_bulk(request)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['created_count'], response.data['error_count']), (3, 3))
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(set(errors), {2, 4, 5})
+        self.assertIn('policy', errors[2])
+        self.assertIn('non_field_errors', errors[4])
+        self.assertIn('event_title', errors[5])
+        self.assertEqual(
+            [event['policy'] for event in response.data['created_events']],
+            [policy.id, other_policy.id, second_policy.id]
+        )
+        self.assertEqual(PolicyTimeline.objects.filter(created_by=self.user).count(), 3)
+
+    def test_summaries_match_aggregates_after_bulk_create(self):
+        items = [self._item(self.first_policies[n % 2], days_ago=n) for n in range(5)]
+        items += [self._item(self.second_policies[0], days_ago=n) for n in range(2)]
+        events, errors = create_timeline_events(items, user=self.user)
+
+        self.assertEqual((len(events), errors), (7, []))
+        expected = summary_values([self.first.id, self.second.id])
+        for customer, total_events in ((self.first, 5), (self.second, 2)):
+            stored = CustomerTimelineSummary.objects.get(customer=customer)
+            self.assertEqual({field: getattr(stored, field) for field in SUMMARY_FIELDS}, expected[customer.id])
+            self.assertEqual(stored.total_events, total_events)
+
+    def test_query_count_does_not_grow_with_the_payload(self):
+        def queries_for(count):
+            items = [self._item(self.first_policies[n % 2], days_ago=n) for n in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                events, _ = create_timeline_events(items, user=self.user)
+            self.assertEqual(len(events), count)
+            return len(queries)
+
+        self.assertEqual(queries_for(40), queries_for(5))
+
+    def test_customer_360_is_invalidated_once_the_bulk_create_commits(self):
+        cache.set(customer_360_key(self.first.id), {'stale': True})
+        cache.set(customer_360_key(self.second.id), {'stale': True})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_timeline_events([self._item(self.first_policies[0])], user=self.user)
+
+        self.assertIsNone(cache.get(customer_360_key(self.first.id)))
+        self.assertIsNotNone(cache.get(customer_360_key(self.second.id)))
@@ -2,23 +2,24 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.http import JsonResponse
 from django.utils import timezone 
 from datetime import timedelta
+from collections import Counter
 
-from .models import PolicyTimeline, CustomerTimelineSummary, UpcomingPayment, CustomerPaymentSchedule
+from .bulk import create_timeline_events
+from .customer_360 import get_customer_360, renewal_timeline
+from .summaries import customer_timeline_summary
+from .models import PolicyTimeline
 from .serializers import (
     PolicyTimelineSerializer,
     PolicyTimelineDetailSerializer,
     PolicyTimelineCreateSerializer,
-    CustomerPaymentScheduleSerializer, 
-    UpcomingPaymentSerializer
 )
 
 from apps.policies.models import Policy
 from apps.customers.models import Customer
-from apps.renewal_timeline.models import CommonRenewalTimelineSettings
 
 
 class PolicyTimelineListCreateView(generics.ListCreateAPIView):
@@ -170,22 +171,8 @@ def create_timeline_event(request):
 @api_view(['GET'])
 def policy_timeline_dashboard(request, customer_id):
     try:
-        customer = get_object_or_404(Customer, id=customer_id)
-        
-        timeline_events = PolicyTimeline.objects.filter(
-            customer=customer,
-            is_deleted=False
-        ).select_related('policy', 'customer', 'agent').order_by('-event_date')
-        
-        try:
-            summary = customer.timeline_summary
-        except:
-            summary = CustomerTimelineSummary.objects.create(
-                customer=customer,
-                total_events=timeline_events.count(),
-                active_policies=customer.policies.filter(status='active').count(),
-                total_premium=sum([float(p.premium_amount or 0) for p in customer.policies.filter(status='active')])
-            )
+        customer = get_object_or_404(Customer.objects.select_related('timeline_summary'), id=customer_id)
+        summary = customer_timeline_summary(customer)
         
         return Response({
             'success': True,
@@ -194,7 +181,12 @@ def policy_timeline_dashboard(request, customer_id):
                 'name': customer.full_name,
                 'code': customer.customer_code,
             },
-            'total_events': timeline_events.count()
+            'total_events': summary['total_events'],
+            'summary': {
+                'active_policies': summary['active_policies'],
+                'total_premium': float(summary['total_premium']),
+                'last_activity_date': summary['last_activity_date'],
+            }
         })
     
     except Exception as e:
@@ -295,39 +287,30 @@ def search_timeline_events(request):
 @api_view(['GET'])
 def timeline_statistics(request):
     try:
-        from django.db.models import Count, Q
-        
         days = int(request.query_params.get('days', 30))
         end_date = timezone.now()
         start_date = end_date - timedelta(days=days)
         
-        total_events = PolicyTimeline.objects.filter(is_deleted=False).count()
-        recent_events = PolicyTimeline.objects.filter(
-            is_deleted=False,
-            event_date__gte=start_date
-        ).count()
-        
-        events_by_type = PolicyTimeline.objects.filter(
-            is_deleted=False,
-            event_date__gte=start_date
-        ).values('event_type').annotate(count=Count('id')).order_by('-count')
-        
-        events_by_status = PolicyTimeline.objects.filter(
-            is_deleted=False,
-            event_date__gte=start_date
-        ).values('event_status').annotate(count=Count('id')).order_by('-count')
-        
-        milestone_events = PolicyTimeline.objects.filter(
-            is_deleted=False,
-            is_milestone=True,
-            event_date__gte=start_date
-        ).count()
-        
-        follow_up_events = PolicyTimeline.objects.filter(
-            is_deleted=False,
-            follow_up_required=True,
-            follow_up_date__gte=timezone.now().date()
-        ).count()
+        recent = Q(event_date__gte=start_date)
+        groups = PolicyTimeline.objects.filter(is_deleted=False).values('event_type', 'event_status').annotate(
+            total=Count('id'),
+            recent=Count('id', filter=recent),
+            milestones=Count('id', filter=recent & Q(is_milestone=True)),
+            follow_ups=Count('id', filter=Q(follow_up_required=True, follow_up_date__gte=timezone.now().date())),
+        ).order_by()
+        
+        total_events = recent_events = milestone_events = follow_up_events = 0
+        by_type, by_status = Counter(), Counter()
+        for group in groups:
+            total_events += group['total']
+            recent_events += group['recent']
+            milestone_events += group['milestones']
+            follow_up_events += group['follow_ups']
+            if group['recent']:
+                by_type[group['event_type']] += group['recent']
+                by_status[group['event_status']] += group['recent']
+        events_by_type = [{'event_type': key, 'count': count} for key, count in by_type.most_common()]
+        events_by_status = [{'event_status': key, 'count': count} for key, count in by_status.most_common()]
         
         return Response({
             'success': True,
@@ -363,19 +346,16 @@ def create_timeline_event_bulk(request):
                 'error': 'No events data provided'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        created_events = []
-        errors = []
+        if not isinstance(events_data, list):
+            return Response({
+                'success': False,
+                'error': 'events must be a list'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        for event_data in events_data:
-            serializer = PolicyTimelineCreateSerializer(data=event_data)
-            if serializer.is_valid():
-                event = serializer.save(created_by=request.user)
-                created_events.append(event)
-            else:
-                errors.append({
-                    'data': event_data,
-                    'errors': serializer.errors
-                })
+        created_events, errors = create_timeline_events(events_data, user=request.user)
+        created_events = PolicyTimeline.objects.filter(
+            id__in=[event.id for event in created_events]
+        ).select_related('policy', 'customer', 'agent').order_by('id')
         
         response_data = {
             'success': True,
@@ -398,13 +378,10 @@ def create_timeline_event_bulk(request):
 @api_view(['GET'])
 def policy_timeline_complete_api(request, customer_id):
     try:
-        customer = get_object_or_404(
-            Customer.objects.select_related('payment_schedule'), 
-            id=customer_id
-        )
+        customer_360 = get_customer_360(customer_id)
         
         timeline_queryset = PolicyTimeline.objects.filter(
-            customer=customer,
+            customer_id=customer_id,
             is_deleted=False
         ).select_related('policy', 'customer', 'agent').order_by('-event_date')
         
@@ -431,283 +408,49 @@ def policy_timeline_complete_api(request, customer_id):
         end = start + page_size
         
         total_events_count = timeline_queryset.count()
-        timeline_events = timeline_queryset[start:end]
-        
-        try:
-            summary = customer.timeline_summary
-        except:
-            summary = CustomerTimelineSummary.objects.create(
-                customer=customer,
-                total_events=total_events_count,
-                active_policies=customer.policies.filter(status='active').count(),
-                total_premium=sum([float(p.premium_amount or 0) for p in customer.policies.filter(status='active')])
-            )
-        
+        timeline_events = list(timeline_queryset[start:end])
         timeline_serializer = PolicyTimelineSerializer(timeline_events, many=True)
         
-        active_policies = customer.policies.filter(status='active')
-        policies_data = []
-        total_premium = 0
-        total_coverage = 0
-        for policy in active_policies:
-            premium = float(policy.premium_amount or 0)
-            coverage = float(policy.sum_assured or 0)
-            total_premium += premium
-            total_coverage += coverage
-            
-            policies_data.append({
-                'id': policy.id,
-                'policy_number': policy.policy_number,
-                'policy_type': policy.policy_type.name if policy.policy_type else None,
-                'premium_amount': premium,
-                'start_date': policy.start_date,
-                'end_date': policy.end_date,
-                'status': policy.status,
-                'coverage_amount': coverage, 
-            })
-        
-        payment_schedules = None
-        upcoming_payments_data = []
-        schedule_summary = None
-        
-        try:
-            schedule_summary, created = CustomerPaymentSchedule.objects.get_or_create(
-                customer=customer,
-                defaults={
-                    'average_payment_timing_days': 5,
-                    'preferred_payment_method': 'credit_card',
-                    'total_payments_last_12_months': 12
-                }
-            )
-            
-            if schedule_summary:
-                payment_schedules = CustomerPaymentScheduleSerializer(schedule_summary).data
-                
-                upcoming_payments = UpcomingPayment.objects.filter(
-                    customer=customer,
-                    due_date__gte=timezone.now().date()
-                ).select_related('policy').order_by('due_date')
-                upcoming_payments_data = UpcomingPaymentSerializer(upcoming_payments, many=True).data
-        
-            
-        except CustomerPaymentSchedule.DoesNotExist:
-            pass
-        except Exception as e:
-            pass
-
-        
-        financial_profile = None
-        try:
-            if customer.financial_profile:
-                financial_profile = {
-                    'annual_income': float(customer.financial_profile.annual_income or 0),
-                    'income_captured_date': customer.financial_profile.income_captured_date,
-                    'income_source': customer.financial_profile.income_source,
-                    'policy_capacity_utilization': customer.financial_profile.policy_capacity_utilization,
-                    'recommended_policies_count': customer.financial_profile.recommended_policies_count,
-                    'risk_profile': customer.financial_profile.risk_profile,
-                    'tolerance_score': float(customer.financial_profile.tolerance_score or 0),
-                    'income_range': customer.financial_profile.income_range,
-                    'capacity_status': customer.financial_profile.capacity_status,
-                }
-        except:
-            pass
-        
-        medical_history = []
-        try:
-            for history in customer.family_medical_history.filter(is_active=True):
-                medical_history.append({
-                    'condition_name': history.condition_name,
-                    'family_relation': history.get_family_relation_display(),
-                    'condition_status': history.get_condition_status_display(),
-                    'age_diagnosed': history.age_diagnosed,
-                    'severity_level': history.get_severity_level_display(),
-                    'risk_score': history.risk_score,
-                    'is_high_risk': history.is_high_risk,
-                })
-        except:
-            pass
-        
-        assets_data = []
-        vehicles_data = []
-        try:
-            for asset in customer.assets.all():
-                assets_data.append({
-                    'residence_type': asset.get_residence_type_display(),
-                    'residence_status': asset.get_residence_status_display(),
-                    'residence_location': asset.residence_location,
-                    'residence_rating': asset.get_residence_rating_display(),
-                    'asset_score': asset.asset_score,
-                })
-                for vehicle in asset.vehicles.all():
-                    vehicles_data.append({
-                        'vehicle_name': vehicle.vehicle_name,
-                        'model_year': vehicle.model_year,
-                        'vehicle_type': vehicle.get_vehicle_type_display(),
-                        'value': float(vehicle.value),
-                        'condition': vehicle.get_condition_display(),
-                        'vehicle_age': vehicle.vehicle_age,
-                        'vehicle_score': vehicle.vehicle_score,
-                    })
-        except:
-            pass
-        
-        policy_preferences = []
-        try:
-            for pref in customer.policy_preferences.all():
-                policy_preferences.append({
-                    'preferred_tenure': pref.preferred_tenure,
-                    'coverage_type': pref.get_coverage_type_display(),
-                    'preferred_insurer': pref.preferred_insurer,
-                    'payment_mode': pref.get_payment_mode_display(),
-                    'auto_renewal': pref.auto_renewal,
-                    'budget_range_min': float(pref.budget_range_min or 0),
-                    'budget_range_max': float(pref.budget_range_max or 0),
-                    'avoided_policy_types': pref.avoided_policy_types if hasattr(pref, 'avoided_policy_types') else None, 
-                })
-        except:
-            pass
-        
-        other_policies = []
-        try:
-            for policy in customer.other_insurance_policies.filter(policy_status='active'):
-                other_policies.append({
-                    'policy_number': policy.policy_number,
-                    'insurance_company': policy.insurance_company,
-                    'policy_type': policy.policy_type.name if policy.policy_type else None,
-                    'premium_amount': float(policy.premium_amount),
-                    'sum_assured': float(policy.sum_assured),
-                    'payment_mode': policy.get_payment_mode_display(),
-                    'channel': policy.get_channel_display(),
-                    'satisfaction_rating': policy.satisfaction_rating,
-                    'claim_experience': policy.claim_experience,
-                    'switching_potential': policy.switching_potential,
-                })
-        except:
-            pass
-        
-        event_type_counts = {}
-        for event_type_choice in PolicyTimeline.EVENT_TYPE_CHOICES:
-            count = PolicyTimeline.objects.filter(
-                customer=customer,
-                event_type=event_type_choice[0],
-                is_deleted=False
-            ).count()
-            event_type_counts[event_type_choice[0]] = {
-                'label': event_type_choice[1],
-                'count': count
-            }
-                
-        comm_prefs_data = []
-        try:
-            for pref in customer.detailed_communication_preferences.all():
-                comm_prefs_data.append({
-                    'channel': pref.get_preferred_channel_display(),
-                    'status': 'Preferred' if getattr(pref, 'is_preferred', False) else 'Accepted',
-                    'is_enabled': True
-                })
-        except:
-            pass
-
-        renewal_data = None
-        try:
-            common_settings = CommonRenewalTimelineSettings.objects.filter(is_active=True).first()
-            reminder_schedule = []
-            
-            if common_settings:
-                if common_settings.reminder_schedule:
-                    reminder_schedule = common_settings.reminder_schedule
-                elif hasattr(common_settings, 'reminder_days') and common_settings.reminder_days:
-                    for days in common_settings.reminder_days:
-                        if days == 30:
-                            reminder_schedule.append("30 days before due date (Email)")
-                        elif days == 14:
-                            reminder_schedule.append("14 days before due date (Email)")
-                        elif days == 7:
-                            reminder_schedule.append("7 days before due date (Phone)")
-                        else:
-                            reminder_schedule.append(f"{days} days before due date (Email)")
-            
-            if not reminder_schedule:
-                reminder_schedule = ["30 days before due date (Email)", "14 days before due date (Email)", "7 days before due date (Phone)"]
-
-            if schedule_summary:
-                avg_days = schedule_summary.average_payment_timing_days
-                timing_str = f"Pays {abs(avg_days)} days {'early' if avg_days >= 0 else 'late'}"
-                
-                renewal_data = {
-                    'typical_pattern': timing_str, 
-                    'avg_timing_days': avg_days,
-                    'reminder_schedule': reminder_schedule
-                }
-        except:
-            renewal_data = None
-
-        payment_method_data = None
-        try:
-            if schedule_summary:
-                payment_method_data = {
-                    'primary_method': schedule_summary.get_preferred_payment_method_display(),
-                    'auto_debit_active': schedule_summary.preferred_payment_method == 'auto_debit',
-                    'details': "Details on file" 
-                }
-        except:
-            payment_method_data = None
-
-        language_data = {
-            'preferred_language': getattr(customer, 'preferred_language', 'English'),
-            'document_language': getattr(customer, 'document_language', 'English'),
-            'primary_communication_language': getattr(customer, 'communication_language', 'English')
-        }
-
+        totals = customer_360['totals']
         customer_preferences_consolidated = {
-            'communication': comm_prefs_data,
-            'renewal_timeline': renewal_data,
-            'payment_methods': payment_method_data,
-            'languages': language_data
+            'communication': customer_360['communication_preferences'],
+            'renewal_timeline': renewal_timeline(customer_360),
+            'payment_methods': customer_360['payment_method'],
+            'languages': customer_360['languages']
         }
 
         return Response({
             'success': True,
             'data': {
-                'customer': {
-                    'id': customer.id,
-                    'name': customer.full_name,
-                    'code': customer.customer_code,
-                    'email': customer.email,
-                    'phone': customer.phone,
-                    'date_of_birth': customer.date_of_birth,
-                    'gender': customer.gender,
-                    'address': f"{customer.address_line1}, {customer.city}, {customer.state}" if customer.address_line1 else None,
-                },
+                'customer': customer_360['customer'],
                 'summary': {
                     'total_events': total_events_count,
-                    'active_policies': len(policies_data),
-                    'total_premium': total_premium,
-                    'total_coverage': total_coverage,
+                    'active_policies': totals['active_policies'],
+                    'total_premium': totals['total_premium'],
+                    'total_coverage': totals['total_coverage'],
                     'last_activity_date': timeline_events[0].event_date if timeline_events else None,
                 },
-                'financial_profile': financial_profile,
-                'family_medical_history': medical_history,
-                'assets': assets_data,
-                'vehicles': vehicles_data,
-                'policy_preferences': policy_preferences,
-                'other_insurance_policies': other_policies,
+                'financial_profile': customer_360['financial_profile'],
+                'family_medical_history': customer_360['family_medical_history'],
+                'assets': customer_360['assets'],
+                'vehicles': customer_360['vehicles'],
+                'policy_preferences': customer_360['policy_preferences'],
+                'other_insurance_policies': customer_360['other_insurance_policies'],
                 'customer_preferences': customer_preferences_consolidated,
                 
                 
                 'payment_schedules': {
-                    'summary': payment_schedules,
-                    'upcoming_payments': upcoming_payments_data,
+                    'summary': customer_360['payment_schedule'],
+                    'upcoming_payments': customer_360['upcoming_payments'],
                 },
-                'active_policies': policies_data,
+                'active_policies': customer_360['active_policies'],
                 'timeline_events': {
                     'results': timeline_serializer.data,
                     'total_count': total_events_count,
                     'page': page,
                     'page_size': page_size,
                     'total_pages': (total_events_count + page_size - 1) // page_size,
-                    'event_type_counts': event_type_counts,
+                    'event_type_counts': customer_360['event_type_counts'],
                 },
                 'filters': {
                     'search_query': search_query,
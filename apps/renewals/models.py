@@ -2,7 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from apps.customers.models import Customer
 from apps.policies.models import Policy
-from apps.core.models import BaseModel
+from apps.core.models import BaseModel, ChangeTrackingMixin
 from apps.customer_payments.models import CustomerPayment
 from apps.channels.models import Channel 
 from apps.teams.models import Team
@@ -19,7 +19,9 @@ class Competitor(BaseModel):
     def __str__(self):
         return self.name
 
-class RenewalCase(BaseModel):
+class RenewalCase(ChangeTrackingMixin, BaseModel):
+    tracked_fields = ('status', 'assigned_to')
+
     STATUS_CHOICES = [
         ('uploaded', 'Uploaded'),
         ('assigned', 'Assigned'),
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SmsProvider, SmsMessage
+from .models import SmsProvider, SmsMessage, SmsWebhookEvent
 
 @admin.register(SmsProvider)
 class SmsProviderAdmin(admin.ModelAdmin):
@@ -29,3 +29,9 @@ class SmsMessageAdmin(admin.ModelAdmin):
     list_filter = ('status', 'provider', 'sent_at')
     search_fields = ('to_phone_number', 'message_sid', 'content')
     readonly_fields = ('created_at', 'sent_at', 'delivered_at')
+
+@admin.register(SmsWebhookEvent)
+class SmsWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('provider_type', 'processed', 'received_at', 'processed_at')
+    list_filter = ('provider_type', 'processed')
+    readonly_fields = ('provider_type', 'raw_data', 'received_at', 'processed_at')
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.17 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_provider', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider_type', models.CharField(max_length=20)),
+                ('raw_data', models.JSONField(default=dict, help_text='Raw webhook payload')),
+                ('processed', models.BooleanField(default=False)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'SMS Webhook Event',
+                'verbose_name_plural': 'SMS Webhook Events',
+                'db_table': 'sms_provider_webhook_event',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(condition=models.Q(('processed', False)), fields=['id'], name='sms_webhook_unprocessed_idx')],
+            },
+        ),
+    ]
@@ -101,4 +101,26 @@ class SmsMessage(models.Model):
         verbose_name_plural = "SMS Messages"
 
     def __str__(self):
-        return f"SMS to {self.to_phone_number} via {self.provider.name} ({self.status})"
\ No newline at end of file
+        return f"SMS to {self.to_phone_number} via {self.provider.name} ({self.status})"
+
+
+class SmsWebhookEvent(models.Model):
+    """Append-only queue of raw delivery receipts; applied in bulk by tasks.process_sms_webhook_events."""
+    provider_type = models.CharField(max_length=20)
+    raw_data = models.JSONField(default=dict, help_text="Raw webhook payload")
+
+    processed = models.BooleanField(default=False)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'sms_provider_webhook_event'
+        ordering = ['-received_at']
+        verbose_name = "SMS Webhook Event"
+        verbose_name_plural = "SMS Webhook Events"
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed=False), name='sms_webhook_unprocessed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider_type} webhook - {self.received_at}"
@@ -1,13 +1,20 @@
 import logging
-from typing import Dict, Any, Type, Optional
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Type, Optional
 import boto3
-import requests
+import httpx
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 from .models import SmsProvider, SmsMessage
-from apps.billing.services import log_communication
+from apps.billing.services import log_communication, log_communications_bulk
+from apps.core.http_clients import get_http_client
+from apps.core.provider_router import ProviderEntry, ProviderRouter, NoProviderAvailable
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +25,123 @@ class BaseSmsService:
     def __init__(self, provider_model: SmsProvider):
         self.provider = provider_model
         self.credentials = provider_model.credentials
+        self.request_timeout = getattr(settings, 'PROVIDER_HTTP_TIMEOUTS', {}).get(
+            f"sms.{provider_model.provider_type}", 10
+        )
 
-    def send_sms(self, to_phone: str, message: str, from_number: str = None, check_notifications: bool = False, **kwargs) -> Dict[str, Any]:
+    @property
+    def http(self) -> httpx.Client:
+        return get_http_client(f"sms.{self.provider.provider_type}", timeout=self.request_timeout)
+
+    def _track(self):
+        return sms_provider_router.track(self.provider.pk)
+
+    def _prepare_sender(self, from_number: str = None) -> Dict[str, Any]:
+        """Validate credentials and resolve the sender once per send or batch."""
+        raise NotImplementedError("This method must be implemented by a subclass.")
+
+    def _dispatch_sms(self, to_phone: str, message: str, sender: Dict[str, Any]) -> Dict[str, Any]:
+        """Network-only part of a send; returns sid, status and cost. Must not touch the database."""
         raise NotImplementedError("This method must be implemented by a subclass.")
 
+    def _format_error(self, exc: Exception) -> str:
+        return str(exc)
+
+    def send_sms(self, to_phone: str, message: str, from_number: str = None, check_notifications: bool = False, **kwargs) -> Dict[str, Any]:
+        if check_notifications and self._is_sms_blocked(to_phone):
+            logger.info(f"SMS blocked for {to_phone} due to user settings.")
+            return {'sid': None, 'status': 'blocked', 'error': 'User disabled SMS notifications'}
+
+        sender = self._prepare_sender(from_number)
+
+        try:
+            result = self._dispatch_sms(to_phone, message, sender)
+        except Exception as e:
+            logger.error(f"{self.provider.get_provider_type_display()} send failed: {e}")
+            self._log_message(f"failed-{self.provider.provider_type}-{to_phone}", to_phone, sender['from_number'], message, 'failed', error_message=str(e), **kwargs)
+            raise SmsApiException(self._format_error(e))
+
+        kwargs['cost'] = result.get('cost')
+        self._log_message(result['sid'], to_phone, sender['from_number'], message, result['status'], **kwargs)
+        return {'sid': result['sid'], 'status': result['status']}
+
+    def send_batch(self, messages: List[Dict[str, Any]], from_number: str = None, max_in_flight: int = None) -> List[Dict[str, Any]]:
+        """
+        Send many SMS concurrently with at most `max_in_flight` requests outstanding.
+
+        Each item needs `to_phone` and `message` and may carry `campaign_id`, `contact_id`
+        and `customer_id`. SmsMessage and billing rows are bulk-inserted after all sends
+        complete; results are returned in input order.
+        """
+        if not messages:
+            return []
+
+        sender = self._prepare_sender(from_number)
+        results = self._dispatch_batch(messages, sender, max_in_flight)
+        self._persist_batch(messages, results, sender['from_number'])
+        return results
+
+    def _dispatch_batch(self, messages: List[Dict[str, Any]], sender: Dict[str, Any], max_in_flight: int = None) -> List[Dict[str, Any]]:
+        max_in_flight = max_in_flight or getattr(settings, 'PROVIDER_BATCH_MAX_IN_FLIGHT', 20)
+        results: List[Dict[str, Any]] = [None] * len(messages)
+
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(messages))) as pool:
+            futures = {
+                pool.submit(self._dispatch_sms, msg['to_phone'], msg['message'], sender): index
+                for index, msg in enumerate(messages)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                    results[index] = {'success': True, 'error': None, **result}
+                except Exception as e:
+                    results[index] = {
+                        'success': False,
+                        'sid': f"failed-{self.provider.provider_type}-{uuid.uuid4().hex}",
+                        'status': 'failed',
+                        'cost': None,
+                        'error': self._format_error(e),
+                    }
+        return results
+
+    def _persist_batch(self, messages: List[Dict[str, Any]], results: List[Dict[str, Any]], from_number: str):
+        now = timezone.now()
+        rows = []
+        log_entries = []
+        for msg, result in zip(messages, results):
+            rows.append(SmsMessage(
+                provider=self.provider,
+                message_sid=result['sid'],
+                to_phone_number=msg['to_phone'],
+                from_number=from_number,
+                content=msg['message'],
+                status=result['status'],
+                error_message=result['error'],
+                sent_at=now if result['success'] else None,
+                campaign_id=msg.get('campaign_id'),
+                contact_id=msg.get('contact_id')
+            ))
+            log_entries.append({
+                'customer_id': msg.get('customer_id'),
+                'status': result['status'],
+                'cost': result['cost'],
+                'message_snippet': msg['message'][:50],
+                'error_message': result['error'],
+                'provider_message_id': result['sid'],
+            })
+
+        sent = sum(1 for result in results if result['success'])
+        with transaction.atomic():
+            SmsMessage.objects.bulk_create(rows, batch_size=500)
+            if sent:
+                SmsProvider.objects.filter(pk=self.provider.pk).update(
+                    messages_sent_today=F('messages_sent_today') + sent,
+                    messages_sent_total=F('messages_sent_total') + sent,
+                    last_sent_at=now
+                )
+            log_communications_bulk(self.provider.name, 'sms', log_entries)
+
     def _is_sms_blocked(self, to_phone: str) -> bool:
         from django.contrib.auth import get_user_model
         User = get_user_model()
@@ -52,49 +172,52 @@ class BaseSmsService:
         )
 
 class TwilioSmsService(BaseSmsService):
-    def send_sms(self, to_phone: str, message: str, from_number: str = None, check_notifications: bool = False, **kwargs) -> Dict[str, Any]:
-        if check_notifications and self._is_sms_blocked(to_phone):
-            logger.info(f"SMS blocked for {to_phone} due to user settings.")
-            return {'sid': None, 'status': 'blocked', 'error': 'User disabled SMS notifications'}
+    def _get_client(self) -> Client:
+        if getattr(self, '_client', None) is None:
+            self._client = Client(self.credentials.get('twilio_account_sid'), self.credentials.get('twilio_auth_token'))
+        return self._client
+
+    def _prepare_sender(self, from_number: str = None) -> Dict[str, Any]:
+        if not self.credentials.get('twilio_account_sid') or not self.credentials.get('twilio_auth_token'):
+            raise SmsApiException("Twilio credentials (Account SID or Auth Token) are not configured.")
 
         sender = from_number or self.credentials.get('twilio_from_number')
         messaging_service_sid = self.credentials.get('twilio_messaging_service_sid')
-        account_sid = self.credentials.get('twilio_account_sid')
-        auth_token = self.credentials.get('twilio_auth_token')
+        if not sender and not messaging_service_sid:
+            raise SmsApiException("Twilio provider requires a 'From Number' or a 'Messaging Service SID'.")
 
-        if not account_sid or not auth_token:
-            raise SmsApiException("Twilio credentials (Account SID or Auth Token) are not configured.")
+        return {
+            'sender': sender,
+            'messaging_service_sid': messaging_service_sid,
+            'from_number': sender or messaging_service_sid,
+        }
 
-        try:
-            client = Client(account_sid, auth_token)
-            
-            if messaging_service_sid:
-                logger.info(f"Sending SMS via Twilio Messaging Service ({messaging_service_sid}) to {to_phone}")
-                response = client.messages.create(body=message, messaging_service_sid=messaging_service_sid, to=to_phone)
-            elif sender:
-                logger.info(f"Sending SMS via Twilio from {sender} to {to_phone}")
-                response = client.messages.create(body=message, from_=sender, to=to_phone)
+    def _dispatch_sms(self, to_phone: str, message: str, sender: Dict[str, Any]) -> Dict[str, Any]:
+        client = self._get_client()
+        with self._track():
+            if sender['messaging_service_sid']:
+                logger.info(f"Sending SMS via Twilio Messaging Service ({sender['messaging_service_sid']}) to {to_phone}")
+                response = client.messages.create(body=message, messaging_service_sid=sender['messaging_service_sid'], to=to_phone)
             else:
-                raise SmsApiException("Twilio provider requires a 'From Number' or a 'Messaging Service SID'.")
-
-            cost = None
-            if response.price:
-                try:
-                    cost = abs(float(response.price))
-                except:
-                    pass
-            kwargs['cost'] = cost
-
-            self._log_message(response.sid, to_phone, sender or messaging_service_sid, message, response.status, **kwargs)
-            return {'sid': response.sid, 'status': response.status}
-        except TwilioRestException as e:
-            logger.error(f"Twilio API Error: {e}")
-            self._log_message(f"failed-twilio-{to_phone}", to_phone, sender or messaging_service_sid or "unknown", message, 'failed', error_message=str(e), **kwargs)
-            raise SmsApiException(f"Twilio Error: {e.msg}")
+                logger.info(f"Sending SMS via Twilio from {sender['sender']} to {to_phone}")
+                response = client.messages.create(body=message, from_=sender['sender'], to=to_phone)
+
+        cost = None
+        if response.price:
+            try:
+                cost = abs(float(response.price))
+            except (TypeError, ValueError):
+                pass
+        return {'sid': response.sid, 'status': response.status, 'cost': cost}
+
+    def _format_error(self, exc: Exception) -> str:
+        if isinstance(exc, TwilioRestException):
+            return f"Twilio Error: {exc.msg}"
+        return str(exc)
 
     def health_check(self):
         try:
-            client = Client(self.credentials.get('twilio_account_sid'), self.credentials.get('twilio_auth_token'))
+            client = self._get_client()
             client.api.v2010.accounts(self.credentials.get('twilio_account_sid')).fetch()
             return {'status': 'connected', 'details': 'Credentials valid'}
         except TwilioRestException as e:
@@ -103,25 +226,29 @@ class TwilioSmsService(BaseSmsService):
             return {'status': 'disconnected', 'error': str(e)}
 
 class Msg91SmsService(BaseSmsService):
-    def send_sms(self, to_phone: str, message: str, from_number: str = None, check_notifications: bool = False, **kwargs) -> Dict[str, Any]:
-        if check_notifications and self._is_sms_blocked(to_phone):
-            logger.info(f"SMS blocked for {to_phone} due to user settings.")
-            return {'sid': None, 'status': 'blocked', 'error': 'User disabled SMS notifications'}
+    api_url = "https://api.msg91.com/api/v2/sendsms"
 
+    def _prepare_sender(self, from_number: str = None) -> Dict[str, Any]:
         auth_key = self.credentials.get('msg91_auth_key')
         sender_id = self.credentials.get('msg91_sender_id')
-        route = self.credentials.get('msg91_route', '4') 
-        country = self.credentials.get('msg91_country_code', '91')
-        
         if not auth_key or not sender_id:
             raise SmsApiException("MSG91 Auth Key or Sender ID missing.")
 
-        url = "https://api.msg91.com/api/v2/sendsms"
-        
+        return {
+            'from_number': sender_id,
+            'route': self.credentials.get('msg91_route', '4'),
+            'country': self.credentials.get('msg91_country_code', '91'),
+            'headers': {
+                'authkey': auth_key,
+                'Content-Type': 'application/json'
+            },
+        }
+
+    def _dispatch_sms(self, to_phone: str, message: str, sender: Dict[str, Any]) -> Dict[str, Any]:
         payload = {
-            "sender": sender_id,
-            "route": route,
-            "country": country,
+            "sender": sender['from_number'],
+            "route": sender['route'],
+            "country": sender['country'],
             "sms": [
                 {
                     "message": message,
@@ -129,34 +256,22 @@ class Msg91SmsService(BaseSmsService):
                 }
             ]
         }
-        
-        headers = {
-            'authkey': auth_key,
-            'Content-Type': 'application/json'
-        }
 
-        try:
-            logger.info(f"🚀 Sending Real MSG91 SMS to {to_phone}...")
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+        logger.info(f"🚀 Sending Real MSG91 SMS to {to_phone}...")
+        with self._track():
+            response = self.http.post(self.api_url, json=payload, headers=sender['headers'])
             response.raise_for_status()
-            
             resp_json = response.json()
             if resp_json.get('type') == 'error':
-                raise Exception(resp_json.get('message'))
+                raise SmsApiException(resp_json.get('message'))
 
-            request_id = resp_json.get('message') 
-            self._log_message(request_id, to_phone, sender_id, message, 'sent', **kwargs)
-            return {'sid': request_id, 'status': 'sent'}
-        except Exception as e:
-            logger.error(f"MSG91 Send Failed: {e}")
-            self._log_message(f"failed-msg91-{to_phone}", to_phone, sender_id, message, 'failed', error_message=str(e), **kwargs)
-            raise SmsApiException(str(e))
+        return {'sid': resp_json.get('message'), 'status': 'sent', 'cost': None}
 
     def health_check(self):
         url = "https://api.msg91.com/api/balance.php"
         params = {"authkey": self.credentials.get('msg91_auth_key'), "type": "4"}
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = self.http.get(url, params=params, timeout=5)
             if response.status_code == 200 and "error" not in response.text.lower():
                  return {'status': 'connected', 'details': f"Balance: {response.text}"}
             return {'status': 'disconnected', 'error': response.text}
@@ -164,28 +279,25 @@ class Msg91SmsService(BaseSmsService):
             return {'status': 'disconnected', 'error': str(e)}
 
 class AwsSnsSmsService(BaseSmsService):
-    def send_sms(self, to_phone: str, message: str, from_number: str = None, check_notifications: bool = False, **kwargs) -> Dict[str, Any]:
-        if check_notifications and self._is_sms_blocked(to_phone):
-            logger.info(f"SMS blocked for {to_phone} due to user settings.")
-            return {'sid': None, 'status': 'blocked', 'error': 'User disabled SMS notifications'}
-
-        access_key = self.credentials.get('aws_sns_access_key_id')
-        secret_key = self.credentials.get('aws_sns_secret_access_key')
-        region = self.credentials.get('aws_sns_region', 'us-east-1')
-        
-        if not access_key or not secret_key:
-            raise SmsApiException("AWS Credentials missing.")
-
-        try:
-            client = boto3.client(
+    def _get_client(self):
+        if getattr(self, '_client', None) is None:
+            self._client = boto3.client(
                 'sns',
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                region_name=region
+                aws_access_key_id=self.credentials.get('aws_sns_access_key_id'),
+                aws_secret_access_key=self.credentials.get('aws_sns_secret_access_key'),
+                region_name=self.credentials.get('aws_sns_region', 'us-east-1')
             )
+        return self._client
+
+    def _prepare_sender(self, from_number: str = None) -> Dict[str, Any]:
+        if not self.credentials.get('aws_sns_access_key_id') or not self.credentials.get('aws_sns_secret_access_key'):
+            raise SmsApiException("AWS Credentials missing.")
+        return {'from_number': "AWS_SNS"}
 
-            logger.info(f"🚀 Sending Real AWS SNS to {to_phone}...")
-            response = client.publish(
+    def _dispatch_sms(self, to_phone: str, message: str, sender: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info(f"🚀 Sending Real AWS SNS to {to_phone}...")
+        with self._track():
+            response = self._get_client().publish(
                 PhoneNumber=to_phone,
                 Message=message,
                 MessageAttributes={
@@ -195,68 +307,47 @@ class AwsSnsSmsService(BaseSmsService):
                     }
                 }
             )
-            message_id = response['MessageId']
-            self._log_message(message_id, to_phone, "AWS_SNS", message, 'sent', **kwargs)
-            return {'sid': message_id, 'status': 'sent'}
-        except Exception as e:
-            logger.error(f"AWS SNS Failed: {e}")
-            self._log_message(f"failed-aws-{to_phone}", to_phone, "AWS_SNS", message, 'failed', error_message=str(e), **kwargs)
-            raise SmsApiException(str(e))
+        return {'sid': response['MessageId'], 'status': 'sent', 'cost': None}
 
     def health_check(self):
         try:
-            client = boto3.client(
-                'sns',
-                aws_access_key_id=self.credentials.get('aws_sns_access_key_id'),
-                aws_secret_access_key=self.credentials.get('aws_sns_secret_access_key'),
-                region_name=self.credentials.get('aws_sns_region', 'us-east-1')
-            )
-            client.get_sms_attributes()
+            self._get_client().get_sms_attributes()
             return {'status': 'connected', 'details': 'AWS Access Valid'}
         except Exception as e:
             return {'status': 'disconnected', 'error': str(e)}
 
 class TextLocalSmsService(BaseSmsService):
-    def send_sms(self, to_phone: str, message: str, from_number: str = None, check_notifications: bool = False, **kwargs) -> Dict[str, Any]:
-        if check_notifications and self._is_sms_blocked(to_phone):
-            logger.info(f"SMS blocked for {to_phone} due to user settings.")
-            return {'sid': None, 'status': 'blocked', 'error': 'User disabled SMS notifications'}
-
+    def _prepare_sender(self, from_number: str = None) -> Dict[str, Any]:
         api_key = self.credentials.get('textlocal_api_key')
-        sender = self.credentials.get('textlocal_sender', 'TXTLCL')
-        
         if not api_key:
             raise SmsApiException("TextLocal API Key missing.")
+        return {
+            'api_key': api_key,
+            'from_number': self.credentials.get('textlocal_sender', 'TXTLCL'),
+        }
 
+    def _dispatch_sms(self, to_phone: str, message: str, sender: Dict[str, Any]) -> Dict[str, Any]:
         data = {
-            'apikey': api_key,
+            'apikey': sender['api_key'],
             'numbers': to_phone.replace('+', ''), 
             'message': message,
-            'sender': sender
+            'sender': sender['from_number']
         }
 
-        try:
-            logger.info(f"🚀 Sending Real TextLocal SMS to {to_phone}...")
-            response = requests.post('https://api.textlocal.in/send/', data=data, timeout=10)
+        logger.info(f"🚀 Sending Real TextLocal SMS to {to_phone}...")
+        with self._track():
+            response = self.http.post('https://api.textlocal.in/send/', data=data)
             resp_json = response.json()
-            
-            if resp_json.get('status') == 'success':
-                batch_id = str(resp_json.get('batch_id'))
-                self._log_message(batch_id, to_phone, sender, message, 'sent', **kwargs)
-                return {'sid': batch_id, 'status': 'sent'}
-            else:
+            if resp_json.get('status') != 'success':
                 errors = resp_json.get('errors', [])
-                error_msg = str(errors[0]['message']) if errors else "Unknown Error"
-                raise Exception(error_msg)
-        except Exception as e:
-            logger.error(f"TextLocal Failed: {e}")
-            self._log_message(f"failed-textlocal-{to_phone}", to_phone, sender, message, 'failed', error_message=str(e), **kwargs)
-            raise SmsApiException(str(e))
+                raise SmsApiException(str(errors[0]['message']) if errors else "Unknown Error")
+
+        return {'sid': str(resp_json.get('batch_id')), 'status': 'sent', 'cost': None}
 
     def health_check(self):
         data = {'apikey': self.credentials.get('textlocal_api_key')}
         try:
-            response = requests.post('https://api.textlocal.in/balance/', data=data, timeout=5)
+            response = self.http.post('https://api.textlocal.in/balance/', data=data, timeout=5)
             resp_json = response.json()
             if resp_json.get('status') == 'success':
                 return {'status': 'connected', 'details': f"Credits: {resp_json.get('balance', {}).get('sms')}"}
@@ -277,23 +368,32 @@ class SmsService:
 
     def get_service_instance(self, provider_id: int = None) -> BaseSmsService:
         try:
-            if provider_id:
-                provider_model = SmsProvider.objects.get(id=provider_id, is_active=True)
-            else:
-                logger.info("No provider ID given, fetching default SMS provider.")
-                provider_model = SmsProvider.objects.get(is_default=True, is_active=True)
-
-        except SmsProvider.DoesNotExist:
+            return sms_provider_router.get_service(provider_id)
+        except NoProviderAvailable:
             logger.error(f"No active SMS provider found for ID: {provider_id} or as default.")
             raise SmsApiException("No active or default SMS provider configured.")
-        except SmsProvider.MultipleObjectsReturned:
-             logger.error("Multiple default SMS providers found. Please set only one default.")
-             raise SmsApiException("Multiple default SMS providers found.")
-
-        ProviderClass = self._get_provider_class(provider_model.provider_type)
 
-        if not ProviderClass:
-            logger.error(f"No service class found for SMS provider type: {provider_model.provider_type}")
-            raise SmsApiException(f"Provider type {provider_model.provider_type} is not supported.")
 
-        return ProviderClass(provider_model)
\ No newline at end of file
+def _load_sms_provider_entries() -> List[ProviderEntry]:
+    entries = []
+    for provider in SmsProvider.objects.filter(is_active=True, is_deleted=False):
+        if provider.provider_type not in SmsService.PROVIDER_MAP:
+            logger.error(f"No service class found for SMS provider type: {provider.provider_type}")
+            continue
+        entries.append(ProviderEntry(
+            provider=provider,
+            priority=(not provider.is_default, provider.status == 'disconnected', provider.name),
+            daily_limit=provider.daily_limit,
+            sent_today=provider.messages_sent_today,
+            lookup_keys={'provider_type': provider.provider_type},
+        ))
+    return entries
+
+
+sms_provider_router = ProviderRouter(
+    name='sms',
+    loader=_load_sms_provider_entries,
+    service_factory=lambda provider: SmsService.PROVIDER_MAP[provider.provider_type](provider),
+    watch_models=[SmsProvider],
+    counter_fields=['messages_sent_today', 'messages_sent_total', 'last_sent_at'],
+)
@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.billing.models import CommunicationLog
+from apps.core.receipts import claim_unprocessed_events, coalesce_status_updates, is_status_progression
+from .models import SmsMessage, SmsWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+STATUS_RANK = {'queued': 0, 'sent': 1, 'delivered': 2, 'undelivered': 3, 'failed': 3}
+
+
+def apply_status_updates(latest: Dict[str, Dict[str, Any]]) -> int:
+    if not latest:
+        return 0
+
+    changed = []
+    messages = SmsMessage.objects.filter(message_sid__in=latest.keys()).only(
+        'id', 'message_sid', 'status', 'sent_at', 'delivered_at', 'error_code', 'error_message'
+    )
+    for sms in messages:
+        update = latest[sms.message_sid]
+        if not is_status_progression(sms.status, update['status'], STATUS_RANK):
+            continue
+
+        sms.status = update['status']
+        if update['error_code']:
+            sms.error_code = update['error_code']
+            sms.error_message = "Twilio Error Code: " + str(update['error_code'])
+        if update['status'] == 'sent':
+            sms.sent_at = update['received_at']
+        elif update['status'] == 'delivered':
+            sms.delivered_at = update['received_at']
+        changed.append(sms)
+
+    SmsMessage.objects.bulk_update(
+        changed, ['status', 'sent_at', 'delivered_at', 'error_code', 'error_message'], batch_size=500
+    )
+
+    by_billing_status = defaultdict(list)
+    for sms in changed:
+        billing_status = 'failed' if sms.status in ['undelivered', 'failed'] else sms.status
+        by_billing_status[billing_status].append(sms.message_sid)
+    for billing_status, sids in by_billing_status.items():
+        CommunicationLog.objects.filter(provider_message_id__in=sids).update(status=billing_status)
+
+    return len(changed)
+
+
+@shared_task
+def process_sms_webhook_events(batch_size=None, max_batches=50):
+    batch_size = batch_size or getattr(settings, 'WEBHOOK_EVENT_BATCH_SIZE', 1000)
+    total_events = total_applied = 0
+    started = time.monotonic()
+
+    for _ in range(max_batches):
+        with transaction.atomic():
+            events = claim_unprocessed_events(SmsWebhookEvent, batch_size)
+            if not events:
+                break
+
+            updates = (
+                {
+                    'message_id': event.raw_data.get('MessageSid'),
+                    'status': event.raw_data.get('MessageStatus'),
+                    'timestamp': event.pk,
+                    'received_at': event.received_at,
+                    'error_code': event.raw_data.get('ErrorCode'),
+                }
+                for event in events
+            )
+            total_applied += apply_status_updates(coalesce_status_updates(updates, STATUS_RANK))
+            total_events += len(events)
+
+            SmsWebhookEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+                processed=True, processed_at=timezone.now()
+            )
+
+    elapsed = time.monotonic() - started
+    if total_events:
+        logger.info(
+            f"SMS webhooks: {total_events} events -> {total_applied} status updates "
+            f"in {elapsed:.2f}s ({total_applied / elapsed if elapsed else 0:.0f} updates/s)"
+        )
+    return {'events': total_events, 'applied': total_applied, 'seconds': round(elapsed, 3)}
@@ -3,16 +3,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
+from django.conf import settings
 from django.http import HttpResponse
 from django.utils import timezone
-from .models import SmsProvider, SmsMessage
-from apps.billing.models import CommunicationLog
+from twilio.request_validator import RequestValidator
+from .models import SmsProvider, SmsMessage, SmsWebhookEvent
+from apps.core.provider_router import NoProviderAvailable
 from .serializers import (
     SmsProviderSerializer,
     SmsProviderCreateUpdateSerializer,
     SmsMessageSerializer
 )
-from .services import SmsService
+from .services import SmsService, sms_provider_router
 
 
 class SmsProviderViewSet(viewsets.ModelViewSet):
@@ -92,39 +94,28 @@ class SmsWebhookView(APIView):
     permission_classes = [AllowAny] 
     authentication_classes = []
 
+    def _has_valid_signature(self, request) -> bool:
+        if not getattr(settings, 'SMS_WEBHOOK_VERIFY_SIGNATURE', False):
+            return True
+        try:
+            provider = sms_provider_router.get_provider(provider_type='twilio')
+        except NoProviderAvailable:
+            return False
+        validator = RequestValidator(provider.credentials.get('twilio_auth_token', ''))
+        return validator.validate(
+            request.build_absolute_uri(),
+            request.POST,
+            request.META.get('HTTP_X_TWILIO_SIGNATURE', '')
+        )
+
     def post(self, request, provider_type=None):
         if provider_type == 'twilio':
-            message_sid = request.POST.get('MessageSid')
-            message_status = request.POST.get('MessageStatus') 
-            error_code = request.POST.get('ErrorCode')
-            
-            print(f"📩 TWILIO WEBHOOK: {message_sid} -> {message_status}")
-
-            if message_sid and message_status:
-                try:
-                    sms_obj = SmsMessage.objects.get(message_sid=message_sid)
-                    
-                    sms_obj.status = message_status
-                    
-                    if error_code:
-                        sms_obj.error_code = error_code
-                        sms_obj.error_message = "Twilio Error Code: " + str(error_code)
-                    
-                    if message_status == 'sent':
-                        sms_obj.sent_at = timezone.now()
-                    elif message_status == 'delivered':
-                        sms_obj.delivered_at = timezone.now()
-                    
-                    sms_obj.save()
-                    billing_status = message_status
-                    if message_status in ['undelivered', 'failed']:
-                        billing_status = 'failed'
-                    
-                    CommunicationLog.objects.filter(provider_message_id=message_sid).update(status=billing_status)
-                    
-                except SmsMessage.DoesNotExist:
-                    print(f"⚠️ Message SID {message_sid} not found in local DB.")
-            
+            if not self._has_valid_signature(request):
+                return Response(status=status.HTTP_403_FORBIDDEN)
+
+            if request.POST.get('MessageSid') and request.POST.get('MessageStatus'):
+                SmsWebhookEvent.objects.create(provider_type=provider_type, raw_data=request.POST.dict())
+
             return HttpResponse("<Response></Response>", content_type="text/xml")
             
         return Response(status=status.HTTP_400_BAD_REQUEST)
@@ -8,63 +8,50 @@ from django.utils import timezone
 from django.db.models import Sum, Count, Q, Avg
 from django.contrib.auth import get_user_model
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    openai = None
-
+from apps.core.llm_gateway import ChatCompletionMixin
 from apps.campaigns.models import Campaign, CampaignRecipient
 from apps.uploads.models import UploadFile
 from apps.channels.models import Channel
 from apps.customer_communication_preferences.models import CommunicationLog
+from apps.ai_insights.snapshot import get_snapshot_section
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class UploadChatbotService:    
-    def __init__(self):
-        self.openai_client = None
-        self._initialize_openai()
-    
-    def _initialize_openai(self):
-        if not OPENAI_AVAILABLE:
-            logger.warning("OpenAI library not available")
-            return False
-        
-        api_key = getattr(settings, 'OPENAI_API_KEY', '')
-        if not api_key:
-            logger.warning("OpenAI API key not configured")
-            return False
-        
-        try:
-            self.openai_client = openai.OpenAI(api_key=api_key)
-            logger.info("OpenAI client initialized successfully")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {str(e)}")
-            return False
-    
-    def is_available(self) -> bool:
-        return (
-            OPENAI_AVAILABLE and 
-            self.openai_client is not None and 
-            bool(getattr(settings, 'OPENAI_API_KEY', ''))
-        )
-    
+class UploadChatbotService(ChatCompletionMixin):
+    COMPLETION_PARAMS = {'max_tokens': 1000, 'temperature': 0.7, 'top_p': 1, 'frequency_penalty': 0, 'presence_penalty': 0}
+    CACHE_NAMESPACE = 'upload_chatbot'
+
+    # campaign_general depends on the wording of the question, so it is never snapshotted
+    SNAPSHOT_QUERY_TYPES = (
+        'campaign_performance', 'upload_analysis', 'communication_effectiveness', 'channel_analysis',
+        'recipient_engagement', 'upload_troubleshooting', 'campaign_optimization',
+    )
+
     def get_upload_campaign_data(self) -> Dict[str, Any]:
+        return dict(get_snapshot_section('upload_chatbot').get('dashboard') or {})
+
+    def build_portfolio_section(self) -> Dict[str, Any]:
+        return {
+            'dashboard': self._compute_upload_campaign_data(),
+            'specialized': {
+                query_type: self._fetch_specialized_data(query_type, None)
+                for query_type in self.SNAPSHOT_QUERY_TYPES
+            },
+        }
+
+    def _compute_upload_campaign_data(self) -> Dict[str, Any]:
         try:
             campaigns = Campaign.objects.filter(is_deleted=False)
             
-            campaign_stats = {
-                'total_campaigns': campaigns.count(),
-                'active_campaigns': campaigns.filter(status='active').count(),
-                'completed_campaigns': campaigns.filter(status='completed').count(),
-                'scheduled_campaigns': campaigns.filter(status='scheduled').count(),
-                'failed_campaigns': campaigns.filter(status='failed').count(),
-            }
+            campaign_stats = campaigns.aggregate(
+                total_campaigns=Count('id'),
+                active_campaigns=Count('id', filter=Q(status='active')),
+                completed_campaigns=Count('id', filter=Q(status='completed')),
+                scheduled_campaigns=Count('id', filter=Q(status='scheduled')),
+                failed_campaigns=Count('id', filter=Q(status='failed')),
+            )
             
             campaign_performance = campaigns.values('campaign_type__name').annotate(
                 count=Count('id'),
@@ -82,30 +69,28 @@ class UploadChatbotService:
                 count=Count('id')
             )
             
-            campaign_recipients = CampaignRecipient.objects.filter(
+            recipient_stats = CampaignRecipient.objects.filter(
                 campaign__is_deleted=False
+            ).aggregate(
+                total_recipients=Count('id'),
+                email_sent=Count('id', filter=Q(email_status='sent')),
+                email_delivered=Count('id', filter=Q(email_status='delivered')),
+                email_opened=Count('id', filter=Q(email_engagement='opened')),
+                email_clicked=Count('id', filter=Q(email_engagement='clicked')),
+                whatsapp_sent=Count('id', filter=Q(whatsapp_status='sent')),
+                whatsapp_delivered=Count('id', filter=Q(whatsapp_status='delivered')),
+                sms_sent=Count('id', filter=Q(sms_status='sent')),
+                sms_delivered=Count('id', filter=Q(sms_status='delivered')),
             )
             
-            recipient_stats = {
-                'total_recipients': campaign_recipients.count(),
-                'email_sent': campaign_recipients.filter(email_status='sent').count(),
-                'email_delivered': campaign_recipients.filter(email_status='delivered').count(),
-                'email_opened': campaign_recipients.filter(email_engagement='opened').count(),
-                'email_clicked': campaign_recipients.filter(email_engagement='clicked').count(),
-                'whatsapp_sent': campaign_recipients.filter(whatsapp_status='sent').count(),
-                'whatsapp_delivered': campaign_recipients.filter(whatsapp_status='delivered').count(),
-                'sms_sent': campaign_recipients.filter(sms_status='sent').count(),
-                'sms_delivered': campaign_recipients.filter(sms_status='delivered').count(),
-            }
-            
             upload_files = UploadFile.objects.filter(is_deleted=False)
             
-            upload_stats = {
-                'total_uploads': upload_files.count(),
-                'successful_uploads': upload_files.filter(status='completed').count(),
-                'failed_uploads': upload_files.filter(status='failed').count(),
-                'processing_uploads': upload_files.filter(status='processing').count(),
-            }
+            upload_stats = upload_files.aggregate(
+                total_uploads=Count('id'),
+                successful_uploads=Count('id', filter=Q(status='completed')),
+                failed_uploads=Count('id', filter=Q(status='failed')),
+                processing_uploads=Count('id', filter=Q(status='processing')),
+            )
             
             recent_uploads = upload_files.filter(
                 created_at__gte=thirty_days_ago
@@ -148,91 +133,31 @@ class UploadChatbotService:
             logger.error(f"Error fetching upload campaign data: {str(e)}")
             return {}
     
-    def generate_ai_response(self, user_message: str, context_data: Dict[str, Any] = None, user=None, conversation_history: List[Dict[str, Any]] = None) -> Dict[str, Any]:
-        current_api_key = getattr(settings, 'OPENAI_API_KEY', '')
-        if not current_api_key:
-            return {
-                'success': False,
-                'error': 'AI service not available',
-                'message': 'OpenAI API key not configured or service unavailable'
-            }
-        
-        if not self.openai_client or not self.is_available():
-            logger.info("Re-initializing OpenAI client with current API key")
-            self._initialize_openai()
-        
-        if not self.is_available():
-            return {
-                'success': False,
-                'error': 'AI service not available',
-                'message': 'OpenAI API key not configured or service unavailable'
-            }
+    def _build_messages(self, user_message: str, user=None, conversation_history: List[Dict[str, Any]] = None):
+        query_type = self._classify_query(user_message)
         
-        try:
-            query_type = self._classify_query(user_message)
-            
-            if query_type == 'non_campaign':
-                return {
-                    'success': True,
-                    'response': 'Sorry, I can only help with campaign-related questions.',
-                    'model': 'direct-response',
-                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
-                    'timestamp': timezone.now().isoformat()
-                }
-            
-            dashboard_data = self.get_upload_campaign_data()
-            specialized_data = self._get_specialized_data(query_type, user_message)
-            dashboard_data.update(specialized_data)
-            
-            system_prompt = self._create_system_prompt(dashboard_data, user, query_type)
-            
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            if conversation_history:
-                for msg in conversation_history:
-                    messages.append({
-                        "role": msg['role'],
-                        "content": msg['content']
-                    })
-            
-            messages.append({"role": "user", "content": user_message})
-            
-            current_api_key = getattr(settings, 'OPENAI_API_KEY', '')
-            if current_api_key:
-                self.openai_client = openai.OpenAI(api_key=current_api_key)
-            
-            response = self.openai_client.chat.completions.create(
-                model=getattr(settings, 'OPENAI_MODEL', 'gpt-4'),
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
-            )
-            
-            ai_response = response.choices[0].message.content
-            
+        if query_type == 'non_campaign':
             return {
                 'success': True,
-                'response': ai_response,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                } if response.usage else None,
-                'model': response.model,
+                'response': 'Sorry, I can only help with campaign-related questions.',
+                'model': 'direct-response',
+                'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
                 'timestamp': timezone.now().isoformat()
             }
-            
-        except Exception as e:
-            logger.error(f"Error generating AI response: {str(e)}")
-            return {
-                'success': False,
-                'error': str(e),
-                'message': 'Failed to generate AI response'
-            }
-    
+        
+        dashboard_data = self.get_upload_campaign_data()
+        specialized_data = self._get_specialized_data(query_type, user_message)
+        dashboard_data.update(specialized_data)
+        
+        system_prompt = self._create_system_prompt(dashboard_data, user, query_type)
+        return self._budget_messages(system_prompt, conversation_history, user_message)
+
+    def _cache_scope(self, user_message: str, user=None) -> Optional[Tuple[str, str]]:
+        query_type = self._classify_query(user_message)
+        if query_type not in self.SNAPSHOT_QUERY_TYPES:
+            return None
+        return query_type, 'global'
+
     def _classify_query(self, user_message: str) -> str:
         message_lower = user_message.lower()
         
@@ -317,6 +242,12 @@ class UploadChatbotService:
             return 'non_campaign'
     
     def _get_specialized_data(self, query_type: str, user_message: str) -> Dict[str, Any]:
+        specialized = get_snapshot_section('upload_chatbot').get('specialized') or {}
+        if query_type in specialized:
+            return dict(specialized[query_type])
+        return self._fetch_specialized_data(query_type, user_message)
+
+    def _fetch_specialized_data(self, query_type: str, user_message: str) -> Dict[str, Any]:
         try:
             if query_type == 'campaign_performance':
                 return self._get_campaign_performance_data()
@@ -13,6 +13,7 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
+from apps.core.llm_gateway import sse_response
 from apps.upload_chatbot.models import UploadChatbotConversation, UploadChatbotMessage
 from apps.upload_chatbot.services import get_upload_chatbot_service
 from apps.upload_chatbot.serializers import (
@@ -149,6 +150,16 @@ class UploadChatbotView(View):
                     'message': 'OpenAI API key not configured or service unavailable'
                 }, status=503)
             
+            if data.get('stream'):
+                return sse_response(
+                    upload_chatbot_service.stream_ai_response(
+                        user_message,
+                        user=request.user,
+                        conversation_history=conversation_history
+                    ),
+                    on_done=lambda event: self._save_exchange(conversation, user_message, event)
+                )
+            
             ai_response = upload_chatbot_service.generate_ai_response(
                 user_message=user_message,
                 user=request.user,
@@ -162,27 +173,7 @@ class UploadChatbotView(View):
                     'message': ai_response.get('message', 'Unknown error occurred')
                 }, status=500)
             
-            if conversation:
-                user_msg = UploadChatbotMessage.objects.create(
-                    conversation=conversation,
-                    role='user',
-                    content=user_message
-                )
-                
-                ai_msg = UploadChatbotMessage.objects.create(
-                    conversation=conversation,
-                    role='assistant',
-                    content=ai_response['response'],
-                    metadata={
-                        'usage': ai_response.get('usage'),
-                        'model': ai_response.get('model'),
-                        'timestamp': ai_response.get('timestamp')
-                    }
-                )
-                
-                conversation.last_activity = timezone.now()
-                conversation.update_message_count()
-                conversation.save()
+            self._save_exchange(conversation, user_message, ai_response)
             
             cleaned_response = ai_response['response'].replace('\n\n', ' ').replace('\n', ' ').strip()
             import re
@@ -282,6 +273,31 @@ class UploadChatbotView(View):
                 'message': str(e)
             }, status=500)
     
+    def _save_exchange(self, conversation, user_message, ai_response):
+        if not conversation or not ai_response.get('success'):
+            return
+        
+        UploadChatbotMessage.objects.create(
+            conversation=conversation,
+            role='user',
+            content=user_message
+        )
+        
+        UploadChatbotMessage.objects.create(
+            conversation=conversation,
+            role='assistant',
+            content=ai_response['response'],
+            metadata={
+                'usage': ai_response.get('usage'),
+                'model': ai_response.get('model'),
+                'timestamp': ai_response.get('timestamp')
+            }
+        )
+        
+        conversation.last_activity = timezone.now()
+        conversation.update_message_count()
+        conversation.save()
+
     def _get_or_create_conversation(self, user, session_id, user_message):
         if session_id:
             try:
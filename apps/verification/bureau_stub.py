@@ -0,0 +1,72 @@
+"""
+Local stand-in for the Bureau API, for development and load tests.
+
+Point BUREAU_BASE_URL at it (`manage.py run_bureau_stub` prints the URL). Answers are
+deterministic so tests can assert on them:
+
+- email: matches unless the address starts with "bad"
+- phone: delivered unless the number ends in "0000"
+- PAN: valid unless it starts with "X"
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class BureauStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.request_count += 1
+
+        service = self.path.rstrip('/').rsplit('/', 1)[-1]
+        if service == 'email-name-attributes':
+            body = {"statusCode": 200, "nameEmailMatch": 20 if payload.get('email', '').startswith('bad') else 90}
+        elif service == 'number-lookup':
+            delivered = not payload.get('phoneNumber', '').endswith('0000')
+            body = {"statusCode": 200, "statusName": "DELIVERED" if delivered else "UNDELIVERED"}
+        elif service == 'pan-govt-check':
+            body = {"statusCode": 200, "name": "" if payload.get('pan', '').startswith('X') else "STUB PAN HOLDER"}
+        else:
+            self.send_error(404)
+            return
+
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BureauStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0):
+        super().__init__(address, BureauStubHandler)
+        self.latency = latency
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v2/services"
+
+
+def start_bureau_stub(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0) -> Tuple[BureauStubServer, threading.Thread]:
+    """Serve the stub on a background thread; port 0 picks a free one. Stop it with server.shutdown()."""
+    server = BureauStubServer((host, port), latency=latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
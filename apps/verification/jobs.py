@@ -0,0 +1,171 @@
+"""
+Bulk customer verification, run as a background job.
+
+Customers are loaded in one query. Identical values (after normalization) are sent to
+the bureau once, values with a cached answer are not sent at all, and the rest go out
+over BUREAU_MAX_CONCURRENCY threads sharing one pooled session. The verification
+flags are then written with one UPDATE for the verified customers and one for the
+rejected ones.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .utils import VERIFIERS, log_verification_attempt, verification_cache_key
+
+logger = logging.getLogger(__name__)
+
+VALUE_FIELDS = {'email': 'email', 'phone': 'phone', 'pan': 'pan_number'}
+FLAG_FIELDS = {
+    'email': ('email_verified', 'email_verified_at'),
+    'phone': ('phone_verified', 'phone_verified_at'),
+    'pan': ('pan_verified', 'pan_verified_at'),
+}
+MISSING_VALUE_MESSAGES = {
+    'email': "Email not available for verification",
+    'phone': "Phone number not available for verification",
+    'pan': "PAN number not available for verification",
+}
+PROGRESS_INTERVAL = 2.0
+
+
+def verify_targets(verify_type: str, targets: Iterable[Tuple[Any, str, str]], max_workers: Optional[int] = None,
+                   progress: Optional[Callable[[int], None]] = None) -> Tuple[Dict[Any, Dict], Dict[str, int]]:
+    """
+    Verify `(ref, value, name)` targets. Returns the result for each ref and
+    {'cache_hits', 'bureau_calls'}; `progress` is called with the number of refs resolved so far.
+    """
+    refs_by_key: Dict[str, List[Any]] = {}
+    request_by_key: Dict[str, Tuple[str, str]] = {}
+    for ref, value, name in targets:
+        key = verification_cache_key(verify_type, value, name)
+        refs_by_key.setdefault(key, []).append(ref)
+        request_by_key.setdefault(key, (value, name))
+
+    results: Dict[Any, Dict] = {}
+    cached = cache.get_many(list(refs_by_key))
+    for key, result in cached.items():
+        for ref in refs_by_key[key]:
+            results[ref] = result
+    if progress and results:
+        progress(len(results))
+
+    misses = [key for key in refs_by_key if key not in cached]
+    to_cache = {}
+    if misses:
+        verifier = VERIFIERS[verify_type]
+        workers = max(1, min(max_workers or settings.BUREAU_MAX_CONCURRENCY, len(misses)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(verifier, *request_by_key[key]): key for key in misses}
+            for future in as_completed(futures):
+                key = futures[future]
+                result = future.result()
+                if not result.get('retryable'):
+                    to_cache[key] = result
+                for ref in refs_by_key[key]:
+                    results[ref] = result
+                if progress:
+                    progress(len(results))
+
+    if to_cache:
+        cache.set_many(to_cache, settings.BUREAU_RESULT_CACHE_TTL)
+    return results, {'cache_hits': len(refs_by_key) - len(misses), 'bureau_calls': len(misses)}
+
+
+def run_verification_job(job_id) -> Dict[str, Any]:
+    from apps.customers.models import Customer
+    from .models import VerificationJob
+
+    job = VerificationJob.objects.get(pk=job_id)
+    started = time.monotonic()
+    jobs = VerificationJob.objects.filter(pk=job.pk)
+    jobs.update(status='running', started_at=timezone.now(), processed=0)
+
+    try:
+        verify_type = job.verify_type
+        value_field = VALUE_FIELDS[verify_type]
+        customers = {
+            row['id']: row for row in Customer.objects.filter(id__in=job.customer_ids).values(
+                'id', 'first_name', 'last_name', 'company_name', 'customer_type', value_field
+            )
+        }
+
+        outcomes: Dict[Any, Dict] = {}
+        targets = []
+        for customer_id in job.customer_ids:
+            customer = customers.get(customer_id)
+            if customer is None:
+                outcomes[customer_id] = {"verified": False, "message": "Customer not found"}
+            elif not customer[value_field]:
+                outcomes[customer_id] = {"verified": False, "message": MISSING_VALUE_MESSAGES[verify_type]}
+            else:
+                name = f"{customer['first_name']} {customer['last_name']}".strip()
+                targets.append((customer_id, customer[value_field], name))
+
+        unresolved = len(outcomes)
+        last_report = [time.monotonic()]
+
+        def report(resolved):
+            if time.monotonic() - last_report[0] >= PROGRESS_INTERVAL:
+                jobs.update(processed=unresolved + resolved)
+                last_report[0] = time.monotonic()
+
+        verified, stats = verify_targets(verify_type, targets, progress=report)
+        outcomes.update(verified)
+
+        # Bureau outages leave the stored flags as they were; the next job asks again.
+        verified_ids = [ref for ref, result in verified.items() if result['verified']]
+        rejected_ids = [ref for ref, result in verified.items() if not result['verified'] and not result.get('retryable')]
+        flag, flagged_at = FLAG_FIELDS[verify_type]
+        now = timezone.now()
+        for start in range(0, len(verified_ids), 1000):
+            Customer.objects.filter(id__in=verified_ids[start:start + 1000]).update(
+                **{flag: True, flagged_at: now, 'updated_at': now}
+            )
+        for start in range(0, len(rejected_ids), 1000):
+            Customer.objects.filter(id__in=rejected_ids[start:start + 1000]).update(
+                **{flag: False, flagged_at: None, 'updated_at': now}
+            )
+
+        results = []
+        for customer_id in job.customer_ids:
+            result = outcomes[customer_id]
+            customer = customers.get(customer_id)
+            if customer is not None:
+                log_verification_attempt(customer_id, verify_type, customer[value_field], result)
+            results.append({
+                "customer_id": customer_id,
+                "customer_name": _display_name(customer),
+                "verified": result["verified"],
+                "message": result["message"],
+            })
+
+        summary = {
+            'processed': len(results),
+            'verified_count': sum(1 for result in results if result['verified']),
+            'failed_count': sum(1 for result in results if not result['verified']),
+            'cache_hits': stats['cache_hits'],
+            'bureau_calls': stats['bureau_calls'],
+        }
+        jobs.update(status='completed', results=results, completed_at=timezone.now(), **summary)
+    except Exception as e:
+        logger.error(f"Verification job {job_id} failed: {str(e)}", exc_info=True)
+        jobs.update(status='failed', error=str(e), completed_at=timezone.now())
+        raise
+
+    summary['seconds'] = round(time.monotonic() - started, 3)
+    logger.info(f"Verification job {job_id}: {summary}")
+    return summary
+
+
+def _display_name(customer: Optional[Dict]) -> Optional[str]:
+    if customer is None:
+        return None
+    if customer['customer_type'] == 'individual':
+        return f"{customer['first_name']} {customer['last_name']}".strip()
+    return customer['company_name']
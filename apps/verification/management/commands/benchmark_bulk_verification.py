@@ -0,0 +1,57 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from apps.verification.bureau_stub import start_bureau_stub
+from apps.verification.jobs import verify_targets
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure bulk verification against the local bureau stub: one call at a time versus the '
+        'bounded worker pool, then a repeat run served from the result cache. No database access.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=500)
+        parser.add_argument('--latency-ms', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duplicate-ratio', type=float, default=0.1,
+                            help='Share of customers sharing a phone number with another customer')
+        parser.add_argument('--skip-sequential', action='store_true')
+
+    def handle(self, *args, **options):
+        server, _ = start_bureau_stub(latency=options['latency_ms'] / 1000)
+        try:
+            with override_settings(BUREAU_BASE_URL=server.base_url, BUREAU_MAX_CONCURRENCY=options['concurrency']):
+                self._run(server, options)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def _run(self, server, options):
+        def batch():
+            numbers = [f"9{uuid.uuid4().int % 10 ** 9:09d}" for _ in range(options['customers'])]
+            shared = int(len(numbers) * options['duplicate_ratio'])
+            for n in range(shared):
+                numbers[-(n + 1)] = numbers[n]
+            return [(n, number, '') for n, number in enumerate(numbers)]
+
+        if not options['skip_sequential']:
+            self._measure(server, 'Sequential', batch(), max_workers=1)
+        targets = batch()
+        self._measure(server, f"Pool of {options['concurrency']}", targets, max_workers=options['concurrency'])
+        self._measure(server, 'Repeat (cached)', targets, max_workers=options['concurrency'])
+
+    def _measure(self, server, label, targets, max_workers):
+        before = server.request_count
+        start = time.perf_counter()
+        results, stats = verify_targets('phone', targets, max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+        verified = sum(1 for result in results.values() if result['verified'])
+        self.stdout.write(
+            f"{label}: {len(targets)} customers in {elapsed:.2f}s ({len(targets) / elapsed:.0f}/s); "
+            f"{server.request_count - before} bureau requests, {stats['cache_hits']} cache hits, {verified} verified"
+        )
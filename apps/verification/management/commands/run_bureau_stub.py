@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.verification.bureau_stub import BureauStubServer
+
+
+class Command(BaseCommand):
+    help = 'Serve a local Bureau API stub for verification tests. Set BUREAU_BASE_URL to the printed URL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=int, default=200, help='Delay added to every response')
+
+    def handle(self, *args, **options):
+        server = BureauStubServer((options['host'], options['port']), latency=options['latency_ms'] / 1000)
+        self.stdout.write(f"Bureau stub listening; BUREAU_BASE_URL={server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.17 on 2026-10-18 21:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationJob',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('verify_type', models.CharField(choices=[('email', 'Email'), ('phone', 'Phone'), ('pan', 'PAN')], max_length=10)),
+                ('customer_ids', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('verified_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('cache_hits', models.PositiveIntegerField(default=0)),
+                ('bureau_calls', models.PositiveIntegerField(default=0)),
+                ('results', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='verification_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'verification_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import models
+
+from apps.core.models import TimestampedModel, UUIDModel
+
+
+class VerificationJob(UUIDModel, TimestampedModel):
+    """
+    A bulk verification request, run in the background by run_bulk_verification.
+    Progress counters are updated while it runs; per-customer results are stored on completion.
+    """
+    TYPE_CHOICES = [
+        ('email', 'Email'),
+        ('phone', 'Phone'),
+        ('pan', 'PAN'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    verify_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    customer_ids = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    verified_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    bureau_calls = models.PositiveIntegerField(default=0)
+    results = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='verification_jobs'
+    )
+
+    class Meta:
+        db_table = 'verification_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_verify_type_display()} verification of {self.total} customers ({self.status})"
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .jobs import run_verification_job
+
+
+@shared_task
+def run_bulk_verification(job_id):
+    return run_verification_job(job_id)
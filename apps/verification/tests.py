@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.customers.models import Customer
+from .bureau_stub import start_bureau_stub
+from .jobs import run_verification_job, verify_targets
+from .models import VerificationJob
+from .utils import verify_email, verify_pan, verify_phone
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'verification-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BureauStubVerificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, _ = start_bureau_stub()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        stub = self.settings(BUREAU_BASE_URL=self.server.base_url)
+        stub.enable()
+        self.addCleanup(stub.disable)
+
+    def test_stub_answers_are_deterministic(self):
+        self.assertTrue(verify_phone('9876543210')['verified'])
+        self.assertEqual(verify_phone('9876540000'), {
+            "verified": False, "message": "Phone number status: UNDELIVERED"
+        })
+        self.assertTrue(verify_email('Test User', 'test@example.com')['verified'])
+        self.assertFalse(verify_email('Test User', 'bad@example.com')['verified'])
+        self.assertTrue(verify_pan('ABCDE1234F')['verified'])
+        self.assertFalse(verify_pan('XBCDE1234F')['verified'])
+
+    def test_identical_values_are_sent_once(self):
+        before = self.server.request_count
+        results, stats = verify_targets('phone', [(1, '+91 98765 43210', ''), (2, '9876543210', ''), (3, '9876540000', '')])
+
+        self.assertEqual(stats, {'cache_hits': 0, 'bureau_calls': 2})
+        self.assertEqual(self.server.request_count - before, 2)
+        self.assertTrue(results[1]['verified'])
+        self.assertEqual(results[1], results[2])
+        self.assertFalse(results[3]['verified'])
+
+    def test_repeat_run_is_served_from_cache(self):
+        targets = [(n, f'98765{n:05d}', '') for n in range(1, 11)]
+        verify_targets('phone', targets)
+        before = self.server.request_count
+        results, stats = verify_targets('phone', targets)
+
+        self.assertEqual(stats, {'cache_hits': 10, 'bureau_calls': 0})
+        self.assertEqual(self.server.request_count, before)
+        self.assertEqual(len(results), 10)
+
+    def test_job_updates_customer_flags_and_summary(self):
+        delivered = Customer.objects.create(
+            customer_code='VER001', first_name='Delivered', email='delivered@example.com', phone='9876543210'
+        )
+        undelivered = Customer.objects.create(
+            customer_code='VER002', first_name='Undelivered', email='undelivered@example.com', phone='9876540000'
+        )
+        job = VerificationJob.objects.create(verify_type='phone', customer_ids=[delivered.id, undelivered.id, 0], total=3)
+
+        summary = run_verification_job(job.id)
+
+        job.refresh_from_db()
+        delivered.refresh_from_db()
+        undelivered.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((summary['verified_count'], summary['failed_count'], summary['bureau_calls']), (1, 2, 2))
+        self.assertEqual([result['verified'] for result in job.results], [True, False, False])
+        self.assertEqual(job.results[2]['message'], "Customer not found")
+        self.assertTrue(delivered.phone_verified)
+        self.assertIsNotNone(delivered.phone_verified_at)
+        self.assertFalse(undelivered.phone_verified)
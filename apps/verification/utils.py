@@ -1,6 +1,10 @@
+import hashlib
 import requests
 import logging
+import threading
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
@@ -13,12 +17,59 @@ def bureau_headers():
     }
 
 
-BUREAU_BASE_URL = getattr(settings, 'BUREAU_BASE_URL', 'https://api.sandbox.bureau.id/v2/services')
+_session = None
+_session_lock = threading.Lock()
+
+
+def bureau_session():
+    """One keep-alive session per process, with a connection pool sized for the bulk job's workers."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.BUREAU_MAX_CONCURRENCY)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def bureau_post(path, payload):
+    # Read per call so BUREAU_BASE_URL can point at a local stub.
+    url = f"{settings.BUREAU_BASE_URL}/{path}"
+    return bureau_session().post(url, headers=bureau_headers(), json=payload, timeout=settings.BUREAU_TIMEOUT)
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def normalize_phone(number):
+    clean_number = (number or '').replace('+', '').replace(' ', '').strip()
+    if not clean_number.startswith('91') and len(clean_number) == 10 and clean_number.isdigit():
+        clean_number = '91' + clean_number
+    return clean_number
+
+
+def normalize_pan(pan):
+    return (pan or '').strip().upper()
+
+
+def verification_cache_key(verify_type, value, name=''):
+    """Cache key for a bureau result; values are hashed so no PII lands in the cache keyspace."""
+    if verify_type == 'email':
+        normalized = f"{normalize_email(value)}|{' '.join((name or '').lower().split())}"
+    elif verify_type == 'phone':
+        normalized = normalize_phone(value)
+    else:
+        normalized = normalize_pan(value)
+    digest = hashlib.sha256(normalized.encode()).hexdigest()
+    return f"verification:{verify_type}:{digest}"
 
 
 def verify_email(name, email):
     try:
-        url = f"{BUREAU_BASE_URL}/email-name-attributes"
         payload = {
             "consent": True,
             "consentText": "approve Bureau Id to capture and process user data based on internal user consent collected",
@@ -28,7 +79,7 @@ def verify_email(name, email):
         }
         
         logger.info(f"Verifying email: {email} for name: {name}")
-        response = requests.post(url, headers=bureau_headers(), json=payload, timeout=30)
+        response = bureau_post('email-name-attributes', payload)
         response.raise_for_status()
         
         data = response.json()
@@ -45,20 +96,16 @@ def verify_email(name, email):
             
     except requests.exceptions.RequestException as e:
         logger.error(f"Bureau API request failed for email verification: {str(e)}")
-        return {"verified": False, "message": f"Verification service unavailable: {str(e)}"}
+        return {"verified": False, "message": f"Verification service unavailable: {str(e)}", "retryable": True}
     except Exception as e:
         logger.error(f"Unexpected error during email verification: {str(e)}")
-        return {"verified": False, "message": f"Verification failed: {str(e)}"}
+        return {"verified": False, "message": f"Verification failed: {str(e)}", "retryable": True}
 
 
 def verify_phone(number):
     try:
-        clean_number = number.replace('+', '').strip()
-        
-        if not clean_number.startswith('91') and len(clean_number) == 10 and clean_number.isdigit():
-            clean_number = '91' + clean_number
+        clean_number = normalize_phone(number)
         
-        url = f"{BUREAU_BASE_URL}/number-lookup"
         payload = {
             "consent": True,
             "consentText": "approve Bureau Id to capture and process user data based on internal user consent collected",
@@ -67,7 +114,7 @@ def verify_phone(number):
         }
         
         logger.info(f"Verifying phone number: {number} (normalized to: {clean_number})")
-        response = requests.post(url, headers=bureau_headers(), json=payload, timeout=30)
+        response = bureau_post('number-lookup', payload)
         response.raise_for_status()
         
         data = response.json()
@@ -84,15 +131,14 @@ def verify_phone(number):
             
     except requests.exceptions.RequestException as e:
         logger.error(f"Bureau API request failed for phone verification: {str(e)}")
-        return {"verified": False, "message": f"Verification service unavailable: {str(e)}"}
+        return {"verified": False, "message": f"Verification service unavailable: {str(e)}", "retryable": True}
     except Exception as e:
         logger.error(f"Unexpected error during phone verification: {str(e)}")
-        return {"verified": False, "message": f"Verification failed: {str(e)}"}
+        return {"verified": False, "message": f"Verification failed: {str(e)}", "retryable": True}
 
 
 def verify_pan(pan):
     try:
-        url = f"{BUREAU_BASE_URL}/pan-govt-check"
         payload = {
             "consent": True,
             "consentText": "approve Bureau Id to capture and process user data based on internal user consent collected",
@@ -101,7 +147,7 @@ def verify_pan(pan):
         }
         
         logger.info(f"Verifying PAN: {pan}")
-        response = requests.post(url, headers=bureau_headers(), json=payload, timeout=30)
+        response = bureau_post('pan-govt-check', payload)
         response.raise_for_status()
         
         data = response.json()
@@ -118,10 +164,33 @@ def verify_pan(pan):
             
     except requests.exceptions.RequestException as e:
         logger.error(f"Bureau API request failed for PAN verification: {str(e)}")
-        return {"verified": False, "message": f"Verification service unavailable: {str(e)}"}
+        return {"verified": False, "message": f"Verification service unavailable: {str(e)}", "retryable": True}
     except Exception as e:
         logger.error(f"Unexpected error during PAN verification: {str(e)}")
-        return {"verified": False, "message": f"Verification failed: {str(e)}"}
+        return {"verified": False, "message": f"Verification failed: {str(e)}", "retryable": True}
+
+
+VERIFIERS = {
+    'email': lambda value, name: verify_email(name, value),
+    'phone': lambda value, name: verify_phone(value),
+    'pan': lambda value, name: verify_pan(value),
+}
+
+
+def cached_verify(verify_type, value, name=''):
+    """
+    Verify through the result cache. Definitive answers are cached for
+    BUREAU_RESULT_CACHE_TTL; outages (`retryable`) are not, so the next run asks again.
+    Returns (result, from_cache).
+    """
+    key = verification_cache_key(verify_type, value, name)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+    result = VERIFIERS[verify_type](value, name)
+    if not result.get('retryable'):
+        cache.set(key, result, settings.BUREAU_RESULT_CACHE_TTL)
+    return result, False
 
 
 def log_verification_attempt(customer_id, verification_type, value, result):
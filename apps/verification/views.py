@@ -4,9 +4,11 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from apps.customers.models import Customer
-from apps.verification.utils import verify_email, verify_phone, verify_pan, log_verification_attempt
+from apps.verification.models import VerificationJob
+from apps.verification.tasks import run_bulk_verification
+from apps.verification.utils import cached_verify, verify_pan, log_verification_attempt
 import logging
 
 logger = logging.getLogger(__name__)
@@ -57,7 +59,7 @@ def verify_customer_data(request):
                 }
             else:
                 customer_name = f"{customer.first_name} {customer.last_name}".strip()
-                result = verify_email(customer_name, value)
+                result, _ = cached_verify("email", value, customer_name)
 
         customer.email_verified = result["verified"]
         if result["verified"] and not result.get("already_verified"):
@@ -91,7 +93,7 @@ def verify_customer_data(request):
                     "verified_at": customer.phone_verified_at.isoformat() if customer.phone_verified_at else None
                 }
             else:
-                result = verify_phone(value)
+                result, _ = cached_verify("phone", value)
 
         customer.phone_verified = result["verified"]
         if result["verified"] and not result.get("already_verified"):
@@ -114,7 +116,7 @@ def verify_customer_data(request):
                     "verified_at": customer.pan_verified_at.isoformat() if customer.pan_verified_at else None
                 }
             else:
-                result = verify_pan(value)
+                result, _ = cached_verify("pan", value)
 
         customer.pan_verified = result["verified"]
         if result["verified"] and not result.get("already_verified"):
@@ -202,69 +204,61 @@ def bulk_verify_customers(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    results = []
-    
-    for customer_id in customer_ids:
-        try:
-            customer = Customer.objects.get(id=customer_id)
-            
-            if verify_type == "email":
-                customer_name = f"{customer.first_name} {customer.last_name}".strip()
-                result = verify_email(customer_name, customer.email)
-                
-                customer.email_verified = result["verified"]
-                if result["verified"]:
-                    customer.email_verified_at = timezone.now()
-                else:
-                    customer.email_verified_at = None
-                customer.save(update_fields=['email_verified', 'email_verified_at'])
-                
-            elif verify_type == "phone":
-                result = verify_phone(customer.phone)
-                
-                customer.phone_verified = result["verified"]
-                if result["verified"]:
-                    customer.phone_verified_at = timezone.now()
-                else:
-                    customer.phone_verified_at = None
-                customer.save(update_fields=['phone_verified', 'phone_verified_at'])
-                
-            elif verify_type == "pan" and customer.pan_number:
-                result = verify_pan(customer.pan_number)
-                
-                customer.pan_verified = result["verified"]
-                if result["verified"]:
-                    customer.pan_verified_at = timezone.now()
-                else:
-                    customer.pan_verified_at = None
-                customer.save(update_fields=['pan_verified', 'pan_verified_at'])
-            else:
-                result = {"verified": False, "message": "PAN number not available for verification"}
-
-            results.append({
-                "customer_id": customer.id,
-                "customer_name": customer.full_name,
-                "verified": result["verified"],
-                "message": result["message"]
-            })
-            
-            log_verification_attempt(customer_id, verify_type, 
-                                   getattr(customer, verify_type == "pan" and "pan_number" or verify_type), 
-                                   result)
-            
-        except Customer.DoesNotExist:
-            results.append({
-                "customer_id": customer_id,
-                "customer_name": None,
-                "verified": False,
-                "message": "Customer not found"
-            })
+    try:
+        customer_ids = [int(customer_id) for customer_id in customer_ids]
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "customer_ids must be a list of customer ids"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    job = VerificationJob.objects.create(
+        verify_type=verify_type,
+        customer_ids=customer_ids,
+        total=len(customer_ids),
+        created_by=request.user,
+    )
+    transaction.on_commit(lambda: run_bulk_verification.delay(str(job.id)))
 
     return Response({
+        "job_id": str(job.id),
         "type": verify_type,
-        "total_processed": len(customer_ids),
-        "results": results
-    }, status=status.HTTP_200_OK)
+        "status": job.status,
+        "total": job.total,
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def bulk_verification_status(request, job_id):
+    try:
+        job = VerificationJob.objects.get(id=job_id)
+    except VerificationJob.DoesNotExist:
+        return Response(
+            {"error": "Verification job not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    response_data = {
+        "job_id": str(job.id),
+        "type": job.verify_type,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "verified_count": job.verified_count,
+        "failed_count": job.failed_count,
+        "cache_hits": job.cache_hits,
+        "bureau_calls": job.bureau_calls,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
+    if job.status == 'completed':
+        response_data["results"] = job.results
+    elif job.status == 'failed':
+        response_data["error"] = job.error
+
+    return Response(response_data, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
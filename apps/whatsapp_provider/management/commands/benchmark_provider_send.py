@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from apps.whatsapp_provider.models import WhatsAppProvider
+from apps.whatsapp_provider.services import Dialog360ProviderService
+
+
+class _MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.05
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        time.sleep(self.latency)
+        body = json.dumps({'messages': [{'id': f"wamid.mock.{time.monotonic_ns()}"}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark WhatsApp send throughput (legacy per-request vs pooled vs batched) against a local mock provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200, help='Messages per scenario')
+        parser.add_argument('--latency', type=float, default=0.05, help='Mock provider latency in seconds')
+        parser.add_argument('--in-flight', type=int, default=20, help='Max concurrent requests for the batch scenario')
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        _MockProviderHandler.latency = options['latency']
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _MockProviderHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        provider = WhatsAppProvider(
+            name='benchmark-mock',
+            provider_type='360dialog',
+            access_token='mock-key',
+            phone_number_id='0000000000',
+            api_url=base_url,
+        )
+        service = Dialog360ProviderService(provider)
+        messages = [{'to_phone': f"9{i:09d}", 'text_content': f"Benchmark message {i}"} for i in range(count)]
+
+        try:
+            def legacy():
+                for msg in messages:
+                    response = requests.post(
+                        f"{base_url}/messages",
+                        headers=service.headers,
+                        json={'to': msg['to_phone'], 'type': 'text', 'text': {'body': msg['text_content']}},
+                        timeout=30,
+                    )
+                    response.raise_for_status()
+
+            def pooled():
+                for msg in messages:
+                    service._dispatch_text(msg['to_phone'], msg['text_content'])
+
+            def batched():
+                results = service._dispatch_batch(messages, max_in_flight=options['in_flight'])
+                failed = sum(1 for r in results if not r['success'])
+                if failed:
+                    self.stdout.write(self.style.WARNING(f"  {failed} batched sends failed"))
+
+            for label, scenario in [('legacy requests.post', legacy), ('pooled sequential', pooled), ('pooled batch', batched)]:
+                start = time.perf_counter()
+                scenario()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"{label:<22} {count} msgs in {elapsed:.2f}s  ({count / elapsed:.1f} msg/s)")
+        finally:
+            server.shutdown()
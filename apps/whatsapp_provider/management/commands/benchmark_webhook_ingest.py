@@ -0,0 +1,67 @@
+import json
+import random
+import statistics
+import time
+
+from rest_framework.test import APIRequestFactory
+
+from apps.core.benchmarking import RolledBackCommand
+from apps.whatsapp_provider.models import WhatsAppMessage, WhatsAppProvider
+from apps.whatsapp_provider.tasks import process_whatsapp_webhook_events
+from apps.whatsapp_provider.views import WhatsAppWebhookView
+
+
+class Command(RolledBackCommand):
+    help = 'Measure WhatsApp webhook ack latency (p50/p99) and queued status-update apply rate. All rows are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--webhooks', type=int, default=1000)
+        parser.add_argument('--statuses-per-webhook', type=int, default=10)
+
+    def run(self, options):
+        provider = WhatsAppProvider.objects.create(
+            name='benchmark-webhooks', provider_type='meta', account_id='benchmark', phone_number_id='benchmark'
+        )
+        message_ids = [f"wamid.bench.{i}" for i in range(options['messages'])]
+        WhatsAppMessage.objects.bulk_create([
+            WhatsAppMessage(
+                provider=provider, message_id=mid, direction='outbound', message_type='text',
+                to_phone_number='0000000000', from_phone_number='0000000000', status='sent'
+            )
+            for mid in message_ids
+        ], batch_size=1000)
+
+        factory = APIRequestFactory()
+        view = WhatsAppWebhookView.as_view({'post': 'handle_webhook'})
+        base_ts = int(time.time())
+        latencies = []
+
+        for n in range(options['webhooks']):
+            statuses = [
+                {'id': random.choice(message_ids), 'status': random.choice(['delivered', 'read']), 'timestamp': str(base_ts + n)}
+                for _ in range(options['statuses_per_webhook'])
+            ]
+            payload = {'entry': [{'changes': [{'value': {'statuses': statuses}}]}]}
+            request = factory.post(f"/webhook/{provider.pk}", json.dumps(payload), content_type='application/json')
+
+            start = time.perf_counter()
+            response = view(request, provider_id=str(provider.pk))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                self.stdout.write(self.style.ERROR(f"Webhook returned {response.status_code}"))
+                return
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"Webhook ack latency: p50={statistics.median(latencies) * 1000:.2f}ms "
+            f"p99={p99 * 1000:.2f}ms over {len(latencies)} requests"
+        )
+
+        result = process_whatsapp_webhook_events()
+        rate = result['applied'] / result['seconds'] if result['seconds'] else 0
+        self.stdout.write(
+            f"Worker: {result['events']} events -> {result['applied']} coalesced updates "
+            f"in {result['seconds']}s ({rate:.0f} updates/s)"
+        )
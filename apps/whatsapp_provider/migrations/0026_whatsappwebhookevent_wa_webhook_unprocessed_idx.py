@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_provider', '0025_alter_whatsappprovider_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='whatsappwebhookevent',
+            index=models.Index(condition=models.Q(('processed', False)), fields=['id'], name='wa_webhook_unprocessed_idx'),
+        ),
+    ]
@@ -419,6 +419,9 @@ class WhatsAppWebhookEvent(models.Model):
         ordering = ['-received_at']
         verbose_name = 'WhatsApp Webhook Event'
         verbose_name_plural = 'WhatsApp Webhook Events'
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed=False), name='wa_webhook_unprocessed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.received_at}"
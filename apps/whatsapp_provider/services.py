@@ -1,8 +1,12 @@
+import hashlib
+import hmac
 import logging
 import time
-import requests
+import uuid
+import httpx
 import json
-from typing import List, Dict, Any, Optional, Type
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Type
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
@@ -19,7 +23,9 @@ from .models import (
     WhatsAppAccountHealthLog,
     WhatsAppAccountUsageLog,
 )
-from apps.billing.services import log_communication
+from apps.billing.services import log_communication, log_communications_bulk
+from apps.core.http_clients import get_http_client
+from apps.core.provider_router import ProviderEntry, ProviderRouter, NoProviderAvailable
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +36,13 @@ class BaseWhatsAppService:
     def __init__(self, provider_model: WhatsAppProvider):
         self.provider = provider_model
         self.encryption_key = getattr(settings, 'WHATSAPP_ENCRYPTION_KEY', None)
+        self.request_timeout = getattr(settings, 'PROVIDER_HTTP_TIMEOUTS', {}).get(
+            f"whatsapp.{provider_model.provider_type}", 30
+        )
+
+    @property
+    def http(self) -> httpx.Client:
+        return get_http_client(f"whatsapp.{self.provider.provider_type}", timeout=self.request_timeout)
         
     def _decrypt(self, value: str) -> str:
         
@@ -45,8 +58,94 @@ class BaseWhatsAppService:
        
         return str(phone_number).replace(" ", "").replace("-", "").replace("+", "")
 
+    def _get_primary_phone_number(self) -> Optional[WhatsAppPhoneNumber]:
+        if not hasattr(self, '_primary_phone_number'):
+            self._primary_phone_number = self.provider.get_primary_phone_number()
+        return self._primary_phone_number
+
     def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
         raise NotImplementedError("This method must be implemented by a subclass")
+
+    def _dispatch_text(self, to_phone: str, text_content: str) -> Dict:
+        """Network-only part of a text send; must not touch the database."""
+        raise NotImplementedError("This method must be implemented by a subclass")
+
+    def _response_message_id(self, response: Dict) -> str:
+        return response.get('messages', [{}])[0].get('id')
+
+    def _sender(self) -> Tuple[Optional[WhatsAppPhoneNumber], str]:
+        return None, ''
+
+    def send_batch(self, messages: List[Dict[str, Any]], max_in_flight: int = None) -> List[Dict[str, Any]]:
+        """
+        Send many text messages concurrently over the pooled client.
+
+        Each item needs `to_phone` and `text_content` and may carry `customer_id` and
+        `campaign_id`. At most `max_in_flight` requests are outstanding at once. Rows are
+        written with one bulk insert once every request has completed; the returned list
+        is in input order with `success`, `message_id` and `error` per item.
+        """
+        if not messages:
+            return []
+
+        phone_number, from_phone = self._sender()
+        results = self._dispatch_batch(messages, max_in_flight)
+        self._persist_batch(messages, results, phone_number, from_phone)
+        return results
+
+    def _dispatch_batch(self, messages: List[Dict[str, Any]], max_in_flight: int = None) -> List[Dict[str, Any]]:
+        max_in_flight = max_in_flight or getattr(settings, 'PROVIDER_BATCH_MAX_IN_FLIGHT', 20)
+        results: List[Dict[str, Any]] = [None] * len(messages)
+
+        with ThreadPoolExecutor(max_workers=min(max_in_flight, len(messages))) as pool:
+            futures = {
+                pool.submit(self._dispatch_text, msg['to_phone'], msg['text_content']): index
+                for index, msg in enumerate(messages)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    message_id = self._response_message_id(future.result())
+                    results[index] = {'success': True, 'message_id': message_id, 'error': None}
+                except Exception as e:
+                    results[index] = {'success': False, 'message_id': None, 'error': str(e)}
+        return results
+
+    def _persist_batch(self, messages: List[Dict[str, Any]], results: List[Dict[str, Any]],
+                       phone_number: Optional[WhatsAppPhoneNumber], from_phone: str):
+        now = timezone.now()
+        rows = []
+        log_entries = []
+        for msg, result in zip(messages, results):
+            snippet = msg['text_content'][:50]
+            if result['success']:
+                rows.append(WhatsAppMessage(
+                    provider=self.provider,
+                    phone_number=phone_number,
+                    message_id=result['message_id'] or f"batch_{uuid.uuid4().hex}",
+                    direction='outbound',
+                    message_type='text',
+                    to_phone_number=msg['to_phone'],
+                    from_phone_number=from_phone,
+                    content={'text': msg['text_content']},
+                    status='sent',
+                    sent_at=now,
+                    customer_id=msg.get('customer_id'),
+                    campaign_id=msg.get('campaign_id')
+                ))
+            log_entries.append({
+                'customer_id': msg.get('customer_id'),
+                'status': 'pending' if result['success'] else 'failed',
+                'message_snippet': snippet,
+                'error_message': result['error'],
+                'provider_message_id': result['message_id'],
+            })
+
+        with transaction.atomic():
+            WhatsAppMessage.objects.bulk_create(rows, batch_size=500)
+            if rows:
+                self._update_usage_counters(phone_number, count=len(rows))
+            log_communications_bulk(self.provider.name, 'whatsapp', log_entries)
         
     def send_template_message(self, to_phone: str, template: WhatsAppMessageTemplate, template_params: List[str], **kwargs) -> Dict:
         raise NotImplementedError("This method must be implemented by a subclass")
@@ -57,10 +156,34 @@ class BaseWhatsAppService:
     def handle_webhook(self, request_data: Dict) -> Any:
         raise NotImplementedError("This method must be implemented by a subclass")
 
+    def verify_webhook_signature(self, raw_body: bytes, signature: Optional[str]) -> bool:
+        app_secret = getattr(settings, 'WHATSAPP_APP_SECRET', None)
+        if not app_secret:
+            return True
+        expected = 'sha256=' + hmac.new(app_secret.encode(), raw_body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature or '')
+
+    def enqueue_webhook(self, event_data: Dict[str, Any]) -> WhatsAppWebhookEvent:
+        """
+        Append the raw payload to the webhook queue. Status updates are applied in bulk
+        by tasks.process_whatsapp_webhook_events so the HTTP response is never blocked.
+        """
+        event_type = 'message'
+        for entry in event_data.get('entry', []):
+            for change in entry.get('changes', []):
+                if 'statuses' in change.get('value', {}):
+                    event_type = 'message_status'
+        return WhatsAppWebhookEvent.objects.create(
+            provider_id=self.provider.pk,
+            event_type=event_type,
+            raw_data=event_data,
+            processed=False
+        )
+
     def health_check(self) -> Dict[str, Any]:
         raise NotImplementedError("This method must be implemented by a subclass")
         
-    def _update_usage_counters(self, phone_number: Optional[WhatsAppPhoneNumber] = None):
+    def _update_usage_counters(self, phone_number: Optional[WhatsAppPhoneNumber] = None, count: int = 1):
         
         now = timezone.now()
         today = now.date()
@@ -76,8 +199,8 @@ class BaseWhatsAppService:
                 provider_to_update.messages_sent_this_month = 0
                 provider_to_update.last_reset_monthly = today
 
-            provider_to_update.messages_sent_today = F('messages_sent_today') + 1
-            provider_to_update.messages_sent_this_month = F('messages_sent_this_month') + 1
+            provider_to_update.messages_sent_today = F('messages_sent_today') + count
+            provider_to_update.messages_sent_this_month = F('messages_sent_this_month') + count
             provider_to_update.save(update_fields=[
                 'messages_sent_today', 'messages_sent_this_month',
                 'last_reset_daily', 'last_reset_monthly'
@@ -85,8 +208,8 @@ class BaseWhatsAppService:
 
             if phone_number:
                 phone_to_update = WhatsAppPhoneNumber.objects.select_for_update().get(pk=phone_number.pk)
-                phone_to_update.messages_sent_today = F('messages_sent_today') + 1
-                phone_to_update.messages_sent_this_month = F('messages_sent_this_month') + 1
+                phone_to_update.messages_sent_today = F('messages_sent_today') + count
+                phone_to_update.messages_sent_this_month = F('messages_sent_this_month') + count
                 phone_to_update.last_message_sent = now
                 phone_to_update.save(update_fields=[
                     'messages_sent_today', 'messages_sent_this_month', 'last_message_sent'
@@ -96,7 +219,7 @@ class BaseWhatsAppService:
             provider=self.provider,
             date=today,
         )
-        usage_log.messages_sent = F('messages_sent') + 1
+        usage_log.messages_sent = F('messages_sent') + count
         usage_log.save(update_fields=['messages_sent'])
 
 class MetaProviderService(BaseWhatsAppService):
@@ -104,7 +227,7 @@ class MetaProviderService(BaseWhatsAppService):
     def __init__(self, provider_model: WhatsAppProvider):
         super().__init__(provider_model)
         self.api_version = provider_model.api_version or "v18.0"
-        self.api_base_url = f"https://graph.facebook.com/{self.api_version}"
+        self.api_base_url = provider_model.api_url or f"https://graph.facebook.com/{self.api_version}"
         
         self.access_token = self._decrypt(provider_model.access_token)
         self.phone_number_id = provider_model.phone_number_id
@@ -124,24 +247,29 @@ class MetaProviderService(BaseWhatsAppService):
             'Content-Type': 'application/json'
         }
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, json=data, timeout=30)
-            else:
-                raise WhatsAppAPIError(f"Unsupported HTTP method: {method}")
-                
-            response.raise_for_status()
+            with whatsapp_provider_router.track(self.provider.pk):
+                if method.upper() == 'GET':
+                    response = self.http.get(url, headers=headers)
+                elif method.upper() == 'POST':
+                    response = self.http.post(url, headers=headers, json=data)
+                else:
+                    raise WhatsAppAPIError(f"Unsupported HTTP method: {method}")
+                    
+                response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
-            error_msg = e.response.text if e.response else str(e)
+        except httpx.HTTPError as e:
+            error_msg = e.response.text if isinstance(e, httpx.HTTPStatusError) else str(e)
             logger.error(f"Meta API request failed: {error_msg}")
             raise WhatsAppAPIError(f"API request failed: {error_msg}")
 
-    def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
+    def _sender(self) -> Tuple[Optional[WhatsAppPhoneNumber], str]:
+        phone_number = self._get_primary_phone_number()
+        return phone_number, phone_number.phone_number if phone_number else ''
+
+    def _dispatch_text(self, to_phone: str, text_content: str) -> Dict:
         if not self.phone_number_id:
             raise WhatsAppAPIError("Meta provider is missing Phone Number ID.")
-            
+
         url = f"{self.api_base_url}/{self.phone_number_id}/messages"
         data = {
             'messaging_product': 'whatsapp',
@@ -149,11 +277,16 @@ class MetaProviderService(BaseWhatsAppService):
             'type': 'text',
             'text': {'body': text_content}
         }
+        return self._make_api_request(url, 'POST', data)
+
+    def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
+        if not self.phone_number_id:
+            raise WhatsAppAPIError("Meta provider is missing Phone Number ID.")
         
         try:
-            response = self._make_api_request(url, 'POST', data)
+            response = self._dispatch_text(to_phone, text_content)
             
-            phone_number = self.provider.get_primary_phone_number()
+            phone_number, from_phone = self._sender()
             msg = WhatsAppMessage.objects.create(
                 provider=self.provider,
                 phone_number=phone_number,
@@ -161,7 +294,7 @@ class MetaProviderService(BaseWhatsAppService):
                 direction='outbound',
                 message_type='text',
                 to_phone_number=to_phone,
-                from_phone_number=phone_number.phone_number if phone_number else '',
+                from_phone_number=from_phone,
                 content={'text': text_content},
                 status='sent',
                 sent_at=timezone.now(),
@@ -217,7 +350,7 @@ class MetaProviderService(BaseWhatsAppService):
         try:
             response = self._make_api_request(url, 'POST', data)
             
-            phone_number = self.provider.get_primary_phone_number()
+            phone_number = self._get_primary_phone_number()
             msg = WhatsAppMessage.objects.create(
                 provider=self.provider,
                 phone_number=phone_number,
@@ -292,51 +425,8 @@ class MetaProviderService(BaseWhatsAppService):
             return {'status': 'unhealthy', 'error': str(e)}
 
     def handle_webhook(self, event_data: Dict[str, Any]) -> Any:
-        WhatsAppWebhookEvent.objects.create(
-            provider=self.provider,
-            event_type='webhook',
-            raw_data=event_data,
-            processed=False
-        )
-
-        try:
-            entry = event_data.get('entry', [])
-            if not entry: return {'status': 'ignored'}
-            
-            changes = entry[0].get('changes', [])
-            if not changes: return {'status': 'ignored'}
-            
-            value = changes[0].get('value', {})
-            
-            if 'statuses' in value:
-                from apps.billing.models import CommunicationLog 
-                
-                for status_item in value['statuses']:
-                    wamid = status_item.get('id')
-                    new_status = status_item.get('status') 
-                    
-                    try:
-                        msg = WhatsAppMessage.objects.get(message_id=wamid)
-                        msg.status = new_status
-                        if new_status == 'delivered': msg.delivered_at = timezone.now()
-                        elif new_status == 'read': msg.read_at = timezone.now()
-                        elif new_status == 'failed':
-                            errors = status_item.get('errors', [])
-                            if errors:
-                                msg.error_message = errors[0].get('title')
-                        msg.save()
-                        
-                        billing_status = 'delivered' if new_status in ['delivered', 'read'] else 'failed' if new_status == 'failed' else None
-                        
-                        if billing_status:
-                            CommunicationLog.objects.filter(provider_message_id=wamid).update(status=billing_status)
-                            
-                    except WhatsAppMessage.DoesNotExist:
-                        pass
-            return {'status': 'success'}
-        except Exception as e:
-            logger.error(f"Error processing Meta webhook: {e}")
-            raise WhatsAppAPIError(str(e))
+        event = self.enqueue_webhook(event_data)
+        return {'status': 'queued', 'event_id': event.pk}
 
 class TwilioProviderService(BaseWhatsAppService):
 
@@ -388,6 +478,12 @@ class TwilioProviderService(BaseWhatsAppService):
             )
             raise WhatsAppAPIError(str(e))
 
+    def _sender(self) -> Tuple[Optional[WhatsAppPhoneNumber], str]:
+        return None, self.from_number
+
+    def _dispatch_text(self, to_phone: str, text_content: str) -> Dict:
+        return {'messages': [{'id': f"tw_{uuid.uuid4().hex}"}]}
+
     def send_template_message(self, to_phone: str, template: WhatsAppMessageTemplate, template_params: List[str], **kwargs) -> Dict:
         raise NotImplementedError("Twilio template sending not implemented yet.")
 
@@ -410,17 +506,24 @@ class GupshupProviderService(BaseWhatsAppService):
 
     def _make_api_request(self, payload: Dict) -> Dict[str, Any]:
         try:
-            response = requests.post(self.api_url, headers=self.headers, data=payload, timeout=30)
-            response.raise_for_status()
-            resp_json = response.json()
-            if resp_json.get('status') == 'error':
-                raise WhatsAppAPIError(resp_json.get('message', 'Gupshup API error'))
+            with whatsapp_provider_router.track(self.provider.pk):
+                response = self.http.post(self.api_url, headers=self.headers, data=payload)
+                response.raise_for_status()
+                resp_json = response.json()
+                if resp_json.get('status') == 'error':
+                    raise WhatsAppAPIError(resp_json.get('message', 'Gupshup API error'))
             return resp_json
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Gupshup API request failed: {e}")
             raise WhatsAppAPIError(f"API request failed: {str(e)}")
 
-    def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
+    def _sender(self) -> Tuple[Optional[WhatsAppPhoneNumber], str]:
+        return None, self.source_number
+
+    def _response_message_id(self, response: Dict) -> str:
+        return response.get('messageId')
+
+    def _dispatch_text(self, to_phone: str, text_content: str) -> Dict:
         payload = {
             'channel': 'whatsapp',
             'source': self.source_number,
@@ -428,9 +531,11 @@ class GupshupProviderService(BaseWhatsAppService):
             'message': json.dumps({'type': 'text', 'text': text_content}),
             'src.name': self.app_name
         }
-        
-        response = self._make_api_request(payload)
-        message_sid = response.get('messageId')
+        return self._make_api_request(payload)
+
+    def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
+        response = self._dispatch_text(to_phone, text_content)
+        message_sid = self._response_message_id(response)
         
         msg = WhatsAppMessage.objects.create(
             provider=self.provider,
@@ -460,7 +565,7 @@ class GupshupProviderService(BaseWhatsAppService):
     def health_check(self) -> Dict[str, Any]:
         health_check_url = "https://api.gupshup.io/wa/api/v1/account/wallet/balance"
         try:
-            response = requests.get(health_check_url, headers={'apikey': self.api_key}, timeout=10)
+            response = self.http.get(health_check_url, headers={'apikey': self.api_key}, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -493,22 +598,28 @@ class Dialog360ProviderService(BaseWhatsAppService):
     def _make_api_request(self, endpoint: str, payload: Dict) -> Dict[str, Any]:
         full_url = f"{self.api_url}/{endpoint}"
         try:
-            response = requests.post(full_url, headers=self.headers, json=payload, timeout=30)
-            response.raise_for_status()
+            with whatsapp_provider_router.track(self.provider.pk):
+                response = self.http.post(full_url, headers=self.headers, json=payload)
+                response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"360Dialog API request failed: {e}")
             raise WhatsAppAPIError(str(e))
 
-    def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
+    def _sender(self) -> Tuple[Optional[WhatsAppPhoneNumber], str]:
+        return None, self.channel_id
+
+    def _dispatch_text(self, to_phone: str, text_content: str) -> Dict:
         payload = {
             "to": self._format_phone(to_phone),
             "type": "text",
             "text": {"body": text_content}
         }
-        
-        response = self._make_api_request("messages", payload)
-        message_sid = response.get('messages', [{}])[0].get('id')
+        return self._make_api_request("messages", payload)
+
+    def send_text_message(self, to_phone: str, text_content: str, **kwargs) -> Dict:
+        response = self._dispatch_text(to_phone, text_content)
+        message_sid = self._response_message_id(response)
         
         msg = WhatsAppMessage.objects.create(
             provider=self.provider,
@@ -538,7 +649,7 @@ class Dialog360ProviderService(BaseWhatsAppService):
     def health_check(self) -> Dict[str, Any]:
         health_check_url = f"{self.api_url}/health"
         try:
-            response = requests.get(health_check_url, headers=self.headers, timeout=10)
+            response = self.http.get(health_check_url, headers=self.headers, timeout=10)
             response.raise_for_status()
             data = response.json()
             
@@ -568,33 +679,19 @@ class WhatsAppService:
 
     def get_service_instance(self, provider_id: int = None) -> BaseWhatsAppService:
         try:
-            if provider_id:
-                provider_model = WhatsAppProvider.objects.get(id=provider_id, is_active=True)
-            else:
-                provider_model = WhatsAppProvider.objects.get(is_default=True, is_active=True)
-        
-        except WhatsAppProvider.DoesNotExist:
+            return whatsapp_provider_router.get_service(provider_id)
+        except NoProviderAvailable:
             raise WhatsAppAPIError("No active or default WhatsApp provider found.")
-        
-        ProviderClass = self._get_provider_class(provider_model.provider_type)
-        if not ProviderClass:
-            raise WhatsAppAPIError(f"Provider type {provider_model.provider_type} is not supported.")
-        
-        return ProviderClass(provider_model)
 
     def get_service_instance_for_webhook(self, webhook_token: str = None, provider_id: int = None) -> BaseWhatsAppService:
+        if not provider_id and not webhook_token:
+            raise WhatsAppAPIError("Provider ID or Webhook Token is required.")
         try:
             if provider_id:
-                provider_model = WhatsAppProvider.objects.get(id=provider_id, is_active=True)
-            elif webhook_token:
-                provider_model = WhatsAppProvider.objects.get(webhook_verify_token=webhook_token, is_active=True)
-            else:
-                raise WhatsAppAPIError("Provider ID or Webhook Token is required.")
-        except WhatsAppProvider.DoesNotExist:
+                return whatsapp_provider_router.get_service(provider_id)
+            return whatsapp_provider_router.get_service(webhook_verify_token=webhook_token)
+        except NoProviderAvailable:
             raise WhatsAppAPIError("Provider not found or not active.")
-        
-        ProviderClass = self._get_provider_class(provider_model.provider_type)
-        return ProviderClass(provider_model)
     
     def get_analytics(self, provider: WhatsAppProvider, start_date=None, end_date=None) -> Dict[str, Any]:
         if not start_date:
@@ -622,4 +719,34 @@ class WhatsAppService:
                 'delivered': delivered_messages,
                 'read': read_messages
             }
-        }
\ No newline at end of file
+        }
+
+def _load_whatsapp_provider_entries() -> List[ProviderEntry]:
+    entries = []
+    today = timezone.now().date()
+    for provider in WhatsAppProvider.objects.filter(is_active=True, is_deleted=False):
+        if provider.provider_type not in WhatsAppService.PROVIDER_MAP:
+            continue
+        same_month = (provider.last_reset_monthly.year, provider.last_reset_monthly.month) == (today.year, today.month)
+        entries.append(ProviderEntry(
+            provider=provider,
+            priority=(not provider.is_default, provider.health_status == 'unhealthy', provider.name),
+            daily_limit=provider.daily_limit,
+            sent_today=provider.messages_sent_today if provider.last_reset_daily == today else 0,
+            monthly_limit=provider.monthly_limit,
+            sent_this_month=provider.messages_sent_this_month if same_month else 0,
+            lookup_keys={'webhook_verify_token': provider.webhook_verify_token},
+        ))
+    return entries
+
+
+whatsapp_provider_router = ProviderRouter(
+    name='whatsapp',
+    loader=_load_whatsapp_provider_entries,
+    service_factory=lambda provider: WhatsAppService.PROVIDER_MAP[provider.provider_type](provider),
+    watch_models=[WhatsAppProvider, WhatsAppPhoneNumber],
+    counter_fields=[
+        'messages_sent_today', 'messages_sent_this_month', 'last_reset_daily',
+        'last_reset_monthly', 'last_message_sent',
+    ],
+)
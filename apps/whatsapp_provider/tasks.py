@@ -0,0 +1,102 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, Iterable
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.billing.models import CommunicationLog
+from apps.core.receipts import claim_unprocessed_events, coalesce_status_updates, is_status_progression
+from .models import WhatsAppMessage, WhatsAppWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+STATUS_RANK = {'queued': 0, 'sent': 1, 'delivered': 2, 'read': 3, 'failed': 4}
+
+
+def _extract_status_updates(events: Iterable[WhatsAppWebhookEvent]):
+    for event in events:
+        for entry in event.raw_data.get('entry', []):
+            for change in entry.get('changes', []):
+                for item in change.get('value', {}).get('statuses', []):
+                    yield {
+                        'message_id': item.get('id'),
+                        'status': item.get('status'),
+                        'timestamp': int(item.get('timestamp') or 0),
+                        'errors': item.get('errors', []),
+                    }
+
+
+def apply_status_updates(latest: Dict[str, Dict[str, Any]]) -> int:
+    """Apply coalesced receipts with one bulk_update plus one UPDATE per billing status."""
+    if not latest:
+        return 0
+
+    now = timezone.now()
+    changed = []
+    messages = WhatsAppMessage.objects.filter(message_id__in=latest.keys()).only(
+        'id', 'message_id', 'status', 'delivered_at', 'read_at', 'error_message'
+    )
+    for msg in messages:
+        update = latest[msg.message_id]
+        if not is_status_progression(msg.status, update['status'], STATUS_RANK):
+            continue
+
+        event_time = datetime.fromtimestamp(update['timestamp'], tz=dt_timezone.utc) if update['timestamp'] else now
+        msg.status = update['status']
+        if update['status'] == 'delivered':
+            msg.delivered_at = event_time
+        elif update['status'] == 'read':
+            msg.read_at = event_time
+            msg.delivered_at = msg.delivered_at or event_time
+        elif update['status'] == 'failed' and update['errors']:
+            msg.error_message = update['errors'][0].get('title')
+        changed.append(msg)
+
+    WhatsAppMessage.objects.bulk_update(
+        changed, ['status', 'delivered_at', 'read_at', 'error_message'], batch_size=500
+    )
+
+    by_billing_status = defaultdict(list)
+    for msg in changed:
+        if msg.status in ['delivered', 'read']:
+            by_billing_status['delivered'].append(msg.message_id)
+        elif msg.status == 'failed':
+            by_billing_status['failed'].append(msg.message_id)
+    for billing_status, message_ids in by_billing_status.items():
+        CommunicationLog.objects.filter(provider_message_id__in=message_ids).update(status=billing_status)
+
+    return len(changed)
+
+
+@shared_task
+def process_whatsapp_webhook_events(batch_size=None, max_batches=50):
+    batch_size = batch_size or getattr(settings, 'WEBHOOK_EVENT_BATCH_SIZE', 1000)
+    total_events = total_applied = 0
+    started = time.monotonic()
+
+    for _ in range(max_batches):
+        with transaction.atomic():
+            events = claim_unprocessed_events(WhatsAppWebhookEvent, batch_size)
+            if not events:
+                break
+
+            latest = coalesce_status_updates(_extract_status_updates(events), STATUS_RANK)
+            total_applied += apply_status_updates(latest)
+            total_events += len(events)
+
+            WhatsAppWebhookEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+                processed=True, processed_at=timezone.now()
+            )
+
+    elapsed = time.monotonic() - started
+    if total_events:
+        logger.info(
+            f"WhatsApp webhooks: {total_events} events -> {total_applied} status updates "
+            f"in {elapsed:.2f}s ({total_applied / elapsed if elapsed else 0:.0f} updates/s)"
+        )
+    return {'events': total_events, 'applied': total_applied, 'seconds': round(elapsed, 3)}
@@ -323,7 +323,12 @@ class WhatsAppWebhookView(viewsets.ViewSet):
         try:
             service_factory = WhatsAppService()
             provider_service = service_factory.get_service_instance_for_webhook(provider_id=provider_id)
-            
+
+            signature = request.META.get('HTTP_X_HUB_SIGNATURE_256')
+            if not provider_service.verify_webhook_signature(request.body, signature):
+                logger.warning(f"Webhook signature mismatch for provider ID: {provider_id}")
+                return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+
             provider_service.handle_webhook(request.data)
             
             return Response({'status': 'success'}, status=status.HTTP_200_OK)
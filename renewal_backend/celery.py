@@ -29,6 +29,47 @@ app.conf.beat_schedule = {
         'task': 'apps.email_inbox.tasks.process_scheduled_campaigns',
         'schedule': 60.0, 
     },
+    'process-whatsapp-webhook-events': {
+        'task': 'apps.whatsapp_provider.tasks.process_whatsapp_webhook_events',
+        'schedule': 5.0,
+    },
+    'process-sms-webhook-events': {
+        'task': 'apps.sms_provider.tasks.process_sms_webhook_events',
+        'schedule': 5.0,
+    },
+    'process-email-provider-events': {
+        'task': 'apps.email_integration.tasks.process_email_provider_events',
+        'schedule': 5.0,
+    },
+    'resume-waiting-automations': {
+        'task': 'apps.email_integration.tasks.resume_waiting_automations',
+        'schedule': 15.0,
+    },
+    'dispatch-due-sequence-steps': {
+        'task': 'apps.campaign_manager.tasks.dispatch_due_sequence_steps',
+        'schedule': 15.0,
+    },
+    'refresh-portfolio-snapshot': {
+        'task': 'apps.ai_insights.tasks.refresh_portfolio_snapshot_task',
+        'schedule': 300.0,
+    },
+    'update-customer-metrics-incremental': {
+        'task': 'apps.core.tasks.update_customer_metrics',
+        'schedule': 900.0,
+        'kwargs': {'incremental': True},
+    },
+    'update-customer-metrics-nightly': {
+        'task': 'apps.core.tasks.update_customer_metrics',
+        'schedule': crontab(hour=1, minute=30),
+    },
+    'refresh-customer-insights': {
+        'task': 'apps.customer_insights.tasks.refresh_customer_insights',
+        'schedule': 600.0,
+    },
+    'score-policy-portfolio': {
+        'task': 'apps.policies.tasks.score_policy_portfolio_task',
+        'schedule': crontab(hour=2, minute=30),
+    },
 }
 
 @app.task(bind=True)
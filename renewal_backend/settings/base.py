@@ -177,11 +177,27 @@ CACHES = {
     }
 }
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-    },
-}
+# Redis is required for websocket events raised in Celery workers or other server
+# processes to reach connected sockets. Without CHANNEL_REDIS_URL the in-memory layer
+# stands in, which only delivers within one process (tests, single runserver).
+CHANNEL_REDIS_URL = config('CHANNEL_REDIS_URL', default='')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [CHANNEL_REDIS_URL],
+                'capacity': config('CHANNEL_LAYER_CAPACITY', default=1500, cast=int),
+                'expiry': 10,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -335,17 +351,45 @@ TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')
 WHATSAPP_ACCESS_TOKEN = config('WHATSAPP_ACCESS_TOKEN', default='')
 WHATSAPP_PHONE_NUMBER_ID = config('WHATSAPP_PHONE_NUMBER_ID', default='')
 WHATSAPP_BUSINESS_ACCOUNT_ID = config('WHATSAPP_BUSINESS_ACCOUNT_ID', default='')
+WHATSAPP_APP_SECRET = config('WHATSAPP_APP_SECRET', default='')
+SMS_WEBHOOK_VERIFY_SIGNATURE = config('SMS_WEBHOOK_VERIFY_SIGNATURE', default=False, cast=bool)
+WEBHOOK_EVENT_BATCH_SIZE = config('WEBHOOK_EVENT_BATCH_SIZE', default=1000, cast=int)
 
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 OPENAI_MODEL = config('OPENAI_MODEL', default='gpt-4')
 OPENAI_MAX_TOKENS = config('OPENAI_MAX_TOKENS', default=150, cast=int)
 OPENAI_TEMPERATURE = config('OPENAI_TEMPERATURE', default=0.3, cast=float)
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')
+OPENAI_TIMEOUT = config('OPENAI_TIMEOUT', default=30.0, cast=float)
+OPENAI_MAX_RETRIES = config('OPENAI_MAX_RETRIES', default=3, cast=int)
+OPENAI_RETRY_BACKOFF = config('OPENAI_RETRY_BACKOFF', default=0.5, cast=float)
+OPENAI_MAX_CONCURRENCY = config('OPENAI_MAX_CONCURRENCY', default=8, cast=int)
+OPENAI_QUEUE_TIMEOUT = config('OPENAI_QUEUE_TIMEOUT', default=10.0, cast=float)
+PORTFOLIO_SNAPSHOT_TTL = config('PORTFOLIO_SNAPSHOT_TTL', default=900, cast=int)
+AI_PROMPT_MAX_TOKENS = config('AI_PROMPT_MAX_TOKENS', default=6000, cast=int)
+AI_PROMPT_HISTORY_TOKENS = config('AI_PROMPT_HISTORY_TOKENS', default=1500, cast=int)
+AI_PROMPT_RECENT_TURNS = config('AI_PROMPT_RECENT_TURNS', default=4, cast=int)
+AI_RESPONSE_CACHE_TTL = config('AI_RESPONSE_CACHE_TTL', default=900, cast=int)
+CUSTOMER_INSIGHTS_BATCH_SIZE = config('CUSTOMER_INSIGHTS_BATCH_SIZE', default=500, cast=int)
+CUSTOMER_INSIGHTS_TTL_HOURS = config('CUSTOMER_INSIGHTS_TTL_HOURS', default=24, cast=int)
+POLICY_SCORING_CHUNK_SIZE = config('POLICY_SCORING_CHUNK_SIZE', default=5000, cast=int)
+INBOX_BROADCAST_DEBOUNCE_MS = config('INBOX_BROADCAST_DEBOUNCE_MS', default=250, cast=int)
+INBOX_BROADCAST_MAX_BATCH = config('INBOX_BROADCAST_MAX_BATCH', default=100, cast=int)
+PRESENCE_REDIS_URL = config('PRESENCE_REDIS_URL', default=CHANNEL_REDIS_URL)
+PRESENCE_TTL_SECONDS = config('PRESENCE_TTL_SECONDS', default=60, cast=int)
+PRESENCE_BROADCASTS_PER_SECOND = config('PRESENCE_BROADCASTS_PER_SECOND', default=2, cast=float)
+SURVEY_QUESTION_MAP_TTL = config('SURVEY_QUESTION_MAP_TTL', default=300, cast=int)
+SURVEY_EXPORT_SYNC_LIMIT = config('SURVEY_EXPORT_SYNC_LIMIT', default=20000, cast=int)
+CUSTOMER_360_CACHE_TTL = config('CUSTOMER_360_CACHE_TTL', default=300, cast=int)
 
 RAZORPAY_KEY_ID = config('RAZORPAY_KEY_ID', default='')
 RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='')
 
 BUREAU_API_KEY = config('BUREAU_API_KEY', default='your_bureau_api_key_here')
 BUREAU_BASE_URL = config('BUREAU_BASE_URL', default='https://api.sandbox.bureau.id/v2/services')
+BUREAU_TIMEOUT = config('BUREAU_TIMEOUT', default=30, cast=int)
+BUREAU_MAX_CONCURRENCY = config('BUREAU_MAX_CONCURRENCY', default=16, cast=int)
+BUREAU_RESULT_CACHE_TTL = config('BUREAU_RESULT_CACHE_TTL', default=7 * 24 * 3600, cast=int)
 
 import platform
 if platform.system() == 'Windows':
@@ -361,9 +405,35 @@ ENABLE_AI_ASSISTANT = config('ENABLE_AI_ASSISTANT', default=True, cast=bool)
 ENABLE_ANALYTICS = config('ENABLE_ANALYTICS', default=True, cast=bool)
 ENABLE_REAL_TIME_NOTIFICATIONS = config('ENABLE_REAL_TIME_NOTIFICATIONS', default=True, cast=bool)
 
+PROVIDER_ROUTER_CACHE_TTL = config('PROVIDER_ROUTER_CACHE_TTL', default=60, cast=int)
+PROVIDER_ROUTER_BREAKER = {
+    'window_size': config('PROVIDER_BREAKER_WINDOW', default=50, cast=int),
+    'min_calls': config('PROVIDER_BREAKER_MIN_CALLS', default=10, cast=int),
+    'error_rate_threshold': config('PROVIDER_BREAKER_ERROR_RATE', default=0.5, cast=float),
+    'cooldown_seconds': config('PROVIDER_BREAKER_COOLDOWN', default=30, cast=int),
+}
+
+HTTP_CLIENT_MAX_CONNECTIONS = config('HTTP_CLIENT_MAX_CONNECTIONS', default=100, cast=int)
+HTTP_CLIENT_MAX_KEEPALIVE = config('HTTP_CLIENT_MAX_KEEPALIVE', default=20, cast=int)
+PROVIDER_BATCH_MAX_IN_FLIGHT = config('PROVIDER_BATCH_MAX_IN_FLIGHT', default=20, cast=int)
+PROVIDER_HTTP_TIMEOUTS = {
+    'whatsapp.meta': 30,
+    'whatsapp.gupshup': 30,
+    'whatsapp.360dialog': 30,
+    'sms.msg91': 10,
+    'sms.textlocal': 10,
+}
+
 DEFAULT_CAMPAIGN_BATCH_SIZE = config('DEFAULT_CAMPAIGN_BATCH_SIZE', default=100, cast=int)
 CAMPAIGN_PROCESSING_DELAY = config('CAMPAIGN_PROCESSING_DELAY', default=5, cast=int)
 MAX_CAMPAIGN_RECIPIENTS = config('MAX_CAMPAIGN_RECIPIENTS', default=10000, cast=int)
+SEQUENCE_DISPATCH_BATCH_SIZE = config('SEQUENCE_DISPATCH_BATCH_SIZE', default=200, cast=int)
+SEQUENCE_DISPATCH_LEASE_SECONDS = config('SEQUENCE_DISPATCH_LEASE_SECONDS', default=600, cast=int)
+SCHEDULED_EMAIL_BATCH_SIZE = config('SCHEDULED_EMAIL_BATCH_SIZE', default=50, cast=int)
+SCHEDULED_EMAIL_MAX_BATCHES = config('SCHEDULED_EMAIL_MAX_BATCHES', default=20, cast=int)
+SCHEDULED_EMAIL_LEASE_SECONDS = config('SCHEDULED_EMAIL_LEASE_SECONDS', default=300, cast=int)
+AUTOMATION_RESUME_BATCH_SIZE = config('AUTOMATION_RESUME_BATCH_SIZE', default=200, cast=int)
+AUTOMATION_RUN_LEASE_SECONDS = config('AUTOMATION_RUN_LEASE_SECONDS', default=600, cast=int)
 
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Intelipro Insurance Policy Renewal API',
@@ -451,4 +521,8 @@ LOCALE_PATHS = (
 SITE_URL = config('BASE_URL', default='http://127.0.0.1:8000')
 
 POPPLER_PATH = r"C:\Program Files\Release-25.12.0-0\poppler-25.12.0\Library\bin"
+OCR_DPI = config('OCR_DPI', default=300, cast=int)
+OCR_MAX_WORKERS = config('OCR_MAX_WORKERS', default=0, cast=int)
+OCR_PAGE_WINDOW = config('OCR_PAGE_WINDOW', default=8, cast=int)
+OCR_TEXT_LAYER_MIN_CHARS = config('OCR_TEXT_LAYER_MIN_CHARS', default=20, cast=int)
 EMAIL_CREDENTIAL_KEY = config('EMAIL_CREDENTIAL_KEY', default="ifyBPaHoeRLXfUPzS9G1TeLBXkZqpJMGi29ZM7v4dE4=")
\ No newline at end of file